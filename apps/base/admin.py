@@ -1,3 +1,22 @@
 from django.contrib import admin
+from django.utils import timezone
 
-# Register your models here.
+from apps.base.models import Tarea
+
+
+@admin.register(Tarea)
+class TareaAdmin(admin.ModelAdmin):
+    list_display = ("id", "nombre", "estado", "intentos", "max_intentos", "ejecutar_en", "terminada_en", "clave")
+    list_filter = ("estado", "nombre")
+    search_fields = ("clave", "nombre")
+    readonly_fields = [f.name for f in Tarea._meta.fields]
+    actions = ["reintentar"]
+    list_per_page = 50
+    show_full_result_count = False
+
+    @admin.action(description="Reintentar tareas fallidas")
+    def reintentar(self, request, queryset):
+        total = queryset.filter(estado=Tarea.ESTADO_FALLIDA).update(
+            estado=Tarea.ESTADO_PENDIENTE, intentos=0, ejecutar_en=timezone.now(), terminada_en=None
+        )
+        self.message_user(request, f"{total} tarea(s) reprogramada(s).")
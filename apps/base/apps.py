@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class BaseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.base'
+
+    def ready(self):
+        import apps.base.signals.permisos  # Invalidación de la caché de permisos
+        import apps.base.signals.busqueda  # f_unaccent en SQLite
+        import apps.base.signals.versiones  # ETag / Last-Modified de las vistas condicionales
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('tareas')  # Registro de tareas en segundo plano (apps/base/tareas.py)
@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from apps.base.auth.permisosCache import tiene_permiso
 
 class SmartModelPermission(permissions.BasePermission):
     """
@@ -17,7 +18,7 @@ class SmartModelPermission(permissions.BasePermission):
         # Verificar permisos custom primero
         if hasattr(view, 'action') and view.action in self.custom_permissions:
             required_perm = self.custom_permissions[view.action]
-            return request.user.has_perm(required_perm)
+            return tiene_permiso(request.user, required_perm)
 
         # Mapeo estándar
         standard_permissions = {
@@ -31,7 +32,7 @@ class SmartModelPermission(permissions.BasePermission):
         }
 
         required_permission = standard_permissions.get(request.method)
-        return required_permission and request.user.has_perm(required_permission)
+        return bool(required_permission) and tiene_permiso(request.user, required_permission)
 
 def model_permission(model_name, **kwargs):
     """Devuelve una clase de permiso personalizada lista para usar en DRF"""
@@ -0,0 +1,148 @@
+"""
+Autenticación JWT ligera.
+
+La autenticación por defecto de simplejwt lee el Usuario de la BD en cada petición.
+Aquí el usuario se arma en memoria a partir de una copia de sus campos guardada en la
+caché compartida, marcada con la versión de permisos (apps/base/auth/permisosCache.py).
+Solo se consulta la BD cuando la copia no está en caché, cuando la versión de permisos
+cambió o cuando el usuario se guardó (ver apps/base/signals/permisos.py).
+
+Revocación sin tabla de blacklist:
+- Por token: el jti se marca en la caché compartida hasta que el token expira
+  (cerrar sesión y rotación del refresh token, ver apps/base/token_jwt.py).
+- Por usuario: una marca de tiempo; los tokens emitidos antes de ella dejan de ser válidos
+  (desactivar al usuario, cambiar su contraseña o cerrar todas sus sesiones). El iat de
+  simplejwt es en segundos enteros: un token emitido en el mismo segundo que el corte sigue
+  siendo válido (el inicio de sesión que sigue a un cambio de contraseña no queda revocado).
+La caché debe ser compartida por todos los workers (ver CACHES en core/settings.py).
+
+Todas las llaves que necesita una petición se leen con un solo cache.get_many.
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.base.auth.permisosCache import VERSION_KEY, version_permisos
+
+
+USUARIO_TIMEOUT = 60 * 60
+
+
+def _llave_usuario(usuario_id):
+    return f'auth:usuario:{usuario_id}'
+
+
+def _llave_revocado(jti):
+    return f'auth:revocado:{jti}'
+
+
+def _llave_corte_usuario(usuario_id):
+    return f'auth:corte:{usuario_id}'
+
+
+def _campos_usuario():
+    """
+    Campos que se copian a la caché (todos menos el password, que queda diferido)
+    """
+    return [
+        field.attname for field in get_user_model()._meta.concrete_fields
+        if field.attname != 'password'
+    ]
+
+
+def invalidar_usuario_token(*usuarios_ids):
+    """
+    Borra la copia en caché del usuario; la siguiente petición la vuelve a leer de la BD
+    """
+    cache.delete_many([_llave_usuario(usuario_id) for usuario_id in usuarios_ids])
+
+
+def revocar_token(token):
+    """
+    Revoca un token (access o refresh) hasta su expiración
+    """
+    jti = token.get(api_settings.JTI_CLAIM)
+    exp = token.get('exp')
+    if not jti or not exp:
+        return
+    restante = int(exp - time.time())
+    if restante <= 0:
+        return
+    cache.set(_llave_revocado(jti), True, restante)
+
+
+def revocar_tokens_usuario(usuario_id):
+    """
+    Invalida todos los tokens emitidos hasta ahora para el usuario (cerrar todas las sesiones)
+    """
+    cache.set(
+        _llave_corte_usuario(usuario_id),
+        int(time.time()),
+        int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+    )
+
+
+def validar_revocacion(token, valores=None):
+    """
+    Lanza AuthenticationFailed si el token o los tokens del usuario fueron revocados.
+    valores permite reutilizar una lectura previa de la caché.
+    """
+    jti = token.get(api_settings.JTI_CLAIM)
+    usuario_id = token.get(api_settings.USER_ID_CLAIM)
+    if valores is None:
+        valores = cache.get_many([_llave_revocado(jti), _llave_corte_usuario(usuario_id)])
+    if valores.get(_llave_revocado(jti)):
+        raise AuthenticationFailed("El token fue revocado", code="token_revoked")
+    corte = valores.get(_llave_corte_usuario(usuario_id))
+    if corte and token.get('iat', 0) < corte:
+        raise AuthenticationFailed("La sesión fue cerrada, inicie sesión nuevamente", code="token_revoked")
+
+
+def _cargar_usuario(usuario_id, version):
+    """
+    Lee el usuario de la BD (una consulta) y guarda la copia en caché
+    """
+    campos = _campos_usuario()
+    valores = get_user_model().objects.filter(pk=usuario_id).values_list(*campos).first()
+    if valores is None:
+        return None
+    copia = {'pv': version, 'campos': campos, 'valores': valores}
+    cache.set(_llave_usuario(usuario_id), copia, USUARIO_TIMEOUT)
+    return copia
+
+
+class JWTAuthenticationLigera(JWTAuthentication):
+    """
+    JWTAuthentication sin consulta del usuario por petición.
+    request.user es una instancia de Usuario armada con Usuario.from_db, así que
+    funciona igual en llaves foráneas, .almacen, .full_name(), etc.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            usuario_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("El token no contiene la identificación del usuario")
+
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        llaves = [VERSION_KEY, _llave_usuario(usuario_id), _llave_revocado(jti), _llave_corte_usuario(usuario_id)]
+        valores = cache.get_many(llaves)
+        validar_revocacion(validated_token, valores)
+
+        version = valores.get(VERSION_KEY) or version_permisos()
+        copia = valores.get(_llave_usuario(usuario_id))
+        if copia is None or copia['pv'] != version:
+            copia = _cargar_usuario(usuario_id, version)
+            if copia is None:
+                raise AuthenticationFailed("Usuario no encontrado", code="user_not_found")
+
+        modelo = get_user_model()
+        usuario = modelo.from_db(router.db_for_read(modelo), copia['campos'], copia['valores'])
+        if api_settings.CHECK_USER_IS_ACTIVE and not usuario.is_active:
+            raise AuthenticationFailed("El usuario está inactivo", code="user_inactive")
+        return usuario
@@ -0,0 +1,93 @@
+"""
+Resolución de permisos con caché compartida.
+
+Los permisos efectivos de cada usuario (directos + de sus grupos) se guardan en la
+caché como un conjunto de códigos 'app_label.codename'. La llave incluye una versión
+global que se incrementa cuando cambian grupos o los permisos de un grupo; los cambios
+de un solo usuario solo borran su entrada (ver apps/base/signals/permisos.py).
+Con la caché caliente autorizar es una búsqueda en un conjunto, sin consultar las tablas
+de permisos (con la caché en BD, sin REDIS_URL, solo se leen las llaves de la caché).
+"""
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db.models import Q
+
+
+VERSION_KEY = 'permisos:version'
+PERMISOS_TIMEOUT = getattr(settings, 'PERMISOS_CACHE_TIMEOUT', 60 * 60)
+
+
+def version_permisos():
+    """
+    Versión global de permisos. Se crea en 1 si no existe en la caché.
+    """
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY) or 1
+    return version
+
+
+def incrementar_version_permisos():
+    """
+    Invalida los permisos de todos los usuarios (cambió un grupo o sus permisos)
+    """
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 2, timeout=None)
+
+
+def _llave_usuario(usuario_id, version):
+    return f'permisos:{version}:{usuario_id}'
+
+
+def invalidar_permisos_usuario(*usuarios_ids):
+    """
+    Borra los permisos en caché de los usuarios indicados (versión actual)
+    """
+    version = version_permisos()
+    cache.delete_many([_llave_usuario(usuario_id, version) for usuario_id in usuarios_ids])
+
+
+def _cargar_permisos(usuario_id):
+    """
+    Permisos directos y de grupos en una sola consulta
+    """
+    return frozenset(
+        f'{app_label}.{codename}'
+        for app_label, codename in Permission.objects.filter(
+            Q(user__id=usuario_id) | Q(group__user__id=usuario_id)
+        ).values_list('content_type__app_label', 'codename').distinct()
+    )
+
+
+def obtener_permisos(usuario):
+    """
+    Conjunto de permisos efectivos del usuario.
+    Se memoriza en la instancia para no repetir la lectura de caché dentro de una petición.
+    """
+    version = version_permisos()
+    memo = getattr(usuario, '_permisos_cache', None)
+    if memo is not None and memo[0] == version:
+        return memo[1]
+
+    llave = _llave_usuario(usuario.pk, version)
+    permisos = cache.get(llave)
+    if permisos is None:
+        permisos = _cargar_permisos(usuario.pk)
+        cache.set(llave, permisos, PERMISOS_TIMEOUT)
+    usuario._permisos_cache = (version, permisos)
+    return permisos
+
+
+def tiene_permiso(usuario, permiso):
+    """
+    Equivalente a usuario.has_perm(permiso) con el ModelBackend, usando la caché
+    """
+    if not usuario or not usuario.is_active:
+        return False
+    if usuario.is_superuser:
+        return True
+    return permiso in obtener_permisos(usuario)
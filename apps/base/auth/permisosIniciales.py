@@ -0,0 +1,63 @@
+"""
+Registro de permisos personalizados que se siembran después de migrar.
+
+Cada app registra sus permisos al importar sus signals (ready()) y un solo receptor
+de post_migrate (apps/base/signals/permisos.py) los crea todos en una pasada:
+calcula el conjunto deseado, lo compara con los existentes en una consulta y
+crea solo los faltantes con bulk_create.
+"""
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+
+
+# [(modelo, codename, nombre)]
+_permisos_registrados = []
+
+
+def permisos_crud(model_name_permiso, model_name_str):
+    """
+    Permisos estándar ver/actualizar/crear/eliminar de un modelo
+    """
+    return [
+        (f"can_view_{model_name_permiso}".lower(),   f"Ver {model_name_str}".upper()),
+        (f"can_update_{model_name_permiso}".lower(), f"Actualizar {model_name_str}".upper()),
+        (f"can_create_{model_name_permiso}".lower(), f"Crear {model_name_str}".upper()),
+        (f"can_delete_{model_name_permiso}".lower(), f"Eliminar {model_name_str}".upper()),
+    ]
+
+
+def registrar_permisos(modelo, permisos):
+    """
+    Registra [(codename, nombre)] para el content type del modelo
+    """
+    for codename, name in permisos:
+        _permisos_registrados.append((modelo, codename, name))
+
+
+def sembrar_permisos(using='default'):
+    """
+    Crea los permisos registrados que no existen. Es idempotente.
+    Retorna el número de permisos creados.
+    """
+    if not _permisos_registrados:
+        return 0
+
+    content_types = ContentType.objects.db_manager(using).get_for_models(
+        *{modelo for modelo, _, _ in _permisos_registrados}
+    )
+    deseados = {}
+    for modelo, codename, name in _permisos_registrados:
+        deseados.setdefault((content_types[modelo].id, codename), name)
+
+    existentes = set(
+        Permission.objects.using(using).filter(
+            content_type_id__in={content_type.id for content_type in content_types.values()}
+        ).values_list('content_type_id', 'codename')
+    )
+    faltantes = [
+        Permission(content_type_id=content_type_id, codename=codename, name=name)
+        for (content_type_id, codename), name in deseados.items()
+        if (content_type_id, codename) not in existentes
+    ]
+    Permission.objects.using(using).bulk_create(faltantes, ignore_conflicts=True)
+    return len(faltantes)
@@ -0,0 +1,140 @@
+"""
+============================================================================================
+                            BÚSQUEDA INDEXADA (CLIENTES, PROVEEDORES, PRODUCTOS)
+============================================================================================
+Cada modelo registrado tiene un "documento de búsqueda": sus columnas de nombre, código,
+RFC y teléfono concatenadas, en minúsculas y sin acentos (f_unaccent).
+
+PostgreSQL (pg_trgm + unaccent):
+- Índice GIN trigram sobre el documento: sirve a LIKE '%texto%' y al operador %> (palabra
+  parecida), que da tolerancia a errores de escritura ("hernadez" -> "Hernández").
+- Índice GIN de texto completo (to_tsvector 'simple') sobre el mismo documento: todas las
+  palabras buscadas, en cualquier orden.
+- Ranking: la mayor entre word_similarity y ts_rank.
+El umbral de parecido es pg_trgm.word_similarity_threshold (0.6 por defecto).
+
+Otras bases de datos (SQLite): f_unaccent se registra como función de Python al abrir la
+conexión y cada palabra buscada debe aparecer en el documento (sin índice ni tolerancia a
+errores); el ranking favorece los documentos con una palabra que empieza con el texto buscado.
+
+Los índices se crean en migraciones con sql_crear_indices() (solo en PostgreSQL).
+"""
+import unicodedata
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import Case, F, FloatField, Q, TextField, Value, When
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+
+
+# modelo -> columnas del documento de búsqueda
+DOCUMENTOS_BUSQUEDA = {
+    'erp.Cliente': ('codigo', 'nombre', 'apellido_paterno', 'apellido_materno', 'razon_social', 'rfc', 'telefono'),
+    'erp.Proveedor': ('codigo', 'nombre', 'razon_social', 'rfc', 'telefono'),
+    'erp.Producto': ('codigo', 'nombre', 'clave_sat'),
+}
+
+# unaccent() es STABLE; el envoltorio IMMUTABLE permite usarlo en índices
+SQL_FUNCION_UNACCENT = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+    "CREATE EXTENSION IF NOT EXISTS unaccent;",
+    """CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;""",
+]
+
+
+def normalizar(texto):
+    """
+    Minúsculas y sin acentos (equivalente a f_unaccent(lower(texto)))
+    """
+    if texto is None:
+        return None
+    descompuesto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(caracter for caracter in descompuesto if not unicodedata.combining(caracter))
+
+
+def documento_sql(columnas, tabla=None):
+    """
+    Expresión SQL del documento. Solo usa funciones IMMUTABLE (no concat_ws) para
+    que PostgreSQL pueda indexarla; la consulta y el índice usan la misma expresión.
+    """
+    prefijo = f'"{tabla}".' if tabla else ''
+    partes = " || ' ' || ".join(f"coalesce({prefijo}\"{columna}\", '')" for columna in columnas)
+    return f"f_unaccent(lower({partes}))"
+
+
+def sql_crear_indices(tabla, columnas):
+    """
+    SQL para crear la función f_unaccent y los índices trigram y de texto completo de la tabla
+    """
+    documento = documento_sql(columnas)
+    return SQL_FUNCION_UNACCENT + [
+        f'CREATE INDEX IF NOT EXISTS "{tabla}_busqueda_trgm" ON "{tabla}" USING gin (({documento}) gin_trgm_ops);',
+        f'CREATE INDEX IF NOT EXISTS "{tabla}_busqueda_fts" ON "{tabla}" USING gin (to_tsvector(\'simple\'::regconfig, {documento}));',
+    ]
+
+
+def sql_eliminar_indices(tabla):
+    return [
+        f'DROP INDEX IF EXISTS "{tabla}_busqueda_trgm";',
+        f'DROP INDEX IF EXISTS "{tabla}_busqueda_fts";',
+    ]
+
+
+def tiene_documento(modelo):
+    return modelo._meta.label in DOCUMENTOS_BUSQUEDA
+
+
+def filtro_texto(campo, termino, postgres):
+    """
+    Condición y ranking sobre un campo (o alias) que ya contiene texto normalizado.
+    PostgreSQL: LIKE o palabra parecida (%>) y word_similarity; otras BD: todas las palabras.
+    """
+    if postgres:
+        condicion = Q(**{f'{campo}__contains': termino}) | Q(**{f'{campo}__trigram_word_similar': termino})
+        return condicion, TrigramWordSimilarity(termino, campo)
+    condicion = Q()
+    for palabra in termino.split():
+        condicion &= Q(**{f'{campo}__contains': palabra})
+    rank = Case(
+        When(Q(**{f'{campo}__startswith': termino}) | Q(**{f'{campo}__contains': f' {termino}'}), then=Value(1.0)),
+        When(**{f'{campo}__contains': termino}, then=Value(0.5)),
+        default=Value(0.1),
+        output_field=FloatField(),
+    )
+    return condicion, rank
+
+
+def buscar(queryset, texto):
+    """
+    Filtra y ordena el queryset por relevancia (anota _rank_busqueda)
+    """
+    modelo = queryset.model
+    termino = normalizar(texto).strip()
+    if not termino:
+        return queryset
+    documento = RawSQL(
+        documento_sql(DOCUMENTOS_BUSQUEDA[modelo._meta.label], modelo._meta.db_table), [],
+        output_field=TextField()
+    )
+    condicion_id = Q()
+    if termino.isdigit():
+        condicion_id = Q(pk=int(termino))
+
+    postgres = connections[queryset.db].vendor == 'postgresql'
+    condicion, rank = filtro_texto('_documento_busqueda', termino, postgres)
+    if postgres:
+        vector = RawSQL(f"to_tsvector('simple'::regconfig, {documento.sql})", [], output_field=SearchVectorField())
+        consulta = SearchQuery(termino, config='simple', search_type='plain')
+        queryset = queryset.alias(_documento_busqueda=documento, _vector_busqueda=vector).filter(
+            condicion_id | condicion | Q(_vector_busqueda=consulta)
+        ).annotate(
+            _rank_busqueda=Greatest(rank, SearchRank(F('_vector_busqueda'), consulta), output_field=FloatField())
+        )
+    else:
+        queryset = queryset.alias(_documento_busqueda=documento).filter(condicion_id | condicion).annotate(
+            _rank_busqueda=rank
+        )
+    return queryset.order_by('-_rank_busqueda', 'pk')
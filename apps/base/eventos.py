@@ -0,0 +1,107 @@
+"""
+============================================================================================
+                    EVENTOS DE DOMINIO (TRANSICIONES DE ESTADO)
+============================================================================================
+Un receptor de post_save se ejecuta en cada save() del modelo aunque no haya cambiado nada
+relevante, y las escrituras en bloque (bulk_update / update()) no lo disparan. Un evento de
+dominio es un django.dispatch.Signal que solo se envía cuando ocurre la transición (venta
+cancelada, embarque iniciado, solicitud rechazada) y siempre con la LISTA de instancias:
+
+    venta_cancelada = Signal()                                  # apps/erp/eventos.py
+    transicion(Venta, 'fase', Venta.FASE_CANCELADA, venta_cancelada)
+
+    @receiver(venta_cancelada)
+    def revertir_inventario(sender, instancias, **kwargs): ...  # una o muchas ventas
+
+- transicion(): el valor original del campo se guarda al cargar la instancia (post_init) y al
+  guardar se compara sin consultas; save(update_fields=[...]) sin el campo se descarta de
+  inmediato. Si el campo estaba diferido (only / defer) se considera transición: los
+  receptores deben ser idempotentes.
+- emitir(evento, Modelo, instancias): para las escrituras en bloque que no pasan por save().
+- en_lote(): las transiciones dentro del bloque se acumulan y cada evento se envía una sola
+  vez al salir con todas las instancias (p. ej. cancelación masiva). Si el bloque falla
+  no se envía nada.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_init, post_save
+
+
+_local = threading.local()
+_TRANSICIONES = {}
+_DIFERIDO = object()
+
+
+def emitir(evento, sender, instancias):
+    """
+    Envía el evento con la lista de instancias (o lo acumula si hay un en_lote() activo)
+    """
+    instancias = list(instancias)
+    if not instancias:
+        return
+    pendientes = getattr(_local, 'pendientes', None)
+    if pendientes is not None:
+        pendientes.setdefault((evento, sender), []).extend(instancias)
+        return
+    evento.send(sender=sender, instancias=instancias)
+
+
+@contextmanager
+def en_lote():
+    """
+    Acumula los eventos del bloque y envía cada uno una sola vez al salir
+    """
+    if getattr(_local, 'pendientes', None) is not None:
+        # Anidado: el bloque externo envía
+        yield
+        return
+    _local.pendientes = {}
+    try:
+        yield
+        pendientes = _local.pendientes
+    finally:
+        _local.pendientes = None
+    for (evento, sender), instancias in pendientes.items():
+        evento.send(sender=sender, instancias=instancias)
+
+
+#=============================================
+#         TRANSICIONES EN save()
+#==============================================
+def _atributo(campo):
+    return f'_evento_original_{campo}'
+
+
+def _guardar_originales(sender, instance, **kwargs):
+    # __dict__ para no consultar campos diferidos
+    for campo in _TRANSICIONES[sender]:
+        setattr(instance, _atributo(campo), instance.__dict__.get(campo, _DIFERIDO))
+
+
+def _detectar_transiciones(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    for campo, transiciones in _TRANSICIONES[sender].items():
+        if update_fields is not None and campo not in update_fields:
+            continue
+        original = getattr(instance, _atributo(campo), _DIFERIDO)
+        actual = instance.__dict__.get(campo, _DIFERIDO)
+        setattr(instance, _atributo(campo), actual)
+        if original == actual and not created:
+            continue
+        for valor, evento in transiciones:
+            if actual == valor:
+                emitir(evento, sender, [instance])
+
+
+def transicion(modelo, campo, valor, evento):
+    """
+    Envía `evento` cuando una instancia de `modelo` se guarda con `campo` cambiado a `valor`
+    (también al crearla con ese valor)
+    """
+    if modelo not in _TRANSICIONES:
+        _TRANSICIONES[modelo] = {}
+        post_init.connect(_guardar_originales, sender=modelo, dispatch_uid=f'eventos_init_{modelo._meta.label}')
+        post_save.connect(_detectar_transiciones, sender=modelo, dispatch_uid=f'eventos_save_{modelo._meta.label}')
+    _TRANSICIONES[modelo].setdefault(campo, []).append((valor, evento))
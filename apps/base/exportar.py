@@ -0,0 +1,148 @@
+"""
+============================================================================================
+                    EXPORTACIONES EN STREAMING (CSV / XLSX)
+============================================================================================
+Las exportaciones para contabilidad y auditoría (un año de movimientos o de ventas) no se
+arman en memoria: el queryset se lee con values_list().iterator(chunk_size=...) (cursor del
+lado del servidor en PostgreSQL) y cada bloque se escribe en cuanto llega.
+- CSV: StreamingHttpResponse que genera renglón por renglón (con BOM para Excel).
+- XLSX: Workbook(write_only=True) de openpyxl (opcional), que escribe los renglones a un
+  archivo temporal; el archivo se envía por bloques con FileResponse.
+La memoria usada no depende del número de renglones.
+
+columnas = [('Encabezado', 'lookup__del__queryset'), ...]
+
+Vistas: respuesta_exportacion(queryset, columnas, 'ventas', formato_solicitado(request))
+Comandos: exportar_archivo(queryset, columnas, salida, formato, chunk_size)
+"""
+import csv
+import datetime
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # pragma: no cover - dependencia opcional
+    Workbook = None
+
+
+FORMATO_CSV = 'csv'
+FORMATO_XLSX = 'xlsx'
+FORMATOS = (FORMATO_CSV, FORMATO_XLSX)
+
+CHUNK_SIZE = getattr(settings, 'EXPORTACION_CHUNK_SIZE', 2000)
+BOM = '\ufeff'
+CONTENT_TYPES = {
+    FORMATO_CSV: 'text/csv; charset=utf-8',
+    FORMATO_XLSX: 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+class _Eco:
+    """
+    Archivo falso para csv.writer: regresa el renglón en vez de guardarlo
+    """
+    def write(self, valor):
+        return valor
+
+
+def formato_solicitado(request):
+    """
+    Formato de ?formato= (csv por defecto). ValueError si no es válido o si falta openpyxl.
+    """
+    formato = (request.query_params.get('formato') or FORMATO_CSV).lower()
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no válido: {formato}. Opciones: {', '.join(FORMATOS)}.")
+    if formato == FORMATO_XLSX and Workbook is None:
+        raise ValueError("La exportación XLSX requiere openpyxl (pip install openpyxl).")
+    return formato
+
+
+def _valor(valor):
+    # Fechas en hora local y sin zona horaria (openpyxl no acepta datetime con tzinfo)
+    if isinstance(valor, datetime.datetime):
+        if timezone.is_aware(valor):
+            valor = timezone.localtime(valor)
+        return valor.replace(tzinfo=None)
+    return valor
+
+
+def filas(queryset, columnas, chunk_size=CHUNK_SIZE):
+    """
+    Renglones del queryset con los lookups de las columnas, leídos por bloques
+    """
+    lookups = [lookup for _, lookup in columnas]
+    for fila in queryset.values_list(*lookups).iterator(chunk_size=chunk_size):
+        yield [_valor(valor) for valor in fila]
+
+
+def generar_csv(columnas, renglones):
+    escritor = csv.writer(_Eco())
+    yield BOM + escritor.writerow([encabezado for encabezado, _ in columnas])
+    for renglon in renglones:
+        yield escritor.writerow(['' if valor is None else valor for valor in renglon])
+
+
+def escribir_csv(archivo, columnas, renglones):
+    """
+    Escribe el CSV en un archivo de texto abierto. Retorna el número de renglones.
+    """
+    total = 0
+    for total, linea in enumerate(generar_csv(columnas, renglones)):
+        archivo.write(linea)
+    return total
+
+
+def escribir_xlsx(archivo, columnas, renglones, titulo='Datos'):
+    """
+    Escribe el XLSX (libro de solo escritura) en una ruta o archivo binario. Retorna el número de renglones.
+    """
+    if Workbook is None:
+        raise ValueError("La exportación XLSX requiere openpyxl (pip install openpyxl).")
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet(title=titulo[:31])
+    hoja.append([encabezado for encabezado, _ in columnas])
+    total = 0
+    for renglon in renglones:
+        hoja.append(renglon)
+        total += 1
+    libro.save(archivo)
+    return total
+
+
+def nombre_archivo(nombre, formato):
+    return f"{nombre}_{timezone.localtime(timezone.now()):%Y%m%d_%H%M%S}.{formato}"
+
+
+def respuesta_exportacion(queryset, columnas, nombre, formato=FORMATO_CSV):
+    """
+    Respuesta de descarga que escribe los renglones conforme se leen de la BD
+    """
+    archivo = nombre_archivo(nombre, formato)
+    if formato == FORMATO_XLSX:
+        temporal = tempfile.TemporaryFile()
+        escribir_xlsx(temporal, columnas, filas(queryset, columnas), titulo=nombre)
+        temporal.seek(0)
+        return FileResponse(temporal, as_attachment=True, filename=archivo, content_type=CONTENT_TYPES[formato])
+
+    respuesta = StreamingHttpResponse(generar_csv(columnas, filas(queryset, columnas)), content_type=CONTENT_TYPES[formato])
+    respuesta['Content-Disposition'] = f'attachment; filename="{archivo}"'
+    return respuesta
+
+
+def exportar_archivo(queryset, columnas, salida=None, formato=FORMATO_CSV, chunk_size=CHUNK_SIZE, titulo='Datos', stdout=None):
+    """
+    Exportación para comandos: escribe en la ruta salida (o CSV en stdout). Retorna el número de renglones.
+    """
+    renglones = filas(queryset, columnas, chunk_size)
+    if formato == FORMATO_XLSX:
+        if not salida:
+            raise ValueError("La exportación XLSX requiere --salida.")
+        return escribir_xlsx(salida, columnas, renglones, titulo=titulo)
+    if not salida:
+        return escribir_csv(stdout, columnas, renglones)
+    with open(salida, 'w', newline='', encoding='utf-8') as archivo:
+        return escribir_csv(archivo, columnas, renglones)
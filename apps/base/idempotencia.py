@@ -0,0 +1,177 @@
+"""
+============================================================================================
+                    PETICIONES IDEMPOTENTES (ENCABEZADO Idempotency-Key)
+============================================================================================
+Los clientes con conexión inestable reintentan el mismo POST (pagos, gastos, ventas,
+entregas). Con el decorador @idempotente la vista acepta el encabezado Idempotency-Key:
+
+- La primera petición con una clave crea su fila en SolicitudIdempotente (usuario + clave,
+  única) antes de ejecutar la vista. Esa fila es el candado: un duplicado concurrente no
+  puede crearla y espera (IDEMPOTENCIA_ESPERA_SEGUNDOS) a que la original termine.
+- Si la vista responde 2xx se guarda la respuesta; los reintentos con la misma clave la
+  reciben tal cual (encabezado Idempotent-Replayed: true) sin volver a ejecutar la vista.
+- Si la vista falla (4xx / 5xx / excepción) se borra la fila: el reintento se ejecuta de nuevo.
+- La misma clave con otro cuerpo u otra ruta responde 422.
+- Las respuestas vencen a las IDEMPOTENCIA_HORAS; depurar con
+  python manage.py depurar_idempotencia
+Sin el encabezado (o sin usuario autenticado) la vista se ejecuta como siempre.
+
+    @action(detail=False, methods=['post'], url_path='registrar-pago')
+    @idempotente
+    def registrar_pago(self, request): ...
+"""
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from apps.base.models import SolicitudIdempotente
+from apps.base.renderers import dumps
+
+
+ENCABEZADO = 'Idempotency-Key'
+ENCABEZADO_REPETIDA = 'Idempotent-Replayed'
+LONGITUD_MAXIMA = 255
+INTERVALO_ESPERA = 0.1
+
+HORAS = getattr(settings, 'IDEMPOTENCIA_HORAS', 24)
+ESPERA_SEGUNDOS = getattr(settings, 'IDEMPOTENCIA_ESPERA_SEGUNDOS', 10)
+BLOQUEO_SEGUNDOS = getattr(settings, 'IDEMPOTENCIA_BLOQUEO_SEGUNDOS', 300)
+
+
+def huella_peticion(request):
+    """
+    SHA-256 del método, la ruta y el cuerpo ya interpretado (independiente del orden de llaves)
+    """
+    datos = request.data
+    if hasattr(datos, 'lists'):
+        datos = dict(datos.lists())
+    cuerpo = json.dumps(datos, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method}|{request.path}|{cuerpo}".encode()).hexdigest()
+
+
+def _respuesta_guardada(solicitud):
+    respuesta = HttpResponse(
+        bytes(solicitud.respuesta or b''), status=solicitud.status_code, content_type=solicitud.content_type
+    )
+    respuesta[ENCABEZADO_REPETIDA] = 'true'
+    return respuesta
+
+
+def _reservar(usuario, clave, request, huella):
+    """
+    Crea la fila de la clave (candado) o resuelve el duplicado.
+    Retorna (solicitud reservada, None) o (None, respuesta para el duplicado).
+    """
+    ahora = timezone.now()
+    SolicitudIdempotente.objects.filter(usuario=usuario, clave=clave, expira__lte=ahora).delete()
+    limite = time.monotonic() + ESPERA_SEGUNDOS
+    while True:
+        try:
+            with transaction.atomic():
+                return SolicitudIdempotente.objects.create(
+                    usuario=usuario,
+                    clave=clave,
+                    metodo=request.method,
+                    ruta=request.path[:255],
+                    huella=huella,
+                    expira=ahora + timedelta(hours=HORAS),
+                ), None
+        except IntegrityError:
+            pass
+
+        solicitud = SolicitudIdempotente.objects.filter(usuario=usuario, clave=clave).first()
+        if solicitud is None:
+            # La petición original falló y liberó la clave: se vuelve a intentar
+            continue
+        if solicitud.huella != huella:
+            return None, Response(
+                {'detail': f'La {ENCABEZADO} ya se usó con otra petición.', 'error_code': 'IDEMPOTENCIA_CONFLICTO'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        if solicitud.estado == SolicitudIdempotente.ESTADO_TERMINADA:
+            return None, _respuesta_guardada(solicitud)
+
+        # Petición original sin terminar: si lleva demasiado tiempo se toma la clave
+        abandonada = timezone.now() - timedelta(seconds=BLOQUEO_SEGUNDOS)
+        if solicitud.creado < abandonada and SolicitudIdempotente.objects.filter(
+            pk=solicitud.pk, estado=SolicitudIdempotente.ESTADO_EN_PROCESO, creado=solicitud.creado
+        ).update(creado=timezone.now()):
+            return solicitud, None
+
+        if time.monotonic() >= limite:
+            respuesta = Response(
+                {'detail': f'La petición con esta {ENCABEZADO} todavía se está procesando.', 'error_code': 'IDEMPOTENCIA_EN_PROCESO'},
+                status=status.HTTP_409_CONFLICT
+            )
+            respuesta['Retry-After'] = str(ESPERA_SEGUNDOS)
+            return None, respuesta
+        time.sleep(INTERVALO_ESPERA)
+
+
+def _guardar(solicitud, respuesta):
+    if isinstance(respuesta, Response):
+        contenido, content_type = dumps(respuesta.data), 'application/json'
+    else:
+        contenido, content_type = respuesta.content, respuesta.get('Content-Type', '')
+    SolicitudIdempotente.objects.filter(pk=solicitud.pk).update(
+        estado=SolicitudIdempotente.ESTADO_TERMINADA,
+        status_code=respuesta.status_code,
+        content_type=content_type,
+        respuesta=contenido,
+    )
+
+
+def _liberar(solicitud):
+    SolicitudIdempotente.objects.filter(pk=solicitud.pk).delete()
+
+
+def idempotente(vista):
+    """
+    Decorador para métodos de ViewSet / APIView o funciones con @api_view
+    (debajo de @action / @api_view para recibir el Request de DRF)
+    """
+    @functools.wraps(vista)
+    def envoltura(*args, **kwargs):
+        request = next(arg for arg in args if isinstance(arg, Request))
+        clave = request.headers.get(ENCABEZADO)
+        usuario = request.user if request.user and request.user.is_authenticated else None
+        if not clave or usuario is None:
+            return vista(*args, **kwargs)
+        if len(clave) > LONGITUD_MAXIMA:
+            return Response(
+                {'detail': f'La {ENCABEZADO} no puede tener más de {LONGITUD_MAXIMA} caracteres.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        solicitud, respuesta = _reservar(usuario, clave, request, huella_peticion(request))
+        if respuesta is not None:
+            return respuesta
+        try:
+            respuesta = vista(*args, **kwargs)
+        except Exception:
+            _liberar(solicitud)
+            raise
+        if status.is_success(respuesta.status_code):
+            _guardar(solicitud, respuesta)
+        else:
+            _liberar(solicitud)
+        return respuesta
+    return envoltura
+
+
+def depurar_solicitudes():
+    """
+    Elimina las respuestas vencidas. Retorna cuántas se eliminaron.
+    """
+    eliminadas, _ = SolicitudIdempotente.objects.filter(expira__lte=timezone.now()).delete()
+    return eliminadas
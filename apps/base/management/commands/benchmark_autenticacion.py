@@ -0,0 +1,84 @@
+import time
+
+from django.contrib.auth.models import Group, Permission
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from apps.base.auth.jwtAuth import JWTAuthenticationLigera, revocar_token, invalidar_usuario_token
+from apps.base.auth.permisosCache import tiene_permiso, invalidar_permisos_usuario
+from apps.base.mediciones import AYUDA_REVERTIDOS, capturar_consultas, datos_revertidos
+from apps.base.token_jwt import MyTokenObtainPairSerializer
+from apps.usuarios.models import Usuario
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el costo por petición de la autenticación JWT y la revisión de permisos "
+        "(simplejwt por defecto vs autenticación ligera con caché). "
+        + AYUDA_REVERTIDOS
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=1000, help="Número de peticiones simuladas")
+        parser.add_argument('--max-queries', type=int, default=None, help="Falla si la autenticación ligera usa más consultas en total")
+
+    def handle(self, *args, **options):
+        with datos_revertidos():
+            self._ejecutar(options['peticiones'], options['max_queries'])
+
+    def _ejecutar(self, total, max_queries):
+        usuario = Usuario.objects.create(username='benchmark-auth', nombre='BENCHMARK')
+        grupo = Group.objects.create(name='BENCHMARK AUTH')
+        permiso = Permission.objects.filter(content_type__app_label='usuarios').first()
+        if permiso is None:
+            raise CommandError("No hay permisos de usuarios, ejecute migrate")
+        grupo.permissions.add(permiso)
+        usuario.groups.add(grupo)
+        codigo = f'{permiso.content_type.app_label}.{permiso.codename}'
+
+        token = MyTokenObtainPairSerializer.get_token(usuario).access_token
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        def por_defecto():
+            user, _ = JWTAuthentication().authenticate(request)
+            return user.has_perm(codigo)
+
+        def ligera():
+            user, _ = JWTAuthenticationLigera().authenticate(request)
+            return tiene_permiso(user, codigo)
+
+        resultados = {}
+        for nombre, funcion in (('simplejwt + has_perm', por_defecto), ('ligera + caché de permisos', ligera)):
+            funcion()  # calentar caché
+            with capturar_consultas() as queries:
+                inicio = time.perf_counter()
+                for _ in range(total):
+                    if not funcion():
+                        raise CommandError(f"{nombre}: el permiso {codigo} no se resolvió")
+                segundos = time.perf_counter() - inicio
+            resultados[nombre] = len(queries)
+            # Sin REDIS_URL la caché vive en la tabla base_cache y sus lecturas también son consultas
+            de_cache = sum(1 for query in queries if 'base_cache' in query['sql'])
+            self.stdout.write(
+                f"{nombre}: {total} peticiones, {len(queries) / total:.2f} consultas/petición "
+                f"({de_cache / total:.2f} a la caché), {segundos * 1e6 / total:.1f} µs/petición"
+            )
+
+        if max_queries is not None and resultados['ligera + caché de permisos'] > max_queries:
+            raise CommandError(
+                f"La autenticación ligera usó {resultados['ligera + caché de permisos']} consultas (máximo {max_queries})"
+            )
+
+        #VALIDAR REVOCACION
+        revocar_token(token)
+        try:
+            JWTAuthenticationLigera().authenticate(request)
+        except Exception:
+            self.stdout.write(self.style.SUCCESS("✔ Token revocado rechazado (los datos de prueba se revirtieron)"))
+        else:
+            raise CommandError("El token revocado fue aceptado")
+        finally:
+            # El usuario se revierte pero la caché no; se limpia para que el id no herede datos
+            invalidar_permisos_usuario(usuario.id)
+            invalidar_usuario_token(usuario.id)
@@ -0,0 +1,97 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.base.busqueda import buscar
+from apps.base.mediciones import AYUDA_REVERTIDOS, datos_revertidos
+from apps.erp.models import Cliente
+
+
+NOMBRES = ['JOSÉ', 'MARÍA', 'JUAN', 'GUADALUPE', 'FRANCISCO', 'ANA', 'LUIS', 'ROSA', 'JESÚS', 'MARTHA', 'MIGUEL', 'PATRICIA']
+APELLIDOS = ['HERNÁNDEZ', 'GARCÍA', 'MARTÍNEZ', 'LÓPEZ', 'GONZÁLEZ', 'PÉREZ', 'RODRÍGUEZ', 'SÁNCHEZ', 'RAMÍREZ', 'CRUZ', 'FLORES', 'GÓMEZ']
+NEGOCIOS = ['ABARROTES', 'TIENDA', 'MISCELÁNEA', 'CREMERÍA', 'FRUTERÍA', 'RESTAURANTE']
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la búsqueda indexada de clientes (apps/base/busqueda.py) sobre N clientes sintéticos. "
+        + AYUDA_REVERTIDOS
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clientes', type=int, default=200000, help="Número de clientes sintéticos")
+        parser.add_argument('--repeticiones', type=int, default=20, help="Repeticiones por búsqueda")
+        parser.add_argument('--max-ms', type=float, default=50.0, help="Falla si alguna búsqueda promedia más milisegundos (solo PostgreSQL)")
+
+    def handle(self, *args, **options):
+        with datos_revertidos():
+            self._ejecutar(options['clientes'], options['repeticiones'], options['max_ms'])
+
+    def _crear_clientes(self, total):
+        azar = random.Random(2024)
+        lote = []
+        for i in range(total):
+            nombre, paterno, materno = azar.choice(NOMBRES), azar.choice(APELLIDOS), azar.choice(APELLIDOS)
+            lote.append(Cliente(
+                codigo=f'BENCH-{i:07d}',
+                nombre=nombre,
+                apellido_paterno=paterno,
+                apellido_materno=f'{materno} {i}',  # (nombre, paterno, materno) es único
+                razon_social=f'{azar.choice(NEGOCIOS)} {paterno}' if i % 3 == 0 else None,
+                rfc=f'{paterno[:2]}{nombre[:2]}{i:06d}XX',
+                telefono=f'55{i:08d}',
+            ))
+            if len(lote) == 5000:
+                Cliente.objects.bulk_create(lote)
+                lote = []
+        Cliente.objects.bulk_create(lote)
+
+    def _ejecutar(self, total, repeticiones, max_ms):
+        inicio = time.perf_counter()
+        self._crear_clientes(total)
+        self.stdout.write(f"{total} clientes creados en {time.perf_counter() - inicio:.1f} s")
+
+        postgres = connection.vendor == 'postgresql'
+        if postgres:
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE erp_cliente')
+        else:
+            self.stdout.write(self.style.WARNING(
+                f"{connection.vendor}: búsqueda portable sin índice ni tolerancia a errores; el límite de {max_ms} ms no se valida"
+            ))
+
+        muestra = Cliente.objects.get(codigo=f'BENCH-{total // 2:07d}')
+        busquedas = [
+            'hernandez',            # sin acento
+            'hernadez',             # error de escritura
+            'jose martinez',        # varias palabras
+            'cremeria lopez',       # razón social
+            muestra.rfc,
+            muestra.telefono[:7],   # teléfono parcial
+            muestra.codigo,
+        ]
+        lentas = []
+        for texto in busquedas:
+            queryset = buscar(Cliente.objects.all(), texto)
+            resultados = list(queryset[:20])
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                list(queryset.all()[:20])
+            ms = (time.perf_counter() - inicio) * 1000 / repeticiones
+            primero = resultados[0] if resultados else None
+            self.stdout.write(
+                f"{texto!r}: {ms:.1f} ms, {len(resultados)} resultados, primero: "
+                f"{f'{primero.nombre} {primero.apellido_paterno} ({primero._rank_busqueda:.2f})' if primero else '-'}"
+            )
+            if postgres and ms > max_ms:
+                lentas.append(texto)
+
+        if postgres:
+            plan = buscar(Cliente.objects.all(), 'hernadez').explain()
+            if '_busqueda_' not in plan:
+                self.stdout.write(self.style.WARNING("El plan no usa los índices de búsqueda:\n" + plan))
+        if lentas:
+            raise CommandError(f"Búsquedas arriba de {max_ms} ms: {', '.join(lentas)}")
+        self.stdout.write(self.style.SUCCESS("✔ Benchmark terminado (los datos de prueba se revirtieron)"))
@@ -0,0 +1,88 @@
+import datetime
+import decimal
+import io
+import json
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.base import renderers
+from apps.base.renderers import ORJSONParser, ORJSONRenderer
+from apps.erp.models import Producto, Venta
+from apps.erp.serializers.productos_serializer import ProductoSerializer
+from apps.erp.serializers.ventas_serializer import VentaSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el renderer/parser JSON de DRF contra los de orjson (apps/base/renderers.py) "
+        "con el catálogo de productos, las ventas y un inventario sintético con Decimal y fechas. "
+        "Solo lee datos; no escribe en la BD."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=500, help="Productos y ventas a serializar desde la BD")
+        parser.add_argument('--copias', type=int, default=20, help="Veces que se repiten los registros dentro del payload")
+        parser.add_argument('--repeticiones', type=int, default=10, help="Repeticiones por medición")
+
+    def handle(self, *args, **options):
+        if renderers.orjson is None:
+            raise CommandError("orjson no está instalado: pip install orjson")
+
+        limite, copias = options['limite'], options['copias']
+        payloads = {
+            'productos': self._serializar(ProductoSerializer, Producto.objects.all()[:limite]) * copias,
+            'ventas': self._serializar(
+                VentaSerializer,
+                Venta.objects.select_related('cliente', 'ruta').prefetch_related('detalles')[:limite]
+            ) * copias,
+            'inventario': self._inventario(limite * copias),
+        }
+
+        for nombre, data in payloads.items():
+            drf = JSONRenderer().render(data)
+            rapido = ORJSONRenderer().render(data)
+            if json.loads(drf) != json.loads(rapido):
+                raise CommandError(f"{nombre}: el JSON de orjson no es igual al de DRF")
+
+            ms_drf = self._medir(lambda: JSONRenderer().render(data), options['repeticiones'])
+            ms_rapido = self._medir(lambda: ORJSONRenderer().render(data), options['repeticiones'])
+            ms_parse_drf = self._medir(lambda: JSONParser().parse(io.BytesIO(drf)), options['repeticiones'])
+            ms_parse_rapido = self._medir(lambda: ORJSONParser().parse(io.BytesIO(drf)), options['repeticiones'])
+            self.stdout.write(
+                f"{nombre} ({len(data)} registros, {len(drf) / 1024:.0f} KB): "
+                f"render {ms_drf:.1f} -> {ms_rapido:.1f} ms (x{ms_drf / max(ms_rapido, 0.001):.1f}), "
+                f"parse {ms_parse_drf:.1f} -> {ms_parse_rapido:.1f} ms (x{ms_parse_drf / max(ms_parse_rapido, 0.001):.1f})"
+            )
+        self.stdout.write(self.style.SUCCESS("✔ Benchmark terminado (mismo JSON en todos los payloads)"))
+
+    def _serializar(self, serializer_class, queryset):
+        return serializer_class(queryset, many=True).data
+
+    def _inventario(self, total):
+        """
+        Payload armado a mano (como los reportes): Decimal sin serializer, fechas y UUID
+        """
+        ahora = datetime.datetime.now(datetime.timezone.utc)
+        return [
+            {
+                'id': i,
+                'uuid': uuid.UUID(int=i),
+                'producto': f'PRODUCTO {i % 300}',
+                'cantidad': decimal.Decimal(i % 97) / 4,
+                'costo': decimal.Decimal('12.35') * (i % 13),
+                'caducidad': (ahora + datetime.timedelta(days=i % 365)).date(),
+                'actualizado': ahora - datetime.timedelta(minutes=i),
+                'almacenes': {1: decimal.Decimal('1.5'), 2: decimal.Decimal('0')},
+            }
+            for i in range(total)
+        ]
+
+    def _medir(self, funcion, repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            funcion()
+        return (time.perf_counter() - inicio) * 1000 / repeticiones
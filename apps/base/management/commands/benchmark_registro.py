@@ -0,0 +1,93 @@
+import io
+import json
+import logging
+import os
+import time
+from contextlib import redirect_stdout
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.base.registro import CorrelacionFilter, FormatoJSON, MuestreoDebug, con_correlacion, debug_activo
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el costo por llamada de print() contra el logging estructurado (apps/base/registro.py): "
+        "logger.debug con DEBUG apagado, logger.info en JSON y DEBUG con muestreo. La salida se "
+        "descarta (os.devnull); no toca la BD."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--llamadas', type=int, default=100000, help="Llamadas por medición")
+        parser.add_argument('--muestreo', type=int, default=10, help="Porcentaje de peticiones con DEBUG")
+
+    def handle(self, *args, **options):
+        llamadas = options['llamadas']
+        venta_id, producto_id, cantidad = 1234, 56, 7
+
+        logger = logging.getLogger('apps.base.benchmark_registro')
+        logger.propagate = False
+        with open(os.devnull, 'w') as nulo:
+            handler = logging.StreamHandler(nulo)
+            handler.addFilter(CorrelacionFilter())
+            handler.addFilter(MuestreoDebug())
+            handler.setFormatter(FormatoJSON())
+            logger.handlers = [handler]
+
+            def imprimir():
+                with redirect_stdout(nulo):
+                    for _ in range(llamadas):
+                        print(f"[HELP VENTAS] Venta {venta_id}: faltan {cantidad} del producto {producto_id}")
+
+            def registrar(nivel):
+                def medir():
+                    for _ in range(llamadas):
+                        logger.log(nivel, "Venta %s: faltan %s del producto %s", venta_id, cantidad, producto_id)
+                return medir
+
+            def debug_muestreado(protegido):
+                # Una "petición" de 100 llamadas; solo el --muestreo % conserva su DEBUG
+                def medir():
+                    for i in range(llamadas // 100):
+                        with con_correlacion(f"bench-{i}", i % 100 < options['muestreo']):
+                            for _ in range(100):
+                                if not protegido or debug_activo(logger):
+                                    logger.debug("Venta %s: faltan %s del producto %s", venta_id, cantidad, producto_id)
+                return medir
+
+            logger.setLevel(logging.INFO)
+            resultados = [
+                ('print()', self._medir(imprimir)),
+                ('logger.debug con DEBUG apagado', self._medir(registrar(logging.DEBUG))),
+                ('logger.info en JSON', self._medir(registrar(logging.INFO))),
+            ]
+            logger.setLevel(logging.DEBUG)
+            muestreo = options['muestreo']
+            resultados.append((f"logger.debug con muestreo {muestreo}%", self._medir(debug_muestreado(False))))
+            resultados.append((
+                f"debug_activo() + logger.debug con muestreo {muestreo}%", self._medir(debug_muestreado(True))
+            ))
+            logger.handlers = []
+
+        for nombre, segundos in resultados:
+            self.stdout.write(f"{nombre}: {segundos * 1e9 / llamadas:.0f} ns por llamada")
+
+        #VALIDAR FORMATO
+        salida = io.StringIO()
+        handler = logging.StreamHandler(salida)
+        handler.addFilter(CorrelacionFilter())
+        handler.setFormatter(FormatoJSON())
+        logger.handlers = [handler]
+        with con_correlacion('bench-validar'):
+            logger.info("Venta %s cancelada", venta_id, extra={'venta_id': venta_id})
+        logger.handlers = []
+        registro = json.loads(salida.getvalue())
+        esperado = {'mensaje': 'Venta 1234 cancelada', 'correlacion_id': 'bench-validar', 'venta_id': venta_id}
+        if any(registro.get(clave) != valor for clave, valor in esperado.items()):
+            raise CommandError(f"Registro JSON incorrecto: {registro}")
+        self.stdout.write(self.style.SUCCESS("✔ Benchmark terminado (registro JSON verificado)"))
+
+    def _medir(self, funcion):
+        inicio = time.perf_counter()
+        funcion()
+        return time.perf_counter() - inicio
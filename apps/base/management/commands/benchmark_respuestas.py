@@ -0,0 +1,81 @@
+import gzip
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from apps.base import middleware
+from apps.base.mediciones import AYUDA_REVERTIDOS, datos_revertidos
+from apps.erp.models import Producto
+from apps.usuarios.models import Usuario
+
+
+ENDPOINTS = [
+    '/api/productos/?limit=1000',
+    '/api/productos-mini/',
+    '/api/almacenes-mini/',
+    '/api/rutas-mini/',
+    '/api/inventario/almacen/?almacen_id=1',
+    '/api/direccion/estados/',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide bytes y latencia de los catálogos pesados: respuesta completa, comprimida "
+        "(gzip / brotli) y GET condicional (304). "
+        + AYUDA_REVERTIDOS
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--productos', type=int, default=2000, help="Productos sintéticos a crear")
+        parser.add_argument('--repeticiones', type=int, default=10, help="Repeticiones por medición")
+        parser.add_argument('--endpoint', action='append', help="Endpoint a medir (se puede repetir); por defecto los catálogos pesados")
+
+    def handle(self, *args, **options):
+        # Sin el log de peticiones: escribe en otro hilo, fuera de la transacción que se revierte
+        sin_log = [clase for clase in settings.MIDDLEWARE if not clase.startswith('apps.logger.')]
+        with override_settings(MIDDLEWARE=sin_log), datos_revertidos():
+            self._ejecutar(options['productos'], options['repeticiones'], options['endpoint'] or ENDPOINTS)
+
+    def _ejecutar(self, productos, repeticiones, endpoints):
+        Producto.objects.bulk_create([
+            Producto(codigo=f'BENCH-{i:06d}', nombre=f'PRODUCTO DE PRUEBA {i}', precio_base=10 + i % 50)
+            for i in range(productos)
+        ], batch_size=1000)
+        usuario = Usuario.objects.create(username='benchmark_respuestas', is_superuser=True)
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+
+        codificaciones = ['gzip'] + (['br'] if middleware.brotli is not None else [])
+        for url in endpoints:
+            respuesta = cliente.get(url)
+            if respuesta.status_code != 200:
+                self.stdout.write(self.style.WARNING(f"{url}: {respuesta.status_code}, se omite"))
+                continue
+            etag = respuesta.get('ETag')
+            tamanos = [f"{len(respuesta.content) / 1024:.1f} KB"]
+            for codificacion in codificaciones:
+                comprimida = cliente.get(url, HTTP_ACCEPT_ENCODING=codificacion)
+                tamanos.append(f"{codificacion} {len(comprimida.content) / 1024:.1f} KB")
+                if codificacion == 'gzip' and comprimida.get('Content-Encoding') == 'gzip':
+                    assert gzip.decompress(comprimida.content) == respuesta.content
+
+            ms_completa = self._medir(lambda: cliente.get(url), repeticiones)
+            linea = f"{url}: {', '.join(tamanos)}; 200 en {ms_completa:.1f} ms"
+            if etag:
+                no_modificada = cliente.get(url, HTTP_IF_NONE_MATCH=etag)
+                ms_304 = self._medir(lambda: cliente.get(url, HTTP_IF_NONE_MATCH=etag), repeticiones)
+                linea += f", {no_modificada.status_code} en {ms_304:.1f} ms ({len(no_modificada.content)} bytes)"
+            else:
+                linea += ", sin ETag"
+            self.stdout.write(linea)
+        self.stdout.write(self.style.SUCCESS("✔ Benchmark terminado (los datos de prueba se revirtieron)"))
+
+    def _medir(self, funcion, repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            funcion()
+        return (time.perf_counter() - inicio) * 1000 / repeticiones
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.base.idempotencia import depurar_solicitudes
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina las respuestas guardadas de Idempotency-Key que ya vencieron "
+        "(IDEMPOTENCIA_HORAS). Programar en cron, p. ej. una vez al día."
+    )
+
+    def handle(self, *args, **options):
+        eliminadas = depurar_solicitudes()
+        self.stdout.write(self.style.SUCCESS(f"✔ {eliminadas} respuestas eliminadas"))
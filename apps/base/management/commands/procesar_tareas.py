@@ -0,0 +1,59 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.base.tareas import LOTE, RETENCION_DIAS, procesar, recuperar_abandonadas, depurar
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de la cola de tareas en la base de datos (apps/base/tareas.py). Corre hasta recibir "
+        "SIGTERM / SIGINT; termina la tarea en curso antes de salir. Se pueden correr varios a la vez. "
+        "Con --una-vez procesa lo pendiente y termina (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=LOTE, help="Tareas que se toman por consulta")
+        parser.add_argument('--espera', type=float, default=2, help="Segundos entre consultas cuando no hay tareas")
+        parser.add_argument('--una-vez', dest='una_vez', action='store_true', help="Procesar lo pendiente y salir")
+        parser.add_argument('--retencion-dias', dest='retencion_dias', type=int, default=RETENCION_DIAS,
+                            help="Días que se conservan las tareas terminadas o fallidas")
+
+    def handle(self, *args, **options):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.detener = False
+        if not options['una_vez']:
+            signal.signal(signal.SIGTERM, self._detener)
+            signal.signal(signal.SIGINT, self._detener)
+            self.stdout.write(f"Worker {worker} procesando tareas (Ctrl+C para salir)")
+
+        total_terminadas = total_fallidas = 0
+        ultimo_mantenimiento = 0
+        while not self.detener:
+            # Recuperar tareas de workers caídos y depurar las viejas una vez por minuto
+            if time.monotonic() - ultimo_mantenimiento > 60:
+                recuperadas = recuperar_abandonadas()
+                depuradas = depurar(options['retencion_dias'])
+                if recuperadas or depuradas:
+                    self.stdout.write(f"  {recuperadas} tareas abandonadas recuperadas, {depuradas} depuradas")
+                ultimo_mantenimiento = time.monotonic()
+
+            terminadas, fallidas = procesar(options['lote'], worker)
+            total_terminadas += terminadas
+            total_fallidas += fallidas
+            if terminadas or fallidas:
+                self.stdout.write(f"  {terminadas} terminadas, {fallidas} con error")
+            elif options['una_vez']:
+                break
+            else:
+                time.sleep(options['espera'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {total_terminadas} tareas terminadas, {total_fallidas} con error"
+        ))
+
+    def _detener(self, *args):
+        self.detener = True
@@ -0,0 +1,45 @@
+"""
+Utilidades de los comandos benchmark_*: los datos de prueba se crean en una transacción
+que siempre se revierte y las consultas se cuentan con el registro de la conexión.
+
+    with datos_revertidos():
+        ...crear datos...
+        with capturar_consultas() as consultas:
+            ...operación medida...
+        len(consultas)
+"""
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+AYUDA_REVERTIDOS = "Crea datos de prueba dentro de una transacción que siempre se revierte."
+
+
+class _Revertir(Exception):
+    pass
+
+
+@contextmanager
+def datos_revertidos():
+    """
+    Transacción que se revierte al terminar el bloque (los errores del bloque se propagan)
+    """
+    try:
+        with transaction.atomic():
+            yield
+            raise _Revertir()
+    except _Revertir:
+        pass
+
+
+@contextmanager
+def capturar_consultas(conexion=connection):
+    """
+    CaptureQueriesContext con el registro vacío: guarda máximo 9000 consultas y, lleno,
+    contaría de menos después de los datos de prueba
+    """
+    conexion.queries_log.clear()
+    with CaptureQueriesContext(conexion) as consultas:
+        yield consultas
@@ -0,0 +1,51 @@
+"""
+============================================================================================
+                            COMPRESIÓN DE RESPUESTAS
+============================================================================================
+GZipMiddleware de Django con brotli cuando el cliente lo acepta y el paquete brotli está
+instalado (opcional; sin él se usa gzip). Solo se comprimen respuestas de al menos
+COMPRESION_MIN_BYTES: en las pequeñas el costo de CPU no compensa los bytes ahorrados.
+Como en GZipMiddleware, el ETag se vuelve débil (W/"...") al comprimir.
+"""
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependencia opcional
+    brotli = None
+
+
+ACEPTA_BROTLI = re.compile(r'\bbr\b')
+MIN_BYTES = getattr(settings, 'COMPRESION_MIN_BYTES', 1024)
+# 0-11: 5 comprime parecido a gzip -9 en una fracción del tiempo
+CALIDAD_BROTLI = getattr(settings, 'COMPRESION_CALIDAD_BROTLI', 5)
+
+
+class CompresionMiddleware(GZipMiddleware):
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < MIN_BYTES:
+            return response
+        if (
+            brotli is None
+            or response.streaming
+            or response.has_header('Content-Encoding')
+            or not ACEPTA_BROTLI.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        comprimido = brotli.compress(response.content, quality=CALIDAD_BROTLI)
+        if len(comprimido) >= len(response.content):
+            return response
+        response.content = comprimido
+        response.headers['Content-Length'] = str(len(comprimido))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
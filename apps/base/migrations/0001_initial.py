@@ -0,0 +1,39 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SolicitudIdempotente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=255, verbose_name='Idempotency-Key')),
+                ('metodo', models.CharField(max_length=10, verbose_name='Método HTTP')),
+                ('ruta', models.CharField(max_length=255, verbose_name='Ruta')),
+                ('huella', models.CharField(help_text='SHA-256 de método, ruta y cuerpo', max_length=64, verbose_name='Huella de la Petición')),
+                ('estado', models.CharField(choices=[('EN PROCESO', 'EN PROCESO'), ('TERMINADA', 'TERMINADA')], default='EN PROCESO', max_length=20)),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('content_type', models.CharField(blank=True, default='', max_length=100)),
+                ('respuesta', models.BinaryField(blank=True, null=True)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('expira', models.DateTimeField(db_index=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes_idempotentes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Solicitud Idempotente',
+                'verbose_name_plural': 'Solicitudes Idempotentes',
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'clave'), name='unique_solicitud_idempotente')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:22
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarea',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(help_text='Nombre registrado con @tarea', max_length=100, verbose_name='Tarea')),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('clave', models.CharField(blank=True, help_text='Clave para no duplicar la tarea', max_length=255, null=True, unique=True)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'PENDIENTE'), ('EN PROCESO', 'EN PROCESO'), ('TERMINADA', 'TERMINADA'), ('FALLIDA', 'FALLIDA')], default='PENDIENTE', max_length=20)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('max_intentos', models.PositiveSmallIntegerField(default=5)),
+                ('ejecutar_en', models.DateTimeField(default=django.utils.timezone.now, help_text='No se ejecuta antes de esta fecha (reintentos)')),
+                ('iniciada_en', models.DateTimeField(blank=True, null=True)),
+                ('terminada_en', models.DateTimeField(blank=True, null=True)),
+                ('worker', models.CharField(blank=True, default='', max_length=100)),
+                ('error', models.TextField(blank=True, default='')),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Tarea',
+                'verbose_name_plural': 'Tareas',
+                'indexes': [models.Index(fields=['estado', 'ejecutar_en', 'id'], name='base_tarea_estado_ea585b_idx')],
+            },
+        ),
+    ]
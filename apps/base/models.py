@@ -94,4 +94,90 @@ class BaseDireccion(models.Model):
         self.numero_exterior = self.numero_exterior.upper().strip() if self.numero_exterior else "N/A"
         self.numero_interior = self.numero_interior.upper().strip() if self.numero_interior else "N/A"
         self.calle = self.calle.upper().strip() if self.calle else "N/A"
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+
+"""
+=======================================================================
+            SOLICITUDES IDEMPOTENTES (ENCABEZADO Idempotency-Key)
+=======================================================================
+"""
+class SolicitudIdempotente(models.Model):
+    """
+    Respuesta guardada de una petición POST enviada con Idempotency-Key
+    (ver apps/base/idempotencia.py). La fila se crea al iniciar la petición y
+    funciona como candado: los duplicados esperan y reciben la misma respuesta.
+    """
+    ESTADO_EN_PROCESO = "EN PROCESO"
+    ESTADO_TERMINADA = "TERMINADA"
+    ESTADO_CHOICES = [
+        (ESTADO_EN_PROCESO, ESTADO_EN_PROCESO),
+        (ESTADO_TERMINADA, ESTADO_TERMINADA),
+    ]
+
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, null=True, blank=True, related_name="solicitudes_idempotentes")
+    clave = models.CharField(max_length=255, verbose_name="Idempotency-Key")
+    metodo = models.CharField(max_length=10, verbose_name="Método HTTP")
+    ruta = models.CharField(max_length=255, verbose_name="Ruta")
+    huella = models.CharField(max_length=64, verbose_name="Huella de la Petición", help_text="SHA-256 de método, ruta y cuerpo")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default=ESTADO_EN_PROCESO)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=100, blank=True, default="")
+    respuesta = models.BinaryField(null=True, blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    expira = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Solicitud Idempotente"
+        verbose_name_plural = "Solicitudes Idempotentes"
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'clave'], name='unique_solicitud_idempotente'),
+        ]
+
+    def __str__(self):
+        return f"{self.metodo} {self.ruta} [{self.clave}] {self.estado}"
+
+
+"""
+=======================================================================
+            TAREAS EN SEGUNDO PLANO (COLA EN LA BASE DE DATOS)
+=======================================================================
+"""
+class Tarea(models.Model):
+    """
+    Trabajo encolado con apps.base.tareas.encolar() y ejecutado por
+    python manage.py procesar_tareas. La clave evita encolar dos veces el mismo trabajo.
+    """
+    ESTADO_PENDIENTE = "PENDIENTE"
+    ESTADO_EN_PROCESO = "EN PROCESO"
+    ESTADO_TERMINADA = "TERMINADA"
+    ESTADO_FALLIDA = "FALLIDA"
+    ESTADO_CHOICES = [
+        (ESTADO_PENDIENTE, ESTADO_PENDIENTE),
+        (ESTADO_EN_PROCESO, ESTADO_EN_PROCESO),
+        (ESTADO_TERMINADA, ESTADO_TERMINADA),
+        (ESTADO_FALLIDA, ESTADO_FALLIDA),
+    ]
+
+    nombre = models.CharField(max_length=100, verbose_name="Tarea", help_text="Nombre registrado con @tarea")
+    parametros = models.JSONField(default=dict, blank=True)
+    clave = models.CharField(max_length=255, null=True, blank=True, unique=True, help_text="Clave para no duplicar la tarea")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default=ESTADO_PENDIENTE)
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=5)
+    ejecutar_en = models.DateTimeField(default=timezone.now, help_text="No se ejecuta antes de esta fecha (reintentos)")
+    iniciada_en = models.DateTimeField(null=True, blank=True)
+    terminada_en = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True, default="")
+    error = models.TextField(blank=True, default="")
+    creado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Tarea"
+        verbose_name_plural = "Tareas"
+        indexes = [
+            models.Index(fields=['estado', 'ejecutar_en', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.nombre} #{self.id} {self.estado}"
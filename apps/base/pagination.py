@@ -0,0 +1,249 @@
+"""
+============================================================================================
+                            PAGINACIÓN POR CURSOR (KEYSET)
+============================================================================================
+LimitOffsetPagination hace COUNT(*) y OFFSET: la página 500 de un historial lee y
+descarta todas las filas anteriores. La paginación keyset ordena por (created_at, id)
+descendente y pide "las filas antes de la última que vi", así que cada página cuesta lo
+mismo que la primera si existe el índice compuesto correspondiente.
+
+- El cursor es opaco (base64 de la fecha, el id y la dirección).
+- El conteo es opcional: ?count=exacto hace COUNT(*), ?count=estimado usa el plan de
+  PostgreSQL (EXPLAIN) y en otras bases de datos cae a COUNT(*).
+- Los filtros de la vista se respetan; el orden siempre es (created_at, id) descendente.
+- La vista puede cambiar el campo de fecha con el atributo keyset_campo.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+def contar_estimado(queryset):
+    """
+    Número aproximado de filas según el planificador de PostgreSQL, sin recorrer la tabla
+    """
+    queryset = queryset.order_by()
+    if connections[queryset.db].vendor != 'postgresql':
+        return queryset.count()
+    plan = json.loads(queryset.explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor sobre (created_at, id) descendente
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    count_query_param = 'count'
+    default_limit = api_settings.PAGE_SIZE or 20
+    max_limit = 500
+    campo = 'created_at'
+
+    SIGUIENTE = 'n'
+    ANTERIOR = 'p'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.campo = getattr(view, 'keyset_campo', self.campo)
+        self.limit = self.get_limit(request)
+        self.nulls_mayores = connections[queryset.db].features.nulls_order_largest
+        cursor = self.decode_cursor(request)
+
+        modo_conteo = request.query_params.get(self.count_query_param)
+        self.count = None
+        self.count_estimado = modo_conteo == 'estimado'
+        if modo_conteo == 'exacto':
+            self.count = queryset.order_by().count()
+        elif modo_conteo == 'estimado':
+            self.count = contar_estimado(queryset)
+
+        descendente = (f'-{self.campo}', '-pk')
+        ascendente = (self.campo, 'pk')
+
+        if cursor is None or cursor[2] == self.SIGUIENTE:
+            if cursor is not None:
+                queryset = queryset.filter(self._despues_de(cursor[0], cursor[1]))
+            filas = list(queryset.order_by(*descendente)[:self.limit + 1])
+            self.has_next = len(filas) > self.limit
+            self.has_previous = cursor is not None
+            filas = filas[:self.limit]
+        else:
+            queryset = queryset.filter(self._antes_de(cursor[0], cursor[1]))
+            filas = list(queryset.order_by(*ascendente)[:self.limit + 1])
+            self.has_previous = len(filas) > self.limit
+            self.has_next = True
+            filas = filas[:self.limit][::-1]
+
+        self.page = filas
+        return filas
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+            if limit > 0:
+                return min(limit, self.max_limit)
+        except (KeyError, ValueError):
+            pass
+        return self.default_limit
+
+    #=============================================
+    #         CONDICIONES KEYSET
+    #==============================================
+    def _menor(self, valor):
+        """
+        Filas cuyo campo va después de valor en orden descendente (respetando dónde ordena NULL la BD)
+        """
+        if valor is None:
+            return Q(**{f'{self.campo}__isnull': False}) if self.nulls_mayores else Q(pk__in=[])
+        condicion = Q(**{f'{self.campo}__lt': valor})
+        return condicion if self.nulls_mayores else (condicion | Q(**{f'{self.campo}__isnull': True}))
+
+    def _mayor(self, valor):
+        if valor is None:
+            return Q(pk__in=[]) if self.nulls_mayores else Q(**{f'{self.campo}__isnull': False})
+        condicion = Q(**{f'{self.campo}__gt': valor})
+        return (condicion | Q(**{f'{self.campo}__isnull': True})) if self.nulls_mayores else condicion
+
+    def _igual(self, valor):
+        if valor is None:
+            return Q(**{f'{self.campo}__isnull': True})
+        return Q(**{self.campo: valor})
+
+    def _despues_de(self, valor, pk):
+        return self._menor(valor) | (self._igual(valor) & Q(pk__lt=pk))
+
+    def _antes_de(self, valor, pk):
+        return self._mayor(valor) | (self._igual(valor) & Q(pk__gt=pk))
+
+    #=============================================
+    #         CURSOR
+    #==============================================
+    def _valores(self, fila):
+        if isinstance(fila, dict):
+            return fila.get(self.campo), fila.get('pk', fila.get('id'))
+        return getattr(fila, self.campo), fila.pk
+
+    def encode_cursor(self, fila, direccion):
+        valor, pk = self._valores(fila)
+        datos = [valor.isoformat() if valor is not None else None, pk, direccion]
+        cursor = base64.urlsafe_b64encode(json.dumps(datos, separators=(',', ':')).encode()).decode().rstrip('=')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+            valor, pk, direccion = datos
+            if direccion not in (self.SIGUIENTE, self.ANTERIOR):
+                raise ValueError(direccion)
+            return (datetime.fromisoformat(valor) if valor is not None else None), int(pk), direccion
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound("Cursor inválido")
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], self.SIGUIENTE)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], self.ANTERIOR)
+
+    def get_paginated_response(self, data):
+        respuesta = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        }
+        if self.count is not None:
+            respuesta['count'] = self.count
+            respuesta['count_estimado'] = self.count_estimado
+        respuesta['results'] = data
+        return Response(respuesta)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer', 'description': 'Solo con ?count=exacto o ?count=estimado'},
+                'count_estimado': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor opaco de la página (tomarlo de next/previous)',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.limit_query_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Número de resultados por página (máximo {self.max_limit})',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Incluir total: exacto (COUNT) o estimado (plan de PostgreSQL)',
+                'schema': {'type': 'string', 'enum': ['exacto', 'estimado']},
+            },
+        ]
+
+
+class PaginacionCursorOpcional(LimitOffsetPagination):
+    """
+    LimitOffsetPagination por defecto (compatible con los clientes actuales) y
+    paginación por cursor cuando se envía ?paginacion=cursor o un ?cursor=.
+    """
+    modo_query_param = 'paginacion'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if request.query_params.get(self.modo_query_param) == 'cursor' or request.query_params.get(KeysetPagination.cursor_query_param):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        parametros = super().get_schema_operation_parameters(view)
+        parametros.append({
+            'name': self.modo_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'cursor: paginación por cursor sobre (created_at, id), sin COUNT ni OFFSET',
+            'schema': {'type': 'string', 'enum': ['cursor']},
+        })
+        parametros.extend(
+            parametro for parametro in KeysetPagination().get_schema_operation_parameters(view)
+            if parametro['name'] != KeysetPagination.limit_query_param
+        )
+        return parametros
@@ -0,0 +1,168 @@
+"""
+============================================================================================
+                    PARTICIONES MENSUALES (SOLO POSTGRESQL)
+============================================================================================
+Utilidades para tablas particionadas por rango de fecha, una partición por mes (UTC):
+- <tabla>_pAAAAMM: particiones mensuales, creadas por adelantado con asegurar_particiones().
+- <tabla>_pdefault: recibe lo que no tenga partición para no perder renglones. Si la
+  creación de particiones se atrasa, asegurar_particiones() mueve esos renglones a la
+  partición del mes al crearla (CREATE TABLE ... PARTITION OF fallaría).
+Eliminar un mes completo es DETACH + DROP (sin DELETE ni VACUUM de millones de renglones).
+La llave primaria de la tabla particionada es (id, <columna de la fecha>); el modelo de Django
+sigue usando id.
+Tablas: logger_requestlog (apps/logger/particiones.py) y el historial de movimientos de
+inventario (apps/inventario/helpers/historial.py).
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+
+LIMITE = re.compile(r"TO \('([^']+)'\)")
+
+
+def inicio_mes(fecha):
+    if isinstance(fecha, datetime) and fecha.tzinfo is not None:
+        fecha = fecha.astimezone(dt_timezone.utc)
+    return datetime(fecha.year, fecha.month, 1, tzinfo=dt_timezone.utc)
+
+
+def mes_siguiente(mes):
+    return datetime(mes.year + mes.month // 12, mes.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def mes_anterior(mes):
+    return datetime(mes.year - (mes.month == 1), (mes.month - 2) % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def nombre_particion(tabla, mes):
+    return f"{tabla}_p{mes:%Y%m}"
+
+
+def sql_crear_particion(tabla, mes):
+    return (
+        f"CREATE TABLE IF NOT EXISTS {nombre_particion(tabla, mes)} PARTITION OF {tabla} "
+        f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{mes_siguiente(mes).isoformat()}')"
+    )
+
+
+def _rango_mes(columna, mes):
+    return f"\"{columna}\" >= '{mes.isoformat()}' AND \"{columna}\" < '{mes_siguiente(mes).isoformat()}'"
+
+
+def sql_particion_desde_default(tabla, columna, mes):
+    """
+    Crea la partición del mes cuando la partición default ya tiene renglones de ese mes:
+    la tabla se crea suelta, recibe los renglones y se adjunta
+    """
+    nombre = nombre_particion(tabla, mes)
+    return [
+        f"CREATE TABLE {nombre} (LIKE {tabla} INCLUDING DEFAULTS INCLUDING STORAGE)",
+        f"WITH movidos AS (DELETE FROM {tabla}_pdefault WHERE {_rango_mes(columna, mes)} RETURNING *) "
+        f"INSERT INTO {nombre} SELECT * FROM movidos",
+        f"ALTER TABLE {tabla} ATTACH PARTITION {nombre} "
+        f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{mes_siguiente(mes).isoformat()}')",
+    ]
+
+
+def sql_crear_default(tabla):
+    return f"CREATE TABLE {tabla}_pdefault PARTITION OF {tabla} DEFAULT"
+
+
+def es_particionada(tabla):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [tabla])
+        return cursor.fetchone() is not None
+
+
+def particiones_mensuales(tabla):
+    """
+    {inicio del mes: nombre} de las particiones mensuales existentes
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)", [tabla]
+        )
+        nombres = [fila[0] for fila in cursor.fetchall()]
+    patron = re.compile(rf'^{tabla}_p(\d{{4}})(\d{{2}})$')
+    particiones = {}
+    for nombre in nombres:
+        coincidencia = patron.match(nombre)
+        if coincidencia:
+            anio, mes = (int(valor) for valor in coincidencia.groups())
+            particiones[datetime(anio, mes, 1, tzinfo=dt_timezone.utc)] = nombre
+    return particiones
+
+
+def columna_particion(tabla):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT a.attname FROM pg_partitioned_table p "
+            "JOIN pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0] "
+            "WHERE p.partrelid = to_regclass(%s)", [tabla]
+        )
+        return cursor.fetchone()[0]
+
+
+def _default_con_renglones(cursor, tabla, columna, mes):
+    cursor.execute(
+        f"SELECT to_regclass(%s) IS NOT NULL AND EXISTS "
+        f"(SELECT 1 FROM {tabla}_pdefault WHERE {_rango_mes(columna, mes)})", [f"{tabla}_pdefault"]
+    )
+    return cursor.fetchone()[0]
+
+
+def limite_particion(nombre):
+    """
+    Fin del rango de una partición (None si no existe o no tiene límite superior)
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_get_expr(c.relpartbound, c.oid) FROM pg_class c WHERE c.oid = to_regclass(%s)", [nombre]
+        )
+        fila = cursor.fetchone()
+    coincidencia = LIMITE.search(fila[0] or '') if fila else None
+    return datetime.fromisoformat(coincidencia.group(1)) if coincidencia else None
+
+
+def asegurar_particiones(tabla, desde, meses=2, limite=None):
+    """
+    Crea las particiones del mes de `desde` y de los siguientes `meses` (las anteriores a
+    `limite` ya están cubiertas por otra partición). Retorna las creadas.
+    """
+    existentes = particiones_mensuales(tabla)
+    creadas = []
+    columna = None
+    mes = inicio_mes(desde)
+    with connection.cursor() as cursor:
+        for _ in range(meses + 1):
+            if mes not in existentes and (limite is None or mes >= limite):
+                columna = columna or columna_particion(tabla)
+                if _default_con_renglones(cursor, tabla, columna, mes):
+                    with transaction.atomic():
+                        for sql in sql_particion_desde_default(tabla, columna, mes):
+                            cursor.execute(sql)
+                else:
+                    cursor.execute(sql_crear_particion(tabla, mes))
+                creadas.append(nombre_particion(tabla, mes))
+            mes = mes_siguiente(mes)
+    return creadas
+
+
+def eliminar_particiones(tabla, corte):
+    """
+    DETACH + DROP de los meses que terminan antes del corte. Retorna los nombres eliminados.
+    """
+    eliminadas = []
+    with connection.cursor() as cursor:
+        for mes, nombre in sorted(particiones_mensuales(tabla).items()):
+            if mes_siguiente(mes) > corte:
+                continue
+            cursor.execute(f"ALTER TABLE {tabla} DETACH PARTITION {nombre}")
+            cursor.execute(f"DROP TABLE {nombre}")
+            eliminadas.append(nombre)
+    return eliminadas
@@ -0,0 +1,18 @@
+"""
+Runner de pruebas (TEST_RUNNER en core/settings.py).
+
+La base de pruebas se crea con migrate; el receptor post_migrate de SEPOMEX
+(apps/direccion/signals.py) carga un archivo externo y termina el proceso con
+exit(), así que se desconecta antes de crearla.
+"""
+from django.db.models.signals import post_migrate
+from django.test.runner import DiscoverRunner
+
+
+class EjecutorPruebas(DiscoverRunner):
+
+    def setup_databases(self, **kwargs):
+        from apps.direccion.signals import insertar_datos_iniciales
+
+        post_migrate.disconnect(insertar_datos_iniciales)
+        return super().setup_databases(**kwargs)
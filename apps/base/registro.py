@@ -0,0 +1,149 @@
+"""
+============================================================================================
+                    REGISTRO ESTRUCTURADO (logging en JSON)
+============================================================================================
+Reemplaza los print() de las vistas, helpers y signals. Cada módulo usa su propio logger:
+
+    logger = logging.getLogger(__name__)
+    logger.info("Venta %s cancelada", venta.id)                       # %s, NO f-strings
+    logger.debug("Lote %s sin existencia", lote.id, extra={'producto_id': producto_id})
+
+- El mensaje se formatea solo si el registro pasa el nivel (REGISTRO_NIVEL). Con DEBUG apagado
+  logger.debug() se descarta sin formatear nada; si los argumentos cuestan (consultas, recorrer
+  detalles) se protege el bloque con `if debug_activo(logger):`.
+- FormatoJSON escribe una línea JSON por registro (REGISTRO_FORMATO=texto para desarrollo) con
+  el id de correlación de la petición y los campos de `extra` (con orjson si está instalado).
+- CorrelacionMiddleware toma X-Request-ID (o genera uno), lo regresa en la respuesta y lo deja
+  en un contextvar; las tareas en segundo plano usan `tarea-<id>` (apps/base/tareas.py).
+- MuestreoDebug conserva los registros DEBUG solo en el REGISTRO_MUESTREO_DEBUG % de las
+  peticiones (la decisión es por petición para no cortar una traza a la mitad).
+"""
+import json
+import logging
+import random
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+
+_correlacion = ContextVar('correlacion_id', default='-')
+_muestra_debug = ContextVar('muestra_debug', default=True)
+
+CABECERA = 'X-Request-ID'
+CABECERA_META = 'HTTP_X_REQUEST_ID'
+ID_VALIDO = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Atributos propios de LogRecord: lo demás viene de `extra`
+_ATRIBUTOS_RECORD = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'correlacion_id', 'request'}
+# Un solo encoder (json.dumps con opciones crea uno por llamada); orjson si está instalado
+_JSON = json.JSONEncoder(ensure_ascii=False, default=str).encode
+
+
+def _a_json(datos):
+    if orjson is not None:
+        try:
+            return orjson.dumps(datos, default=str).decode()
+        except TypeError:  # llaves que no son texto en `extra`
+            pass
+    return _JSON(datos)
+
+
+def correlacion_actual():
+    return _correlacion.get()
+
+
+def debug_activo(logger):
+    """
+    True si logger.debug() se escribiría en esta petición (nivel y muestreo). Para proteger
+    bloques de DEBUG cuyos argumentos cuestan: con DEBUG apagado o fuera de la muestra no se
+    crea ni un LogRecord.
+    """
+    return logger.isEnabledFor(logging.DEBUG) and _muestra_debug.get()
+
+
+@contextmanager
+def con_correlacion(correlacion_id, muestra_debug=None):
+    """
+    Fija el id de correlación (y opcionalmente el muestreo de DEBUG) dentro del bloque
+    """
+    token = _correlacion.set(correlacion_id)
+    token_muestra = _muestra_debug.set(muestra_debug) if muestra_debug is not None else None
+    try:
+        yield correlacion_id
+    finally:
+        _correlacion.reset(token)
+        if token_muestra is not None:
+            _muestra_debug.reset(token_muestra)
+
+
+#=============================================
+#         FILTROS Y FORMATO
+#==============================================
+class CorrelacionFilter(logging.Filter):
+
+    def filter(self, record):
+        # django.request registra la respuesta después de salir del middleware: trae el request
+        record.correlacion_id = getattr(getattr(record, 'request', None), 'correlacion_id', None) or _correlacion.get()
+        return True
+
+
+class MuestreoDebug(logging.Filter):
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or _muestra_debug.get()
+
+
+class FormatoJSON(logging.Formatter):
+
+    def formatTime(self, record, datefmt=None):
+        # ISO 8601 con milisegundos y zona (TIME_ZONE): 2025-01-31T13:05:09.123-0600
+        fecha = self.converter(record.created)
+        return f"{time.strftime('%Y-%m-%dT%H:%M:%S', fecha)}.{int(record.msecs):03d}{time.strftime('%z', fecha)}"
+
+    def format(self, record):
+        datos = {
+            'ts': self.formatTime(record),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage(),
+            'correlacion_id': getattr(record, 'correlacion_id', _correlacion.get()),
+        }
+        for clave in record.__dict__.keys() - _ATRIBUTOS_RECORD:
+            if not clave.startswith('_'):
+                datos[clave] = record.__dict__[clave]
+        if record.exc_info:
+            datos['excepcion'] = self.formatException(record.exc_info)
+        return _a_json(datos)
+
+
+#=============================================
+#         MIDDLEWARE
+#==============================================
+class CorrelacionMiddleware:
+    """
+    Id de correlación por petición (X-Request-ID) y decisión de muestreo de DEBUG
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.muestreo = getattr(settings, 'REGISTRO_MUESTREO_DEBUG', 100)
+
+    def __call__(self, request):
+        correlacion_id = request.META.get(CABECERA_META, '')
+        if not ID_VALIDO.match(correlacion_id):
+            correlacion_id = uuid.uuid4().hex
+        muestra = self.muestreo >= 100 or random.random() * 100 < self.muestreo
+        request.correlacion_id = correlacion_id
+        with con_correlacion(correlacion_id, muestra):
+            response = self.get_response(request)
+        response[CABECERA] = correlacion_id
+        return response
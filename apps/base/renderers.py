@@ -0,0 +1,110 @@
+"""
+============================================================================================
+                            JSON RÁPIDO (ORJSON)
+============================================================================================
+Renderer y parser JSON basados en orjson (opcional). Generan el mismo JSON que los de DRF:
+- Decimal sin serializer (agregados, dicts armados a mano) -> número, igual que el
+  JSONEncoder de DRF; los DecimalField de los serializers ya llegan como texto.
+- datetime en UTC termina en 'Z', date/time/UUID como texto, timedelta en segundos.
+- Llaves que no son texto (ids enteros) se convierten a texto.
+- Lazy strings, QuerySets, bytes y arreglos de numpy igual que DRF.
+Si orjson no está instalado se usan el renderer y el parser de DRF.
+
+Global: REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] / ['DEFAULT_PARSER_CLASSES'] (ver settings,
+variable de entorno JSON_ORJSON). Por vista: renderer_classes = [ORJSONRenderer].
+"""
+import datetime
+import decimal
+import uuid
+
+from django.conf import settings
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+
+def _default(obj):
+    """
+    Tipos que orjson no serializa de forma nativa (mismas reglas que el JSONEncoder de DRF)
+    """
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, QuerySet):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, '__getitem__'):
+        try:
+            return dict(obj)
+        except Exception:
+            pass
+    if hasattr(obj, '__iter__'):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    OPCIONES = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+else:
+    OPCIONES = 0
+
+
+def dumps(data, indent=False):
+    """
+    Serializa con orjson (o con el encoder de DRF si orjson no está instalado). Retorna bytes.
+    """
+    if orjson is None:
+        return JSONRenderer().render(data, renderer_context={'indent': 4 if indent else None})
+    ret = orjson.dumps(data, default=_default, option=OPCIONES | (orjson.OPT_INDENT_2 if indent else 0))
+    # Igual que DRF: JSON válido también como subconjunto de JavaScript
+    if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+        ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return ret
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer de DRF con orjson
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        return dumps(data, indent=bool(indent))
+
+
+class ORJSONParser(JSONParser):
+    """
+    JSONParser de DRF con orjson (solo UTF-8; otras codificaciones usan el parser de DRF)
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -1,9 +1,25 @@
 from rest_framework.filters import SearchFilter
 
+from apps.base.busqueda import buscar, tiene_documento
+
 class MinimalSearchFilter(SearchFilter):
     min_length = 3
     def filter_queryset(self, request, queryset, view):
         search = request.query_params.get(self.search_param, None)
         if search and len(search) < self.min_length:
             return queryset.none()
-        return super().filter_queryset(request, queryset, view)
\ No newline at end of file
+        return super().filter_queryset(request, queryset, view)
+
+
+class BusquedaIndexadaFilter(MinimalSearchFilter):
+    """
+    Búsqueda ordenada por relevancia sobre el documento de búsqueda del modelo
+    (apps/base/busqueda.py). Los modelos sin documento usan search_fields como antes.
+    """
+    def filter_queryset(self, request, queryset, view):
+        search = request.query_params.get(self.search_param, None)
+        if not search or not search.strip() or not tiene_documento(queryset.model):
+            return super().filter_queryset(request, queryset, view)
+        if len(search.strip()) < self.min_length:
+            return queryset.none()
+        return buscar(queryset, search)
@@ -6,7 +6,72 @@ from rest_framework_simplejwt.models import TokenUser
 from apps.base.models import BaseModel
 from apps.usuarios.models import Usuario
 
-class BaseSerializer(serializers.ModelSerializer):
+"""
+==============================================
+    RESPUESTAS PARCIALES (fields / omit / expand)
+==============================================
+"""
+def _lista_parametro(request, nombre):
+    valor = request.query_params.get(nombre)
+    if not valor:
+        return None
+    return {campo.strip() for campo in valor.split(',') if campo.strip()}
+
+
+def parametros_respuesta(request):
+    """
+    (fields, omit, expand) de la petición: ?fields=id,codigo,total&omit=detalles&expand=cliente
+    fields es None cuando no se envía (todos los campos). Solo aplica a GET.
+    """
+    if request is None or request.method not in ('GET', 'HEAD'):
+        return None, set(), set()
+    parametros = getattr(request, '_parametros_respuesta', None)
+    if parametros is None:
+        parametros = (
+            _lista_parametro(request, 'fields'),
+            _lista_parametro(request, 'omit') or set(),
+            _lista_parametro(request, 'expand') or set(),
+        )
+        request._parametros_respuesta = parametros
+    return parametros
+
+
+class CamposDinamicosMixin:
+    """
+    Respuestas parciales para el serializer raíz de una petición GET:
+    - ?fields=id,codigo,total solo serializa esos campos
+    - ?omit=detalles,pagos quita campos
+    - ?expand=cliente agrega los serializers anidados de Meta.expandibles
+      {'campo': (SerializerClass, {kwargs})}
+    Los campos quitados no se calculan (los SerializerMethodField no se ejecutan).
+    Los serializers anidados no se recortan.
+    """
+
+    def _es_raiz(self):
+        padre = self.parent
+        return padre is None or (isinstance(padre, serializers.ListSerializer) and padre.parent is None)
+
+    def get_fields(self):
+        campos = super().get_fields()
+        if not self._es_raiz():
+            return campos
+        fields, omit, expand = parametros_respuesta(self.context.get('request'))
+        if fields is None and not omit and not expand:
+            return campos
+
+        if fields is not None:
+            campos = {nombre: campo for nombre, campo in campos.items() if nombre in fields}
+        for nombre in omit:
+            campos.pop(nombre, None)
+        expandibles = getattr(getattr(self, 'Meta', None), 'expandibles', {})
+        for nombre in expand:
+            if nombre in expandibles:
+                clase, kwargs = expandibles[nombre]
+                campos[nombre] = clase(read_only=True, **kwargs)
+        return campos
+
+
+class BaseSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     created_at = serializers.SerializerMethodField(read_only=True)
     updated_at = serializers.SerializerMethodField(read_only=True)
     created_by = serializers.SerializerMethodField(read_only=True)
@@ -0,0 +1,14 @@
+"""
+Registra f_unaccent en las conexiones SQLite para que el documento de búsqueda
+(apps/base/busqueda.py) funcione igual que en PostgreSQL, donde es una función SQL.
+"""
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from apps.base.busqueda import normalizar
+
+
+@receiver(connection_created)
+def registrar_funciones_busqueda(sender, connection, **kwargs):
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function('f_unaccent', 1, normalizar, deterministic=True)
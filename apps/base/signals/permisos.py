@@ -0,0 +1,91 @@
+"""
+Invalidación de la caché de permisos (apps/base/auth/permisosCache.py) y de la
+copia del usuario que usa la autenticación JWT ligera (apps/base/auth/jwtAuth.py).
+Desactivar a un usuario o cambiar su contraseña revoca todos sus tokens.
+Se ejecuta al confirmar la transacción para que otra petición no vuelva a
+cachear los permisos anteriores mientras el cambio aún no es visible.
+
+También siembra los permisos personalizados al terminar migrate (una sola vez).
+"""
+from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.apps import apps as django_apps
+from django.db.models.signals import post_save, post_delete, m2m_changed, post_migrate
+from django.dispatch import receiver
+
+from apps.base.auth.permisosCache import incrementar_version_permisos, invalidar_permisos_usuario
+from apps.base.auth.jwtAuth import invalidar_usuario_token, revocar_tokens_usuario
+from apps.base.auth.permisosIniciales import sembrar_permisos
+from apps.usuarios.models import Usuario
+
+
+def _invalidar_usuarios(usuarios_ids):
+    usuarios_ids = [usuario_id for usuario_id in usuarios_ids if usuario_id]
+    if usuarios_ids:
+        transaction.on_commit(lambda: invalidar_permisos_usuario(*usuarios_ids))
+
+
+def _incrementar_version():
+    transaction.on_commit(incrementar_version_permisos)
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def invalidar_permisos_usuario_guardado(sender, instance, **kwargs):
+    # is_active / is_superuser pueden cambiar en cualquier guardado
+    _invalidar_usuarios([instance.pk])
+    # Copia del usuario que usa la autenticación JWT ligera
+    if instance.pk:
+        usuario_id = instance.pk
+        transaction.on_commit(lambda: invalidar_usuario_token(usuario_id))
+
+
+@receiver(post_save, sender=Usuario)
+def revocar_sesiones_usuario(sender, instance, created, **kwargs):
+    # set_password() deja la contraseña nueva en _password hasta terminar save() (después de post_save)
+    if created or (instance.is_active and instance._password is None):
+        return
+    usuario_id = instance.pk
+    transaction.on_commit(lambda: revocar_tokens_usuario(usuario_id))
+
+
+@receiver(m2m_changed, sender=Usuario.groups.through)
+@receiver(m2m_changed, sender=Usuario.user_permissions.through)
+def invalidar_permisos_relacion_usuario(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        # usuario.groups.add(...) / usuario.user_permissions.add(...)
+        _invalidar_usuarios([instance.pk])
+    elif pk_set:
+        # grupo.user_set.add(...) / permiso.user_set.add(...)
+        _invalidar_usuarios(pk_set)
+    elif action == 'pre_clear':
+        # grupo.user_set.clear(): pk_set no trae los usuarios, se invalidan todos
+        _incrementar_version()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidar_permisos_grupo(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _incrementar_version()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidar_permisos_catalogo(sender, **kwargs):
+    _incrementar_version()
+
+
+@receiver(post_migrate)
+def sembrar_permisos_personalizados(sender, using='default', **kwargs):
+    # post_migrate se emite una vez por app (después de aplicar todas las migraciones);
+    # solo se siembra con la primera. No se usa la última porque el receptor de
+    # apps/direccion/signals.py termina el proceso con exit() en el primer envío.
+    primera = next(app_config for app_config in django_apps.get_app_configs() if app_config.models_module is not None)
+    if sender is not primera:
+        return
+    creados = sembrar_permisos(using=using)
+    if creados:
+        print(f"[PERMISOS post_migrate] {creados} permisos personalizados creados.")
@@ -0,0 +1,28 @@
+"""
+Renueva la versión de los recursos (apps/base/versiones.py) cuando se guarda o elimina
+una instancia de los modelos de RECURSOS_POR_MODELO. Las escrituras en bloque no pasan
+por aquí: llaman a marcar_cambio() / marcar_cambio_inventario() directamente.
+"""
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.base.versiones import marcar_cambio, recursos_de_instancia
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def renovar_version_recursos(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    recursos = recursos_de_instancia(instance)
+    if recursos:
+        marcar_cambio(*recursos)
+
+
+@receiver(m2m_changed)
+def renovar_version_recursos_m2m(sender, instance, action, **kwargs):
+    # p. ej. los proveedores de un producto
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        recursos = recursos_de_instancia(instance)
+        if recursos:
+            marcar_cambio(*recursos)
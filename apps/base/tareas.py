@@ -0,0 +1,220 @@
+"""
+============================================================================================
+                    TAREAS EN SEGUNDO PLANO (COLA EN LA BASE DE DATOS)
+============================================================================================
+Los efectos secundarios pesados de los signals (notificaciones, solicitudes automáticas,
+alertas) no se ejecutan en la petición: se encolan en la tabla Tarea y los ejecuta
+    python manage.py procesar_tareas
+sin ningún broker externo.
+
+- Registro: los módulos `tareas.py` de cada app se importan al iniciar (BaseConfig.ready)
+      @tarea('inventario.notificar_solicitud')
+      def notificar_solicitud(solicitud_id): ...
+- Encolar: encolar('inventario.notificar_solicitud', {'solicitud_id': 5}, clave='solicitud:5')
+  La fila se inserta en la transacción actual: el worker la ve hasta que se confirma (on commit)
+  y desaparece con un rollback, sin perder la tarea si el proceso muere después del commit.
+  Los parámetros deben ser JSON (ids, no instancias).
+- Claves: una tarea con la misma clave no se vuelve a encolar mientras exista la fila
+  (incluye las terminadas y fallidas). depurar() borra esas filas a los TAREAS_RETENCION_DIAS
+  y con ellas sus claves: después la misma clave se puede encolar de nuevo. Las claves solo
+  evitan repeticiones cercanas (varios save() o eventos del mismo cambio); lo que nunca deba
+  repetirse lo tiene que revisar la propia tarea o quien la encola.
+- Worker: toma lotes con SELECT ... FOR UPDATE SKIP LOCKED (varios workers no toman la misma
+  tarea), ejecuta cada una en su transacción y si falla la reprograma con espera exponencial
+  (TAREAS_ESPERA_BASE * 2^intentos, hasta TAREAS_ESPERA_MAXIMA) hasta max_intentos; después
+  queda FALLIDA con el traceback. Las tareas EN PROCESO de un worker que murió se recuperan
+  después de TAREAS_BLOQUEO_SEGUNDOS.
+- TAREAS_EN_LINEA=1 (desarrollo, sin worker): las filas se insertan igual (las claves aplican)
+  y al confirmar la transacción (transaction.on_commit) el mismo proceso ejecuta las tareas
+  pendientes y vencidas, con los mismos reintentos que el worker.
+"""
+import logging
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from apps.base.models import Tarea
+from apps.base.registro import con_correlacion
+
+
+logger = logging.getLogger(__name__)
+
+EN_LINEA = getattr(settings, 'TAREAS_EN_LINEA', False)
+LOTE = getattr(settings, 'TAREAS_LOTE', 20)
+MAX_INTENTOS = getattr(settings, 'TAREAS_MAX_INTENTOS', 5)
+ESPERA_BASE = getattr(settings, 'TAREAS_ESPERA_BASE', 10)
+ESPERA_MAXIMA = getattr(settings, 'TAREAS_ESPERA_MAXIMA', 3600)
+BLOQUEO_SEGUNDOS = getattr(settings, 'TAREAS_BLOQUEO_SEGUNDOS', 600)
+RETENCION_DIAS = getattr(settings, 'TAREAS_RETENCION_DIAS', 7)
+
+TAREAS = {}
+
+
+def tarea(nombre, max_intentos=MAX_INTENTOS):
+    """
+    Registra la función como tarea. La función recibe los parámetros encolados como kwargs.
+    """
+    def decorador(funcion):
+        funcion.nombre_tarea = nombre
+        funcion.max_intentos = max_intentos
+        TAREAS[nombre] = funcion
+        return funcion
+    return decorador
+
+
+#=============================================
+#         ENCOLAR
+#==============================================
+def encolar(nombre, parametros=None, clave=None, retraso=0):
+    """
+    Encola una tarea (se ejecuta después del commit). Si la clave ya existe no se encola
+    (las claves de tareas depuradas se pueden volver a usar).
+    """
+    encolar_lote(nombre, [parametros or {}], [clave], retraso)
+
+
+def encolar_lote(nombre, lista_parametros, claves=None, retraso=0):
+    """
+    Encola varias tareas con un solo INSERT (claves opcionales, una por tarea)
+    """
+    funcion = TAREAS.get(nombre)
+    if funcion is None:
+        raise LookupError(f"Tarea no registrada: {nombre}")
+    claves = claves or [None] * len(lista_parametros)
+
+    ejecutar_en = timezone.now() + timedelta(seconds=retraso)
+    Tarea.objects.bulk_create([
+        Tarea(nombre=nombre, parametros=parametros, clave=clave,
+              max_intentos=funcion.max_intentos, ejecutar_en=ejecutar_en)
+        for parametros, clave in zip(lista_parametros, claves)
+    ], ignore_conflicts=any(claves))
+
+    if EN_LINEA:
+        transaction.on_commit(procesar_en_linea)
+
+
+#=============================================
+#         WORKER
+#==============================================
+def espera_reintento(intentos):
+    """
+    Segundos antes del siguiente intento: exponencial con un 10 % de variación
+    """
+    espera = min(ESPERA_BASE * 2 ** max(intentos - 1, 0), ESPERA_MAXIMA)
+    return espera * random.uniform(0.9, 1.1)
+
+
+def tomar(lote=LOTE, worker=''):
+    """
+    Marca EN PROCESO hasta `lote` tareas pendientes y vencidas. Las filas bloqueadas por otro
+    worker se saltan (SKIP LOCKED; en SQLite la escritura ya es exclusiva).
+    """
+    ahora = timezone.now()
+    with transaction.atomic():
+        tareas = list(
+            Tarea.objects.select_for_update(skip_locked=True).filter(
+                estado=Tarea.ESTADO_PENDIENTE, ejecutar_en__lte=ahora
+            ).order_by('ejecutar_en', 'id')[:lote]
+        )
+        if tareas:
+            Tarea.objects.filter(pk__in=[tarea.pk for tarea in tareas]).update(
+                estado=Tarea.ESTADO_EN_PROCESO, iniciada_en=ahora, worker=worker, intentos=F('intentos') + 1
+            )
+    for tarea in tareas:
+        tarea.estado = Tarea.ESTADO_EN_PROCESO
+        tarea.intentos += 1
+    return tareas
+
+
+def ejecutar(tarea):
+    """
+    Ejecuta la tarea en su transacción y guarda el resultado. Retorna True si terminó.
+    """
+    try:
+        funcion = TAREAS.get(tarea.nombre)
+        if funcion is None:
+            raise LookupError(f"Tarea no registrada: {tarea.nombre}")
+        with con_correlacion(f"tarea-{tarea.id}"), transaction.atomic():
+            funcion(**tarea.parametros)
+    except Exception:
+        ahora = timezone.now()
+        if tarea.intentos >= tarea.max_intentos:
+            cambios = {'estado': Tarea.ESTADO_FALLIDA, 'terminada_en': ahora}
+        else:
+            cambios = {
+                'estado': Tarea.ESTADO_PENDIENTE,
+                'ejecutar_en': ahora + timedelta(seconds=espera_reintento(tarea.intentos)),
+            }
+        logger.warning(
+            "Tarea %s (%s) falló en el intento %s/%s", tarea.id, tarea.nombre, tarea.intentos, tarea.max_intentos,
+            exc_info=True, extra={'tarea_id': tarea.id, 'estado': cambios['estado']}
+        )
+        Tarea.objects.filter(pk=tarea.pk).update(error=traceback.format_exc(), **cambios)
+        return False
+
+    Tarea.objects.filter(pk=tarea.pk).update(estado=Tarea.ESTADO_TERMINADA, terminada_en=timezone.now(), error='')
+    return True
+
+
+def procesar_en_linea():
+    """
+    TAREAS_EN_LINEA: ejecuta en este proceso las tareas pendientes y vencidas (sin
+    close_old_connections, corre dentro de la petición que las encoló)
+    """
+    while True:
+        tareas = tomar(worker='en-linea')
+        if not tareas:
+            return
+        for tarea in tareas:
+            ejecutar(tarea)
+
+
+def recuperar_abandonadas(segundos=BLOQUEO_SEGUNDOS):
+    """
+    Regresa a PENDIENTE (o FALLIDA sin intentos) las tareas EN PROCESO de workers que murieron
+    """
+    ahora = timezone.now()
+    abandonadas = Tarea.objects.filter(
+        estado=Tarea.ESTADO_EN_PROCESO, iniciada_en__lt=ahora - timedelta(seconds=segundos)
+    )
+    fallidas = abandonadas.filter(intentos__gte=F('max_intentos')).update(
+        estado=Tarea.ESTADO_FALLIDA, terminada_en=ahora, error='Tarea abandonada por el worker'
+    )
+    return fallidas + abandonadas.update(estado=Tarea.ESTADO_PENDIENTE, ejecutar_en=ahora)
+
+
+def procesar(lote=LOTE, worker=''):
+    """
+    Toma y ejecuta un lote. Retorna (terminadas, fallidas).
+    """
+    close_old_connections()
+    terminadas = fallidas = 0
+    for tarea in tomar(lote, worker):
+        if ejecutar(tarea):
+            terminadas += 1
+        else:
+            fallidas += 1
+    return terminadas, fallidas
+
+
+def depurar(dias=RETENCION_DIAS, lote=1000):
+    """
+    Borra por lotes las tareas terminadas o fallidas con más de `dias` días. Retorna cuántas.
+    Sus claves quedan libres: encolar() con la misma clave vuelve a crear la tarea.
+    """
+    vencidas = Tarea.objects.filter(
+        estado__in=[Tarea.ESTADO_TERMINADA, Tarea.ESTADO_FALLIDA],
+        terminada_en__lt=timezone.now() - timedelta(days=dias)
+    )
+    total = 0
+    while True:
+        ids = list(vencidas.order_by().values_list('pk', flat=True)[:lote])
+        if not ids:
+            return total
+        borradas, _ = Tarea.objects.filter(pk__in=ids).delete()
+        total += borradas
@@ -1,3 +1,107 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from apps.base import tareas
+from apps.base.auth.jwtAuth import _llave_corte_usuario, revocar_tokens_usuario, validar_revocacion
+from apps.base.models import Tarea
+
+
+EJECUCIONES = []
+
+
+@tareas.tarea('pruebas.falla', max_intentos=2)
+def tarea_falla(motivo):
+    raise RuntimeError(motivo)
+
+
+@tareas.tarea('pruebas.registra')
+def tarea_registra(valor):
+    EJECUCIONES.append(valor)
+
+
+class ReintentosTareaTests(TestCase):
+    """
+    Una tarea que falla se reprograma con espera exponencial hasta max_intentos
+    """
+
+    def setUp(self):
+        EJECUCIONES.clear()
+
+    def test_reintento_y_fallida(self):
+        tareas.encolar('pruebas.falla', {'motivo': 'SIN CONEXION'})
+        antes = timezone.now()
+        with self.assertLogs('apps.base.tareas', 'WARNING'):
+            self.assertEqual(tareas.procesar(), (0, 1))
+
+        tarea = Tarea.objects.get()
+        self.assertEqual(tarea.estado, Tarea.ESTADO_PENDIENTE)
+        self.assertEqual(tarea.intentos, 1)
+        self.assertGreater(tarea.ejecutar_en, antes)
+        # No se toma antes de su espera
+        self.assertEqual(tareas.procesar(), (0, 0))
+
+        Tarea.objects.update(ejecutar_en=timezone.now())
+        with self.assertLogs('apps.base.tareas', 'WARNING') as registro:
+            self.assertEqual(tareas.procesar(), (0, 1))
+        self.assertIn('2/2', registro.output[0])
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, Tarea.ESTADO_FALLIDA)
+        self.assertEqual(tarea.intentos, 2)
+        self.assertIsNotNone(tarea.terminada_en)
+        self.assertIn('SIN CONEXION', tarea.error)
+
+    def test_espera_reintento(self):
+        for intentos in range(1, 6):
+            espera = tareas.ESPERA_BASE * 2 ** (intentos - 1)
+            self.assertTrue(espera * 0.9 <= tareas.espera_reintento(intentos) <= espera * 1.1)
+        self.assertLessEqual(tareas.espera_reintento(50), tareas.ESPERA_MAXIMA * 1.1)
+
+    def test_clave_no_repite_hasta_depurar(self):
+        tareas.encolar('pruebas.registra', {'valor': 1}, clave='pruebas:1')
+        tareas.encolar('pruebas.registra', {'valor': 1}, clave='pruebas:1')
+        self.assertEqual(tareas.procesar(), (1, 0))
+        tareas.encolar('pruebas.registra', {'valor': 1}, clave='pruebas:1')
+        self.assertEqual(tareas.procesar(), (0, 0))
+        self.assertEqual(EJECUCIONES, [1])
+
+        # Depurada la fila, la clave se puede volver a encolar
+        Tarea.objects.update(terminada_en=timezone.now() - timedelta(days=tareas.RETENCION_DIAS + 1))
+        self.assertEqual(tareas.depurar(), 1)
+        tareas.encolar('pruebas.registra', {'valor': 1}, clave='pruebas:1')
+        self.assertEqual(tareas.procesar(), (1, 0))
+        self.assertEqual(EJECUCIONES, [1, 1])
+
+    @mock.patch('apps.base.tareas.EN_LINEA', True)
+    def test_en_linea_respeta_claves(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tareas.encolar('pruebas.registra', {'valor': 2}, clave='pruebas:2')
+            tareas.encolar('pruebas.registra', {'valor': 2}, clave='pruebas:2')
+        with self.captureOnCommitCallbacks(execute=True):
+            tareas.encolar('pruebas.registra', {'valor': 2}, clave='pruebas:2')
+
+        self.assertEqual(EJECUCIONES, [2])
+        self.assertEqual(Tarea.objects.get().estado, Tarea.ESTADO_TERMINADA)
+
+
+class RevocacionTokenTests(TestCase):
+    """
+    El corte por usuario revoca los tokens emitidos antes de él, no los del mismo segundo
+    """
+
+    def _token(self, iat):
+        return {'jti': f'jti-{iat}', 'user_id': 7, 'iat': iat}
+
+    def test_corte_mismo_segundo(self):
+        revocar_tokens_usuario(7)
+        corte = cache.get(_llave_corte_usuario(7))
 
-# Create your tests here.
+        # Emitido en el mismo segundo (p. ej. el inicio de sesión tras cambiar la contraseña)
+        validar_revocacion(self._token(corte))
+        validar_revocacion(self._token(corte + 1))
+        with self.assertRaises(AuthenticationFailed):
+            validar_revocacion(self._token(corte - 1))
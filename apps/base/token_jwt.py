@@ -1,6 +1,17 @@
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.contrib.auth import get_user_model
+from rest_framework import serializers, status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from apps.base.auth.jwtAuth import revocar_token, revocar_tokens_usuario, validar_revocacion
+
+
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
@@ -9,6 +20,73 @@ class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['name'] = f'{user.full_name()}'
         token['email'] = user.email
         token['is_superuser'] = user.is_superuser
-        token['caja_abierta'] = True if  user.get_mi_caja() is not None else False
+        # caja_abierta ya no va en el token (costaba una consulta por emisión y quedaba
+        # desactualizada al abrir/cerrar caja); se consulta en mi-data
         #token['permissions'] = list(user.get_all_permissions())
-        return token
\ No newline at end of file
+        return token
+
+
+class MyTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Refresh con revocación: rechaza refresh tokens revocados y, al rotar,
+    revoca el refresh usado para que no pueda reutilizarse.
+    """
+
+    def validate(self, attrs):
+        try:
+            refresh = self.token_class(attrs["refresh"])
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        validar_revocacion(refresh)
+
+        user = get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            revocar_token(refresh)
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data["refresh"] = str(refresh)
+
+        return data
+
+
+class RevocarTokenSerializer(serializers.Serializer):
+    refresh = serializers.CharField(required=False, help_text="Refresh token a revocar")
+    todas = serializers.BooleanField(
+        required=False, default=False, help_text="Cerrar todas las sesiones del usuario (todos sus tokens)"
+    )
+
+
+class RevocarTokenView(APIView):
+    """
+    Cierra la sesión: revoca el access token de la petición y el refresh token enviado.
+    Con todas=true revoca todos los tokens emitidos hasta ahora para el usuario.
+    """
+    permission_classes = [AllowAny]
+    serializer_class = RevocarTokenSerializer
+
+    def post(self, request):
+        serializer = RevocarTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        usuario_id = None
+        if isinstance(request.auth, AccessToken):
+            revocar_token(request.auth)
+            usuario_id = request.auth.get(api_settings.USER_ID_CLAIM)
+        refresh = serializer.validated_data.get('refresh')
+        if refresh:
+            try:
+                refresh = RefreshToken(refresh)
+            except TokenError as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            revocar_token(refresh)
+            usuario_id = usuario_id or refresh.get(api_settings.USER_ID_CLAIM)
+        if serializer.validated_data['todas'] and usuario_id:
+            revocar_tokens_usuario(usuario_id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
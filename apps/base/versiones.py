@@ -0,0 +1,164 @@
+"""
+============================================================================================
+                    VERSIONES DE RECURSOS (ETAG / LAST-MODIFIED)
+============================================================================================
+Cada recurso ('productos', 'almacenes', 'inventario:<almacen_id>', ...) tiene en la caché
+la marca de tiempo de su último cambio. Las escrituras la renuevan al confirmar la
+transacción: signals para save/delete (apps/base/signals/versiones.py) y marcar_cambio()
+en las escrituras en bloque (bulk_create / bulk_update / queryset.update).
+
+Las vistas con RespuestaCondicionalMixin (apps/base/views.py) arman el ETag con las
+versiones de sus recursos, el usuario y la URL; si el cliente manda el mismo ETag
+(If-None-Match) o una fecha igual o posterior (If-Modified-Since) responden 304 sin
+ejecutar la consulta.
+
+Las versiones deben vivir en una caché compartida por todos los workers (Redis o la
+tabla de la BD, ver CACHES en core/settings.py). Con una caché por proceso un worker no
+ve los cambios hechos en otro y respondería 304 con datos viejos: en ese caso las
+respuestas condicionales se desactivan (versiones_compartidas()).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from apps.base.auth.permisosCache import version_permisos
+
+
+PREFIJO = 'version_recurso:'
+
+# Backends de caché que no comparten datos entre procesos
+CACHES_POR_PROCESO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# modelo -> recursos que cambian cuando se guarda o elimina una instancia
+# ('{campo}' se sustituye con el valor de la instancia)
+RECURSOS_POR_MODELO = {
+    'erp.Producto': ('productos',),
+    'erp.Categoria': ('productos',),
+    'contabilidad.UnidadSat': ('productos',),
+    'erp.Proveedor': ('productos',),
+    'erp.Cliente': ('clientes',),
+    'erp.Compra': ('compras',),
+    'erp.CompraDetalle': ('compras',),
+    'erp.Almacen': ('almacenes',),
+    'erp.Rutas': ('rutas',),
+    'erp.UnidadVehicular': ('rutas',),
+    'usuarios.Usuario': ('usuarios',),
+    'inventario.LoteInventario': ('inventario:{almacen_id}',),
+    'inventario.Piso': ('ubicaciones',),
+    'inventario.Zona': ('ubicaciones',),
+    'inventario.Rack': ('ubicaciones',),
+    'direccion.Estado': ('sepomex',),
+    'direccion.Municipio': ('sepomex',),
+    'direccion.CodigoPostal': ('sepomex',),
+    'direccion.Colonia': ('sepomex',),
+}
+
+
+def versiones_compartidas():
+    """
+    True si la caché por defecto la comparten todos los workers
+    """
+    return settings.CACHES['default']['BACKEND'] not in CACHES_POR_PROCESO
+
+
+def recurso_inventario(almacen_id):
+    return f'inventario:{almacen_id}'
+
+
+def versiones(recursos):
+    """
+    {recurso: marca de tiempo del último cambio}. Un recurso sin marca (caché vacía)
+    se toma como modificado ahora.
+    """
+    llaves = {PREFIJO + recurso: recurso for recurso in recursos}
+    encontradas = cache.get_many(list(llaves))
+    faltantes = [llave for llave in llaves if llave not in encontradas]
+    if faltantes:
+        ahora = time.time()
+        for llave in faltantes:
+            cache.add(llave, ahora, timeout=None)
+        encontradas.update(cache.get_many(faltantes))
+    return {recurso: encontradas.get(llave, time.time()) for llave, recurso in llaves.items()}
+
+
+def _renovar(recursos):
+    ahora = time.time()
+    cache.set_many({PREFIJO + recurso: ahora for recurso in recursos}, timeout=None)
+
+
+def marcar_cambio(*recursos):
+    """
+    Renueva la versión de los recursos al confirmar la transacción (de inmediato si no hay
+    una abierta), para que ninguna petición guarde los datos anteriores con la versión nueva
+    """
+    recursos = [recurso for recurso in dict.fromkeys(recursos) if recurso]
+    if recursos:
+        transaction.on_commit(lambda: _renovar(recursos))
+
+
+def marcar_cambio_inventario(lotes):
+    """
+    Renueva el inventario de los almacenes de los lotes (escrituras en bloque)
+    """
+    marcar_cambio(*{recurso_inventario(lote.almacen_id) for lote in lotes if lote.almacen_id})
+
+
+def recursos_de_instancia(instancia):
+    recursos = RECURSOS_POR_MODELO.get(instancia._meta.label, ())
+    return [recurso.format_map(vars(instancia)) for recurso in recursos]
+
+
+#=============================================
+#         PETICIONES CONDICIONALES
+#==============================================
+def etiqueta_respuesta(request, recursos):
+    """
+    (etag, última modificación) de la respuesta a la petición con las versiones actuales
+    """
+    marcas = versiones(recursos)
+    usuario = getattr(request, 'user', None)
+    llave = "|".join([
+        *(f"{recurso}={marcas[recurso]!r}" for recurso in sorted(marcas)),
+        request.get_full_path(),
+        str(getattr(usuario, 'pk', '')),
+        str(version_permisos()),
+        request.META.get('HTTP_ACCEPT', ''),
+    ])
+    return f'"{hashlib.md5(llave.encode()).hexdigest()}"', max(marcas.values())
+
+
+def no_modificado(request, etag, modificado):
+    """
+    True si la copia del cliente sigue vigente. If-None-Match tiene prioridad sobre
+    If-Modified-Since; la compresión vuelve débil el ETag (W/"..."), se compara sin el prefijo.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etiquetas = parse_etags(if_none_match)
+        return '*' in etiquetas or etag in (etiqueta.removeprefix('W/') for etiqueta in etiquetas)
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and puede_enviar_fecha(modificado) and int(modificado) <= if_modified_since
+
+
+def puede_enviar_fecha(modificado):
+    """
+    Last-Modified tiene resolución de segundos: solo se usa cuando ya pasó el segundo del
+    último cambio (otro cambio en ese mismo segundo tendría la misma fecha)
+    """
+    return time.time() >= int(modificado) + 1
+
+
+def encabezados_version(response, etag, modificado):
+    response['ETag'] = etag
+    if puede_enviar_fecha(modificado):
+        response['Last-Modified'] = http_date(int(modificado))
+    # Cada cliente guarda su copia y la valida en cada petición
+    response['Cache-Control'] = 'private, no-cache'
+    return response
@@ -1,3 +1,78 @@
-from django.shortcuts import render
+from rest_framework import status
+from rest_framework.response import Response
 
-# Create your views here.
+from apps.base.versiones import etiqueta_respuesta, no_modificado, encabezados_version, versiones_compartidas
+
+
+class CamposDinamicosViewMixin:
+    """
+    Precarga solo las relaciones de los campos que el serializer va a mostrar
+    (incluye ?fields / ?omit / ?expand, ver CamposDinamicosMixin en apps/base/serializer.py).
+
+    relaciones_por_campo = {
+        'cliente_nombre': {'select': ['cliente']},
+        'detalles': {'prefetch': ['detalles__lotes_utilizados']},
+    }
+    """
+    relaciones_por_campo = {}
+
+    def optimizar_relaciones(self, queryset):
+        campos = self.get_serializer().fields
+        select, prefetch = [], []
+        for campo, relaciones in self.relaciones_por_campo.items():
+            if campo in campos:
+                select.extend(relaciones.get('select', []))
+                prefetch.extend(relaciones.get('prefetch', []))
+        if select:
+            queryset = queryset.select_related(*dict.fromkeys(select))
+        if prefetch:
+            queryset = queryset.prefetch_related(*dict.fromkeys(prefetch))
+        return queryset
+
+    def get_queryset(self):
+        return self.optimizar_relaciones(super().get_queryset())
+
+
+class NoModificado(Exception):
+    pass
+
+
+class RespuestaCondicionalMixin:
+    """
+    GET condicional con ETag / Last-Modified a partir de las versiones de los recursos
+    (apps/base/versiones.py). Si la copia del cliente sigue vigente responde 304 antes de
+    ejecutar la consulta (después de autenticar y revisar permisos).
+
+    recursos_version = ('productos',)
+    o get_recursos_version() cuando dependen de la petición (p. ej. el almacén).
+    Con una caché por proceso (LocMem / Dummy) responde siempre completo, sin ETag.
+    """
+    recursos_version = ()
+
+    def get_recursos_version(self):
+        return self.recursos_version
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._version_respuesta = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+        recursos = self.get_recursos_version()
+        if not recursos or not versiones_compartidas():
+            return
+        etag, modificado = etiqueta_respuesta(request, recursos)
+        self._version_respuesta = (etag, modificado)
+        if no_modificado(request, etag, modificado):
+            raise NoModificado()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NoModificado):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        version = getattr(self, '_version_respuesta', None)
+        if version and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            encabezados_version(response, *version)
+        return response
@@ -10,6 +10,8 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiRespon
 from drf_spectacular.types import OpenApiTypes
 
 from apps.base.serachFilter import MinimalSearchFilter
+from apps.base.pagination import PaginacionCursorOpcional
+from apps.base.idempotencia import idempotente
 from apps.credito.models import CreditoCliente, PagosCredito
 from apps.credito.serializers.credito import (
     CreditoClienteSerializer,
@@ -595,6 +597,7 @@ class PagosCreditoViewSet(viewsets.ModelViewSet):
     - GET /api/pagos-credito/por_cliente/{cliente_id}/ - Pagos de un cliente
     """
     permission_classes = [IsAuthenticated]
+    pagination_class = PaginacionCursorOpcional
     
     def get_queryset(self):
         """Queryset con select_related para optimizar consultas"""
@@ -1032,6 +1035,7 @@ class PagosCreditoViewSet(viewsets.ModelViewSet):
         tags=['Pagos de Crédito']
     )
     @action(detail=False, methods=['post'], url_path='registrar-masivo')
+    @idempotente
     def registrar_masivo(self, request):
         """
         Registrar pagos masivos a múltiples créditos
@@ -10,6 +10,7 @@ from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiRespon
 from drf_spectacular.types import OpenApiTypes
 
 from apps.base.serachFilter import MinimalSearchFilter
+from apps.base.idempotencia import idempotente
 from apps.credito.models import CreditoProveedor, PagosCreditoProveedor
 from apps.credito.serializers.credito_proveedor import (
     CreditoProveedorSerializer,
@@ -755,6 +756,7 @@ class PagosCreditoProveedorViewSet(viewsets.ModelViewSet):
         tags=['Pagos Crédito Proveedor']
     )
     @action(detail=False, methods=['post'], url_path='registrar-masivo')
+    @idempotente
     def registrar_masivo(self, request):
         """Registrar pagos masivos a múltiples créditos de proveedor"""
         serializer = PagoCreditoProveedorCreateMasivoSerializer(
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0006_condicionpago'),
+        ('credito', '0004_creditoproveedor_pagoscreditoproveedor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pagoscredito',
+            index=models.Index(fields=['created_at', 'id'], name='credito_pag_created_76b94f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pagoscredito',
+            index=models.Index(fields=['credito', 'created_at', 'id'], name='credito_pag_credito_b0dcd9_idx'),
+        ),
+    ]
@@ -99,6 +99,13 @@ class PagosCredito(BaseModel):
     monto = models.DecimalField(max_digits=20, decimal_places=2)
     metodo_pago = models.ForeignKey(MetodoPago, on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        #PAGINACIÓN POR CURSOR (created_at, id)
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['credito', 'created_at', 'id']),
+        ]
+
 
 
 class CreditoProveedor(BaseModel):
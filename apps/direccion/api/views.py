@@ -2,14 +2,16 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import viewsets,permissions, status
 
+from apps.base.views import RespuestaCondicionalMixin
 from apps.direccion.models import CodigoPostal, Colonia, Municipio, Estado
 from apps.direccion.serializers.estado import EstadoSerializer
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 
 
 
-class EstadoListAPIView(APIView):
+class EstadoListAPIView(RespuestaCondicionalMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
+    recursos_version = ('sepomex',)
 
     def get(self, request):
         estados = Estado.objects.all().order_by('nombre')
@@ -60,9 +62,10 @@ class EstadoListAPIView(APIView):
         )
     }
 )
-class DesgloseDireccionAPIView(APIView):
+class DesgloseDireccionAPIView(RespuestaCondicionalMixin, APIView):
    
     permission_classes = [permissions.IsAuthenticated]
+    recursos_version = ('sepomex',)
 
     def get(self, request):
         codigo_postal = request.GET.get('codigo_postal')
@@ -0,0 +1,54 @@
+from rest_framework import status, serializers
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+
+from apps.erp.helpers.busqueda_global import buscar_global, TIPOS, LIMITE_DEFAULT, LIMITE_MAXIMO, MIN_CARACTERES
+
+
+class BusquedaGlobalAPIView(APIView):
+    """
+    Búsqueda global para el buscador del front: una consulta para todos los tipos
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Búsqueda global",
+        description=(
+            f"Los mejores resultados por tipo ({', '.join(TIPOS)}) con una sola consulta al índice de búsqueda. "
+            f"Solo incluye los tipos que el usuario puede ver. Mínimo {MIN_CARACTERES} caracteres."
+        ),
+        parameters=[
+            OpenApiParameter(name='q', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, description='Texto a buscar', required=True),
+            OpenApiParameter(name='tipos', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, description='Tipos separados por coma (todos por defecto)', required=False),
+            OpenApiParameter(name='limite', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, description=f'Resultados por tipo (default {LIMITE_DEFAULT}, máximo {LIMITE_MAXIMO})', required=False),
+        ],
+        responses={
+            200: inline_serializer(
+                name='BusquedaGlobalResponse',
+                fields={
+                    'q': serializers.CharField(),
+                    'resultados': serializers.DictField(child=serializers.ListField(child=serializers.DictField())),
+                }
+            )
+        },
+        tags=['Búsqueda']
+    )
+    def get(self, request):
+        texto = request.query_params.get('q', '')
+        tipos = [tipo.strip() for tipo in request.query_params.get('tipos', '').split(',') if tipo.strip()] or None
+        if tipos and any(tipo not in TIPOS for tipo in tipos):
+            return Response(
+                {"detail": f"Tipos válidos: {', '.join(TIPOS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limite = int(request.query_params.get('limite', LIMITE_DEFAULT))
+        except (TypeError, ValueError):
+            limite = LIMITE_DEFAULT
+
+        resultados = buscar_global(request.user, texto, tipos=tipos, limite=limite)
+        return Response({'q': texto, 'resultados': resultados}, status=status.HTTP_200_OK)
@@ -6,6 +6,8 @@ from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
 
 from apps.erp.models import CajaTransaccion, PagosVenta, CajaApertura, Venta
+from apps.base.pagination import PaginacionCursorOpcional
+from apps.base.idempotencia import idempotente
 from apps.erp.serializers.caja.movimientos import (
     MovimientoCajaVentaSerializer,
     MovimientoCajaTransaccionSerializer,
@@ -93,6 +95,7 @@ class MovimientoCajaViewSet(viewsets.GenericViewSet):
         tags=['Cajas - Movimientos']
     )
     @action(detail=False, methods=['post'], url_path='registrar-pago-venta')
+    @idempotente
     def registrar_pago_venta(self, request):
         """
         Registrar pago de una venta en la caja del usuario
@@ -209,6 +212,7 @@ class MovimientoCajaViewSet(viewsets.GenericViewSet):
         tags=['Cajas - Movimientos']
     )
     @action(detail=False, methods=['post'], url_path='registrar-salida-gasto')
+    @idempotente
     def registrar_salida_gasto(self, request):
         """
         Registrar una salida o gasto de caja
@@ -262,6 +266,7 @@ class TransaccionCajaViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     """
     permission_classes = [IsAuthenticated]
     serializer_class = MovimientoCajaTransaccionSerializer
+    pagination_class = PaginacionCursorOpcional
     
     def get_queryset(self):
         """
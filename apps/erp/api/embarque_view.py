@@ -5,6 +5,7 @@ from rest_framework.decorators import api_view, permission_classes
 from django.db import transaction
 from django.db.models import Sum
 from django.core.exceptions import ValidationError
+import logging
 
 from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiParameter, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
@@ -16,6 +17,9 @@ from apps.erp.serializers.embarque.embarque_serializer import (
 )
 
 
+logger = logging.getLogger(__name__)
+
+
 """
 ============================================================================================
                             VIEWS DE APIS DE EMBARQUE
@@ -231,7 +235,7 @@ def listar_preventas_con_detalles_carga(request):
             filtros['ruta_id'] = ruta.id
 
         almacen = ruta.almacen_embarque
-        print(f"almacen de pedidos (ruta): {ruta.almacen_embarque} | almacen usuario: {user.almacen}")
+        logger.debug("Almacén de pedidos (ruta) %s | almacén del usuario %s", ruta.almacen_embarque_id, user.almacen_id)
         
         if not almacen:
             return Response(
@@ -343,9 +347,7 @@ def listar_preventas_con_detalles_carga(request):
         return Response({'preventas': preventas_data}, status=status.HTTP_200_OK)
         
     except Exception as e:
-        print(f"❌ [API ERROR] Error al listar preventas con detalles: {str(e)}")
-        import traceback
-        print(f"❌ [API ERROR] Traceback: {traceback.format_exc()}")
+        logger.exception("Error al listar preventas con detalles")
         
         return Response(
             {'detail': f'Error al listar preventas con detalles: {str(e)}'},
@@ -645,7 +647,9 @@ def iniciar_reparto(request):
             embarque.nota = f"{embarque.nota or ''}\n[INICIO REPARTO]: {nota}".strip()
         else:
             embarque.nota = f"{embarque.nota or ''}\n[INICIO REPARTO] POR {request.user.full_name()}".strip()
-        embarque.save(update_fields=['fase', 'fecha_salida', 'encargado', 'nota', 'updated_at'])
+        # El evento embarque_iniciado abre la caja; si falla, el embarque se queda en CARGA
+        with transaction.atomic():
+            embarque.save(update_fields=['fase', 'fecha_salida', 'encargado', 'nota', 'updated_at'])
         
         # Obtener nombre del encargado
         encargado_nombre = None
@@ -700,6 +704,9 @@ def iniciar_reparto(request):
 )
 @api_view(['POST'])
 def finalizar_reparto(request):
+    from apps.inventario.services.liquidacion_embarque import LiquidacionEmbarqueService
+    from apps.erp.serializers.embarque.embarque_serializer import LiquidacionEmbarqueSerializer
+
     reparto_id = request.data.get('reparto_id')
     model_reparto = EmbarqueReparto.objects.filter(id=reparto_id).first()
     if not model_reparto:
@@ -714,17 +721,21 @@ def finalizar_reparto(request):
             status=status.HTTP_400_BAD_REQUEST
         )
         
-    model_reparto.fase = EmbarqueReparto.FASE_TERMINADO
-    
-    
-    
-    model_reparto.save()
+    with transaction.atomic():
+        model_reparto.fase = EmbarqueReparto.FASE_TERMINADO
+        model_reparto.add_fechas()
+        model_reparto.save()
+
+        # Guardar las cifras de cierre para consultas y reimpresiones posteriores
+        liquidacion = LiquidacionEmbarqueService.cerrar(model_reparto, usuario=request.user)
+
     return Response(
         {
             'success': True,
             'message': f'Reparto {reparto_id} finalizado exitosamente',
             'reparto_id': model_reparto.id,
             'fase': model_reparto.fase,
+            'liquidacion': LiquidacionEmbarqueSerializer(liquidacion).data,
         },
         status=status.HTTP_200_OK
     )
@@ -892,12 +903,14 @@ def obtener_caja_movimientos_embarque(request):
     Endpoint para obtener los movimientos de caja asociados a un embarque,
     incluyendo las ventas realizadas durante el periodo del embarque.
     """
-    from django.utils import timezone
     from apps.erp.serializers.embarque.embarque_serializer import (
         EmbarqueCajaMovimientosSerializer,
-        VentaEmbarqueCajaSerializer
+        VentaEmbarqueCajaSerializer,
+        LiquidacionEmbarqueSerializer
     )
-    from apps.erp.models import CajaApertura, CajaTransaccion
+    from apps.erp.models import CajaApertura
+    from apps.inventario.models import LiquidacionEmbarque
+    from apps.inventario.services.liquidacion_embarque import LiquidacionEmbarqueService
     
     embarque_id = request.query_params.get('embarque_id')
     
@@ -940,31 +953,100 @@ def obtener_caja_movimientos_embarque(request):
     
     # Obtener las ventas realizadas durante el periodo del embarque
     # Filtrar por el usuario de la apertura de caja y el rango de fechas
-    usuario_caja = embarque.apertura_caja.usuario
-    fecha_inicio = embarque.created_at
-    fecha_fin = embarque.fecha_finalizada if embarque.fecha_finalizada else timezone.now()
-    
-    ventas_queryset = Venta.objects.select_related(
+    ventas_queryset = LiquidacionEmbarqueService.ventas_periodo(embarque).select_related(
         'cliente',
         'created_by'
-    ).filter(
-        created_by=usuario_caja,
-        created_at__gte=fecha_inicio,
-        created_at__lte=fecha_fin,
-        status_model=Venta.STATUS_MODEL_ACTIVE
-    ).exclude(
-        fase=Venta.FASE_CANCELADA
     ).order_by('-created_at')
     
     ventas_serializer = VentaEmbarqueCajaSerializer(ventas_queryset, many=True)
-    
-    # Calcular totales de ventas
-    total_ventas = sum(float(v.total) for v in ventas_queryset)
-    total_cobrado_ventas = sum(float(v.total_pagado) for v in ventas_queryset)
-    
     response_data['ventas'] = ventas_serializer.data
-    response_data['total_ventas'] = round(total_ventas, 2)
-    response_data['total_cobrado_ventas'] = round(total_cobrado_ventas, 2)
-    response_data['cantidad_ventas'] = ventas_queryset.count()
+
+    # Si el embarque ya fue liquidado se usan las cifras guardadas al cierre
+    liquidacion = LiquidacionEmbarque.objects.filter(embarque=embarque).first()
+    if liquidacion:
+        totales = {
+            'total_ventas': liquidacion.total_ventas,
+            'total_cobrado_ventas': liquidacion.total_cobrado_ventas,
+            'cantidad_ventas': liquidacion.cantidad_ventas,
+        }
+        response_data['liquidacion'] = LiquidacionEmbarqueSerializer(liquidacion).data
+    else:
+        totales = LiquidacionEmbarqueService.totales_ventas(ventas_queryset)
+        response_data['liquidacion'] = None
+
+    response_data['total_ventas'] = round(float(totales['total_ventas']), 2)
+    response_data['total_cobrado_ventas'] = round(float(totales['total_cobrado_ventas']), 2)
+    response_data['cantidad_ventas'] = totales['cantidad_ventas']
     
     return Response(response_data, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    summary="Obtener liquidación del embarque",
+    description="Obtiene las cifras de cierre guardadas al finalizar el reparto (cargado, entregado, devuelto, caja por método de pago y crédito otorgado). Con recalcular=true se vuelven a calcular y guardar.",
+    parameters=[
+        OpenApiParameter(
+            name='embarque_id',
+            type=OpenApiTypes.INT,
+            location=OpenApiParameter.QUERY,
+            description='ID del embarque/reparto',
+            required=True
+        ),
+        OpenApiParameter(
+            name='recalcular',
+            type=OpenApiTypes.BOOL,
+            location=OpenApiParameter.QUERY,
+            description='Si es true, recalcula y guarda la liquidación',
+            required=False,
+            default=False
+        ),
+    ],
+    responses={
+        200: "LiquidacionEmbarqueSerializer",
+        400: "Error: embarque_id requerido",
+        404: "Embarque no encontrado o sin liquidación"
+    },
+    tags=['Embarque']
+)
+@api_view(['GET'])
+def obtener_liquidacion_embarque(request):
+    """
+    Endpoint para consultar (o reimprimir) la liquidación guardada de un embarque
+    """
+    from apps.erp.serializers.embarque.embarque_serializer import LiquidacionEmbarqueSerializer
+    from apps.inventario.models import LiquidacionEmbarque
+    from apps.inventario.services.liquidacion_embarque import LiquidacionEmbarqueService
+
+    embarque_id = request.query_params.get('embarque_id')
+    recalcular = request.query_params.get('recalcular', '').lower() == 'true'
+
+    if not embarque_id:
+        return Response(
+            {'detail': 'El parámetro embarque_id es requerido'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    embarque = EmbarqueReparto.objects.filter(id=embarque_id).first()
+    if not embarque:
+        return Response(
+            {'detail': 'Embarque no encontrado'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    if recalcular:
+        if embarque.fase != EmbarqueReparto.FASE_TERMINADO:
+            return Response(
+                {'detail': f'Solo se puede liquidar un embarque TERMINADO. Fase actual: {embarque.fase}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        liquidacion = LiquidacionEmbarqueService.cerrar(embarque, usuario=request.user)
+    else:
+        liquidacion = LiquidacionEmbarque.objects.select_related('embarque', 'apertura_caja').filter(embarque=embarque).first()
+
+    if not liquidacion:
+        return Response(
+            {'detail': 'El embarque no tiene liquidación registrada'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    return Response(LiquidacionEmbarqueSerializer(liquidacion).data, status=status.HTTP_200_OK)
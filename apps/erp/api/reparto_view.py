@@ -5,7 +5,8 @@ from django.db import transaction
 
 from drf_spectacular.utils import extend_schema, inline_serializer
 
-from apps.erp.serializers.reparto.entregaProductoSerializer import EntragaProductoRutaSerializer
+from apps.base.idempotencia import idempotente
+from apps.erp.serializers.reparto.entregaProductoSerializer import EntragaProductoRutaSerializer, EntregasRutaSerializer
 
 
 @extend_schema(
@@ -28,6 +29,7 @@ from apps.erp.serializers.reparto.entregaProductoSerializer import EntragaProduc
     tags=['Reparto']
 )
 @api_view(['POST'])
+@idempotente
 def entrega_producto_ruta(request):
     """
     Registra la entrega de productos de una venta durante el reparto.
@@ -58,3 +60,51 @@ def entrega_producto_ruta(request):
             {'detail': f'Error al registrar entrega: {str(e)}'},
             status=status.HTTP_400_BAD_REQUEST
         )
+
+
+@extend_schema(
+    summary="Registrar entregas de todas las paradas de una ruta",
+    description="Registra en una sola llamada las entregas de varias ventas/preventas de un embarque. "
+                "Cada entrega lleva una clave única generada por el dispositivo; si se reenvía una clave ya "
+                "registrada se responde como DUPLICADA sin volver a mover inventario.",
+    request=EntregasRutaSerializer,
+    responses={
+        200: inline_serializer(
+            name='EntregasRutaResponse',
+            fields={
+                'success': serializers.BooleanField(),
+                'message': serializers.CharField(),
+                'embarque_id': serializers.IntegerField(),
+                'resultados': serializers.DictField(),
+            }
+        ),
+        400: "Error en los datos proporcionados",
+    },
+    tags=['Reparto']
+)
+@api_view(['POST'])
+def entrega_productos_ruta_masivo(request):
+    """
+    Registra las entregas de todas las paradas de un embarque en una sola transacción.
+    """
+    serializer = EntregasRutaSerializer(data=request.data, context={'request': request})
+
+    if not serializer.is_valid():
+        return Response(
+            {'detail': 'Datos inválidos', 'errors': serializer.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        resultados = serializer.save()
+        return Response({
+            'success': True,
+            'message': f'{len(resultados)} entregas procesadas',
+            'embarque_id': serializer.validated_data['embarque'].id,
+            'resultados': resultados,
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        return Response(
+            {'detail': f'Error al registrar entregas: {str(e)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
@@ -0,0 +1,60 @@
+from rest_framework import status, serializers
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+
+from apps.base.auth.permisosCache import tiene_permiso
+from apps.base.models import BaseModel
+from apps.erp.helpers.sync_ruta import sincronizar, ENTIDADES
+from apps.erp.models import Rutas
+
+
+class SyncRutaAPIView(APIView):
+    """
+    Sincronización incremental del dispositivo del vendedor de ruta
+    """
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Sincronización de ruta",
+        description=(
+            f"Cambios desde el token anterior para la ruta ({', '.join(ENTIDADES)}): por entidad los registros "
+            "actuales ('actualizados') y los ids que se deben borrar del dispositivo ('eliminados'). "
+            "Sin token (o si 'completa' es true) la respuesta trae todo y el dispositivo reemplaza sus datos. "
+            "Guardar el token de la respuesta y repetir mientras 'hay_mas' sea true."
+        ),
+        parameters=[
+            OpenApiParameter(name='token', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, description='Token de la última sincronización', required=False),
+            OpenApiParameter(name='ruta_id', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, description='Ruta (por defecto la asignada al usuario)', required=False),
+        ],
+        responses={
+            200: inline_serializer(
+                name='SyncRutaResponse',
+                fields={
+                    'token': serializers.CharField(),
+                    'completa': serializers.BooleanField(),
+                    'hay_mas': serializers.BooleanField(),
+                    'cambios': serializers.DictField(child=serializers.DictField()),
+                }
+            )
+        },
+        tags=['Sincronización']
+    )
+    def get(self, request):
+        rutas = Rutas.objects.exclude(status_model=BaseModel.STATUS_MODEL_DELETE).only('id', 'asignado_id')
+        ruta_id = request.query_params.get('ruta_id')
+        if ruta_id:
+            if not str(ruta_id).isdigit():
+                return Response({"detail": "ruta_id inválido"}, status=status.HTTP_400_BAD_REQUEST)
+            ruta = rutas.filter(pk=ruta_id).first()
+            if ruta and ruta.asignado_id != request.user.id and not tiene_permiso(request.user, 'erp.can_view_rutas'):
+                return Response({"detail": "No tiene acceso a esta ruta"}, status=status.HTTP_403_FORBIDDEN)
+        else:
+            ruta = rutas.filter(asignado=request.user).order_by('id').first()
+        if ruta is None:
+            return Response({"detail": "No se encontró la ruta"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(sincronizar(ruta, request.query_params.get('token')), status=status.HTTP_200_OK)
@@ -7,12 +7,19 @@ from django.db import models, transaction
 from django.core.exceptions import ValidationError
 
 from apps.base.serachFilter import MinimalSearchFilter
+from apps.base.pagination import PaginacionCursorOpcional
+from apps.base.views import CamposDinamicosViewMixin
+from apps.base.auth.permisosCache import tiene_permiso
+from apps.base.idempotencia import idempotente
+from apps.base.eventos import en_lote
+from apps.base.exportar import FORMATOS, formato_solicitado, respuesta_exportacion
 
 from apps.erp.models import Venta, VentaDetalle
 from apps.erp.serializers.ventas_serializer import (
     VentaSerializer, VentaMiniSerializer, VentaEstadoSerializer,
-    VentaDetalleSerializer
+    VentaDetalleSerializer, VentasRutaLoteSerializer
 )
+from apps.erp.helpers.exportaciones import NIVEL_DETALLE, NIVELES, filtrar_ventas, exportacion_ventas
 
 from apps.base.models import BaseModel
 
@@ -22,12 +29,29 @@ from apps.base.models import BaseModel
                             VIEWS DE APIS DE VENTAS
 ============================================================================================
 """
-class VentaViewSet(viewsets.ModelViewSet):
+class VentaViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     """
     ViewSet completo para CRUD de ventas con control de lotes
     """
-    queryset = Venta.objects.all().exclude(status_model=BaseModel.STATUS_MODEL_DELETE).order_by('-id').select_related('cliente', 'ruta').prefetch_related('detalles__lotes_utilizados')
+    queryset = Venta.objects.all().exclude(status_model=BaseModel.STATUS_MODEL_DELETE).order_by('-id')
+    #PRECARGA SOLO LO QUE SE VA A SERIALIZAR (?fields / ?omit / ?expand)
+    relaciones_por_campo = {
+        'cliente': {'select': ['cliente']},
+        'cliente_nombre': {'select': ['cliente']},
+        'cliente_obj': {'select': ['cliente']},
+        'ruta': {'select': ['ruta']},
+        'ruta_nombre': {'select': ['ruta']},
+        'ruta_obj': {'select': ['ruta']},
+        'origen': {'select': ['almacen']},
+        'almacen_obj': {'select': ['almacen']},
+        'vendedor_nombre': {'select': ['vendedor']},
+        'created_by': {'select': ['created_by']},
+        'updated_by': {'select': ['updated_by']},
+        'total_detalles': {'prefetch': ['detalles']},
+        'detalles': {'prefetch': ['detalles__lotes_utilizados']},
+    }
     serializer_class = VentaSerializer
+    pagination_class = PaginacionCursorOpcional
     #permission_classes = [permissions.IsAuthenticated]
     filter_backends = [MinimalSearchFilter, filters.OrderingFilter]
     search_fields = ['codigo', 'cliente__nombre', 'cliente__razon_social', 'ruta__nombre']
@@ -152,49 +176,8 @@ class VentaViewSet(viewsets.ModelViewSet):
         """
         queryset = self.filter_queryset(self.get_queryset())
 
-        # Filtro de preventa
-        preventa = request.query_params.get('preventa', None)
-        if preventa is not None:
-            if preventa.lower() in ['true', '1']:
-                queryset = queryset.filter(was_preventa=True)
-            elif preventa.lower() in ['false', '0']:
-                queryset = queryset.filter(was_preventa=False)
-                
-        # Filtro de is_terminada
-        is_terminada = request.query_params.get('is_terminada', None)
-        if is_terminada is not None:
-            if is_terminada.lower() in ['true', '1']:
-                queryset = queryset.filter(is_terminada=True)
-            elif is_terminada.lower() in ['false', '0']:
-                queryset = queryset.filter(is_terminada=False)
-
-        # Filtros adicionales
-        fase = request.query_params.get('fase', None)
-        if fase:
-            queryset = queryset.filter(fase=fase)
-        
-        cliente_id = request.query_params.get('cliente', None)
-        if cliente_id:
-            try:
-                queryset = queryset.filter(cliente_id=int(cliente_id))
-            except (ValueError, TypeError):
-                pass
-        
-        ruta_id = request.query_params.get('ruta', None)
-        if ruta_id:
-            try:
-                queryset = queryset.filter(ruta_id=int(ruta_id))
-            except (ValueError, TypeError):
-                pass
-
-        # Filtro de fechas
-        fecha_desde = request.query_params.get('fecha_desde', None)
-        fecha_hasta = request.query_params.get('fecha_hasta', None)
-        
-        if fecha_desde:
-            queryset = queryset.filter(created_at__date__gte=fecha_desde)
-        if fecha_hasta:
-            queryset = queryset.filter(created_at__date__lte=fecha_hasta)
+        # Filtros de preventa, is_terminada, fase, cliente, ruta y fechas (compartidos con la exportación)
+        queryset = filtrar_ventas(queryset, request.query_params)
             
         almacen_user = request.user.almacen
         if almacen_user:
@@ -222,13 +205,13 @@ class VentaViewSet(viewsets.ModelViewSet):
         
         if is_terminada is not None:
             is_terminada = is_terminada.lower() in ['true', '1']
-            print("is_terminada:", is_terminada)
             if not  is_terminada and  instance.ya_terminada:
                 return self.respuesta_404() 
 
         serializer = self.get_serializer(instance)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @idempotente
     def create(self, request, *args, **kwargs):
         """
         Crear nueva venta con detalles
@@ -437,7 +420,7 @@ class VentaViewSet(viewsets.ModelViewSet):
         # Lógica adicional para revertir inventario si es necesario
         venta.fase = Venta.FASE_CANCELADA
         venta.save(update_fields=['fase'])
-        # Aquí se podrían agregar señales o lógica para revertir inventario, notificaciones, etc.
+        # La reversión de inventario la hace el evento venta_cancelada (signals/ventas_inventario.py)
 
         serializer = VentaSerializer(venta)
         return Response(
@@ -572,43 +555,99 @@ class VentaViewSet(viewsets.ModelViewSet):
         
         resultados = []
         
-        for venta_id in ventas:
-            try:
-                venta = Venta.objects.get(id=venta_id)
-                
-                if venta.fase == Venta.FASE_CANCELADA:
+        # Un solo evento venta_cancelada con todas las ventas (una reversión de inventario en bloque)
+        with transaction.atomic(), en_lote():
+            for venta_id in ventas:
+                try:
+                    venta = Venta.objects.get(id=venta_id)
+                    
+                    if venta.fase == Venta.FASE_CANCELADA:
+                        resultados.append({
+                            'venta_id': venta_id,
+                            'status': 'error',
+                            'detail': 'La venta ya está cancelada.'
+                        })
+                        continue
+                    
+                    # La reversión de inventario la hace el evento venta_cancelada (signals/ventas_inventario.py)
+                    venta.fase = Venta.FASE_CANCELADA
+                    with transaction.atomic():
+                        venta.save(update_fields=['fase'])
+
+                    resultados.append({
+                        'venta_id': venta_id,
+                        'status': 'success',
+                        'detail': 'Venta cancelada correctamente.'
+                    })
+                    
+                except Venta.DoesNotExist:
                     resultados.append({
                         'venta_id': venta_id,
                         'status': 'error',
-                        'detail': 'La venta ya está cancelada.'
+                        'detail': 'Venta no encontrada.'
+                    })
+                except Exception as e:
+                    resultados.append({
+                        'venta_id': venta_id,
+                        'status': 'error',
+                        'detail': f'Error inesperado: {str(e)}'
                     })
-                    continue
-                
-                # Lógica adicional para revertir inventario si es necesario
-                venta.fase = Venta.FASE_CANCELADA
-                venta.save(update_fields=['fase'])
-                # Aquí se podrían agregar señales o lógica para revertir inventario, notificaciones, etc.
-
-                resultados.append({
-                    'venta_id': venta_id,
-                    'status': 'success',
-                    'detail': 'Venta cancelada correctamente.'
-                })
-                
-            except Venta.DoesNotExist:
-                resultados.append({
-                    'venta_id': venta_id,
-                    'status': 'error',
-                    'detail': 'Venta no encontrada.'
-                })
-            except Exception as e:
-                resultados.append({
-                    'venta_id': venta_id,
-                    'status': 'error',
-                    'detail': f'Error inesperado: {str(e)}'
-                })
         
         return Response(resultados, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Registrar en lote las ventas de una ruta",
+        description="Registra en una sola transacción las ventas y preventas capturadas sin conexión en el "
+                    "dispositivo de ruta. Cada venta lleva una clave única generada por el dispositivo; si se "
+                    "reenvía una clave ya registrada se responde como DUPLICADA sin volver a mover inventario. "
+                    "Las ventas con datos inválidos se responden como ERROR y no detienen al resto del lote.",
+        request=VentasRutaLoteSerializer,
+        responses={
+            200: inline_serializer(
+                name='VentasRutaLoteResponse',
+                fields={
+                    'success': serializers.BooleanField(),
+                    'message': serializers.CharField(),
+                    'ruta_id': serializers.IntegerField(),
+                    'resultados': serializers.DictField(),
+                }
+            ),
+            400: "Error en los datos proporcionados",
+            403: "El usuario no tiene acceso a la ruta",
+        },
+        tags=['Ventas']
+    )
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='lote'
+    )
+    def registrar_lote(self, request):
+        """
+        Registra las ventas de ruta enviadas juntas por el dispositivo
+        """
+        serializer = VentasRutaLoteSerializer(data=request.data, context={'request': request})
+        if not serializer.is_valid():
+            return Response(
+                {'detail': 'Datos inválidos', 'errors': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        ruta = serializer.validated_data['ruta']
+        if ruta.asignado_id != request.user.id and not tiene_permiso(request.user, 'erp.can_create_venta'):
+            return Response({"detail": "No tiene acceso a esta ruta"}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            resultados = serializer.save()
+        except Exception as e:
+            return Response(
+                {'detail': f'Error al registrar ventas: {str(e)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({
+            'success': True,
+            'message': f'{len(resultados)} ventas procesadas',
+            'ruta_id': ruta.id,
+            'resultados': resultados,
+        }, status=status.HTTP_200_OK)
         
     @extend_schema(
         responses={200: inline_serializer(
@@ -654,6 +693,52 @@ class VentaViewSet(viewsets.ModelViewSet):
         
         return Response(stats, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        description=(
+            "Exporta las ventas a CSV (por defecto) o XLSX con los mismos filtros del listado. "
+            "Los renglones se escriben conforme se leen de la base de datos (sin límite de renglones)."
+        ),
+        parameters=[
+            OpenApiParameter(name='nivel', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False,
+                             enum=NIVELES, description='Un renglón por producto (detalle) o por lote utilizado (lote)'),
+            OpenApiParameter(name='formato', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False,
+                             enum=FORMATOS, description='Formato del archivo (xlsx requiere openpyxl)'),
+            OpenApiParameter(name='preventa', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter(name='is_terminada', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter(name='fase', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter(name='cliente', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter(name='ruta', type=OpenApiTypes.INT, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter(name='fecha_desde', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter(name='fecha_hasta', type=OpenApiTypes.DATE, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter(name='search', type=OpenApiTypes.STR, location=OpenApiParameter.QUERY, required=False),
+        ],
+        responses={
+            (200, 'text/csv'): OpenApiTypes.BINARY,
+            400: inline_serializer(name='VentasExportarError', fields={'detail': serializers.CharField()}),
+        }
+    )
+    @action(detail=False, methods=['get'], url_path='exportar')
+    def exportar(self, request):
+        """
+        Exportar ventas (CSV / XLSX en streaming)
+        """
+        nivel = request.query_params.get('nivel', NIVEL_DETALLE)
+        if nivel not in NIVELES:
+            return Response({'detail': f"Nivel no válido: {nivel}. Opciones: {', '.join(NIVELES)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            formato = formato_solicitado(request)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        ventas = filtrar_ventas(self.filter_queryset(self.get_queryset()), request.query_params)
+        almacen_user = request.user.almacen
+        if almacen_user:
+            ventas = ventas.filter(almacen=almacen_user)
+
+        queryset, columnas = exportacion_ventas(ventas, nivel)
+        return respuesta_exportacion(queryset, columnas, f'ventas_{nivel}', formato)
+
 
 class VentaMiniViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     """
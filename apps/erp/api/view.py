@@ -9,10 +9,12 @@ from django.db import models
 from drf_spectacular.utils import extend_schema, inline_serializer,OpenApiParameter, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
 
-from apps.base.serachFilter import MinimalSearchFilter
+from apps.base.serachFilter import MinimalSearchFilter, BusquedaIndexadaFilter
 
 
 from apps.base.models import BaseModel
+from apps.base.views import CamposDinamicosViewMixin, RespuestaCondicionalMixin
+from apps.base.versiones import recurso_inventario
 from apps.erp.models import (Almacen, Empresa,
                             Producto, Categoria, Proveedor,
                             Sucursal, Cliente, 
@@ -241,11 +243,12 @@ class CategoriaMiniViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
 ============================================================================================
                             VIEWS DE APIS DE PRODUCTOS
 """
-class ProductoViewSet(viewsets.ModelViewSet):
+class ProductoViewSet(RespuestaCondicionalMixin, viewsets.ModelViewSet):
     queryset = Producto.objects.all().order_by('-id')
     serializer_class = ProductoSerializer
     permission_classes = [IsAuthenticated,ProductoPermission]
-    filter_backends = [MinimalSearchFilter]
+    recursos_version = ('productos',)
+    filter_backends = [BusquedaIndexadaFilter]
     search_fields = ['nombre', 'categoria__nombre', 'id','codigo']
 
     def list(self, request, *args, **kwargs):
@@ -307,14 +310,19 @@ class ProductoViewSet(viewsets.ModelViewSet):
         )
 
 
-class ProductoMiniViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class ProductoMiniViewSet(RespuestaCondicionalMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     queryset = Producto.objects.all().filter(status_model=BaseModel.STATUS_MODEL_ACTIVE).order_by('nombre')
     serializer_class = ProductoMiniSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [MinimalSearchFilter]
+    filter_backends = [BusquedaIndexadaFilter]
     search_fields = ['nombre', 'id', 'codigo']
     pagination_class = None
 
+    def get_recursos_version(self):
+        # Precio por cliente / última compra y existencias del almacén (mismo almacén que get_serializer_context)
+        almacen_id = self.request.query_params.get('almacen_id') or self.request.user.almacen_id or 1
+        return ('productos', 'clientes', 'compras', recurso_inventario(almacen_id))
+
     def get_serializer_context(self):
         """
         Sobrescribe el contexto para pasar cliente_id y almacen_id al serializer
@@ -554,7 +562,7 @@ class ProveedorViewSet(viewsets.ModelViewSet):
     queryset = Proveedor.objects.all()
     serializer_class = ProveedorSerializer
     permission_classes = [IsAuthenticated, ProveedorPermission]
-    filter_backends = [MinimalSearchFilter]
+    filter_backends = [BusquedaIndexadaFilter]
     search_fields = ['nombre', 'id', 'rfc','codigo','razon_social']
 
     def list(self, request, *args, **kwargs):
@@ -647,7 +655,7 @@ class ProveedorMiniViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     queryset = Proveedor.objects.all().filter(status_model=BaseModel.STATUS_MODEL_ACTIVE).order_by('nombre')
     serializer_class = ProveedorMiniSerializer
     permission_classes = [IsAuthenticated, ]#
-    filter_backends = [MinimalSearchFilter]
+    filter_backends = [BusquedaIndexadaFilter]
 
     pagination_class = None
     search_fields = ['codigo', 'nombre', 'id']
@@ -666,12 +674,22 @@ class ProveedorMiniViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
                             VIEWS DE APIS DE CLIENTES
 ============================================================================================
 """
-class ClienteViewSet(viewsets.ModelViewSet):
+class ClienteViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     queryset = Cliente.objects.all().order_by('-id')  # Assuming Cliente is a subclass of Proveedor
     serializer_class = ClienteSerializer
+    #PRECARGA SOLO LO QUE SE VA A SERIALIZAR (?fields / ?omit / ?expand)
+    relaciones_por_campo = {
+        'clasificacion_name': {'select': ['clasificacion']},
+        'vendedor_name': {'select': ['vendedor']},
+        'vendedor_detalle': {'select': ['vendedor']},
+        'regimen_fiscal_detalle': {'select': ['regimen_fiscal']},
+        'direccion': {'prefetch': ['direccion_cliente']},
+        'created_by': {'select': ['created_by']},
+        'updated_by': {'select': ['updated_by']},
+    }
     permission_classes = [ClientePermission]
 
-    filter_backends = [MinimalSearchFilter]
+    filter_backends = [BusquedaIndexadaFilter]
 
     search_fields = ['nombre', 'id', 'rfc','codigo','razon_social']
 
@@ -765,7 +783,7 @@ class ClienteMiniViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     serializer_class = ClienteMiniSerializer
     search_fields = ['id', 'nombre']
     #search_backends = [MinimalSearchFilter]
-    filter_backends = [MinimalSearchFilter]
+    filter_backends = [BusquedaIndexadaFilter]
     
     pagination_class = None
     permission_classes = [IsAuthenticated]
@@ -922,7 +940,7 @@ class AlmacenViewSet(viewsets.ModelViewSet):
             status=status.HTTP_404_NOT_FOUND
         )
    
-class AlmacenMiniViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class AlmacenMiniViewSet(RespuestaCondicionalMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     """
     A viewset for listing minimal Almacen instances.
 
@@ -938,6 +956,7 @@ class AlmacenMiniViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     permission_classes = [IsAuthenticated]
     pagination_class = None
     filter_backends = [MinimalSearchFilter]
+    recursos_version = ('almacenes', 'usuarios')
 
     search_fields = ['codigo', 'nombre', 'id']
 
@@ -1988,7 +2007,7 @@ class RutasViewSet(viewsets.ModelViewSet):
         return Response(stats, status=status.HTTP_200_OK)
 
 
-class RutasMiniViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+class RutasMiniViewSet(RespuestaCondicionalMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     """
     ViewSet para listar rutas de forma resumida
     """
@@ -1998,6 +2017,7 @@ class RutasMiniViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
     filter_backends = [MinimalSearchFilter]
     search_fields = ['codigo', 'nombre', 'origen', 'destino', 'asignado__full_name']
     pagination_class = None
+    recursos_version = ('rutas', 'almacenes', 'usuarios')
 
     def list(self, request, *args, **kwargs):
         """
@@ -0,0 +1,19 @@
+"""
+============================================================================================
+                    EVENTOS DE DOMINIO DE VENTAS (apps/base/eventos.py)
+============================================================================================
+Receptores: def receptor(sender, instancias, **kwargs) con la lista de ventas.
+"""
+from django.dispatch import Signal
+
+from apps.base.eventos import transicion
+from apps.erp.models import Venta
+
+
+# La venta pasó a CANCELADA: se regresa al inventario su salida (signals/ventas_inventario.py)
+venta_cancelada = Signal()
+# La preventa quedó totalmente cargada en el embarque: sus detalles se marcan como cargados
+venta_cargada = Signal()
+
+transicion(Venta, 'fase', Venta.FASE_CANCELADA, venta_cancelada)
+transicion(Venta, 'is_total_cargado', True, venta_cargada)
@@ -0,0 +1,253 @@
+"""
+==========================================================================================
+                    BÚSQUEDA GLOBAL (TYPE-AHEAD)
+==========================================================================================
+Productos, clientes, proveedores, ventas y rutas se copian a IndiceBusqueda (título,
+subtítulo y documento normalizado) con signals (apps/erp/signals/busqueda_global.py).
+Una sola consulta sobre esa tabla devuelve los N mejores resultados de cada tipo:
+ROW_NUMBER() OVER (PARTITION BY tipo ORDER BY rank DESC) <= N.
+
+- Solo se buscan los tipos que el usuario puede ver (erp.can_view_<modelo>).
+- Las ventas de un almacén solo las ve el usuario de ese almacén (igual que VentaViewSet).
+- Los resultados se guardan en caché unos segundos por (texto, tipos, almacén, límite):
+  las teclas repetidas o las mismas búsquedas de varios usuarios no llegan a la BD.
+- Ventas y clientes solo se reindexan cuando cambia un campo del índice (CAMPOS_INDICE);
+  el nombre del cliente forma parte del documento de sus ventas.
+- Las escrituras masivas (bulk_create, queryset.update) no disparan signals; después de
+  una carga masiva ejecutar: python manage.py reconstruir_indice_busqueda
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from apps.base.auth.permisosCache import tiene_permiso
+from apps.base.busqueda import normalizar, filtro_texto
+from apps.base.models import BaseModel
+from apps.erp.models import IndiceBusqueda, Producto, Cliente, Proveedor, Venta, Rutas
+
+
+CACHE_SEGUNDOS = getattr(settings, 'BUSQUEDA_GLOBAL_CACHE_SEGUNDOS', 15)
+MIN_CARACTERES = 3
+LIMITE_DEFAULT = 5
+LIMITE_MAXIMO = 20
+
+
+def _nombre_completo(*partes):
+    return " ".join(parte for parte in partes if parte)
+
+
+def _producto(producto):
+    return {
+        'titulo': producto.nombre,
+        'subtitulo': producto.codigo,
+        'partes': [producto.codigo, producto.nombre, producto.clave_sat],
+        'almacen_id': None,
+    }
+
+
+def _cliente(cliente):
+    nombre = _nombre_completo(cliente.nombre, cliente.apellido_paterno, cliente.apellido_materno)
+    return {
+        'titulo': cliente.razon_social or nombre,
+        'subtitulo': _nombre_completo(cliente.codigo, cliente.rfc),
+        'partes': [cliente.codigo, nombre, cliente.razon_social, cliente.rfc, cliente.telefono],
+        'almacen_id': None,
+    }
+
+
+def _proveedor(proveedor):
+    return {
+        'titulo': proveedor.nombre,
+        'subtitulo': _nombre_completo(proveedor.codigo, proveedor.rfc),
+        'partes': [proveedor.codigo, proveedor.nombre, proveedor.razon_social, proveedor.rfc, proveedor.telefono],
+        'almacen_id': None,
+    }
+
+
+def _venta(venta):
+    cliente = venta.cliente
+    nombre = _nombre_completo(cliente.nombre, cliente.apellido_paterno, cliente.apellido_materno)
+    return {
+        'titulo': venta.codigo or f"Venta {venta.pk}",
+        'subtitulo': cliente.razon_social or nombre,
+        'partes': [venta.codigo, nombre, cliente.razon_social],
+        'almacen_id': venta.almacen_id,
+    }
+
+
+def _ruta(ruta):
+    return {
+        'titulo': ruta.nombre,
+        'subtitulo': f"{ruta.origen} - {ruta.destino}",
+        'partes': [ruta.codigo, ruta.nombre, ruta.origen, ruta.destino],
+        'almacen_id': None,
+    }
+
+
+# tipo -> (modelo, permiso para verlo, datos del índice, select_related)
+TIPOS = {
+    IndiceBusqueda.TIPO_PRODUCTO: (Producto, 'erp.can_view_producto', _producto, ()),
+    IndiceBusqueda.TIPO_CLIENTE: (Cliente, 'erp.can_view_cliente', _cliente, ()),
+    IndiceBusqueda.TIPO_PROVEEDOR: (Proveedor, 'erp.can_view_proveedor', _proveedor, ()),
+    IndiceBusqueda.TIPO_VENTA: (Venta, 'erp.can_view_venta', _venta, ('cliente',)),
+    IndiceBusqueda.TIPO_RUTA: (Rutas, 'erp.can_view_rutas', _ruta, ()),
+}
+TIPO_POR_MODELO = {modelo: tipo for tipo, (modelo, _, _, _) in TIPOS.items()}
+
+# Campos que alimentan el índice: si no cambian, guardar la instancia no lo toca
+CAMPOS_NOMBRE_CLIENTE = ('nombre', 'apellido_paterno', 'apellido_materno', 'razon_social')
+CAMPOS_INDICE = {
+    Venta: ('codigo', 'cliente_id', 'almacen_id', 'status_model'),
+    Cliente: ('codigo', 'rfc', 'telefono', 'status_model') + CAMPOS_NOMBRE_CLIENTE,
+}
+
+
+#=============================================
+#         SINCRONIZACIÓN DEL ÍNDICE
+#==============================================
+def _datos_indice(tipo, instancia):
+    datos = TIPOS[tipo][2](instancia)
+    return {
+        'titulo': (datos['titulo'] or '')[:255],
+        'subtitulo': (datos['subtitulo'] or '')[:255] or None,
+        'documento': normalizar(" ".join(str(parte) for parte in datos['partes'] if parte)),
+        'almacen_id': datos['almacen_id'],
+    }
+
+
+def indexar(instancia):
+    """
+    Crea o actualiza la fila del índice de la instancia (la quita si está eliminada)
+    """
+    tipo = TIPO_POR_MODELO[type(instancia)]
+    if instancia.status_model == BaseModel.STATUS_MODEL_DELETE:
+        desindexar(tipo, instancia.pk)
+        return
+    IndiceBusqueda.objects.update_or_create(
+        tipo=tipo, objeto_id=instancia.pk, defaults=_datos_indice(tipo, instancia)
+    )
+
+
+def indexar_ventas_cliente(cliente):
+    """
+    Actualiza en bloque las filas del índice de las ventas del cliente (tras cambiar su nombre)
+    """
+    ventas = Venta.objects.filter(cliente_id=cliente.pk).exclude(
+        status_model=BaseModel.STATUS_MODEL_DELETE
+    ).only('id', 'codigo', 'almacen_id', 'cliente_id')
+    filas = {
+        fila.objeto_id: fila
+        for fila in IndiceBusqueda.objects.filter(tipo=IndiceBusqueda.TIPO_VENTA, objeto_id__in=ventas.values('id'))
+    }
+    if not filas:
+        return 0
+
+    campos = ('titulo', 'subtitulo', 'documento', 'almacen_id')
+    for venta in ventas.filter(id__in=filas.keys()):
+        venta.cliente = cliente
+        for campo, valor in _datos_indice(IndiceBusqueda.TIPO_VENTA, venta).items():
+            setattr(filas[venta.pk], campo, valor)
+    IndiceBusqueda.objects.bulk_update(filas.values(), campos, batch_size=500)
+    return len(filas)
+
+
+def indexar_nuevos(instancias):
+    """
+    Agrega al índice instancias recién creadas con bulk_create (no disparan signals)
+    """
+    IndiceBusqueda.objects.bulk_create([
+        IndiceBusqueda(tipo=TIPO_POR_MODELO[type(instancia)], objeto_id=instancia.pk,
+                       **_datos_indice(TIPO_POR_MODELO[type(instancia)], instancia))
+        for instancia in instancias
+    ])
+
+
+def desindexar(tipo, objeto_id):
+    IndiceBusqueda.objects.filter(tipo=tipo, objeto_id=objeto_id).delete()
+
+
+def reconstruir_indice(tipos=None, lote=2000):
+    """
+    Vuelve a generar el índice de los tipos indicados (todos por defecto) con bulk_create.
+    Retorna {tipo: filas creadas}.
+    """
+    creadas = {}
+    with transaction.atomic():
+        for tipo in tipos or TIPOS:
+            modelo, _, _, relacionados = TIPOS[tipo]
+            IndiceBusqueda.objects.filter(tipo=tipo).delete()
+            queryset = modelo.objects.exclude(
+                status_model=BaseModel.STATUS_MODEL_DELETE
+            ).select_related(*relacionados).order_by('pk')
+
+            filas = []
+            creadas[tipo] = 0
+            for instancia in queryset.iterator(chunk_size=lote):
+                filas.append(IndiceBusqueda(tipo=tipo, objeto_id=instancia.pk, **_datos_indice(tipo, instancia)))
+                if len(filas) >= lote:
+                    IndiceBusqueda.objects.bulk_create(filas)
+                    creadas[tipo] += len(filas)
+                    filas = []
+            IndiceBusqueda.objects.bulk_create(filas)
+            creadas[tipo] += len(filas)
+    return creadas
+
+
+#=============================================
+#         BÚSQUEDA
+#==============================================
+def tipos_permitidos(usuario, tipos=None):
+    """
+    Tipos solicitados (todos por defecto) que el usuario puede ver
+    """
+    return [
+        tipo for tipo in (tipos or TIPOS)
+        if tipo in TIPOS and tiene_permiso(usuario, TIPOS[tipo][1])
+    ]
+
+
+def _consultar(termino, tipos, almacen_id, limite):
+    queryset = IndiceBusqueda.objects.filter(tipo__in=tipos)
+    if almacen_id:
+        queryset = queryset.filter(Q(almacen__isnull=True) | Q(almacen_id=almacen_id))
+
+    condicion, rank = filtro_texto('documento', termino, connections[queryset.db].vendor == 'postgresql')
+    filas = queryset.filter(condicion).annotate(
+        rank=rank,
+        posicion=Window(RowNumber(), partition_by=[F('tipo')], order_by=[F('rank').desc(), F('objeto_id').desc()]),
+    ).filter(posicion__lte=limite).values('tipo', 'objeto_id', 'titulo', 'subtitulo', 'rank', 'posicion')
+
+    resultados = {tipo: [] for tipo in tipos}
+    for fila in sorted(filas, key=lambda fila: (fila['tipo'], fila['posicion'])):
+        resultados[fila['tipo']].append({
+            'id': fila['objeto_id'],
+            'titulo': fila['titulo'],
+            'subtitulo': fila['subtitulo'],
+            'rank': round(float(fila['rank']), 3),
+        })
+    return resultados
+
+
+def buscar_global(usuario, texto, tipos=None, limite=LIMITE_DEFAULT):
+    """
+    Los N mejores resultados por tipo para el usuario: {tipo: [{id, titulo, subtitulo, rank}]}
+    """
+    permitidos = tipos_permitidos(usuario, tipos)
+    termino = normalizar(texto or '').strip()
+    if len(termino) < MIN_CARACTERES or not permitidos:
+        return {tipo: [] for tipo in permitidos}
+
+    limite = max(1, min(limite, LIMITE_MAXIMO))
+    almacen_id = getattr(usuario, 'almacen_id', None)
+    llave = 'busqueda_global:' + hashlib.md5(
+        f"{termino}|{','.join(sorted(permitidos))}|{almacen_id}|{limite}".encode()
+    ).hexdigest()
+    resultados = cache.get(llave)
+    if resultados is None:
+        resultados = _consultar(termino, permitidos, almacen_id, limite)
+        cache.set(llave, resultados, CACHE_SEGUNDOS)
+    return resultados
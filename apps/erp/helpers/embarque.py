@@ -1,8 +1,13 @@
 from apps.inventario.models import MovimientoInventario, ProductosMovimiento, LoteInventario, EmbarqueReparto, ProductoEmbarque, LoteProductoEmbarque
 from apps.erp.models import Venta, VentaDetalle
+from apps.base.registro import debug_activo
 from django.db.models import Sum, Prefetch
 from django.db import transaction
 from decimal import Decimal
+import logging
+
+
+logger = logging.getLogger(__name__)
 
 
 def crear_movimiento_inventario_almacen_embarque(ruta=None, pedidos=None, productos_tara=None, usuario=None, almacen_origen=None):
@@ -84,11 +89,12 @@ def crear_movimiento_inventario_almacen_embarque(ruta=None, pedidos=None, produc
                             #detalle.is_cargado = True
                             detalle.updated_by = usuario
                             
-                            print(f"✅ [EMBARQUE] Producto {detalle.producto.nombre} (ID: {detalle.producto.id}) cargado correctamente en el embarque para la venta ID {venta.id}")
+                            logger.debug("Producto %s cargado en el embarque para la venta %s", detalle.producto_id, venta.id)
                     detalle.save()
                     break
             if not producto_encontrado:
-                print(f"❌ [EMBARQUE] Producto {detalle.producto.nombre} (ID: {detalle.producto.id}) NO fue cargado en el embarque para la venta ID {venta.id}")
+                logger.info("Producto %s NO fue cargado en el embarque para la venta %s", detalle.producto_id, venta.id,
+                            extra={'venta_id': venta.id, 'producto_id': detalle.producto_id})
     
         if sum_cargados_completo == detalles_venta_len:
             venta.is_total_cargado = True
@@ -695,10 +701,10 @@ def identificar_preventas_cargadas_completamente_actualizar_(lotes_encontrados_p
         detalles = venta.detalles.all()
         #SI no EXISTEN PRODUCTOS POR CARGAR 
         for de in detalles:
-            print(f"❌ FALTA CARGAR PRODUCTO: {de.producto.nombre} - Cantidad: {de.cantidad}")
+            logger.debug("Venta %s: falta cargar %s de %s", venta_id, de.cantidad, de.producto.nombre)
         if not detalles:
             #modifcamos la venta como cargada completamente
-            print(f"✅ La venta ID {venta_id} ha sido completamente cargada en el embarque.")
+            logger.debug("Venta %s cargada completamente en el embarque", venta_id)
             venta.is_total_cargado = True
             venta.updated_by = usuario
             
@@ -724,29 +730,28 @@ def identificar_preventas_cargadas_completamente_actualizar(lotes_encontrados_po
         venta = Venta.objects.get(id=venta_id)
         
         
-        # VERIFICAR TODOS LOS DETALLES DE LA VENTA
-        todos_los_detalles = venta.detalles.all()
-       
-        for i, detalle in enumerate(todos_los_detalles):
-            print(f"   Detalle {i+1}: Producto {detalle.producto.nombre} (ID: {detalle.producto.id}) - Cantidad: {detalle.cantidad} - is_cargado: {detalle.is_cargado}")
+        # VERIFICAR TODOS LOS DETALLES DE LA VENTA (solo con DEBUG: consulta los detalles)
+        if debug_activo(logger):
+            for i, detalle in enumerate(venta.detalles.select_related('producto')):
+                logger.debug("Venta %s detalle %s: producto %s cantidad %s is_cargado %s",
+                             venta_id, i + 1, detalle.producto.nombre, detalle.cantidad, detalle.is_cargado)
         
-        # OBTENER LOS PRODUCTOS QUE FALTAN POR CARGAR EN EL EMBARQUE
-        detalles_faltantes = VentaDetalle.objects.filter(
+        # OBTENER LOS PRODUCTOS QUE FALTAN POR CARGAR EN EL EMBARQUE (una sola consulta)
+        detalles_faltantes = list(VentaDetalle.objects.filter(
             venta_id=venta_id
-        ).exclude(producto_id__in=productos_cantidad.keys())
-        
-        print(f"🚨 [EMBARQUE] Detalles que faltan por cargar: {detalles_faltantes.count()}")
+        ).exclude(producto_id__in=productos_cantidad.keys()))
         
         for detalle in detalles_faltantes:
-            print(f"❌ FALTA CARGAR PRODUCTO: {detalle.producto.nombre} (ID: {detalle.producto.id}) - Cantidad: {detalle.cantidad}")
+            logger.debug("Venta %s: falta cargar %s del producto %s", venta_id, detalle.cantidad, detalle.producto_id)
         
-        if not detalles_faltantes.exists():
+        if not detalles_faltantes:
             # Modificamos la venta como cargada completamente
             venta.is_total_cargado = True
             venta.updated_by = usuario
             venta.save()
         else:
-            print(f"⚠️ [EMBARQUE] La venta ID {venta_id} AÚN tiene productos pendientes por cargar")
+            logger.info("La venta %s aún tiene %s productos pendientes por cargar", venta_id, len(detalles_faltantes),
+                        extra={'venta_id': venta_id})
 
 def crear_movimiento_inventario_almacen_embarque_ruta(ruta=None, lotes_list_movimiento=None, productos_tara=None, usuario=None):
     almacen_ruta = ruta.almacen
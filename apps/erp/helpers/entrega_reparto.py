@@ -1,268 +1,244 @@
-from apps.erp.models import Almacen,Venta, VentaDetalle,Rutas
-from apps.inventario.models import EmbarqueReparto, LoteInventario, MovimientoInventario, ProductosMovimiento
+from apps.erp.models import Almacen,Venta, VentaDetalle,Rutas, CambioSync
+from apps.erp.helpers.sync_ruta import registrar_cambios, ambito_ruta
+from apps.inventario.models import EmbarqueReparto, EntregaReparto, LoteInventario, MovimientoInventario, ProductosMovimiento
+from django.db import transaction
+from django.utils import timezone
+from collections import defaultdict
 from decimal import Decimal
+from apps.base.versiones import marcar_cambio_inventario
 
 
-def registrar_entrega_productos(venta: Venta, productos_entregados: list):
-    detalles_venta = VentaDetalle.objects.filter(venta=venta)
-    ruta = venta.ruta
-    almacen_pedido = ruta.almacen_embarque
-    alamcen_tara_abierta = ruta.almacen
-    
-    # Buscar el embarque que contiene esta venta y está en fase REPARTO
-    try:
-        embarque = EmbarqueReparto.objects.get(
-            ventas=venta,
-            #fase=EmbarqueReparto.FASE_REPARTO
-        )
-    except EmbarqueReparto.DoesNotExist:
+ENTREGA_REGISTRADA = 'REGISTRADA'
+ENTREGA_DUPLICADA = 'DUPLICADA'
+
+
+def registrar_entrega_productos(venta: Venta, productos_entregados: list, clave=None):
+    # Buscar el embarque que contiene esta venta (si hay varios, el más reciente)
+    embarque = EmbarqueReparto.objects.filter(
+        ventas=venta,
+        #fase=EmbarqueReparto.FASE_REPARTO
+    ).order_by('-created_at').first()
+    if embarque is None:
         raise ValueError(f"No se encontró un embarque en reparto para la venta {venta.codigo}.")
-    except EmbarqueReparto.MultipleObjectsReturned:
-        # Si hay múltiples, tomar el más reciente
-        embarque = EmbarqueReparto.objects.filter(
-            ventas=venta,
-            #fase=EmbarqueReparto.FASE_REPARTO
-        ).order_by('-created_at').first()
-    #print("🚧 Función registrar_entrega_productos en desarrollo...")
-    #print(embarque)    
-    #raise ValueError("Función en desarrollo, no implementada completamente.")
-
-    movimiento_model = embarque.movimiento_inventario_pedidos_entrada
-    #productos_movimiento = movimiento_model.productosMovimiento.all()
-    #print("🚧 Función registrar_entrega_productos en desarrollo...")
-    #print(productos_movimiento)
-    #raise NotImplementedError("Función en desarrollo, no implementada completamente.")
-    for item in productos_entregados:
-        producto_model = item['producto']
-        cantidad = float(item['cantidad'])
-        productos_entregados = []
-        
-        try:
-            detalle = detalles_venta.get(producto=producto_model)
-            if cantidad > detalle.cantidad:
-                raise ValueError(f"La cantidad entregada para el producto {producto_model.nombre} excede la cantidad en la venta.")
-            elif cantidad < float(detalle.cantidad):
-                pass 
-                ##mover productos a tara abierta del almacen de pedidos
-                #lotes_a_usar = _buscar_lotes(
-                #    producto=producto_model,
-                #    almacen=almacen_pedido,
-                #    cantidad_pendiente=cantidad
-                #)
-                #lotes_descontados = _descontar_lotes(lotes_a_usar)
-                #dif = float(detalle.cantidad) - cantidad
-                #
-                #for lote_item in lotes_descontados:
-                #    if dif == float(lote_item.cantidad):
-                #        #Mover lote completo a tara abierta
-                #        movimiento_salida = _crear_movimiento_traspaso(
-                #            lotes=[lote_item],
-                #            almacen_origen=almacen_pedido,
-                #            almacen_destino=alamcen_tara_abierta,
-                #            user=venta.created_by,
-                #            venta=venta
-                #        )
-                #        
-                #        lote_item.almacen = alamcen_tara_abierta
-                #        lote_item.save()
-                        
-                
-            if cantidad == detalle.cantidad:
-                #Proceder con la entrega normal
-                
-            
-                lotes_a_usar = _buscar_lotes(
-                    producto=producto_model,
-                    almacen=almacen_pedido,
-                    cantidad_pendiente=cantidad
-                )
-                lotes_descontados = _descontar_lotes(lotes_a_usar)
-                movimiento_salida = _crear_movimiento(
-                    lotes=lotes_a_usar,
-                    almacen=almacen_pedido,
-                    user=venta.created_by,
-                    venta=venta
-                )
-            
-                detalle.is_entregado = True
-            
-            detalle.cantidad_entregada = cantidad
-            detalle.save()
-            
-            
-        except VentaDetalle.DoesNotExist:
-            raise ValueError(f"El producto {producto_model.nombre} no pertenece a la venta {venta.codigo}.")
-    
-    #TRAER LOS PRODUCTOS NO ENTREGADOS 
-    if detalles_venta.filter(is_entregado=False).exists():
-        venta.is_entregado = False
-        venta.save()
-    else:
-        venta.is_entregado = True
-        venta.ya_terminada = True
-        venta.save()
+
+    registrar_entregas_ruta(
+        embarque=embarque,
+        entregas=[{'clave': clave, 'venta': venta, 'productos': productos_entregados}],
+        usuario=venta.created_by
+    )
+    venta.refresh_from_db()
     return venta
-    
 
 
-def _buscar_lotes(producto, almacen, cantidad_pendiente):
+def registrar_entregas_ruta(embarque: EmbarqueReparto, entregas: list, usuario=None):
+    """
+    Registra en una sola llamada las entregas de todas las paradas de un embarque.
+
+    entregas = [{'clave': str | None, 'venta': Venta, 'productos': [{'producto': Producto, 'cantidad': Decimal}]}]
+
+    - Las entregas con una clave ya registrada no se vuelven a procesar (reintentos del dispositivo).
+    - Los lotes de todos los productos se bloquean y asignan con una sola consulta.
+    - Movimientos, productos del movimiento, lotes y detalles se escriben en bloque.
+
+    Retorna un diccionario {clave (o VENTA-<id>): {'estado', 'venta_id', 'movimiento_id'}}.
+    """
+    with transaction.atomic():
+        # Bloquear el embarque serializa las entregas concurrentes de la misma ruta
+        embarque = EmbarqueReparto.objects.select_for_update().select_related(
+            'ruta__almacen_embarque'
+        ).get(pk=embarque.pk)
+        almacen_pedido = embarque.ruta.almacen_embarque
+
+        resultados = {}
+        pendientes = _filtrar_entregas_registradas(entregas, resultados)
+        if not pendientes:
+            return resultados
+
+        ventas = {entrega['venta'].id: entrega['venta'] for entrega in pendientes}
+        ventas_embarque = set(embarque.ventas.filter(id__in=ventas.keys()).values_list('id', flat=True))
+        for venta_id, venta in ventas.items():
+            if venta_id not in ventas_embarque:
+                raise ValueError(f"La venta {venta.codigo} no pertenece al embarque {embarque.id}.")
+
+        detalles = {
+            (detalle.venta_id, detalle.producto_id): detalle
+            for detalle in VentaDetalle.objects.filter(venta_id__in=ventas.keys())
+        }
+
+        #VALIDAR CANTIDADES Y OBTENER LO QUE SE DESCUENTA DE LOTES
+        requeridos = defaultdict(list)
+        for i, entrega in enumerate(pendientes):
+            venta = entrega['venta']
+            for item in entrega['productos']:
+                producto_model = item['producto']
+                cantidad = Decimal(str(item['cantidad']))
+                detalle = detalles.get((venta.id, producto_model.id))
+                if detalle is None:
+                    raise ValueError(f"El producto {producto_model.nombre} no pertenece a la venta {venta.codigo}.")
+                if cantidad > detalle.cantidad:
+                    raise ValueError(f"La cantidad entregada para el producto {producto_model.nombre} excede la cantidad en la venta.")
+                if cantidad == detalle.cantidad:
+                    #Proceder con la entrega normal
+                    requeridos[i].append((producto_model, cantidad))
+                    detalle.is_entregado = True
+                detalle.cantidad_entregada = cantidad
+
+        #ASIGNAR LOTES (UNA SOLA CONSULTA CON BLOQUEO)
+        productos_ids = {producto.id for items in requeridos.values() for producto, _ in items}
+        lotes_por_producto = defaultdict(list)
+        if productos_ids:
+            lotes_models = LoteInventario.objects.select_for_update().filter(
+                producto_id__in=productos_ids,
+                almacen=almacen_pedido,
+                cantidad__gt=0,
+                status_model=LoteInventario.STATUS_MODEL_ACTIVE
+            ).order_by('producto_id', 'created_at', 'id')
+            for lote in lotes_models:
+                lotes_por_producto[lote.producto_id].append(lote)
+
+        asignaciones = {
+            i: [
+                (lote, cantidad_lote)
+                for producto_model, cantidad in items
+                for lote, cantidad_lote in _asignar_lotes(lotes_por_producto[producto_model.id], producto_model, cantidad)
+            ]
+            for i, items in requeridos.items()
+        }
+
+        #MOVIMIENTOS DE SALIDA (UNO POR VENTA)
+        movimientos = {
+            i: MovimientoInventario(
+                almacen=almacen_pedido,
+                tipo=MovimientoInventario.TIPO_SALIDA,
+                movimiento=MovimientoInventario.SALIDA_VENTA,
+                costo_unitario=0,
+                cantidad=sum(cantidad for _, cantidad in lotes),
+                referencia=f"VENTA-{pendientes[i]['venta'].id}",
+                fase=MovimientoInventario.FASE_TERMINADA,
+                created_by=usuario
+            )
+            for i, lotes in asignaciones.items()
+        }
+        MovimientoInventario.objects.bulk_create(movimientos.values())
+
+        productos_movimiento = [
+            ProductosMovimiento(
+                movimiento=movimientos[i],
+                producto_id=lote.producto_id,
+                lote=lote,
+                cantidad=cantidad,
+                costo_unitario=lote.costo_unitario,
+                costo_total=cantidad * lote.costo_unitario,
+                created_by=usuario
+            )
+            for i, lotes in asignaciones.items()
+            for lote, cantidad in lotes
+        ]
+        ProductosMovimiento.objects.bulk_create(productos_movimiento)
+
+        # bulk_create no ejecuta ProductosMovimiento.save(), se descuentan los lotes aquí
+        ahora = timezone.now()
+        lotes_afectados = {lote.id: lote for lotes in asignaciones.values() for lote, _ in lotes}
+        for lote in lotes_afectados.values():
+            if lote.cantidad <= 0:
+                lote.status_model = LoteInventario.STATUS_MODEL_INACTIVE
+            lote.updated_at = ahora
+        LoteInventario.objects.bulk_update(lotes_afectados.values(), ['cantidad', 'status_model', 'updated_at'])
+        marcar_cambio_inventario(lotes_afectados.values())
+
+        detalles_afectados = [
+            detalles[(entrega['venta'].id, item['producto'].id)]
+            for entrega in pendientes
+            for item in entrega['productos']
+        ]
+        VentaDetalle.objects.bulk_update(set(detalles_afectados), ['cantidad_entregada', 'is_entregado'])
+
+        #TRAER LOS PRODUCTOS NO ENTREGADOS
+        ventas_pendientes = {venta_id for (venta_id, _), detalle in detalles.items() if not detalle.is_entregado}
+        ventas_entregadas = set(ventas.keys()) - ventas_pendientes
+        Venta.objects.filter(id__in=ventas_pendientes).update(is_entregado=False, updated_at=ahora)
+        Venta.objects.filter(id__in=ventas_entregadas).update(is_entregado=True, ya_terminada=True, updated_at=ahora)
+        registrar_cambios(CambioSync.ENTIDAD_PREVENTA, ventas.keys(), [ambito_ruta(embarque.ruta_id)])
+
+        EntregaReparto.objects.bulk_create([
+            EntregaReparto(
+                clave=entrega['clave'],
+                embarque=embarque,
+                venta=entrega['venta'],
+                movimiento=movimientos.get(i),
+                created_by=usuario
+            )
+            for i, entrega in enumerate(pendientes)
+            if entrega.get('clave')
+        ])
+
+        for i, entrega in enumerate(pendientes):
+            venta = entrega['venta']
+            movimiento = movimientos.get(i)
+            resultados[entrega.get('clave') or venta.referencia_busqueda()] = {
+                'estado': ENTREGA_REGISTRADA,
+                'venta_id': venta.id,
+                'movimiento_id': movimiento.id if movimiento else None,
+            }
+        return resultados
+
+
+def _filtrar_entregas_registradas(entregas, resultados):
     """
-    Busca lotes por producto que sumados den la cantidad pendiente.
-    Primero intenta encontrar un lote que cubra la cantidad completa,
-    si no existe, usa FIFO combinando lotes.
+    Separa las entregas cuya clave ya fue registrada (o viene repetida en la misma
+    llamada) y las agrega a resultados como DUPLICADA. Retorna las pendientes.
     """
-    
-    
-    cantidad_pendiente = float(cantidad_pendiente)
-    
+    claves = [entrega['clave'] for entrega in entregas if entrega.get('clave')]
+    registradas = {
+        registro.clave: registro
+        for registro in EntregaReparto.objects.filter(clave__in=claves).only('clave', 'venta_id', 'movimiento_id')
+    }
+
+    pendientes = []
+    vistas = set()
+    for entrega in entregas:
+        clave = entrega.get('clave')
+        if clave and (clave in registradas or clave in vistas):
+            registro = registradas.get(clave)
+            resultados[clave] = {
+                'estado': ENTREGA_DUPLICADA,
+                'venta_id': registro.venta_id if registro else entrega['venta'].id,
+                'movimiento_id': registro.movimiento_id if registro else None,
+            }
+            continue
+        if clave:
+            vistas.add(clave)
+        pendientes.append(entrega)
+    return pendientes
+
+
+def _asignar_lotes(lotes, producto, cantidad_pendiente):
+    """
+    Asigna en memoria los lotes (ya bloqueados) que cubren la cantidad pendiente.
+    Primero intenta encontrar un lote que cubra la cantidad completa (el más cercano),
+    si no existe, usa FIFO combinando lotes. Descuenta la cantidad de cada lote usado.
+    """
+    disponibles = [lote for lote in lotes if lote.cantidad > 0]
+
     # Primero buscar un lote que tenga la cantidad exacta o mayor (preferir exacto)
-    lote_completo = LoteInventario.objects.filter(
-        producto=producto,
-        almacen=almacen,
-        cantidad__gte=cantidad_pendiente,
-        status_model=LoteInventario.STATUS_MODEL_ACTIVE
-    ).order_by('cantidad', 'created_at').first()  # Ordenar por cantidad para preferir el más cercano
-    
-    if lote_completo:
-        # Encontramos un lote que cubre todo
-        return [{
-            'lote': lote_completo,
-            'cantidad': cantidad_pendiente
-        }]
-    
+    completos = [lote for lote in disponibles if lote.cantidad >= cantidad_pendiente]
+    if completos:
+        lote_completo = min(completos, key=lambda lote: lote.cantidad)
+        lote_completo.cantidad -= cantidad_pendiente
+        return [(lote_completo, cantidad_pendiente)]
+
     # Si no hay un lote completo, usar FIFO combinando lotes
-    lotes_models = LoteInventario.objects.filter(
-        producto=producto,
-        almacen=almacen,
-        cantidad__gt=0,
-        status_model=LoteInventario.STATUS_MODEL_ACTIVE
-    ).order_by('created_at')
-    
     lotes_a_usar = []
     cantidad_restante = cantidad_pendiente
-    
-    for lote in lotes_models:
+    for lote in disponibles:
         if cantidad_restante <= 0:
             break
-            
-        cantidad_lote = float(lote.cantidad)
-        if cantidad_lote >= cantidad_restante:
-            # Este lote cubre todo lo que falta
-            lotes_a_usar.append({
-                'lote': lote,
-                'cantidad': cantidad_restante
-            })
-            cantidad_restante = 0
-        else:
-            # Usar todo el lote y seguir buscando
-            lotes_a_usar.append({
-                'lote': lote,
-                'cantidad': cantidad_lote
-            })
-            cantidad_restante -= cantidad_lote
-    
+        cantidad_lote = min(lote.cantidad, cantidad_restante)
+        lote.cantidad -= cantidad_lote
+        cantidad_restante -= cantidad_lote
+        lotes_a_usar.append((lote, cantidad_lote))
+
     if cantidad_restante > 0:
         raise ValueError(f"No hay suficiente stock del producto {producto.nombre}. Faltan {cantidad_restante} unidades.")
-    
-    return lotes_a_usar
 
-
-def _crear_movimiento(lotes, almacen,user,venta):
-    cantidad_total = sum([item['cantidad'] for item in lotes])
-    total_movimiento = 0
-    data = {
-        'almacen': almacen,
-        #'almacen_destino_id': almacen_destino_id,
-        'tipo': MovimientoInventario.TIPO_SALIDA,
-        'movimiento': MovimientoInventario.SALIDA_VENTA,
-        'costo_unitario': total_movimiento,
-        "cantidad": Decimal(cantidad_total),
-        'referencia': f"VENTA-{venta.id}",
-        'fase': MovimientoInventario.FASE_TERMINADA,
-        'created_by': user
-    }
-    data['movimiento'] = MovimientoInventario.SALIDA_VENTA
-    movimiento = MovimientoInventario.objects.create(**data)
-    #help_actualizar_lotes(lotes_afectados,lotes_ids_en_0,almacen_destino_id,user_id)
-    #CREAMOS LOS PRODUCTOS MOVIMIENTO, 
-    for item in lotes:
-        data_mov = {
-            'movimiento_id': movimiento.id,
-            'producto_id': item['lote'].producto.id,
-            'lote_id': item['lote'].id,
-            'cantidad': Decimal(item['cantidad']),
-            'costo_unitario': item['lote'].costo_unitario,
-            'costo_total': Decimal(item['cantidad']) * item['lote'].costo_unitario,
-            'created_by': user
-        }
-        #Movimiento de salida
-        ProductosMovimiento.objects.create(**data_mov)
-        
-    return movimiento
-
-
-
-def _crear_movimiento_traspaso(lotes, almacen_origen, almacen_destino, user, venta):
-    cantidad_total = sum([item['cantidad'] for item in lotes])
-    total_movimiento = 0
-    #Movimiento de salida
-    data_salida = {
-        'almacen': almacen_origen,
-        'tipo': MovimientoInventario.TIPO_SALIDA,
-        'movimiento': MovimientoInventario.SALIDA_TRASPASO,
-        'costo_unitario': total_movimiento,
-        "cantidad": Decimal(cantidad_total),
-        'referencia': f"TRASPASO-SALIDA-RETORNO-TARA-{venta.id}",
-        'fase': MovimientoInventario.FASE_TERMINADA,
-        'created_by': user
-    }
-    movimiento_salida = MovimientoInventario.objects.create(**data_salida)
-    
-    #Movimiento de entrada
-    data_entrada = {
-        'almacen': almacen_destino,
-        'tipo': MovimientoInventario.TIPO_ENTRADA,
-        'movimiento': MovimientoInventario.ENTRADA_TRASPASO,
-        'costo_unitario': total_movimiento,
-        "cantidad": Decimal(cantidad_total),
-        'referencia': f"TRASPASO-ENTRADA-RETORNO-TARA-{venta.id}",
-        'fase': MovimientoInventario.FASE_TERMINADA,
-        'created_by': user
-    }
-    movimiento_entrada = MovimientoInventario.objects.create(**data_entrada)
-    
-    #CREAMOS LOS PRODUCTOS MOVIMIENTO, 
-    for item in lotes:
-        data_mov_salida = {
-            'movimiento_id': movimiento_salida.id,
-            'producto_id': item['lote'].producto.id,
-            'lote_id': item['lote'].id,
-            'cantidad': Decimal(item['cantidad']),
-            'costo_unitario': item['lote'].costo_unitario,
-            'costo_total': Decimal(item['cantidad']) * item['lote'].costo_unitario,
-            'created_by': user
-        }
-        #Movimiento de salida
-        ProductosMovimiento.objects.create(**data_mov_salida)
-        
-        data_mov_entrada = {
-            'movimiento_id': movimiento_entrada.id,
-            'producto_id': item['lote'].producto.id,
-            'lote_id': item['lote'].id,
-            'cantidad': Decimal(item['cantidad']),
-            'costo_unitario': item['lote'].costo_unitario,
-            'costo_total': Decimal(item['cantidad']) * item['lote'].costo_unitario,
-            'created_by': user
-        }
-        #Movimiento de entrada
-        ProductosMovimiento.objects.create(**data_mov_entrada)
-def _descontar_lotes(lotes):
-    for item in lotes:
-        lote = item['lote']
-        cantidad = float(item['cantidad'])
-        descuento = float(lote.cantidad) - cantidad
-        lote.cantidad = Decimal(descuento)
-        lote.save()
-        item['lote'] = lote
-        
-    return lotes
\ No newline at end of file
+    return lotes_a_usar
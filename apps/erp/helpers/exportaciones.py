@@ -0,0 +1,131 @@
+"""
+============================================================================================
+                    EXPORTACIÓN DE VENTAS (CSV / XLSX EN STREAMING)
+============================================================================================
+Los filtros son los mismos del listado de ventas (VentaViewSet.list) para que la exportación
+coincida con lo que el usuario ve en pantalla. Se exporta un renglón por producto vendido
+(nivel 'detalle') o por lote utilizado (nivel 'lote', para costeo y auditoría).
+La escritura por bloques está en apps/base/exportar.py.
+"""
+from apps.base.models import BaseModel
+from apps.erp.models import Venta, VentaDetalle, VentaDetalleLote
+
+
+NIVEL_DETALLE = 'detalle'
+NIVEL_LOTE = 'lote'
+NIVELES = (NIVEL_DETALLE, NIVEL_LOTE)
+
+COLUMNAS_DETALLE = [
+    ('Venta', 'venta_id'),
+    ('Código', 'venta__codigo'),
+    ('Fecha', 'venta__created_at'),
+    ('Fase', 'venta__fase'),
+    ('Tipo de venta', 'venta__tipo_venta'),
+    ('Condición de pago', 'venta__condicion_pago'),
+    ('Almacén', 'venta__almacen__nombre'),
+    ('Ruta', 'venta__ruta__nombre'),
+    ('Cliente código', 'venta__cliente__codigo'),
+    ('Cliente', 'venta__cliente__nombre'),
+    ('Razón social', 'venta__cliente__razon_social'),
+    ('Producto código', 'producto__codigo'),
+    ('Producto', 'producto__nombre'),
+    ('Cantidad', 'cantidad'),
+    ('Cantidad entregada', 'cantidad_entregada'),
+    ('Precio unitario', 'precio_unitario'),
+    ('Subtotal', 'subtotal'),
+    ('Total venta', 'venta__total'),
+    ('Total pagado', 'venta__total_pagado'),
+]
+
+COLUMNAS_LOTE = [
+    ('Venta', 'venta_detalle__venta_id'),
+    ('Código', 'venta_detalle__venta__codigo'),
+    ('Fecha', 'venta_detalle__venta__created_at'),
+    ('Fase', 'venta_detalle__venta__fase'),
+    ('Almacén', 'venta_detalle__venta__almacen__nombre'),
+    ('Cliente', 'venta_detalle__venta__cliente__nombre'),
+    ('Producto código', 'venta_detalle__producto__codigo'),
+    ('Producto', 'venta_detalle__producto__nombre'),
+    ('Precio unitario', 'venta_detalle__precio_unitario'),
+    ('Lote', 'lote_inventario_id'),
+    ('Referencia lote', 'lote_inventario__referencia'),
+    ('Cantidad utilizada', 'cantidad_utilizada'),
+    ('Costo unitario lote', 'costo_unitario_lote'),
+    ('Asignado', 'created_at'),
+]
+
+
+def _booleano(valor):
+    # 'true'/'1' -> True, 'false'/'0' -> False, cualquier otro valor -> None (sin filtro)
+    if valor is None:
+        return None
+    valor = str(valor).lower()
+    if valor in ['true', '1']:
+        return True
+    if valor in ['false', '0']:
+        return False
+    return None
+
+
+def _entero(valor):
+    try:
+        return int(valor)
+    except (ValueError, TypeError):
+        return None
+
+
+def filtrar_ventas(queryset, parametros):
+    """
+    Aplica los filtros del listado de ventas (preventa, is_terminada, fase, cliente, ruta,
+    fecha_desde, fecha_hasta). parametros: request.query_params o un dict.
+    """
+    preventa = _booleano(parametros.get('preventa'))
+    if preventa is not None:
+        queryset = queryset.filter(was_preventa=preventa)
+
+    terminada = _booleano(parametros.get('is_terminada'))
+    if terminada is not None:
+        queryset = queryset.filter(ya_terminada=terminada)
+
+    fase = parametros.get('fase')
+    if fase:
+        queryset = queryset.filter(fase=fase)
+
+    cliente_id = _entero(parametros.get('cliente'))
+    if cliente_id:
+        queryset = queryset.filter(cliente_id=cliente_id)
+
+    ruta_id = _entero(parametros.get('ruta'))
+    if ruta_id:
+        queryset = queryset.filter(ruta_id=ruta_id)
+
+    fecha_desde = parametros.get('fecha_desde')
+    if fecha_desde:
+        queryset = queryset.filter(created_at__date__gte=fecha_desde)
+    fecha_hasta = parametros.get('fecha_hasta')
+    if fecha_hasta:
+        queryset = queryset.filter(created_at__date__lte=fecha_hasta)
+    return queryset
+
+
+def ventas_base(almacen_id=None):
+    queryset = Venta.objects.exclude(status_model=BaseModel.STATUS_MODEL_DELETE)
+    if almacen_id:
+        queryset = queryset.filter(almacen_id=almacen_id)
+    return queryset
+
+
+def exportacion_ventas(ventas, nivel=NIVEL_DETALLE):
+    """
+    (queryset, columnas) de los renglones de las ventas filtradas.
+    Las ventas entran como subconsulta: una sola consulta sin traer ids a memoria.
+    """
+    ventas = ventas.order_by().values('pk')
+    if nivel == NIVEL_LOTE:
+        queryset = VentaDetalleLote.objects.filter(
+            venta_detalle__venta_id__in=ventas
+        ).order_by('venta_detalle__venta_id', 'venta_detalle_id', 'pk')
+        return queryset, COLUMNAS_LOTE
+
+    queryset = VentaDetalle.objects.filter(venta_id__in=ventas).order_by('venta_id', 'pk')
+    return queryset, COLUMNAS_DETALLE
@@ -0,0 +1,359 @@
+"""
+==========================================================================================
+                    SINCRONIZACIÓN INCREMENTAL DE DISPOSITIVOS DE RUTA
+==========================================================================================
+Los signals (apps/erp/signals/sync_ruta.py) agregan una fila a CambioSync por cada
+cliente, producto, precio, embarque o preventa modificado, con el ámbito de quien lo
+necesita ('' = todas las rutas, 'ruta:<id>', 'vendedor:<id>'). Un cliente que cambia de
+vendedor o una preventa que cambia de ruta se registra en el ámbito anterior y en el nuevo.
+
+El dispositivo manda el token de su última sincronización y recibe, por entidad, los
+registros actuales (actualizados) y los ids que ya no le corresponden (eliminados):
+- Sin cambios: una consulta sobre el índice (ambito, id) que trae también el cambio más
+  antiguo de la bitácora (para saber si se depuró después del token).
+- Los ids se agrupan; un objeto modificado varias veces viaja una vez.
+- Eliminado = el objeto ya no existe, está dado de baja o salió del ámbito de la ruta.
+- El token no avanza sobre cambios de los últimos SYNC_MARGEN_SEGUNDOS: una transacción
+  que tomó un id menor pero confirmó después no se pierde (esos cambios se reenvían y el
+  dispositivo los aplica de nuevo, son idempotentes). Si la página se llena, se corta en
+  el margen: hay_mas solo indica cambios fuera del margen.
+- Sin token, con token inválido o anterior a la depuración de la bitácora
+  (python manage.py depurar_cambios_sync), o si la ruta cambió de vendedor o de almacén
+  después del token, se envía todo el contenido de la ruta.
+
+Escrituras en bloque (bulk_create / bulk_update / queryset.update) no disparan signals;
+deben llamar a registrar_cambios().
+"""
+import base64
+import json
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Prefetch, Q, Subquery, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from apps.base.models import BaseModel
+from apps.erp.models import CambioSync, Cliente, CompraDetalle, Producto, Venta, VentaDetalle
+from apps.inventario.models import EmbarqueReparto
+
+
+MARGEN_SEGUNDOS = getattr(settings, 'SYNC_MARGEN_SEGUNDOS', 60)
+LIMITE_CAMBIOS = 5000
+
+
+def ambito_ruta(ruta_id):
+    return f'ruta:{ruta_id}' if ruta_id else None
+
+
+def ambito_vendedor(vendedor_id):
+    return f'vendedor:{vendedor_id}' if vendedor_id else None
+
+
+#=============================================
+#         BITÁCORA DE CAMBIOS
+#==============================================
+def registrar_cambios(entidad, objetos_ids, ambitos=('',)):
+    """
+    Agrega a la bitácora los objetos en cada ámbito (None se ignora)
+    """
+    ambitos = [ambito for ambito in dict.fromkeys(ambitos) if ambito is not None]
+    CambioSync.objects.bulk_create([
+        CambioSync(entidad=entidad, objeto_id=objeto_id, ambito=ambito)
+        for objeto_id in dict.fromkeys(objetos_ids) if objeto_id
+        for ambito in ambitos
+    ])
+
+
+def codificar_token(cambio_id):
+    return base64.urlsafe_b64encode(json.dumps({'c': cambio_id}).encode()).decode()
+
+
+def decodificar_token(token):
+    """
+    Id del último cambio recibido; None si el token no es válido
+    """
+    try:
+        cambio_id = json.loads(base64.urlsafe_b64decode(token.encode()))['c']
+    except (ValueError, TypeError, KeyError):
+        return None
+    return cambio_id if isinstance(cambio_id, int) and cambio_id >= 0 else None
+
+
+#=============================================
+#         DATOS POR ENTIDAD
+#==============================================
+def _lista_precios(precio_unitario):
+    """
+    Mismos precios que Producto.get_precio_mayoreo / semi_mayoreo / menudeo
+    """
+    return {
+        Cliente.MAYOREO: round(precio_unitario * (1 + Producto.UT_MAYOREO), 2) + Producto.CANT_AUMENTO,
+        Cliente.SEMI_MAYOREO: round(precio_unitario * (1 + Producto.UT_SEMI_MAYOREO), 2) + Producto.CANT_AUMENTO,
+        Cliente.PUBLICO: round(precio_unitario * (1 + Producto.UT_MENUDEO), 2) + Producto.CANT_AUMENTO,
+    }
+
+
+def precios_productos(productos):
+    """
+    Lista de precios de cada producto con las últimas compras de todos en una consulta
+    (mismo promedio ponderado que Producto.get_precio_unitario)
+    """
+    compras = defaultdict(list)
+    filas = CompraDetalle.objects.filter(producto__in=[producto.pk for producto in productos]).annotate(
+        posicion=Window(RowNumber(), partition_by=[F('producto_id')], order_by=[F('compra__created_at').desc()])
+    ).filter(posicion__lte=Producto.NUMERO_COMPRAS).values('producto_id', 'precio_unitario', 'cantidad_entrada', 'posicion')
+    for fila in sorted(filas, key=lambda fila: fila['posicion']):
+        compras[fila['producto_id']].append(fila)
+
+    resultado = []
+    for producto in productos:
+        ultimas = compras.get(producto.pk, [])
+        precio_ultima_compra = float(ultimas[0]['precio_unitario'] if ultimas else producto.precio_base)
+        suma_q = sum(float(compra['cantidad_entrada']) for compra in ultimas)
+        suma_precio = sum(float(compra['precio_unitario']) * float(compra['cantidad_entrada']) for compra in ultimas)
+        precio_unitario = float(round(suma_precio / suma_q, 2)) if suma_q else precio_ultima_compra
+        resultado.append({'producto_id': producto.pk, 'precios': _lista_precios(precio_unitario)})
+    return resultado
+
+
+def _clientes(ruta, ids=None):
+    # Sin vendedor asignado no hay clientes (vendedor_id=None traería los que no tienen vendedor)
+    if ruta.asignado_id is None:
+        return []
+    queryset = Cliente.objects.filter(vendedor_id=ruta.asignado_id).exclude(status_model=BaseModel.STATUS_MODEL_DELETE)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    return [
+        {
+            'id': cliente.id,
+            'codigo': cliente.codigo,
+            'nombre': cliente.nombre_completo,
+            'razon_social': cliente.razon_social,
+            'rfc': cliente.rfc,
+            'telefono': cliente.telefono,
+            'email': cliente.email,
+            'tipo': cliente.tipo,
+            'precio_tipo': cliente.precio_tipo,
+            'sujeto_credito': cliente.sujeto_credito,
+            'limite_credito': cliente.limite_credito,
+            'total_credito': cliente.total_credito,
+            'plazos_semanas': cliente.plazos_semanas,
+        }
+        for cliente in queryset.order_by('id')
+    ]
+
+
+def _productos_queryset(ids=None):
+    queryset = Producto.objects.filter(status_model=BaseModel.STATUS_MODEL_ACTIVE)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    return queryset
+
+
+def _productos(ruta, ids=None):
+    return [
+        {
+            'id': producto.id,
+            'codigo': producto.codigo,
+            'nombre': producto.nombre,
+            'categoria_id': producto.categoria_id,
+            'unidad_sat_clave': producto.unidad_sat.clave if producto.unidad_sat else None,
+            'unidad_sat_nombre': producto.unidad_sat.nombre if producto.unidad_sat else None,
+            'clave_sat': producto.clave_sat,
+            'iva': producto.iva,
+            'otro_impuesto': producto.otro_impuesto,
+            'precio_base': producto.precio_base,
+        }
+        for producto in _productos_queryset(ids).select_related('unidad_sat').order_by('id')
+    ]
+
+
+def _precios(ruta, ids=None):
+    productos = list(_productos_queryset(ids).only('id', 'precio_base').order_by('id'))
+    return [{'id': fila['producto_id'], **fila} for fila in precios_productos(productos)]
+
+
+def _embarques(ruta, ids=None):
+    queryset = EmbarqueReparto.objects.filter(
+        ruta_id=ruta.id, fase__in=[EmbarqueReparto.FASE_CARGA, EmbarqueReparto.FASE_REPARTO]
+    ).exclude(status_model=BaseModel.STATUS_MODEL_DELETE)
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    queryset = queryset.prefetch_related('productos', Prefetch('ventas', queryset=Venta.objects.only('id')))
+    return [
+        {
+            'id': embarque.id,
+            'fase': embarque.fase,
+            'fecha_salida': embarque.fecha_salida,
+            'nota': embarque.nota,
+            'ventas': [venta.id for venta in embarque.ventas.all()],
+            'productos': [
+                {
+                    'producto_id': producto.producto_id,
+                    'preventa_id': producto.preventa_id,
+                    'tipo': producto.tipo,
+                    'cantidad': producto.cantidad,
+                    'cantidad_entregada': producto.cantidad_entregada,
+                    'precio_unitario': producto.precio_unitario,
+                    'is_cargado': producto.is_cargado,
+                }
+                for producto in embarque.productos.all()
+                if producto.status_model != BaseModel.STATUS_MODEL_DELETE
+            ],
+        }
+        for embarque in queryset.order_by('id')
+    ]
+
+
+def _preventas(ruta, ids=None):
+    queryset = Venta.objects.filter(ruta_id=ruta.id, fase=Venta.FASE_PRE_VENTA).exclude(
+        status_model=BaseModel.STATUS_MODEL_DELETE
+    )
+    if ids is not None:
+        queryset = queryset.filter(id__in=ids)
+    queryset = queryset.prefetch_related(Prefetch('detalles', queryset=VentaDetalle.objects.order_by('id')))
+    return [
+        {
+            'id': venta.id,
+            'codigo': venta.codigo,
+            'cliente_id': venta.cliente_id,
+            'fase': venta.fase,
+            'total': venta.total,
+            'total_pagado': venta.total_pagado,
+            'condicion_pago': venta.condicion_pago,
+            'is_total_cargado': venta.is_total_cargado,
+            'is_entregado': venta.is_entregado,
+            'created_at': venta.created_at,
+            'detalles': [
+                {
+                    'producto_id': detalle.producto_id,
+                    'cantidad': detalle.cantidad,
+                    'cantidad_entregada': detalle.cantidad_entregada,
+                    'precio_unitario': detalle.precio_unitario,
+                    'subtotal': detalle.subtotal,
+                }
+                for detalle in venta.detalles.all()
+            ],
+        }
+        for venta in queryset.order_by('id')
+    ]
+
+
+# entidad -> datos actuales de la ruta (todos o los ids indicados)
+ENTIDADES = {
+    CambioSync.ENTIDAD_CLIENTE: _clientes,
+    CambioSync.ENTIDAD_PRODUCTO: _productos,
+    CambioSync.ENTIDAD_PRECIO: _precios,
+    CambioSync.ENTIDAD_EMBARQUE: _embarques,
+    CambioSync.ENTIDAD_PREVENTA: _preventas,
+}
+
+
+#=============================================
+#         SINCRONIZACIÓN
+#==============================================
+def ambitos_ruta(ruta):
+    return ['', ambito_ruta(ruta.id)] + ([ambito_vendedor(ruta.asignado_id)] if ruta.asignado_id else [])
+
+
+def _ultimo_cambio_seguro():
+    """
+    Id del último cambio con más de MARGEN_SEGUNDOS (el token nunca lo rebasa)
+    """
+    limite = timezone.now() - timedelta(seconds=MARGEN_SEGUNDOS)
+    return CambioSync.objects.filter(creado__lte=limite).order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def _primer_cambio():
+    # Cambio más antiguo de la bitácora (subconsulta sobre la llave primaria)
+    return Subquery(CambioSync.objects.order_by('id').values('id')[:1])
+
+
+def depurar_cambios(dias):
+    """
+    Elimina los cambios con más de N días. Retorna cuántos se eliminaron.
+    Los dispositivos con un token anterior reciben la sincronización completa.
+    El cambio más reciente nunca se elimina: sincronizar() usa el cambio más antiguo para
+    saber hasta dónde llegó la depuración aunque la bitácora no tenga cambios nuevos.
+    """
+    limite = timezone.now() - timedelta(days=dias)
+    mas_reciente = CambioSync.objects.order_by('-id').values_list('id', flat=True).first()
+    if mas_reciente is None:
+        return 0
+    ultimo = CambioSync.objects.filter(
+        creado__lt=limite, id__lt=mas_reciente
+    ).order_by('-id').values_list('id', flat=True).first()
+    if ultimo is None:
+        return 0
+    eliminados, _ = CambioSync.objects.filter(id__lte=ultimo).delete()
+    return eliminados
+
+
+def sincronizacion_completa(ruta):
+    token = _ultimo_cambio_seguro()
+    return {
+        'token': codificar_token(token),
+        'completa': True,
+        'hay_mas': False,
+        'cambios': {
+            entidad: {'actualizados': datos(ruta), 'eliminados': []}
+            for entidad, datos in ENTIDADES.items()
+        },
+    }
+
+
+def sincronizar(ruta, token=None):
+    """
+    Cambios de la ruta desde el token: {token, completa, hay_mas, cambios: {entidad: {actualizados, eliminados}}}
+    """
+    desde = decodificar_token(token) if token else None
+    if desde is None:
+        return sincronizacion_completa(ruta)
+
+    # Una sola consulta: los cambios de la ruta y, primero, el más antiguo de la bitácora
+    ambitos = ambitos_ruta(ruta)
+    filas = list(
+        CambioSync.objects.filter(Q(ambito__in=ambitos, id__gt=desde) | Q(id=_primer_cambio()))
+        .order_by('id').values_list('id', 'ambito', 'entidad', 'objeto_id', 'creado')[:LIMITE_CAMBIOS + 2]
+    )
+    if filas:
+        primer_id, primer_ambito = filas[0][:2]
+        if desde < primer_id - 1:
+            return sincronizacion_completa(ruta)  # La bitácora ya se depuró después del token
+        if primer_id <= desde or primer_ambito not in ambitos:
+            filas = filas[1:]
+    if any(entidad == CambioSync.ENTIDAD_RUTA for _, _, entidad, _, _ in filas):
+        return sincronizacion_completa(ruta)  # Cambió el vendedor o el almacén de la ruta
+
+    hay_mas = len(filas) > LIMITE_CAMBIOS
+    filas = filas[:LIMITE_CAMBIOS]
+
+    # El token avanza hasta el primer cambio todavía dentro del margen
+    limite = timezone.now() - timedelta(seconds=MARGEN_SEGUNDOS)
+    nuevo_token = desde
+    for posicion, (cambio_id, _, _, _, creado) in enumerate(filas):
+        if creado > limite:
+            if hay_mas:
+                # Página llena: se corta en el margen, el resto llega en la siguiente sincronización
+                filas = filas[:posicion]
+                hay_mas = False
+            break
+        nuevo_token = cambio_id
+
+    ids_por_entidad = defaultdict(dict)
+    for _, _, entidad, objeto_id, _ in filas:
+        ids_por_entidad[entidad][objeto_id] = None
+
+    cambios = {}
+    for entidad, ids in ids_por_entidad.items():
+        if entidad not in ENTIDADES:
+            continue
+        actualizados = ENTIDADES[entidad](ruta, list(ids))
+        vigentes = {fila['id'] for fila in actualizados}
+        cambios[entidad] = {
+            'actualizados': actualizados,
+            'eliminados': [objeto_id for objeto_id in ids if objeto_id not in vigentes],
+        }
+    return {'token': codificar_token(nuevo_token), 'completa': False, 'hay_mas': hay_mas, 'cambios': cambios}
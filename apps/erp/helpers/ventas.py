@@ -3,6 +3,11 @@ from apps.inventario.models import LoteInventario, MovimientoInventario, Product
 from decimal import Decimal
 from django.db.models import Sum, F
 from django.db import transaction
+from apps.base.versiones import marcar_cambio, recurso_inventario
+import logging
+
+
+logger = logging.getLogger(__name__)
 
 def main_crearmovomientos_venta(model_venta=None, data_detalles=None, user=None):
     almacen = model_venta.almacen
@@ -156,7 +161,8 @@ def afectar_lotes_inventario_venta_f_expressions(dict_productos=None, almacen=No
                 )
             
                 if filas_actualizadas == 0:
-                    print(f"[ERROR] Lote {lote.id}: no se pudo actualizar (posible concurrencia)")
+                    logger.warning("Lote %s: no se pudo actualizar (posible concurrencia)", lote.id,
+                                   extra={'lote_id': lote.id, 'producto_id': producto_id})
                     continue
                     
                 #print(f"[LOTE PARCIAL] Lote {lote.id}: -{cantidad_a_tomar}, queda: {nueva_cantidad}")
@@ -173,9 +179,12 @@ def afectar_lotes_inventario_venta_f_expressions(dict_productos=None, almacen=No
         
         # Verificar si se pudo cubrir toda la cantidad requerida
         if cantidad_restante > 0:
-            print(f"[ADVERTENCIA] Producto {producto_id}: faltan {cantidad_restante} unidades")
+            logger.warning("Producto %s: faltan %s unidades", producto_id, cantidad_restante,
+                           extra={'producto_id': producto_id, 'almacen_id': getattr(almacen, 'pk', almacen)})
     #print(f"[HELP VENTAS] Lotes afectados: {lotes_afectados}")
     #print(f"[HELP VENTAS] Lotes completos en cero: {lotes_completos_cero}")
+    if lotes_afectados:
+        marcar_cambio(recurso_inventario(getattr(almacen, 'pk', almacen)))
     return lotes_afectados, lotes_completos_cero
 
 
@@ -197,7 +206,7 @@ def crear_movimiento_inventario_venta(venta_id=None,lotes_ids_en_0 = None, lotes
         'fase': MovimientoInventario.FASE_TERMINADA,
         'created_by_id': user_id
     }
-    print(f"[HELP VENTAS] Creando movimiento de inventario para venta {venta_id} con fase {fase}")
+    logger.debug("Creando movimiento de inventario para venta %s con fase %s", venta_id, fase)
     #print(f"[HELP VENTAS] Creando movimiento de inventario para venta {venta_id} con fase {fase}")
     match fase:
         #SI ES PREVENTA, ESTA SE VA AL ALMACEN HELP CEDIS
@@ -230,7 +239,7 @@ def crear_movimiento_inventario_venta(venta_id=None,lotes_ids_en_0 = None, lotes
                 
         case Venta.FASE_TERMINADA:
             #SI ES TERMINADA, SOLO CREAMOS EL MOVIMIENTO DE SALIDA
-            print(f"[HELP VENTAS] Creando movimiento de inventario para venta terminada {venta_id}")
+            logger.debug("Creando movimiento de salida para venta terminada %s", venta_id)
             data['almacen_destino_id'] = None
             data['movimiento'] = MovimientoInventario.SALIDA_VENTA
             movimiento = MovimientoInventario.objects.create(**data)
@@ -292,6 +301,7 @@ def help_actualizar_lotes(lotes_afectados,lotes_ids_en_0,almacen_destino_id,user
             new_lote.save()
     #ACTUALIZAMOS LOS LOTES QUE SE FUERON EN 0, A ACTIVE EN EL ALMACEN HELP CEDIS
     LoteInventario.objects.filter(id__in=lotes_ids_en_0).update(status_model=LoteInventario.STATUS_MODEL_ACTIVE, almacen_id=almacen_destino_id, ubicacion=None, updated_by_id=user_id)
+    marcar_cambio(recurso_inventario(almacen_destino_id))
     
 
 def help_buscar_almacen_destino(model_venta=None):
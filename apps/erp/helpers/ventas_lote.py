@@ -0,0 +1,350 @@
+"""
+============================================================================================
+                    CARGA EN LOTE DE VENTAS DE RUTA (DISPOSITIVO SIN CONEXIÓN)
+============================================================================================
+El dispositivo del vendedor guarda las ventas sin conexión y las envía juntas al
+recuperar señal. Cada venta trae una clave generada en el dispositivo (Venta.clave_dispositivo):
+- Una clave ya registrada (o repetida en el mismo envío) se responde DUPLICADA con la
+  venta existente y no vuelve a mover inventario: el dispositivo puede reintentar el envío.
+- Una venta con datos inválidos (cliente, producto o almacén inexistente, etc.) se responde
+  ERROR y no se guarda; las demás ventas del envío sí se registran.
+
+Misma lógica que VentaSerializer.create + main_crearmovomientos_venta, pero para todo el lote:
+- Clientes, productos, almacenes y métodos de pago se validan con una consulta por modelo.
+- Ventas, detalles, pagos, movimientos y solicitudes se escriben con bulk_create.
+- Los lotes de todas las ventas TERMINADA se bloquean y asignan (FIFO) una sola vez;
+  las preventas solo revisan existencias (una consulta) y generan solicitudes si falta producto.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from apps.base.models import BaseModel
+from apps.base.versiones import marcar_cambio_inventario
+from apps.contabilidad.models import CondicionPago, MetodoPago
+from apps.erp.models import Almacen, CambioSync, Cliente, PagosVenta, Producto, Rutas, Venta, VentaDetalle
+from apps.erp.helpers.busqueda_global import indexar_nuevos
+from apps.erp.helpers.sync_ruta import ambito_ruta, registrar_cambios
+from apps.inventario.helpers.solicitudes import crear_solicitudes
+from apps.inventario.models import LoteInventario, MovimientoInventario, ProductosMovimiento, ProductosSolicitud
+
+
+VENTA_CREADA = 'CREADA'
+VENTA_DUPLICADA = 'DUPLICADA'
+VENTA_ERROR = 'ERROR'
+
+LIMITE_VENTAS_LOTE = 500
+FASES_LOTE = (Venta.FASE_PRE_VENTA, Venta.FASE_TERMINADA)
+
+
+def registrar_ventas_ruta(ruta: Rutas, ventas: list, usuario=None):
+    """
+    Registra en una sola transacción las ventas capturadas sin conexión en una ruta.
+
+    ventas = [{
+        'clave': str, 'cliente': int, 'fase': PRE VENTA | TERMINADA, 'almacen': int | None,
+        'detalles': [{'producto': int, 'cantidad': Decimal, 'precio_unitario': Decimal}],
+        'pagos': [{'metodo_pago': int, 'monto': Decimal, 'referencia': str}],
+    }]
+
+    Las ventas TERMINADA descuentan del almacén de venta de la ruta (o del almacén indicado).
+    Las preventas requieren el almacén donde se revisan las existencias.
+
+    Retorna un diccionario {clave: {'estado', 'venta_id', 'codigo', ...}}.
+    """
+    with transaction.atomic():
+        # Bloquear la ruta serializa los envíos concurrentes del mismo dispositivo
+        ruta = Rutas.objects.select_for_update().get(pk=ruta.pk)
+
+        resultados = {}
+        pendientes = _filtrar_ventas_registradas(ventas, resultados)
+        validas = _validar_ventas(ruta, pendientes, resultados)
+        if not validas:
+            return resultados
+
+        ahora = timezone.now()
+        faltantes = _revisar_existencias_preventas([venta for venta in validas if venta['fase'] == Venta.FASE_PRE_VENTA])
+        asignaciones, sin_stock, lotes_afectados = _asignar_lotes_ventas([
+            venta for venta in validas if venta['fase'] == Venta.FASE_TERMINADA
+        ])
+
+        #VENTAS (EL CÓDIGO DEPENDE DEL ID)
+        ventas_models = []
+        for i, venta in enumerate(validas):
+            total = sum((cantidad * precio for _, cantidad, precio in venta['detalles']), Decimal('0'))
+            total_pagado = sum((monto for _, monto, _ in venta['pagos']), Decimal('0'))
+            ventas_models.append(Venta(
+                clave_dispositivo=venta['clave'],
+                cliente=venta['cliente'],
+                almacen=venta['almacen'],
+                ruta=ruta,
+                fase=venta['fase'],
+                total=total,
+                was_preventa=venta['fase'] == Venta.FASE_PRE_VENTA,
+                falta_inventario=bool(faltantes.get(i)),
+                condicion_pago=CondicionPago.CONDICION_CONTADO if total_pagado >= total else CondicionPago.CONDICION_CREDITO,
+                vendedor=usuario,
+                created_by=usuario,
+            ))
+        Venta.objects.bulk_create(ventas_models)
+        for venta_model in ventas_models:
+            venta_model.codigo = venta_model.generar_codigo()
+        Venta.objects.bulk_update(ventas_models, ['codigo'])
+
+        VentaDetalle.objects.bulk_create([
+            VentaDetalle(venta=ventas_models[i], producto=producto, cantidad=cantidad,
+                         precio_unitario=precio, subtotal=cantidad * precio)
+            for i, venta in enumerate(validas)
+            for producto, cantidad, precio in venta['detalles']
+        ])
+        PagosVenta.objects.bulk_create([
+            PagosVenta(venta=ventas_models[i], metodo_pago=metodo_pago, monto=monto,
+                       referencia=referencia, created_by=usuario)
+            for i, venta in enumerate(validas)
+            for metodo_pago, monto, referencia in venta['pagos']
+        ])
+
+        #MOVIMIENTOS DE SALIDA DE LAS VENTAS TERMINADAS (UNO POR VENTA)
+        movimientos = {
+            i: MovimientoInventario(
+                almacen=ventas_models[i].almacen,
+                tipo=MovimientoInventario.TIPO_SALIDA,
+                movimiento=MovimientoInventario.SALIDA_VENTA,
+                costo_unitario=sum(cantidad * precio for _, cantidad, precio in lotes),
+                cantidad=sum(cantidad for _, cantidad, _ in lotes),
+                referencia=f"VENTA-{ventas_models[i].id}",
+                fase=MovimientoInventario.FASE_TERMINADA,
+                created_by=usuario
+            )
+            for i, lotes in asignaciones.items()
+        }
+        MovimientoInventario.objects.bulk_create(movimientos.values())
+        ProductosMovimiento.objects.bulk_create([
+            ProductosMovimiento(
+                movimiento=movimientos[i],
+                producto_id=lote.producto_id,
+                lote=lote,
+                cantidad=cantidad,
+                costo_unitario=precio,
+                costo_total=cantidad * precio,
+                created_by=usuario
+            )
+            for i, lotes in asignaciones.items()
+            for lote, cantidad, precio in lotes
+        ])
+
+        # bulk_create no ejecuta ProductosMovimiento.save(), se descuentan los lotes aquí
+        for lote in lotes_afectados:
+            lote.updated_by = usuario
+            lote.updated_at = ahora
+        LoteInventario.objects.bulk_update(lotes_afectados, ['cantidad', 'updated_by', 'updated_at'])
+        marcar_cambio_inventario(lotes_afectados)
+
+        #SOLICITUDES DE PRODUCTO DE LAS PREVENTAS INCOMPLETAS
+        crear_solicitudes([
+            ProductosSolicitud(
+                producto=producto,
+                cantidad=faltante,
+                almacen=ventas_models[i].almacen,
+                motivo=ProductosSolicitud.MOTIVO_PREVENTA,
+                created_by=usuario
+            )
+            for i, productos in faltantes.items()
+            for producto, faltante in productos
+        ])
+
+        # bulk_create no dispara signals: índice de búsqueda y bitácora de sincronización
+        indexar_nuevos(ventas_models)
+        registrar_cambios(
+            CambioSync.ENTIDAD_PREVENTA,
+            [venta_model.id for venta_model in ventas_models if venta_model.was_preventa],
+            [ambito_ruta(ruta.id)]
+        )
+
+        for i, venta_model in enumerate(ventas_models):
+            movimiento = movimientos.get(i)
+            resultados[venta_model.clave_dispositivo] = {
+                'estado': VENTA_CREADA,
+                'venta_id': venta_model.id,
+                'codigo': venta_model.codigo,
+                'movimiento_id': movimiento.id if movimiento else None,
+                'falta_inventario': venta_model.falta_inventario,
+                'productos_sin_stock': sin_stock.get(i, []),
+            }
+        return resultados
+
+
+def _filtrar_ventas_registradas(ventas, resultados):
+    """
+    Separa las ventas cuya clave ya fue registrada (o viene repetida en el mismo
+    envío) y las agrega a resultados como DUPLICADA. Retorna las pendientes.
+    """
+    registradas = {
+        venta.clave_dispositivo: venta
+        for venta in Venta.objects.filter(
+            clave_dispositivo__in=[venta['clave'] for venta in ventas]
+        ).only('id', 'codigo', 'clave_dispositivo')
+    }
+
+    pendientes = []
+    vistas = set()
+    for venta in ventas:
+        clave = venta['clave']
+        if clave in registradas or clave in vistas:
+            registro = registradas.get(clave)
+            resultados[clave] = {
+                'estado': VENTA_DUPLICADA,
+                'venta_id': registro.id if registro else None,
+                'codigo': registro.codigo if registro else None,
+            }
+            continue
+        vistas.add(clave)
+        pendientes.append(venta)
+    return pendientes
+
+
+def _validar_ventas(ruta, ventas, resultados):
+    """
+    Resuelve clientes, productos, almacenes y métodos de pago de todo el lote (una consulta
+    por modelo). Las ventas con errores se agregan a resultados como ERROR.
+    Retorna las ventas válidas con los modelos ya cargados.
+    """
+    clientes = Cliente.objects.exclude(status_model=BaseModel.STATUS_MODEL_DELETE).only(
+        'id', 'codigo', 'nombre', 'apellido_paterno', 'apellido_materno', 'razon_social'
+    ).in_bulk({venta['cliente'] for venta in ventas})
+    productos = Producto.objects.exclude(status_model=BaseModel.STATUS_MODEL_DELETE).only(
+        'id', 'nombre'
+    ).in_bulk({detalle['producto'] for venta in ventas for detalle in venta['detalles']})
+    metodos_pago = MetodoPago.objects.in_bulk({pago['metodo_pago'] for venta in ventas for pago in venta.get('pagos') or []})
+    almacenes = Almacen.objects.exclude(status_model=BaseModel.STATUS_MODEL_DELETE).only(
+        'id', 'nombre'
+    ).in_bulk({venta['almacen'] for venta in ventas if venta.get('almacen')} | {ruta.almacen_id} - {None})
+
+    validas = []
+    for venta in ventas:
+        errores = []
+        fase = venta['fase']
+
+        cliente = clientes.get(venta['cliente'])
+        if cliente is None:
+            errores.append(f"El cliente {venta['cliente']} no existe.")
+
+        almacen_id = venta.get('almacen') or (ruta.almacen_id if fase == Venta.FASE_TERMINADA else None)
+        almacen = almacenes.get(almacen_id)
+        if almacen_id is None:
+            errores.append("Debe especificar el almacén donde se afectará el inventario.")
+        elif almacen is None:
+            errores.append(f"El almacén {almacen_id} no existe.")
+
+        detalles = []
+        for detalle in venta['detalles']:
+            producto = productos.get(detalle['producto'])
+            if producto is None:
+                errores.append(f"El producto {detalle['producto']} no existe.")
+                continue
+            detalles.append((producto, Decimal(str(detalle['cantidad'])), Decimal(str(detalle['precio_unitario']))))
+
+        pagos = []
+        for pago in venta.get('pagos') or []:
+            metodo_pago = metodos_pago.get(pago['metodo_pago'])
+            if metodo_pago is None:
+                errores.append(f"El método de pago {pago['metodo_pago']} no existe.")
+                continue
+            if any(metodo_pago.id == metodo.id for metodo, _, _ in pagos):
+                errores.append(f"El método de pago '{metodo_pago.nombre}' no puede aparecer más de 2 veces.")
+                continue
+            pagos.append((metodo_pago, Decimal(str(pago['monto'])), pago.get('referencia') or None))
+
+        if errores:
+            resultados[venta['clave']] = {'estado': VENTA_ERROR, 'venta_id': None, 'codigo': None, 'errores': errores}
+            continue
+        validas.append({
+            'indice': len(validas),
+            'clave': venta['clave'],
+            'fase': fase,
+            'cliente': cliente,
+            'almacen': almacen,
+            'detalles': detalles,
+            'pagos': pagos,
+        })
+    return validas
+
+
+def _agrupar_productos(detalles):
+    # {producto_id: (producto, cantidad total, precio unitario del primer renglón)}
+    agrupados = {}
+    for producto, cantidad, precio in detalles:
+        if producto.id in agrupados:
+            _, cantidad_anterior, precio = agrupados[producto.id]
+            cantidad += cantidad_anterior
+        agrupados[producto.id] = (producto, cantidad, precio)
+    return agrupados
+
+
+def _revisar_existencias_preventas(preventas):
+    """
+    Las preventas no tocan inventario: solo se compara la cantidad pedida contra las
+    existencias del almacén (una consulta para todo el lote).
+    Retorna {índice de la preventa: [(producto, faltante)]}.
+    """
+    if not preventas:
+        return {}
+    existencias = {
+        (fila['almacen_id'], fila['producto_id']): fila['total_stock']
+        for fila in LoteInventario.objects.filter(
+            almacen_id__in={venta['almacen'].id for venta in preventas},
+            producto_id__in={producto.id for venta in preventas for producto, _, _ in venta['detalles']},
+            cantidad__gt=0
+        ).values('almacen_id', 'producto_id').annotate(total_stock=Sum('cantidad'))
+    }
+
+    faltantes = {}
+    for venta in preventas:
+        for producto_id, (producto, cantidad, _) in _agrupar_productos(venta['detalles']).items():
+            disponible = existencias.get((venta['almacen'].id, producto_id)) or 0
+            if disponible < cantidad:
+                faltantes.setdefault(venta['indice'], []).append((producto, cantidad - disponible))
+    return faltantes
+
+
+def _asignar_lotes_ventas(ventas):
+    """
+    Bloquea una sola vez los lotes de todos los productos vendidos y los asigna en memoria
+    por venta (FIFO por fecha de ingreso). Igual que main_crearmovomientos_venta, un producto
+    sin existencias suficientes no se descuenta y se reporta en productos_sin_stock.
+
+    Retorna (asignaciones {índice: [(lote, cantidad, precio)]}, sin_stock {índice: [producto_id]},
+    lotes afectados).
+    """
+    if not ventas:
+        return {}, {}, []
+    lotes_por_producto = defaultdict(list)
+    for lote in LoteInventario.objects.select_for_update().filter(
+        almacen_id__in={venta['almacen'].id for venta in ventas},
+        producto_id__in={producto.id for venta in ventas for producto, _, _ in venta['detalles']},
+        cantidad__gt=0
+    ).order_by('fecha_ingreso', 'id'):
+        lotes_por_producto[(lote.almacen_id, lote.producto_id)].append(lote)
+
+    asignaciones, sin_stock, lotes_afectados = {}, {}, {}
+    for venta in ventas:
+        for producto_id, (_, cantidad, precio) in _agrupar_productos(venta['detalles']).items():
+            lotes = lotes_por_producto[(venta['almacen'].id, producto_id)]
+            if sum(lote.cantidad for lote in lotes) < cantidad:
+                sin_stock.setdefault(venta['indice'], []).append(producto_id)
+                continue
+            cantidad_restante = cantidad
+            for lote in lotes:
+                if cantidad_restante <= 0:
+                    break
+                if lote.cantidad <= 0:
+                    continue
+                cantidad_tomar = min(lote.cantidad, cantidad_restante)
+                lote.cantidad -= cantidad_tomar
+                cantidad_restante -= cantidad_tomar
+                lotes_afectados[lote.id] = lote
+                asignaciones.setdefault(venta['indice'], []).append((lote, cantidad_tomar, precio))
+    return asignaciones, sin_stock, list(lotes_afectados.values())
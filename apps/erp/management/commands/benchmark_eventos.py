@@ -0,0 +1,127 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.base.eventos import en_lote
+from apps.base.mediciones import AYUDA_REVERTIDOS, capturar_consultas, datos_revertidos
+from apps.erp.models import Almacen, Cliente, Producto, Venta
+from apps.inventario.models import LoteInventario, MovimientoInventario, ProductosMovimiento
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide los eventos de dominio de ventas (apps/base/eventos.py): consultas de un save() que no "
+        "cambia la fase y cancelación de N ventas una por una contra en_lote(). "
+        + AYUDA_REVERTIDOS
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ventas', type=int, default=200, help="Ventas a cancelar en cada escenario")
+        parser.add_argument('--lineas', type=int, default=5, help="Productos por venta")
+
+    def handle(self, *args, **options):
+        total_ventas = max(1, options['ventas'])
+        lineas = max(1, options['lineas'])
+        with datos_revertidos():
+            self._ejecutar(total_ventas, lineas)
+
+    def _crear_ventas(self, almacen, cliente, productos, total_ventas):
+        """
+        Ventas TERMINADAS con su SALIDA VENTA (4 piezas por lote; el lote queda en 6)
+        """
+        ventas = [
+            Venta.objects.create(almacen=almacen, cliente=cliente, total=Decimal('10.00'))
+            for _ in range(total_ventas)
+        ]
+        lotes = LoteInventario.objects.bulk_create([
+            LoteInventario(producto=producto, almacen=almacen, cantidad=Decimal('6.00'), costo_unitario=Decimal('2.50'))
+            for _ in ventas for producto in productos
+        ])
+        movimientos = MovimientoInventario.objects.bulk_create([
+            MovimientoInventario(
+                almacen=almacen,
+                cantidad=Decimal('4.00') * len(productos),
+                tipo=MovimientoInventario.TIPO_SALIDA,
+                movimiento=MovimientoInventario.SALIDA_VENTA,
+                referencia=f"VENTA-{venta.id}",
+                fase=MovimientoInventario.FASE_TERMINADA,
+            )
+            for venta in ventas
+        ])
+        ProductosMovimiento.objects.bulk_create([
+            ProductosMovimiento(
+                movimiento=movimiento,
+                producto=lote.producto,
+                lote=lote,
+                cantidad=Decimal('4.00'),
+                costo_unitario=Decimal('2.50'),
+                costo_total=Decimal('10.00'),
+            )
+            for i, movimiento in enumerate(movimientos)
+            for lote in lotes[i * len(productos):(i + 1) * len(productos)]
+        ])
+        return ventas, lotes
+
+    def _medir(self, etiqueta, funcion):
+        with capturar_consultas() as queries:
+            inicio = time.perf_counter()
+            funcion()
+            segundos = time.perf_counter() - inicio
+        # Los demás receptores de Venta (índice de búsqueda, sync) se cuentan aparte
+        inventario = sum(1 for query in queries if 'inventario_' in query['sql'])
+        self.stdout.write(f"{etiqueta}: {len(queries)} consultas ({inventario} de inventario), {segundos * 1000:.1f} ms")
+        return inventario
+
+    def _cancelar(self, ventas):
+        for venta in ventas:
+            venta.fase = Venta.FASE_CANCELADA
+            venta.save(update_fields=['fase'])
+
+    def _ejecutar(self, total_ventas, lineas):
+        almacen = Almacen.objects.create(nombre='BENCH EVENTOS')
+        cliente = Cliente.objects.create(
+            nombre='BENCH', apellido_paterno='EVENTOS', plazos_semanas=1, limite_credito=0, sujeto_credito=False
+        )
+        productos = Producto.objects.bulk_create([
+            Producto(nombre=f'BENCH EVENTO {i}', precio_base=1) for i in range(lineas)
+        ])
+
+        una_por_una, lotes_uno = self._crear_ventas(almacen, cliente, productos, total_ventas)
+        en_bloque, lotes_bloque = self._crear_ventas(almacen, cliente, productos, total_ventas)
+
+        consultas_una = self._medir(
+            f"cancelar {total_ventas} ventas una por una", lambda: self._cancelar(una_por_una)
+        )
+        consultas_bloque = self._medir(
+            f"cancelar {total_ventas} ventas en_lote()", lambda: self._en_lote(self._cancelar, en_bloque)
+        )
+
+        #GUARDAR DE NUEVO SIN CAMBIAR LA FASE: NO DEBE VOLVER A REVERTIR NI CONSULTAR MOVIMIENTOS
+        def guardar_sin_transicion():
+            for venta in una_por_una:
+                venta.ignorada = True
+                venta.save()
+        consultas_save = self._medir(f"{total_ventas} save() de ventas ya canceladas", guardar_sin_transicion)
+
+        #VALIDAR RESULTADO
+        lotes = LoteInventario.objects.filter(id__in=[lote.id for lote in lotes_uno + lotes_bloque])
+        entradas = MovimientoInventario.objects.filter(
+            referencia__in=[f"VENTA-{venta.id}" for venta in una_por_una + en_bloque],
+            movimiento=MovimientoInventario.ENTRADA_VENTA
+        )
+        checks = {
+            'lotes repuestos una vez': not lotes.exclude(cantidad=Decimal('10.00')).exists(),
+            'una entrada por venta': entradas.count() == total_ventas * 2,
+            'save() sin consultas de inventario': consultas_save == 0,
+            # en_lote(): 4 lecturas y las escrituras en bloque (partidas según el límite de parámetros)
+            'en_lote() agrupa las consultas': consultas_bloque <= consultas_una,
+        }
+        fallidos = [nombre for nombre, ok in checks.items() if not ok]
+        if fallidos:
+            raise CommandError(f"Resultado incorrecto: {', '.join(fallidos)}")
+        self.stdout.write(self.style.SUCCESS("✔ Eventos de venta verificados (los datos de prueba se revirtieron)"))
+
+    def _en_lote(self, funcion, *args):
+        with en_lote():
+            funcion(*args)
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from apps.erp.helpers.sync_ruta import depurar_cambios
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina de la bitácora de sincronización de rutas los cambios con más de N días. "
+        "Los dispositivos con un token anterior recibirán la sincronización completa."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=30, help="Días de cambios que se conservan")
+
+    def handle(self, *args, **options):
+        eliminados = depurar_cambios(options['dias'])
+        self.stdout.write(self.style.SUCCESS(f"✔ {eliminados} cambios eliminados"))
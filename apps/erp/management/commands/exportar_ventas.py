@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.base.exportar import FORMATOS, FORMATO_CSV, CHUNK_SIZE, exportar_archivo
+from apps.erp.helpers.exportaciones import NIVELES, NIVEL_DETALLE, filtrar_ventas, ventas_base, exportacion_ventas
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta ventas a CSV o XLSX leyendo por bloques (memoria constante). "
+        "Mismos filtros que el listado de ventas. Sin --salida escribe el CSV en la salida estándar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--nivel', choices=NIVELES, default=NIVEL_DETALLE, help="Un renglón por producto o por lote")
+        parser.add_argument('--almacen', type=int, help="ID del almacén")
+        parser.add_argument('--preventa', help="true / false")
+        parser.add_argument('--is-terminada', dest='is_terminada', help="true / false")
+        parser.add_argument('--fase')
+        parser.add_argument('--cliente', type=int)
+        parser.add_argument('--ruta', type=int)
+        parser.add_argument('--fecha-desde', dest='fecha_desde', help="YYYY-MM-DD")
+        parser.add_argument('--fecha-hasta', dest='fecha_hasta', help="YYYY-MM-DD")
+        parser.add_argument('--formato', choices=FORMATOS, default=FORMATO_CSV)
+        parser.add_argument('--salida', help="Ruta del archivo")
+        parser.add_argument('--chunk-size', dest='chunk_size', type=int, default=CHUNK_SIZE, help="Renglones por bloque")
+
+    def handle(self, *args, **options):
+        ventas = filtrar_ventas(ventas_base(options['almacen']), options)
+        queryset, columnas = exportacion_ventas(ventas, options['nivel'])
+        try:
+            total = exportar_archivo(queryset, columnas, options['salida'], options['formato'],
+                                     options['chunk_size'], titulo='ventas', stdout=self.stdout)
+        except ValueError as e:
+            raise CommandError(str(e))
+        destino = self.stdout if options['salida'] else self.stderr
+        destino.write(self.style.SUCCESS(f"✔ {total} renglones exportados"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.erp.helpers.busqueda_global import TIPOS, reconstruir_indice
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenera el índice de la búsqueda global (IndiceBusqueda). "
+        "Ejecutar después de migrar por primera vez o de cargas masivas que no disparan signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tipo', choices=list(TIPOS), nargs='+', default=None, help="Tipos a regenerar (todos por defecto)")
+
+    def handle(self, *args, **options):
+        creadas = reconstruir_indice(options['tipo'])
+        for tipo, total in creadas.items():
+            self.stdout.write(f"{tipo}: {total} registros")
+        self.stdout.write(self.style.SUCCESS("✔ Índice de búsqueda regenerado"))
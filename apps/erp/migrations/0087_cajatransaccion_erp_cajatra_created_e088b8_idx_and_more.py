@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contabilidad', '0006_condicionpago'),
+        ('erp', '0086_compra_fecha_vencimiento'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cajatransaccion',
+            index=models.Index(fields=['created_at', 'id'], name='erp_cajatra_created_e088b8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cajatransaccion',
+            index=models.Index(fields=['caja_apertura', 'created_at', 'id'], name='erp_cajatra_caja_ap_370d86_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['created_at', 'id'], name='erp_venta_created_0c60ab_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Índices de búsqueda trigram / texto completo (solo PostgreSQL, ver apps/base/busqueda.py)
+
+from django.db import migrations
+
+from apps.base.busqueda import sql_crear_indices, sql_eliminar_indices
+
+
+TABLAS = {
+    'erp_cliente': ('codigo', 'nombre', 'apellido_paterno', 'apellido_materno', 'razon_social', 'rfc', 'telefono'),
+    'erp_proveedor': ('codigo', 'nombre', 'razon_social', 'rfc', 'telefono'),
+    'erp_producto': ('codigo', 'nombre', 'clave_sat'),
+}
+
+
+def crear_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for tabla, columnas in TABLAS.items():
+        for sql in sql_crear_indices(tabla, columnas):
+            schema_editor.execute(sql)
+
+
+def eliminar_indices(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for tabla in TABLAS:
+        for sql in sql_eliminar_indices(tabla):
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0087_cajatransaccion_erp_cajatra_created_e088b8_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def crear_indice_trigram(apps, schema_editor):
+    # Índice trigram del documento (solo PostgreSQL; ver apps/erp/helpers/busqueda_global.py)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS "erp_indicebusqueda_documento_trgm" '
+        'ON "erp_indicebusqueda" USING gin ("documento" gin_trgm_ops);'
+    )
+
+
+def eliminar_indice_trigram(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS "erp_indicebusqueda_documento_trgm";')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0088_indices_busqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndiceBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('producto', 'Producto'), ('cliente', 'Cliente'), ('proveedor', 'Proveedor'), ('venta', 'Venta'), ('ruta', 'Ruta')], max_length=20, verbose_name='Tipo')),
+                ('objeto_id', models.BigIntegerField(verbose_name='ID del objeto')),
+                ('titulo', models.CharField(max_length=255, verbose_name='Título')),
+                ('subtitulo', models.CharField(blank=True, max_length=255, null=True, verbose_name='Subtítulo')),
+                ('documento', models.TextField(verbose_name='Documento de búsqueda')),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('almacen', models.ForeignKey(blank=True, help_text='Solo visible para usuarios de este almacén (vacío = todos)', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='erp.almacen')),
+            ],
+            options={
+                'verbose_name': 'Índice de Búsqueda',
+                'verbose_name_plural': 'Índice de Búsqueda',
+                'indexes': [models.Index(fields=['tipo', 'almacen'], name='erp_indiceb_tipo_ba275c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'objeto_id'), name='erp_indicebusqueda_tipo_objeto')],
+            },
+        ),
+        migrations.RunPython(crear_indice_trigram, eliminar_indice_trigram),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0089_indicebusqueda'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CambioSync',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entidad', models.CharField(choices=[('cliente', 'Cliente'), ('producto', 'Producto'), ('precio', 'Precio'), ('embarque', 'Embarque'), ('preventa', 'Preventa')], max_length=20, verbose_name='Entidad')),
+                ('objeto_id', models.BigIntegerField(verbose_name='ID del objeto')),
+                ('ambito', models.CharField(blank=True, default='', max_length=30, verbose_name='Ámbito')),
+                ('creado', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Cambio de Sincronización',
+                'verbose_name_plural': 'Cambios de Sincronización',
+                'indexes': [models.Index(fields=['ambito', 'id'], name='erp_cambios_ambito_a62242_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0090_cambiosync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venta',
+            name='clave_dispositivo',
+            field=models.CharField(blank=True, help_text='Clave única de la venta generada por el dispositivo de ruta (evita duplicados en reintentos)', max_length=100, null=True, unique=True, verbose_name='Clave del Dispositivo'),
+        ),
+    ]
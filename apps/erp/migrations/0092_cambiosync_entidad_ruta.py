@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0091_venta_clave_dispositivo'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cambiosync',
+            name='entidad',
+            field=models.CharField(choices=[('cliente', 'Cliente'), ('producto', 'Producto'), ('precio', 'Precio'), ('embarque', 'Embarque'), ('preventa', 'Preventa'), ('ruta', 'Ruta (vendedor o almacén)')], max_length=20, verbose_name='Entidad'),
+        ),
+    ]
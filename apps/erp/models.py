@@ -5,6 +5,11 @@ from apps.base.models import BaseModel, BaseDireccion
 from apps.usuarios.models import Usuario
 from apps.contabilidad.models import CondicionPago,MetodoPago
 from datetime import timedelta
+import logging
+
+
+logger = logging.getLogger(__name__)
+
 
 class Empresa(BaseModel):
     class Meta:
@@ -543,14 +548,14 @@ class Cliente(BaseModel):
         #SI M ONTOP ES MAYOR A CERO, ENTONCES PUEDE PAGAR
         monto = float(monto)
         if monto > self.total_credito:
-            print(f"El monto {monto} excede el crédito total {self.total_credito}.")
+            logger.info("Cliente %s: el monto %s excede el crédito total %s", self.id, monto, self.total_credito)
             return False
         
         if self.sujeto_credito is False:
-            print(f"El cliente {self.nombre} no es sujeto a crédito.")
+            logger.info("Cliente %s no es sujeto a crédito", self.id)
             return False
         if self.total_credito == 0:
-            print(f"El cliente {self.nombre} no tiene crédito disponible.")
+            logger.info("Cliente %s no tiene crédito disponible", self.id)
             return False
         #from apps.credito.models import CreditoCliente
         creditos_activos = self.creditos.filter(is_pagado=False)
@@ -560,7 +565,7 @@ class Cliente(BaseModel):
                 creditos_vencidos_count += 1
                 
         if creditos_vencidos_count > 0:
-            print(f"El cliente {self.nombre} tiene {creditos_vencidos_count} créditos vencidos.")
+            logger.info("Cliente %s tiene %s créditos vencidos", self.id, creditos_vencidos_count)
             return False
         
         return True
@@ -927,6 +932,10 @@ class Venta(BaseModel):
     class Meta:
         verbose_name = "Venta"
         verbose_name_plural = "Ventas"
+        #PAGINACIÓN POR CURSOR (created_at, id)
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+        ]
     FASE_PRE_VENTA  = "PRE VENTA"
     FASE_VENTA_COMANDA = "VENTA COMANDERA"
     FASE_EN_PROCESO = "EN CURSO"
@@ -971,6 +980,7 @@ class Venta(BaseModel):
     ya_terminada = models.BooleanField(default=False, verbose_name="Ya Terminada", help_text="Indica si la venta ya fue finalizada")
     ignorada = models.BooleanField(default=False, verbose_name="Venta Ignorada", help_text="Indica si la venta fue ignorada en el sistema para cierre")
     cambio = models.DecimalField(max_digits=25, decimal_places=5, verbose_name="Cambio Entregado", default=0.00)
+    clave_dispositivo = models.CharField(max_length=100, unique=True, blank=True, null=True, verbose_name="Clave del Dispositivo", help_text="Clave única de la venta generada por el dispositivo de ruta (evita duplicados en reintentos)")
     
     
     
@@ -1338,6 +1348,13 @@ class CajaTransaccion(BaseModel):
     tipo = models.CharField(max_length=10, choices=TIPO_CHOICES, verbose_name="Tipo de Transacción", default=TIPO_ENTRADA)
     gasto_tipo = models.CharField(max_length=50, blank=True, null=True, verbose_name="Tipo de Gasto", choices=GASTO_TIPO_CHOICES,default="")
     descripcion = models.TextField(blank=True, null=True, verbose_name="Descripción")
+
+    class Meta:
+        #PAGINACIÓN POR CURSOR (created_at, id)
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['caja_apertura', 'created_at', 'id']),
+        ]
     
     
 """
@@ -1393,3 +1410,87 @@ class InsidenciaLote(BaseModel):
     
     def __str__(self):
         return f"Insidencia {self.insidencia.pk} - Lote {self.lote.pk} ({'Atendida' if self.atendida else 'Pendiente'})"
+
+
+"""
+=======================================================================
+                    ÍNDICE DE BÚSQUEDA GLOBAL
+=======================================================================
+"""
+class IndiceBusqueda(models.Model):
+    """
+    Copia desnormalizada de productos, clientes, proveedores, ventas y rutas para la
+    búsqueda global. Se mantiene con signals (apps/erp/signals/busqueda_global.py);
+    el documento ya está en minúsculas y sin acentos.
+    """
+    class Meta:
+        verbose_name = "Índice de Búsqueda"
+        verbose_name_plural = "Índice de Búsqueda"
+        constraints = [
+            models.UniqueConstraint(fields=['tipo', 'objeto_id'], name='erp_indicebusqueda_tipo_objeto'),
+        ]
+        indexes = [
+            models.Index(fields=['tipo', 'almacen']),
+        ]
+
+    TIPO_PRODUCTO = "producto"
+    TIPO_CLIENTE = "cliente"
+    TIPO_PROVEEDOR = "proveedor"
+    TIPO_VENTA = "venta"
+    TIPO_RUTA = "ruta"
+    TIPO_CHOICES = [
+        (TIPO_PRODUCTO, "Producto"),
+        (TIPO_CLIENTE, "Cliente"),
+        (TIPO_PROVEEDOR, "Proveedor"),
+        (TIPO_VENTA, "Venta"),
+        (TIPO_RUTA, "Ruta"),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES, verbose_name="Tipo")
+    objeto_id = models.BigIntegerField(verbose_name="ID del objeto")
+    titulo = models.CharField(max_length=255, verbose_name="Título")
+    subtitulo = models.CharField(max_length=255, blank=True, null=True, verbose_name="Subtítulo")
+    documento = models.TextField(verbose_name="Documento de búsqueda")
+    almacen = models.ForeignKey(Almacen, on_delete=models.CASCADE, blank=True, null=True, related_name="+", help_text="Solo visible para usuarios de este almacén (vacío = todos)")
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.tipo} {self.objeto_id}: {self.titulo}"
+
+
+class CambioSync(models.Model):
+    """
+    Bitácora de cambios para la sincronización incremental de los dispositivos de ruta
+    (apps/erp/helpers/sync_ruta.py). Solo se agrega; el id es el token de sincronización.
+    El ámbito indica quién debe recibir el cambio: vacío = todas las rutas,
+    'ruta:<id>' o 'vendedor:<id>'.
+    """
+    class Meta:
+        verbose_name = "Cambio de Sincronización"
+        verbose_name_plural = "Cambios de Sincronización"
+        indexes = [
+            models.Index(fields=['ambito', 'id']),
+        ]
+
+    ENTIDAD_CLIENTE = "cliente"
+    ENTIDAD_PRODUCTO = "producto"
+    ENTIDAD_PRECIO = "precio"
+    ENTIDAD_EMBARQUE = "embarque"
+    ENTIDAD_PREVENTA = "preventa"
+    ENTIDAD_RUTA = "ruta"
+    ENTIDAD_CHOICES = [
+        (ENTIDAD_CLIENTE, "Cliente"),
+        (ENTIDAD_PRODUCTO, "Producto"),
+        (ENTIDAD_PRECIO, "Precio"),
+        (ENTIDAD_EMBARQUE, "Embarque"),
+        (ENTIDAD_PREVENTA, "Preventa"),
+        (ENTIDAD_RUTA, "Ruta (vendedor o almacén)"),
+    ]
+
+    entidad = models.CharField(max_length=20, choices=ENTIDAD_CHOICES, verbose_name="Entidad")
+    objeto_id = models.BigIntegerField(verbose_name="ID del objeto")
+    ambito = models.CharField(max_length=30, blank=True, default="", verbose_name="Ámbito")
+    creado = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.id} {self.entidad} {self.objeto_id} ({self.ambito or 'global'})"
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from apps.erp.models import Venta, Almacen, Rutas, Producto, CajaApertura, CajaTransaccion
-from apps.inventario.models import LoteInventario, EmbarqueReparto, ProductoEmbarque
+from apps.inventario.models import LoteInventario, EmbarqueReparto, ProductoEmbarque, LiquidacionEmbarque
 from apps.base.serializer import FlexiblePKRelatedField, SerializerRelatedField
 
 from apps.erp.helpers.embarque import crear_movimiento_inventario_almacen_embarque
@@ -148,6 +148,39 @@ class VentaEmbarqueCajaSerializer(serializers.ModelSerializer):
             return obj.created_by.full_name()
         return None
 
+
+class LiquidacionEmbarqueSerializer(serializers.ModelSerializer):
+    """
+    Serializer para mostrar la liquidación guardada al finalizar un embarque
+    """
+    embarque_id = serializers.IntegerField(source='embarque.id', read_only=True)
+    apertura_caja_id = serializers.IntegerField(source='apertura_caja.id', read_only=True, allow_null=True)
+    fecha_cierre = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S", read_only=True)
+
+    class Meta:
+        model = LiquidacionEmbarque
+        fields = [
+            'id',
+            'embarque_id',
+            'apertura_caja_id',
+            'fecha_cierre',
+            'cantidad_cargada',
+            'cantidad_entregada',
+            'cantidad_devuelta',
+            'cantidad_ventas',
+            'total_ventas',
+            'total_cobrado_ventas',
+            'total_credito',
+            'monto_inicial',
+            'total_entradas',
+            'total_salidas',
+            'total_gastos',
+            'balance',
+            'metodos_pago',
+            'productos',
+        ]
+        read_only_fields = fields
+
 ################################################################################################################
 class LoteProductoEmbarqueSerializer(serializers.Serializer):
     lote = SerializerRelatedField(
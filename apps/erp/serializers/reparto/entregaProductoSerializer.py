@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from apps.erp.models import Venta, Producto
+from apps.inventario.models import EmbarqueReparto
 
-from apps.erp.helpers.entrega_reparto import registrar_entrega_productos
+from apps.erp.helpers.entrega_reparto import registrar_entrega_productos, registrar_entregas_ruta
 
 class ProductosEntregaSerializer(serializers.Serializer):
     producto = serializers.PrimaryKeyRelatedField(queryset=Producto.objects.all())
@@ -10,6 +11,8 @@ class ProductosEntregaSerializer(serializers.Serializer):
 class EntragaProductoRutaSerializer(serializers.Serializer):
     venta = serializers.PrimaryKeyRelatedField(queryset=Venta.objects.filter(was_preventa=True))
     productos = ProductosEntregaSerializer(many=True)
+    clave = serializers.CharField(max_length=100, required=False, allow_null=True, allow_blank=True,
+                                  help_text="Clave única de la entrega generada por el dispositivo (evita duplicados en reintentos)")
     
     
     
@@ -17,6 +20,28 @@ class EntragaProductoRutaSerializer(serializers.Serializer):
     def create(self, validated_data):
         venta = validated_data['venta']
         productos = validated_data['productos']
+        clave = validated_data.get('clave') or None
         
-        venta_actualizada = registrar_entrega_productos(venta, productos)
+        venta_actualizada = registrar_entrega_productos(venta, productos, clave=clave)
         return venta_actualizada
+
+
+class EntregaParadaSerializer(serializers.Serializer):
+    clave = serializers.CharField(max_length=100, help_text="Clave única de la entrega generada por el dispositivo")
+    venta = serializers.PrimaryKeyRelatedField(queryset=Venta.objects.filter(was_preventa=True))
+    productos = ProductosEntregaSerializer(many=True, allow_empty=False)
+
+
+class EntregasRutaSerializer(serializers.Serializer):
+    embarque = serializers.PrimaryKeyRelatedField(
+        queryset=EmbarqueReparto.objects.exclude(status_model=EmbarqueReparto.STATUS_MODEL_DELETE)
+    )
+    entregas = EntregaParadaSerializer(many=True, allow_empty=False, help_text="Entregas de todas las paradas de la ruta")
+
+    def create(self, validated_data):
+        request = self.context.get('request')
+        return registrar_entregas_ruta(
+            embarque=validated_data['embarque'],
+            entregas=validated_data['entregas'],
+            usuario=request.user if request else None
+        )
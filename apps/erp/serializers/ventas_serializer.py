@@ -17,6 +17,7 @@ from apps.contabilidad.models import CondicionPago
 from apps.usuarios.models import Usuario
 
 from apps.erp.helpers.ventas import main_crearmovomientos_venta
+from apps.erp.helpers.ventas_lote import registrar_ventas_ruta, FASES_LOTE, LIMITE_VENTAS_LOTE
 
 
 
@@ -190,6 +191,11 @@ class VentaMiniSerializer(BaseSerializer):
             'id', 'codigo', 'cliente_nombre', 'ruta_nombre', 'total_detalles', 'created_at','origen','was_preventa','is_terminada',
             'condicion_pago'
         )
+        # ?expand=cliente,ruta
+        expandibles = {
+            'cliente': (ClienteMiniSerializer, {}),
+            'ruta': (RutasMiniSerializer, {}),
+        }
 
     def get_ruta_nombre(self, obj):
         """
@@ -499,3 +505,52 @@ class VentaEstadoSerializer(BaseSerializer):
                     )
         
         return value
+
+
+"""
+==============================================
+    SERIALIZERS PARA CARGA EN LOTE DE VENTAS DE RUTA
+==============================================
+Los ids se reciben como enteros y se validan juntos para todo el lote
+(ver apps/erp/helpers/ventas_lote.py), no con una consulta por venta.
+"""
+class VentaLoteDetalleSerializer(serializers.Serializer):
+    producto = serializers.IntegerField()
+    cantidad = serializers.DecimalField(max_digits=20, decimal_places=5, min_value=Decimal('0.00001'))
+    precio_unitario = serializers.DecimalField(max_digits=20, decimal_places=5, min_value=Decimal('0'))
+
+
+class VentaLotePagoSerializer(serializers.Serializer):
+    metodo_pago = serializers.IntegerField()
+    monto = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+    referencia = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+
+class VentaLoteSerializer(serializers.Serializer):
+    clave = serializers.CharField(max_length=100, help_text="Clave única de la venta generada por el dispositivo")
+    cliente = serializers.IntegerField()
+    fase = serializers.ChoiceField(choices=FASES_LOTE, default=Venta.FASE_TERMINADA)
+    almacen = serializers.IntegerField(
+        required=False, allow_null=True,
+        help_text="Almacén afectado (obligatorio en preventas; por defecto el almacén de venta de la ruta)"
+    )
+    detalles = VentaLoteDetalleSerializer(many=True, allow_empty=False)
+    pagos = VentaLotePagoSerializer(many=True, required=False)
+
+
+class VentasRutaLoteSerializer(serializers.Serializer):
+    ruta = serializers.PrimaryKeyRelatedField(
+        queryset=Rutas.objects.exclude(status_model=BaseModel.STATUS_MODEL_DELETE)
+    )
+    ventas = VentaLoteSerializer(
+        many=True, allow_empty=False, max_length=LIMITE_VENTAS_LOTE,
+        help_text=f"Ventas capturadas sin conexión (máximo {LIMITE_VENTAS_LOTE} por envío)"
+    )
+
+    def create(self, validated_data):
+        request = self.context.get('request')
+        return registrar_ventas_ruta(
+            ruta=validated_data['ruta'],
+            ventas=validated_data['ventas'],
+            usuario=request.user if request else None
+        )
@@ -3,4 +3,6 @@ from .acciones import *
 from .ventas_inventario import *
 from .permisos import *
 from .categoria_cliente import *
+from .busqueda_global import *
+from .sync_ruta import *
 #from .producto import *
\ No newline at end of file
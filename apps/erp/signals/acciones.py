@@ -1,6 +1,10 @@
 from django.db.models.signals import post_save, pre_save, post_migrate
 from django.dispatch import receiver
 from apps.erp.models import Almacen, Rutas
+import logging
+
+
+logger = logging.getLogger(__name__)
 
 """
 ====================================================================
@@ -48,10 +52,8 @@ def crear_almacenes_virtual_ruta(sender, instance, created, **kwargs):
                 ruta=instance
             )
             
-        except Exception as e:
-            print(f"[SIGNAL ERROR] Error al crear almacén virtual para ruta {instance.codigo}: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error al crear almacén virtual para ruta %s", instance.codigo)
 
     else:
         if instance.status_model == Rutas.STATUS_MODEL_DELETE:
@@ -78,20 +80,24 @@ def crear_almacen_virtual(sender, instance, created, **kwargs):
                 pertence=instance
             )
             
-        except Exception as e:
-            print(f"[SIGNAL ERROR] Error al crear almacén virtual para el almacén {instance.codigo}: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error al crear almacén virtual para el almacén %s", instance.codigo)
 
 
 @receiver(post_migrate)
 def crear_almacenes_help_cedis(sender, **kwargs):
-    print("[ERP post_migrate] Ejecutando tareas post-migrate...")
+    logger.debug("Ejecutando tareas post-migrate de ERP")
     # Ejemplos:
     # - Crear almacén virtual de ayuda para cedis y rutas en preventas
-    from apps.erp.models import Almacen
+    from apps.erp.models import Almacen, Empresa
     from django.db import transaction
 
+    # Los almacenes pertenecen a una empresa; en una BD nueva (p. ej. la de pruebas) aún no hay
+    empresa = Empresa.objects.order_by('id').first()
+    if empresa is None:
+        logger.warning("No hay empresas registradas, no se crean los almacenes de ayuda")
+        return
+
     with transaction.atomic():
         if not Almacen.objects.filter(tipo=Almacen.TIPO_HELP_CEDIS).exists():
             Almacen.objects.create(
@@ -99,6 +105,7 @@ def crear_almacenes_help_cedis(sender, **kwargs):
                 codigo=None,  # se autogenera en save()
                 tipo=Almacen.TIPO_HELP_CEDIS,
                 is_cedis=False,
+                empresa=empresa,
             )
         if not Almacen.objects.filter(tipo=Almacen.TIPO_INSIDENCIAS).exists():
             Almacen.objects.create(
@@ -106,6 +113,7 @@ def crear_almacenes_help_cedis(sender, **kwargs):
                 codigo=None,  # se autogenera en save()
                 tipo=Almacen.TIPO_INSIDENCIAS,
                 is_cedis=False,
+                empresa=empresa,
             )
 
     #print("[ERP post_migrate] Listo.")
@@ -140,7 +148,7 @@ def crear_embarque_almacen_ruta(sender, **kwargs):
             empresa_default = Empresa.objects.filter(status_model='ACTIVE').first()
             
             if not empresa_default:
-                print("[SIGNAL ERROR] No se encontró una empresa activa")
+                logger.warning("No se encontró una empresa activa para crear los almacenes de embarque")
                 return
             
             # Crear Almacén de Embarque
@@ -153,9 +161,7 @@ def crear_embarque_almacen_ruta(sender, **kwargs):
             
             # Asignar el almacén recién creado a la ruta
             Rutas.objects.filter(pk=ruta.pk).update(almacen_embarque=nuevo_almacen_embarque)
-            print(f"[SIGNAL] Creado almacén de embarque para la ruta {ruta.nombre}")
+            logger.info("Creado almacén de embarque para la ruta %s", ruta.nombre)
             
-        except Exception as e:
-            print(f"[SIGNAL ERROR] Error al crear almacén de embarque para ruta {ruta.codigo}: {str(e)}")
-            import traceback
-            traceback.print_exc()
\ No newline at end of file
+        except Exception:
+            logger.exception("Error al crear almacén de embarque para ruta %s", ruta.codigo)
\ No newline at end of file
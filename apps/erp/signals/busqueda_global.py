@@ -0,0 +1,59 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.erp.models import Producto, Cliente, Proveedor, Venta, Rutas
+from apps.erp.helpers.busqueda_global import (
+    indexar, indexar_ventas_cliente, desindexar, TIPO_POR_MODELO, CAMPOS_INDICE, CAMPOS_NOMBRE_CLIENTE,
+)
+
+"""
+====================================================================
+        SINCRONIZACIÓN DEL ÍNDICE DE BÚSQUEDA GLOBAL
+====================================================================
+Ventas y clientes guardan al cargarse los valores de CAMPOS_INDICE: la mayoría de sus
+escrituras (pagos, fases, entregas) no cambian el índice y no se reindexan.
+"""
+def _campos_indice(instance):
+    # __dict__ para no consultar campos diferidos (only / defer)
+    return {campo: instance.__dict__.get(campo) for campo in CAMPOS_INDICE[type(instance)]}
+
+
+@receiver(post_init, sender=Venta)
+@receiver(post_init, sender=Cliente)
+def indice_original(sender, instance, **kwargs):
+    instance._busqueda_original = _campos_indice(instance)
+
+
+@receiver(post_save, sender=Producto)
+@receiver(post_save, sender=Proveedor)
+@receiver(post_save, sender=Rutas)
+def indexar_busqueda_global(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    indexar(instance)
+
+
+@receiver(post_save, sender=Venta)
+@receiver(post_save, sender=Cliente)
+def indexar_si_cambia(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    original = instance._busqueda_original
+    actual = _campos_indice(instance)
+    instance._busqueda_original = actual
+    if not created and actual == original:
+        return
+    indexar(instance)
+    if sender is Cliente and not created and any(
+        actual[campo] != original[campo] for campo in CAMPOS_NOMBRE_CLIENTE
+    ):
+        indexar_ventas_cliente(instance)
+
+
+@receiver(post_delete, sender=Producto)
+@receiver(post_delete, sender=Cliente)
+@receiver(post_delete, sender=Proveedor)
+@receiver(post_delete, sender=Venta)
+@receiver(post_delete, sender=Rutas)
+def desindexar_busqueda_global(sender, instance, **kwargs):
+    desindexar(TIPO_POR_MODELO[sender], instance.pk)
@@ -0,0 +1,125 @@
+from django.db.models.signals import post_init, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from apps.erp.models import CambioSync, Cliente, CompraDetalle, Producto, Rutas, Venta
+from apps.erp.helpers.sync_ruta import registrar_cambios, ambito_ruta, ambito_vendedor
+from apps.inventario.models import EmbarqueReparto, ProductoEmbarque
+
+"""
+====================================================================
+        BITÁCORA DE SINCRONIZACIÓN DE RUTAS (CambioSync)
+====================================================================
+El ámbito anterior (vendedor del cliente, ruta de la preventa o del embarque) se guarda
+al cargar la instancia para avisar también a quien deja de verla.
+Cambiar el vendedor o el almacén de una ruta cambia todo su contenido: se registra un
+cambio de la ruta y su siguiente sincronización es completa.
+"""
+def _original(instance, campo):
+    # __dict__ para no consultar campos diferidos (only / defer)
+    return instance.__dict__.get(campo)
+
+
+@receiver(post_init, sender=Cliente)
+def cliente_ambito_original(sender, instance, **kwargs):
+    instance._sync_vendedor_id = _original(instance, 'vendedor_id')
+
+
+@receiver(post_init, sender=Venta)
+def venta_ambito_original(sender, instance, **kwargs):
+    instance._sync_ruta_id = _original(instance, 'ruta_id')
+    instance._sync_fase = _original(instance, 'fase')
+
+
+@receiver(post_init, sender=EmbarqueReparto)
+def embarque_ambito_original(sender, instance, **kwargs):
+    instance._sync_ruta_id = _original(instance, 'ruta_id')
+
+
+@receiver(post_init, sender=Rutas)
+def ruta_ambito_original(sender, instance, **kwargs):
+    instance._sync_asignado_id = _original(instance, 'asignado_id')
+    instance._sync_almacen_id = _original(instance, 'almacen_id')
+
+
+@receiver(post_save, sender=Cliente)
+@receiver(post_delete, sender=Cliente)
+def registrar_cambio_cliente(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    registrar_cambios(CambioSync.ENTIDAD_CLIENTE, [instance.pk], [
+        ambito_vendedor(instance._sync_vendedor_id), ambito_vendedor(instance.vendedor_id)
+    ])
+    instance._sync_vendedor_id = instance.vendedor_id
+
+
+@receiver(post_save, sender=Rutas)
+def registrar_cambio_ruta(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    if (instance._sync_asignado_id, instance._sync_almacen_id) != (instance.asignado_id, instance.almacen_id):
+        registrar_cambios(CambioSync.ENTIDAD_RUTA, [instance.pk], [ambito_ruta(instance.pk)])
+    instance._sync_asignado_id = instance.asignado_id
+    instance._sync_almacen_id = instance.almacen_id
+
+
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+def registrar_cambio_producto(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    registrar_cambios(CambioSync.ENTIDAD_PRODUCTO, [instance.pk])
+    registrar_cambios(CambioSync.ENTIDAD_PRECIO, [instance.pk])
+
+
+@receiver(post_save, sender=CompraDetalle)
+@receiver(post_delete, sender=CompraDetalle)
+def registrar_cambio_precio(sender, instance, raw=False, **kwargs):
+    # La lista de precios sale del promedio de las últimas compras
+    if raw:
+        return
+    registrar_cambios(CambioSync.ENTIDAD_PRECIO, [instance.producto_id])
+
+
+@receiver(post_save, sender=Venta)
+@receiver(post_delete, sender=Venta)
+def registrar_cambio_preventa(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if Venta.FASE_PRE_VENTA in (instance._sync_fase, instance.fase):
+        registrar_cambios(CambioSync.ENTIDAD_PREVENTA, [instance.pk], [
+            ambito_ruta(instance._sync_ruta_id), ambito_ruta(instance.ruta_id)
+        ])
+    instance._sync_ruta_id = instance.ruta_id
+    instance._sync_fase = instance.fase
+
+
+@receiver(post_save, sender=EmbarqueReparto)
+@receiver(post_delete, sender=EmbarqueReparto)
+def registrar_cambio_embarque(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    registrar_cambios(CambioSync.ENTIDAD_EMBARQUE, [instance.pk], [
+        ambito_ruta(instance._sync_ruta_id), ambito_ruta(instance.ruta_id)
+    ])
+    instance._sync_ruta_id = instance.ruta_id
+
+
+@receiver(post_save, sender=ProductoEmbarque)
+@receiver(post_delete, sender=ProductoEmbarque)
+def registrar_cambio_producto_embarque(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    ruta_id = EmbarqueReparto.objects.filter(pk=instance.embarque_id).values_list('ruta_id', flat=True).first()
+    registrar_cambios(CambioSync.ENTIDAD_EMBARQUE, [instance.embarque_id], [ambito_ruta(ruta_id)])
+
+
+@receiver(m2m_changed, sender=EmbarqueReparto.ventas.through)
+def registrar_cambio_ventas_embarque(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        registrar_cambios(CambioSync.ENTIDAD_EMBARQUE, [instance.pk], [ambito_ruta(instance.ruta_id)])
+    elif pk_set:
+        # venta.embarques_ruta.add(...): instance es la venta
+        for embarque_id, ruta_id in EmbarqueReparto.objects.filter(pk__in=pk_set).values_list('id', 'ruta_id'):
+            registrar_cambios(CambioSync.ENTIDAD_EMBARQUE, [embarque_id], [ambito_ruta(ruta_id)])
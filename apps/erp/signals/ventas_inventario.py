@@ -1,7 +1,11 @@
-from django.db.models.signals import post_save, pre_save
+from collections import defaultdict
+
+from django.db.models.signals import pre_save
 from django.dispatch import receiver
-from apps.erp.models import Venta, VentaDetalle, VentaDetalleLote
-from apps.inventario.models import MovimientoInventario, ProductosMovimiento, LoteInventario, Almacen
+from apps.base.versiones import marcar_cambio_inventario
+from apps.erp.eventos import venta_cancelada, venta_cargada
+from apps.erp.models import Venta, VentaDetalle
+from apps.inventario.models import MovimientoInventario, ProductosMovimiento, LoteInventario
 from django.db import transaction
 
 """
@@ -26,101 +30,76 @@ def validar_venta_pre_guardado(sender, instance, **kwargs):
         # Creación de venta normal
         instance.vendedor = instance.created_by
 
-@receiver(post_save, sender=Venta)
-def actualizar_detalles_cargados(sender, instance, **kwargs):
+
+# Los eventos (apps/erp/eventos.py) solo se envían en la transición de la venta, no en cada save()
+@receiver(venta_cargada)
+def actualizar_detalles_cargados(sender, instancias, **kwargs):
     """
-    Actualiza el estado de carga de todos los detalles cuando una preventa es totalmente cargada
+    Marca como cargados los detalles de las preventas totalmente cargadas (una sola consulta)
     """
-    # Validaciones básicas
-    if not instance:
-        return
-        
-    # Solo procesar si la venta está totalmente cargada y fue preventa
-    if not (instance.is_total_cargado and instance.was_preventa):
-        return
-    
-    print(f"[VENTA SIGNAL] Actualizando detalles para venta {instance.codigo} (ID: {instance.id})")
-    
-    try:
-        ## 🔍 DEBUGGING: Veamos el estado actual de los detalles
-        #total_detalles = instance.detalles.count()
-        #detalles_false = instance.detalles.filter(is_cargado=False).count()
-        #detalles_true = instance.detalles.filter(is_cargado=True).count()
-        #
-        #print(f"[VENTA SIGNAL DEBUG] Estado de detalles:")
-        #print(f"  - Total detalles: {total_detalles}")
-        #print(f"  - Con is_cargado=False: {detalles_false}")
-        #print(f"  - Con is_cargado=True: {detalles_true}")
-        
-        # ✅ OPTIMIZACIÓN: Update masivo en una sola consulta
-        # Solo actualizar detalles que NO estén marcados como cargados
-        detalles_actualizados = instance.detalles.filter(is_cargado=False).update(is_cargado=True)
-        
-        if detalles_actualizados > 0:
-            print(f"[VENTA SIGNAL] ✅ {detalles_actualizados} detalles marcados como cargados para venta {instance.codigo}")
-        else:
-            print(f"[VENTA SIGNAL] ⚠️ No se encontraron detalles con is_cargado=False para actualizar en venta {instance.codigo}")
-            
-    except Exception as e:
-        print(f"[VENTA SIGNAL ERROR] ❌ Error al actualizar detalles: {str(e)}")
-        # No re-lanzar la excepción para evitar que falle el guardado de la venta
+    ids = [venta.id for venta in instancias if venta.was_preventa]
+    if ids:
+        VentaDetalle.objects.filter(venta_id__in=ids, is_cargado=False).update(is_cargado=True)
 
 
-@receiver(post_save, sender=Venta)
-def cancelar_venta(sender, instance, **kwargs):
-    print(f"[VENTA SIGNAL] Procesando cancelación para venta {instance.codigo} (ID: {instance.id})")
-    # Verifica si la instancia existe
-    if not instance:
-        #print("[VENTA SIGNAL] Instancia de venta no encontrada.")
+@receiver(venta_cancelada)
+@transaction.atomic
+def cancelar_venta(sender, instancias, **kwargs):
+    """
+    Regresa al inventario la salida de las ventas canceladas con un movimiento de
+    ENTRADA VENTA por venta. Las ventas sin salida o ya revertidas se omiten.
+    """
+    ventas = {f"VENTA-{venta.id}": venta for venta in instancias}
+    revertidas = set(MovimientoInventario.objects.filter(
+        referencia__in=ventas, movimiento=MovimientoInventario.ENTRADA_VENTA
+    ).values_list('referencia', flat=True))
+
+    salidas = {}
+    for movimiento in MovimientoInventario.objects.filter(
+        referencia__in=set(ventas) - revertidas,
+        movimiento=MovimientoInventario.SALIDA_VENTA
+    ).prefetch_related('productosMovimiento').order_by('id'):
+        salidas.setdefault(movimiento.referencia, movimiento)
+    if not salidas:
         return
-    # Solo procesa si la venta fue cancelada
-    if instance.fase == Venta.FASE_CANCELADA:
-        ref = f"VENTA-{instance.id}"
-        
-        movimiento = MovimientoInventario.objects.filter(
-            referencia=ref, 
-            movimiento=MovimientoInventario.SALIDA_VENTA
-        ).select_related(
-            'almacen'
-        ).prefetch_related(
-            'productosMovimiento__producto',
-            'productosMovimiento__lote'
-        ).first()
-        
-        #print(f"[VENTA SIGNAL] Cancelando inventario para venta {instance.codigo} (ID: {instance.id})")
-        cantidad_productos = 0
-        
-        if movimiento:
-            for prod_mov in movimiento.productosMovimiento.all():
-                lote = prod_mov.lote
-                almacen = movimiento.almacen
-                #print(f"Regresando {prod_mov.cantidad} del producto {prod_mov.producto.nombre} al almacen {almacen.nombre}")
-                # Si el lote existe, regresa la cantidad al lote
-                if lote:
-                    lote.cantidad += prod_mov.cantidad
-                    cantidad_productos += prod_mov.cantidad
-                    lote.save()
-                
-        #Creamos los movimientos de entrada por cancelacion de venta
-        with transaction.atomic():
-            nuevo_movimiento = MovimientoInventario.objects.create(
-                almacen=movimiento.almacen,
-                cantidad=movimiento.cantidad,
-                costo_unitario=movimiento.costo_unitario,
-                tipo =MovimientoInventario.TIPO_ENTRADA,
-                movimiento=MovimientoInventario.ENTRADA_VENTA,
-                referencia=ref,
-                fase=MovimientoInventario.FASE_TERMINADA,
-                created_by=instance.updated_by
-            )
-            
-            for prod_mov in movimiento.productosMovimiento.all():
-                ProductosMovimiento.objects.create(
-                    movimiento=nuevo_movimiento,
-                    producto=prod_mov.producto,
-                    lote=prod_mov.lote,
-                    cantidad=prod_mov.cantidad,
-                    costo_unitario=prod_mov.costo_unitario,
-                    costo_total=prod_mov.costo_total,
-                    created_by=instance.updated_by
-                )
\ No newline at end of file
+
+    #BLOQUEAR LOS LOTES Y REGRESAR LAS CANTIDADES EN MEMORIA
+    regresar = defaultdict(int)
+    for movimiento in salidas.values():
+        for prod_mov in movimiento.productosMovimiento.all():
+            if prod_mov.lote_id:
+                regresar[prod_mov.lote_id] += prod_mov.cantidad
+    lotes = list(LoteInventario.objects.select_for_update().filter(id__in=regresar))
+    for lote in lotes:
+        lote.cantidad += regresar[lote.id]
+
+    #MOVIMIENTOS DE ENTRADA POR CANCELACIÓN (bulk_create no vuelve a afectar los lotes)
+    entradas = {
+        ref: MovimientoInventario(
+            almacen_id=movimiento.almacen_id,
+            cantidad=movimiento.cantidad,
+            costo_unitario=movimiento.costo_unitario,
+            tipo=MovimientoInventario.TIPO_ENTRADA,
+            movimiento=MovimientoInventario.ENTRADA_VENTA,
+            referencia=ref,
+            fase=MovimientoInventario.FASE_TERMINADA,
+            created_by_id=ventas[ref].updated_by_id
+        )
+        for ref, movimiento in salidas.items()
+    }
+    MovimientoInventario.objects.bulk_create(entradas.values())
+    ProductosMovimiento.objects.bulk_create([
+        ProductosMovimiento(
+            movimiento=entradas[ref],
+            producto_id=prod_mov.producto_id,
+            lote_id=prod_mov.lote_id,
+            cantidad=prod_mov.cantidad,
+            costo_unitario=prod_mov.costo_unitario,
+            costo_total=prod_mov.costo_total,
+            created_by_id=ventas[ref].updated_by_id
+        )
+        for ref, movimiento in salidas.items()
+        for prod_mov in movimiento.productosMovimiento.all()
+    ])
+    LoteInventario.objects.bulk_update(lotes, ['cantidad'])
+    marcar_cambio_inventario(lotes)
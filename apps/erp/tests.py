@@ -1,3 +1,393 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, modify_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.erp.helpers.entrega_reparto import ENTREGA_DUPLICADA, ENTREGA_REGISTRADA, registrar_entregas_ruta
+from apps.erp.helpers.sync_ruta import codificar_token, depurar_cambios, registrar_cambios, sincronizar
+from apps.erp.models import (
+    Almacen, CambioSync, Cliente, Empresa, IndiceBusqueda, Producto, Rutas, UnidadVehicular, Venta, VentaDetalle,
+)
+from apps.inventario.models import (
+    EmbarqueReparto, EntregaReparto, LoteInventario, MovimientoInventario, ProductoEmbarque, ProductosMovimiento,
+)
+from apps.inventario.services.liquidacion_embarque import LiquidacionEmbarqueService
+from apps.usuarios.models import Usuario
+
+
+def crear_ruta():
+    """
+    Usuario asignado a una ruta (con su almacén), un cliente y dos productos
+    """
+    # Almacen.empresa tiene default=1
+    Empresa.objects.create(id=1, nombre='EMPRESA', rfc='XAXX010101000')
+    usuario = Usuario.objects.create(username='vendedor', nombre='VENDEDOR')
+    unidad = UnidadVehicular.objects.create(nombre='U1', placas='PRUEBA-1')
+    ruta = Rutas.objects.create(nombre='R1', asignado=usuario, unidad=unidad, origen='A', destino='B')
+    ruta.refresh_from_db()
+    cliente = Cliente.objects.create(
+        nombre='CLIENTE', apellido_paterno='PRUEBA', plazos_semanas=1, limite_credito=1000, sujeto_credito=True
+    )
+    productos = [Producto.objects.create(nombre=f'P{i}', precio_base=10) for i in range(2)]
+    return usuario, ruta, cliente, productos
+
+
+class CancelacionVentaTests(TestCase):
+    """
+    La cancelación de una venta repone su inventario una sola vez (eventos de dominio)
+    """
+
+    def setUp(self):
+        self.usuario, ruta, cliente, productos = crear_ruta()
+        self.venta = Venta.objects.create(almacen=ruta.almacen, cliente=cliente, total=40, created_by=self.usuario)
+        self.lote = LoteInventario.objects.create(producto=productos[0], almacen=ruta.almacen, cantidad=6, costo_unitario=1)
+        salida = MovimientoInventario.objects.create(
+            almacen=ruta.almacen,
+            cantidad=4,
+            tipo=MovimientoInventario.TIPO_SALIDA,
+            movimiento=MovimientoInventario.SALIDA_VENTA,
+            referencia=f"VENTA-{self.venta.id}",
+            fase=MovimientoInventario.FASE_TERMINADA
+        )
+        # bulk_create: el lote ya tiene descontada la venta
+        ProductosMovimiento.objects.bulk_create([
+            ProductosMovimiento(
+                movimiento=salida, producto=productos[0], lote=self.lote, cantidad=4, costo_unitario=1, costo_total=4
+            )
+        ])
+
+    def _entradas(self):
+        return MovimientoInventario.objects.filter(
+            referencia=f"VENTA-{self.venta.id}", movimiento=MovimientoInventario.ENTRADA_VENTA
+        )
+
+    def test_cancelar_repone_una_vez(self):
+        self.venta.fase = Venta.FASE_CANCELADA
+        self.venta.save()
+        # Guardar de nuevo la venta cancelada no vuelve a reponer
+        self.venta.save()
+        Venta.objects.get(pk=self.venta.pk).save()
+
+        self.lote.refresh_from_db()
+        self.assertEqual(self.lote.cantidad, 10)
+        self.assertEqual(self._entradas().count(), 1)
+
+    def test_cancelar_sin_salida(self):
+        venta = Venta.objects.create(almacen=self.venta.almacen, cliente=self.venta.cliente, total=10)
+        venta.fase = Venta.FASE_CANCELADA
+        venta.save()
+
+        self.assertFalse(
+            MovimientoInventario.objects.filter(referencia=f"VENTA-{venta.id}").exists()
+        )
+
+
+# El log de peticiones se guarda en otro hilo, que no ve la transacción de la prueba
+SIN_LOG_PETICIONES = modify_settings(MIDDLEWARE={'remove': 'apps.logger.middleware.middleware.RequestLoggingMiddleware'})
+
+
+@SIN_LOG_PETICIONES
+class VentasLoteTests(TestCase):
+    """
+    Carga en bloque de ventas de ruta capturadas sin conexión (POST /api/ventas/lote/)
+    """
+
+    def setUp(self):
+        self.usuario, self.ruta, self.cliente, self.productos = crear_ruta()
+        self.lote = LoteInventario.objects.create(
+            producto=self.productos[0], almacen=self.ruta.almacen, cantidad=4, costo_unitario=2
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def _venta(self, clave, cliente=None):
+        return {
+            'clave': clave,
+            'cliente': cliente or self.cliente.id,
+            'detalles': [{'producto': self.productos[0].id, 'cantidad': '1', 'precio_unitario': '5'}],
+        }
+
+    def _enviar(self, ventas):
+        return self.client.post('/api/ventas/lote/', {'ruta': self.ruta.id, 'ventas': ventas}, format='json')
+
+    def test_reenvio_no_duplica(self):
+        ventas = [self._venta('dispositivo-1'), self._venta('dispositivo-2')]
+        primera = self._enviar(ventas).json()['resultados']
+        respuesta = self._enviar(ventas)
+
+        self.assertEqual(respuesta.status_code, 200)
+        resultados = respuesta.json()['resultados']
+        for clave in ('dispositivo-1', 'dispositivo-2'):
+            self.assertEqual(primera[clave]['estado'], 'CREADA')
+            self.assertEqual(resultados[clave]['estado'], 'DUPLICADA')
+            self.assertEqual(resultados[clave]['venta_id'], primera[clave]['venta_id'])
+        self.assertEqual(Venta.objects.filter(clave_dispositivo__startswith='dispositivo-').count(), 2)
+        self.lote.refresh_from_db()
+        self.assertEqual(self.lote.cantidad, 2)
+
+    def test_venta_con_error_no_detiene_el_lote(self):
+        resultados = self._enviar([self._venta('valida'), self._venta('invalida', cliente=999999)]).json()['resultados']
+
+        self.assertEqual(resultados['valida']['estado'], 'CREADA')
+        self.assertEqual(resultados['invalida']['estado'], 'ERROR')
+        self.assertFalse(Venta.objects.filter(clave_dispositivo='invalida').exists())
+
+
+@SIN_LOG_PETICIONES
+class IdempotenciaVentaTests(TestCase):
+    """
+    POST /api/ventas/ con Idempotency-Key: el reintento repite la respuesta sin crear otra venta
+    """
+
+    def setUp(self):
+        self.usuario, ruta, cliente, productos = crear_ruta()
+        self.usuario.almacen = ruta.almacen
+        self.usuario.save()
+        self.lote = LoteInventario.objects.create(producto=productos[0], almacen=ruta.almacen, cantidad=40, costo_unitario=2)
+        self.venta = {
+            'cliente': cliente.id,
+            'almacen': ruta.almacen.id,
+            'fase': Venta.FASE_TERMINADA,
+            'detalles': [{'producto': productos[0].id, 'cantidad': '1', 'precio_unitario': '5'}],
+        }
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def _enviar(self, datos, clave):
+        return self.client.post('/api/ventas/', datos, format='json', HTTP_IDEMPOTENCY_KEY=clave)
+
+    def test_reintento_repite_la_respuesta(self):
+        primera = self._enviar(self.venta, 'venta-1')
+        self.lote.refresh_from_db()
+        existencia = self.lote.cantidad
+        segunda = self._enviar(self.venta, 'venta-1')
+
+        self.assertEqual(primera.status_code, 201)
+        self.assertEqual(segunda.status_code, 201)
+        self.assertEqual(segunda['Idempotent-Replayed'], 'true')
+        self.assertEqual(segunda.json()['id'], primera.json()['id'])
+        self.assertEqual(Venta.objects.count(), 1)
+        # El reintento no vuelve a descontar inventario
+        self.lote.refresh_from_db()
+        self.assertEqual(self.lote.cantidad, existencia)
+
+    def test_misma_clave_con_otro_cuerpo(self):
+        self._enviar(self.venta, 'venta-1')
+        otra = dict(self.venta, detalles=[dict(self.venta['detalles'][0], cantidad='2')])
+
+        self.assertEqual(self._enviar(otra, 'venta-1').status_code, 422)
+        self.assertEqual(Venta.objects.count(), 1)
+
+
+class SincronizacionRutaTests(TestCase):
+    """
+    Sincronización incremental de dispositivos de ruta y depuración de la bitácora
+    """
+
+    def setUp(self):
+        self.usuario, self.ruta, self.cliente, self.productos = crear_ruta()
+        self.cliente.vendedor = self.usuario
+        self.cliente.save()
+
+    def _cambiar_producto(self, producto, nombre):
+        producto.nombre = nombre
+        producto.save()
+        # Fuera del margen de SYNC_MARGEN_SEGUNDOS y de los días que conserva la depuración
+        CambioSync.objects.update(creado=timezone.now() - timedelta(days=10))
+
+    def test_token_anterior_a_la_depuracion_recibe_todo(self):
+        self._cambiar_producto(self.productos[0], 'P0 NUEVO')
+        token_viejo = sincronizar(self.ruta)['token']
+        self._cambiar_producto(self.productos[1], 'P1 NUEVO')
+        token_actual = sincronizar(self.ruta, token_viejo)['token']
+
+        self.assertGreater(depurar_cambios(5), 0)
+        # Se conserva el cambio más reciente para saber hasta dónde llegó la depuración
+        self.assertEqual(CambioSync.objects.count(), 1)
+
+        completa = sincronizar(self.ruta, token_viejo)
+        self.assertTrue(completa['completa'])
+        self.assertIn(self.cliente.id, [cliente['id'] for cliente in completa['cambios']['cliente']['actualizados']])
+        incremental = sincronizar(self.ruta, token_actual)
+        self.assertFalse(incremental['completa'])
+        self.assertEqual(incremental['cambios'], {})
+
+    def test_ruta_sin_vendedor_no_recibe_clientes(self):
+        Cliente.objects.create(nombre='SIN', apellido_paterno='VENDEDOR', plazos_semanas=1, limite_credito=0)
+        self.ruta.asignado_id = None
+
+        self.assertEqual(sincronizar(self.ruta)['cambios']['cliente']['actualizados'], [])
+
+    def test_sin_cambios_una_consulta(self):
+        self._cambiar_producto(self.productos[0], 'P0 NUEVO')
+        token = sincronizar(self.ruta)['token']
+
+        with self.assertNumQueries(1):
+            respuesta = sincronizar(self.ruta, token)
+        self.assertEqual(respuesta['cambios'], {})
+        self.assertEqual(respuesta['token'], token)
+
+    def test_cambio_de_vendedor_sincroniza_todo(self):
+        self._cambiar_producto(self.productos[0], 'P0 NUEVO')
+        token = sincronizar(self.ruta)['token']
+
+        self.ruta.asignado = Usuario.objects.create(username='otro', nombre='OTRO')
+        self.ruta.save()
+        respuesta = sincronizar(self.ruta, token)
+
+        self.assertTrue(respuesta['completa'])
+        self.assertEqual(respuesta['cambios']['cliente']['actualizados'], [])
+
+    def test_pagina_llena_no_rebasa_el_margen(self):
+        self._cambiar_producto(self.productos[0], 'P0 NUEVO')
+        token = sincronizar(self.ruta)['token']
+        self._cambiar_producto(self.productos[1], 'P1 NUEVO')
+        ultimo_seguro = CambioSync.objects.order_by('-id').values_list('id', flat=True).first()
+        # Cambios recientes (dentro del margen) que no caben en la página
+        registrar_cambios(CambioSync.ENTIDAD_PRODUCTO, [producto.id for producto in self.productos])
+
+        with mock.patch('apps.erp.helpers.sync_ruta.LIMITE_CAMBIOS', 5):
+            respuesta = sincronizar(self.ruta, token)
+
+        self.assertFalse(respuesta['hay_mas'])
+        self.assertEqual(respuesta['token'], codificar_token(ultimo_seguro))
+
+
+class EmbarqueRepartoTests(TestCase):
+    """
+    Entregas en ruta (registrar_entregas_ruta) y liquidación del embarque (LiquidacionEmbarqueService)
+    """
+
+    def setUp(self):
+        self.usuario, self.ruta, cliente, self.productos = crear_ruta()
+        self.venta = Venta.objects.create(almacen=self.ruta.almacen, cliente=cliente, total=40, created_by=self.usuario)
+        for producto, cantidad in zip(self.productos, (3, 2)):
+            VentaDetalle.objects.create(
+                venta=self.venta, producto=producto, cantidad=cantidad, cantidad_cargada=cantidad, precio_unitario=5
+            )
+        self.embarque = EmbarqueReparto.objects.create(ruta=self.ruta, fase=EmbarqueReparto.FASE_REPARTO)
+        self.embarque.ventas.add(self.venta)
+        self.lote = LoteInventario.objects.create(
+            producto=self.productos[0], almacen=self.ruta.almacen_embarque, cantidad=10, costo_unitario=2
+        )
+
+    def _entrega(self, clave):
+        return {
+            'clave': clave,
+            'venta': self.venta,
+            'productos': [
+                {'producto': self.productos[0], 'cantidad': 3},
+                {'producto': self.productos[1], 'cantidad': 1},
+            ],
+        }
+
+    def test_reentrega_no_duplica(self):
+        primera = registrar_entregas_ruta(self.embarque, [self._entrega('entrega-1')], self.usuario)
+        # Reintento del dispositivo: la misma clave otra vez y repetida dentro del mismo envío
+        segunda = registrar_entregas_ruta(
+            self.embarque, [self._entrega('entrega-1'), self._entrega('entrega-1')], self.usuario
+        )
+
+        self.assertEqual(primera['entrega-1']['estado'], ENTREGA_REGISTRADA)
+        self.assertEqual(segunda['entrega-1']['estado'], ENTREGA_DUPLICADA)
+        self.assertEqual(segunda['entrega-1']['movimiento_id'], primera['entrega-1']['movimiento_id'])
+        self.lote.refresh_from_db()
+        self.assertEqual(self.lote.cantidad, 7)
+        self.assertEqual(MovimientoInventario.objects.filter(referencia=f"VENTA-{self.venta.id}").count(), 1)
+        self.assertEqual(EntregaReparto.objects.count(), 1)
+        # La entrega parcial deja la venta pendiente
+        self.venta.refresh_from_db()
+        self.assertFalse(self.venta.is_entregado)
+
+    def test_liquidacion(self):
+        registrar_entregas_ruta(self.embarque, [self._entrega('entrega-1')], self.usuario)
+        ProductoEmbarque.objects.create(
+            embarque=self.embarque, producto=self.productos[1], tipo=ProductoEmbarque.TARA, cantidad=4, cantidad_entregada=1
+        )
+
+        liquidacion = LiquidacionEmbarqueService.cerrar(self.embarque, self.usuario)
+        self.assertEqual(
+            [(p['tipo'], p['producto_id'], p['cargado'], p['entregado'], p['devuelto']) for p in liquidacion.productos],
+            [
+                (ProductoEmbarque.PEDIDO, self.productos[0].id, 3, 3, 0),
+                (ProductoEmbarque.PEDIDO, self.productos[1].id, 2, 1, 1),
+                (ProductoEmbarque.TARA, self.productos[1].id, 4, 1, 3),
+            ]
+        )
+        self.assertEqual(
+            (liquidacion.cantidad_cargada, liquidacion.cantidad_entregada, liquidacion.cantidad_devuelta), (9, 5, 4)
+        )
+        # La preventa es anterior al embarque (no es venta del periodo) y la caja no tiene movimientos
+        self.assertEqual((liquidacion.cantidad_ventas, liquidacion.balance), (0, 0))
+
+        # Cerrar otra vez recalcula la misma liquidación
+        VentaDetalle.objects.filter(venta=self.venta, producto=self.productos[1]).update(cantidad_entregada=2)
+        recalculada = LiquidacionEmbarqueService.cerrar(self.embarque, self.usuario)
+        self.assertEqual(recalculada.pk, liquidacion.pk)
+        self.assertEqual(recalculada.cantidad_devuelta, 3)
+
+
+@SIN_LOG_PETICIONES
+class RespuestaCondicionalTests(TestCase):
+    """
+    GET condicional con ETag (RespuestaCondicionalMixin) en GET /api/almacenes-mini/
+    """
+
+    def setUp(self):
+        self.usuario, self.ruta, _, _ = crear_ruta()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def test_if_none_match(self):
+        primera = self.client.get('/api/almacenes-mini/')
+        etag = primera['ETag']
+
+        self.assertEqual(primera.status_code, 200)
+        vigente = self.client.get('/api/almacenes-mini/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(vigente.status_code, 304)
+        self.assertEqual(vigente['ETag'], etag)
+
+        # La versión de 'almacenes' se renueva al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            Almacen.objects.create(nombre='NUEVO')
+        cambiada = self.client.get('/api/almacenes-mini/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cambiada.status_code, 200)
+        self.assertNotEqual(cambiada['ETag'], etag)
+
+
+class IndiceBusquedaTests(TestCase):
+    """
+    Sincronización del índice de búsqueda global al guardar ventas y clientes
+    """
+
+    def setUp(self):
+        self.usuario, ruta, self.cliente, _ = crear_ruta()
+        self.venta = Venta.objects.create(almacen=ruta.almacen, cliente=self.cliente, total=40, created_by=self.usuario)
+
+    def _fila_venta(self):
+        return IndiceBusqueda.objects.get(tipo=IndiceBusqueda.TIPO_VENTA, objeto_id=self.venta.id)
+
+    def test_venta_sin_cambios_del_indice(self):
+        self.assertEqual(self._fila_venta().titulo, self.venta.codigo)
+
+        with mock.patch('apps.erp.signals.busqueda_global.indexar') as indexar:
+            venta = Venta.objects.get(pk=self.venta.pk)
+            venta.total_pagado = 40
+            venta.save()
+            indexar.assert_not_called()
+
+            venta.codigo = 'V-NUEVO'
+            venta.save()
+            indexar.assert_called_once_with(venta)
+
+    def test_renombrar_cliente_reindexa_sus_ventas(self):
+        cliente = Cliente.objects.get(pk=self.cliente.pk)
+        cliente.razon_social = 'ABARROTES LA ESQUINA'
+        cliente.save()
+
+        fila = self._fila_venta()
+        self.assertEqual(fila.subtitulo, 'ABARROTES LA ESQUINA')
+        self.assertIn('esquina', fila.documento)
+        self.assertEqual(fila.titulo, self.venta.codigo)
@@ -23,9 +23,10 @@ from apps.erp.api.embarque_view import (
     EmbarqueRepartoListRetrieveAPIView,
     iniciar_reparto,finalizar_reparto,
     obtener_caja_movimientos_embarque,
+    obtener_liquidacion_embarque,
     checkin_producto_embarque
 )
-from apps.erp.api.reparto_view import entrega_producto_ruta
+from apps.erp.api.reparto_view import entrega_producto_ruta, entrega_productos_ruta_masivo
 from apps.erp.api.insidencias import InsidenciaListRetrieveAPIView, atender_insidencia_lote
 from apps.erp.api.notificacion import NotificacionViewSet
 from apps.erp.api.gastos_compra_view import GastosCompraViewSet
@@ -39,6 +40,8 @@ from apps.erp.api.caja.movomientos import MovimientoCajaViewSet, TransaccionCaja
 
 #categorias cliente
 from apps.erp.api.cliente.categoria import CategoriaClienteViewSet, CategoriaClienteMiniViewSet
+from apps.erp.api.busqueda_global_view import BusquedaGlobalAPIView
+from apps.erp.api.sync_ruta_view import SyncRutaAPIView
 
 rutas = routers.DefaultRouter()
 rutas.register(r'contabilidad/regimen-fiscal', RegimenFiscalViewSet, basename='regimenfiscal')
@@ -97,6 +100,8 @@ rutas.register(r'transacciones-caja', TransaccionCajaViewSet, basename='transacc
 urlpatterns = [
     #path('libro/buscar/',LibroViewSet.as_view({'get':'buscar'}), name='buscar-libro'),
     path('producto-inventario/', ProductoInventarioAPIView.as_view(), name='producto-inventario'),
+    path('busqueda/', BusquedaGlobalAPIView.as_view(), name='busqueda-global'),
+    path('sync/ruta/', SyncRutaAPIView.as_view(), name='sync-ruta'),
     
     path('ordenes-compra-completa/', OrdenCompraCompletaListView.as_view(), name='ordenes-compra-completa'),
     # URLs de embarque
@@ -112,9 +117,11 @@ urlpatterns = [
     path('embarques-reparto/iniciar/',   iniciar_reparto, name='embarque-iniciar-reparto'),
     path('embarques-reparto/finalizar/', finalizar_reparto, name='embarque-finalizar-reparto'),
     path('embarques-reparto/caja-movimientos/', obtener_caja_movimientos_embarque, name='embarque-caja-movimientos'),
+    path('embarques-reparto/liquidacion/', obtener_liquidacion_embarque, name='embarque-liquidacion'),
     path('embarques-reparto/checkin/', checkin_producto_embarque, name='embarque-checkin-producto'),
     # Reparto - entrega de productos
     path('reparto/entrega-producto/', entrega_producto_ruta, name='reparto-entrega-producto'),
+    path('reparto/entregas-ruta/', entrega_productos_ruta_masivo, name='reparto-entregas-ruta'),
     # Insidencias
     path('incidencias/', InsidenciaListRetrieveAPIView.as_view(), name='insidencia-list'),
     path('incidencias/<int:pk>/', InsidenciaListRetrieveAPIView.as_view(), name='insidencia-detail'),
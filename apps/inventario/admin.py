@@ -5,10 +5,14 @@ from .models import (
     MovimientoInventario, ProductosMovimiento, 
     Transformacion, 
     ProductosSolicitud, 
+    CierreInventario,
 )
 from apps.erp.models import Almacen
+import logging
 
 
+logger = logging.getLogger(__name__)
+
 
 @admin.register(Piso)
 class PisoAdmin(admin.ModelAdmin):
@@ -510,10 +514,7 @@ class LoteInventarioAdmin(admin.ModelAdmin):
 		from django.db import transaction
 		from django.utils import timezone
 		
-		print(f"DEBUG INICIO: Método mover_producto_entre_almacenes llamado")
-		print(f"DEBUG: request.method = {request.method}")
-		print(f"DEBUG: request.POST = {request.POST}")
-		print(f"DEBUG: 'aplicar_movimiento' in request.POST = {'aplicar_movimiento' in request.POST}")
+		logger.debug("mover_producto_entre_almacenes: %s", request.method)
 		
 		# Solo permitir seleccionar un lote a la vez
 		if queryset.count() != 1:
@@ -609,20 +610,15 @@ class LoteInventarioAdmin(admin.ModelAdmin):
 			return render(request, 'admin/inventario/mover_producto_form.html', context)
 		
 		# Si es POST, procesar el formulario
-		print(f"DEBUG: POST recibido, request.POST = {request.POST}")
 		form = MoverProductoForm(request.POST)
 		
-		print(f"DEBUG: Formulario creado, is_valid() = {form.is_valid()}")
-		if not form.is_valid():
-			print(f"DEBUG: ERRORES DEL FORMULARIO: {form.errors}")
-		
 		if form.is_valid():
 			almacen_destino = form.cleaned_data['almacen_destino']
 			cantidad = form.cleaned_data['cantidad']
 			ubicacion_destino = form.cleaned_data['ubicacion_destino']
 			observaciones = form.cleaned_data['observaciones']
 			
-			print(f"DEBUG: Datos del formulario - almacen_destino: {almacen_destino}, cantidad: {cantidad}")
+			logger.debug("Mover lote %s: %s al almacén %s", lote_origen.id, cantidad, almacen_destino.id)
 			
 			# Validaciones adicionales
 			if cantidad > lote_origen.cantidad:
@@ -638,10 +634,8 @@ class LoteInventarioAdmin(admin.ModelAdmin):
 				ubicacion_destino = None
 			
 			# Procesar movimiento
-			print(f"DEBUG: Iniciando transacción atómica...")
 			try:
 				with transaction.atomic():
-					print(f"DEBUG: Dentro de transaction.atomic()")
 					# 1. Crear MovimientoInventario de SALIDA
 					movimiento_salida = MovimientoInventario.objects.create(
 						almacen=lote_origen.almacen,
@@ -649,7 +643,6 @@ class LoteInventarioAdmin(admin.ModelAdmin):
 						movimiento=MovimientoInventario.SALIDA_TRASPASO,
 						nota=f'Movimiento hacia {almacen_destino.nombre}. {observaciones}'
 					)
-					print(f"DEBUG: MovimientoInventario SALIDA creado ID: {movimiento_salida.id}")
 					
 					# 2. Crear ProductosMovimiento de SALIDA
 					prod_mov_salida = ProductosMovimiento.objects.create(
@@ -659,14 +652,13 @@ class LoteInventarioAdmin(admin.ModelAdmin):
 						cantidad=cantidad,
 						costo_unitario=lote_origen.costo_unitario
 					)
-					print(f"DEBUG: ProductosMovimiento SALIDA creado ID: {prod_mov_salida.id}")
 					
 					# 3. Reducir cantidad del lote origen
 					cantidad_antes = lote_origen.cantidad
 					lote_origen.cantidad -= cantidad
 					lote_origen.save(update_fields=['cantidad', 'status_model'])
 					lote_origen.refresh_from_db()
-					print(f"DEBUG: Lote origen ID {lote_origen.id} - Cantidad antes: {cantidad_antes}, después: {lote_origen.cantidad}")
+					logger.debug("Lote origen %s: %s -> %s", lote_origen.id, cantidad_antes, lote_origen.cantidad)
 					
 					# 4. Crear MovimientoInventario de ENTRADA
 					movimiento_entrada = MovimientoInventario.objects.create(
@@ -692,7 +684,7 @@ class LoteInventarioAdmin(admin.ModelAdmin):
 						lote_destino.cantidad += cantidad
 						lote_destino.save(update_fields=['cantidad', 'status_model'])
 						lote_destino.refresh_from_db()
-						print(f"DEBUG: Lote destino ID {lote_destino.id} - Cantidad antes: {cantidad_destino_antes}, después: {lote_destino.cantidad}")
+						logger.debug("Lote destino %s: %s -> %s", lote_destino.id, cantidad_destino_antes, lote_destino.cantidad)
 						mensaje_lote = f'actualizado (ID: {lote_destino.id})'
 					else:
 						# Si no existe, crear nuevo lote duplicando características del origen
@@ -706,7 +698,7 @@ class LoteInventarioAdmin(admin.ModelAdmin):
 							fecha_vencimiento=lote_origen.fecha_vencimiento,  # Misma fecha de vencimiento
 							status_model='ACTIVE'
 						)
-						print(f"DEBUG: Nuevo lote creado ID {lote_destino.id} - Cantidad: {lote_destino.cantidad}")
+						logger.debug("Lote destino nuevo %s: %s", lote_destino.id, lote_destino.cantidad)
 						mensaje_lote = f'creado (ID: {lote_destino.id})'
 					
 					# 6. Crear ProductosMovimiento de ENTRADA
@@ -717,8 +709,7 @@ class LoteInventarioAdmin(admin.ModelAdmin):
 						cantidad=cantidad,
 						costo_unitario=lote_origen.costo_unitario
 					)
-					print(f"DEBUG: ProductosMovimiento ENTRADA creado ID: {prod_mov_entrada.id}")
-					print(f"DEBUG: ¡TRANSACCIÓN COMPLETADA EXITOSAMENTE!")
+					logger.info("Movimiento entre almacenes %s / %s registrado", movimiento_salida.id, movimiento_entrada.id)
 					
 					# Mensaje de éxito
 					ubicacion_info = f', Ubicación: {ubicacion_destino.nombre}' if ubicacion_destino else ''
@@ -732,16 +723,14 @@ class LoteInventarioAdmin(admin.ModelAdmin):
 					)
 					
 			except Exception as e:
-				print(f"DEBUG: EXCEPCIÓN CAPTURADA: {type(e).__name__}: {str(e)}")
-				import traceback
-				print(f"DEBUG: Traceback completo:\n{traceback.format_exc()}")
+				logger.exception("Error al mover el lote %s entre almacenes", lote_origen.id)
 				self.message_user(
 					request,
 					f'❌ Error al realizar el movimiento: {str(e)}',
 					level='error'
 				)
 		else:
-			print(f"DEBUG: Formulario NO válido, mostrando errores al usuario")
+			logger.debug("Formulario de movimiento inválido: %s", form.errors)
 			self.message_user(
 				request,
 				'❌ Formulario inválido. Verifique los datos ingresados.',
@@ -1193,6 +1182,16 @@ class ProductosSolicitudAdmin(admin.ModelAdmin):
 		return readonly
 
 
+# ================================================================
+#           CIERRES MENSUALES DE INVENTARIO (SOLO CONSULTA)
+# ================================================================
+@admin.register(CierreInventario)
+class CierreInventarioAdmin(admin.ModelAdmin):
+	list_display = ('mes', 'cerrado_en', 'archivado_en', 'movimientos_archivados')
+	readonly_fields = [f.name for f in CierreInventario._meta.fields]
+	list_per_page = 50
+
+
 # ================================================================
 #           ADMINISTRADOR DE EMBARQUES Y PRODUCTOS
 # ================================================================
@@ -0,0 +1,115 @@
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from drf_spectacular.types import OpenApiTypes
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.base.exportar import FORMATOS, formato_solicitado, respuesta_exportacion
+from apps.erp.models import Almacen
+from apps.inventario.models import MovimientoInventario, MovimientoInventarioHistorico
+from apps.inventario.helpers.exportaciones import (
+    filtrar_movimientos, exportacion_movimientos, exportacion_inventario
+)
+
+
+"""
+================================================================================
+                    EXPORTACIÓN DE MOVIMIENTOS E INVENTARIO
+================================================================================
+"""
+PARAMETRO_FORMATO = OpenApiParameter(
+    name="formato", type=str, location=OpenApiParameter.QUERY, required=False,
+    enum=FORMATOS, description="Formato del archivo (csv por defecto; xlsx requiere openpyxl)"
+)
+RESPUESTAS_EXPORTACION = {
+    (200, 'text/csv'): OpenApiTypes.BINARY,
+    400: OpenApiResponse(description="Formato no válido o almacén no encontrado"),
+}
+
+
+class ExportarMovimientosAPIView(APIView):
+    """
+    Exporta los productos de los movimientos del almacén del usuario en streaming
+    """
+
+    @extend_schema(
+        summary="Exportar movimientos de inventario",
+        description="""
+        Un renglón por producto/lote de cada movimiento del almacén del usuario (origen o destino).
+        Los renglones se escriben conforme se leen de la base de datos.
+        Con historico=true incluye los movimientos archivados de meses anteriores.
+        """,
+        parameters=[
+            PARAMETRO_FORMATO,
+            OpenApiParameter(name="tipo", type=str, location=OpenApiParameter.QUERY, required=False,
+                             enum=[MovimientoInventario.TIPO_ENTRADA, MovimientoInventario.TIPO_SALIDA]),
+            OpenApiParameter(name="fase", type=str, location=OpenApiParameter.QUERY, required=False,
+                             enum=[MovimientoInventario.FASE_PROCESO, MovimientoInventario.FASE_TERMINADA]),
+            OpenApiParameter(name="movimiento", type=str, location=OpenApiParameter.QUERY, required=False,
+                             description="Tipo de movimiento (p. ej. SALIDA_VENTA)"),
+            OpenApiParameter(name="fecha_inicio", type=str, location=OpenApiParameter.QUERY, required=False,
+                             description="Fecha de inicio (formato: YYYY-MM-DD)"),
+            OpenApiParameter(name="fecha_fin", type=str, location=OpenApiParameter.QUERY, required=False,
+                             description="Fecha de fin (formato: YYYY-MM-DD)"),
+            OpenApiParameter(name="historico", type=bool, location=OpenApiParameter.QUERY, required=False,
+                             description="Incluir los movimientos archivados (más lento)"),
+        ],
+        responses=RESPUESTAS_EXPORTACION,
+        tags=['Movimientos de Inventario']
+    )
+    def get(self, request):
+        try:
+            formato = formato_solicitado(request)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        movimientos = filtrar_movimientos(request.query_params, almacen=request.user.almacen)
+        historicos = None
+        if request.query_params.get('historico', '').lower() in ('1', 'true'):
+            historicos = filtrar_movimientos(
+                request.query_params, almacen=request.user.almacen, modelo=MovimientoInventarioHistorico
+            )
+        queryset, columnas = exportacion_movimientos(movimientos, historicos)
+        return respuesta_exportacion(queryset, columnas, 'movimientos', formato)
+
+
+class ExportarInventarioAPIView(APIView):
+    """
+    Exporta los lotes con existencia de un almacén en streaming
+    """
+
+    @extend_schema(
+        summary="Exportar inventario por almacén",
+        description="Un renglón por lote con existencia del almacén (por defecto el asignado al usuario).",
+        parameters=[
+            PARAMETRO_FORMATO,
+            OpenApiParameter(name="almacen_id", type=int, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter(name="producto_id", type=int, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter(name="search", type=str, location=OpenApiParameter.QUERY, required=False,
+                             description="Buscar productos por nombre (mínimo 3 caracteres)"),
+        ],
+        responses=RESPUESTAS_EXPORTACION,
+        tags=['Inventario']
+    )
+    def get(self, request):
+        try:
+            formato = formato_solicitado(request)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        search = request.query_params.get('search', '').strip()
+        if search and len(search) < 3:
+            return Response({}, status=status.HTTP_204_NO_CONTENT)
+
+        almacen_id = request.query_params.get('almacen_id')
+        if not almacen_id:
+            almacen = request.user.almacen or Almacen.objects.filter(encargado=request.user).first()
+            if not almacen:
+                return Response(
+                    {'detail': 'El parámetro almacen_id es requerido'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            almacen_id = almacen.id
+
+        queryset, columnas = exportacion_inventario(almacen_id, request.query_params)
+        return respuesta_exportacion(queryset, columnas, 'inventario', formato)
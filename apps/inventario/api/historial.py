@@ -0,0 +1,76 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.inventario.helpers.historial import existencias_al
+
+
+"""
+================================================================================
+                    EXISTENCIAS A UNA FECHA (CIERRES + MOVIMIENTOS)
+================================================================================
+"""
+def _fecha_corte(valor):
+    """
+    YYYY-MM-DD -> fin del día (hora local); fecha y hora ISO -> ese momento. None si no es válida.
+    """
+    fecha = parse_datetime(valor)
+    if fecha is None:
+        dia = parse_date(valor)
+        if dia is None:
+            return None
+        fecha = datetime.combine(dia + timedelta(days=1), time.min)
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    return fecha
+
+
+class ExistenciasFechaAPIView(APIView):
+    """
+    Existencia neta por almacén y producto a una fecha
+    """
+
+    @extend_schema(
+        summary="Existencias a una fecha",
+        description="""
+        Entradas menos salidas de los lotes hasta la fecha, por almacén y producto.
+        Parte del último cierre mensual anterior a la fecha (python manage.py cerrar_inventario)
+        y solo suma los movimientos posteriores; los movimientos archivados se leen únicamente
+        si la fecha cae en meses archivados.
+        """,
+        parameters=[
+            OpenApiParameter(name="fecha", type=str, location=OpenApiParameter.QUERY, required=True,
+                             description="YYYY-MM-DD (al final del día) o fecha y hora ISO"),
+            OpenApiParameter(name="almacen_id", type=int, location=OpenApiParameter.QUERY, required=False),
+            OpenApiParameter(name="producto_id", type=int, location=OpenApiParameter.QUERY, required=False),
+        ],
+        responses={
+            200: OpenApiResponse(description="Lista de {almacen_id, producto_id, cantidad, valor}"),
+            400: OpenApiResponse(description="Fecha no válida"),
+        },
+        tags=['Inventario']
+    )
+    def get(self, request):
+        fecha = _fecha_corte(request.query_params.get('fecha') or '')
+        if fecha is None:
+            return Response(
+                {'detail': 'El parámetro fecha es requerido (YYYY-MM-DD)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        saldos = existencias_al(
+            fecha,
+            almacen_id=request.query_params.get('almacen_id'),
+            producto_id=request.query_params.get('producto_id'),
+        )
+        data = [
+            {'almacen_id': almacen_id, 'producto_id': producto_id, 'cantidad': cantidad, 'valor': valor}
+            for (almacen_id, producto_id), (cantidad, valor) in sorted(saldos.items())
+            if almacen_id and producto_id and (cantidad or valor)
+        ]
+        return Response({'fecha': fecha, 'existencias': data})
@@ -1,9 +1,12 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
+from rest_framework.decorators import action
 from rest_framework.pagination import LimitOffsetPagination
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiResponse
 from apps.inventario.serializers.trasnsformaciones.transformacio_serializer import (
     TransformacionCreateSerializer,
+    TransformacionLoteSerializer,
+    RendimientoTransformacionSerializer,
     TransformacionListSerializer,
     TransformacionDetailSerializer
 )
@@ -43,6 +46,37 @@ class TransformacionViewSet(viewsets.ViewSet):
                 {"detail": str(e), "error_code": "ERROR_TRANSFORMACION"},
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+
+    @extend_schema(
+        request=TransformacionLoteSerializer,
+        responses={
+            201: RendimientoTransformacionSerializer(many=True),
+            400: OpenApiResponse(description="Error en los datos proporcionados. No se procesa ninguna transformación."),
+        },
+        description="Procesar varias transformaciones o mermas en una sola operación. Retorna el rendimiento de cada una."
+    )
+    @action(detail=False, methods=['post'], url_path='lote')
+    def lote(self, request):
+        """
+        Procesar un lote de transformaciones o mermas. Si alguna falla no se guarda ninguna.
+        """
+        serializer = TransformacionLoteSerializer(data=request.data, context={'request': request})
+        try:
+            serializer.is_valid(raise_exception=True)
+            resultados = serializer.save()
+            return Response(
+                {
+                    "detail": f"{len(resultados)} transformaciones procesadas exitosamente.",
+                    "transformaciones": RendimientoTransformacionSerializer(resultados, many=True).data
+                },
+                status=status.HTTP_201_CREATED
+            )
+        except Exception as e:
+            return Response(
+                {"detail": str(e), "error_code": "ERROR_TRANSFORMACION"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
             
     @extend_schema(
         parameters=[
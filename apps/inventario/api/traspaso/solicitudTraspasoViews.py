@@ -1,7 +1,3 @@
-from django.utils import timezone
-from django.db import transaction
-
-from rest_framework.exceptions import ValidationError
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -14,11 +10,12 @@ from apps.inventario.serializers.traspaso.traspasoSolicitudSerializer import (
     SolicitudTraspasoListSerializer,
     SolicitudTraspasoDetailSerializer,
     SolicitudTraspasoCreateUpdateSerializer,
-    AprobarRechazarSolicitudSerializer
+    AprobarRechazarSolicitudSerializer,
+    AprobarRechazarSolicitudesLoteSerializer
 )
+from apps.inventario.services.traspasos import TraspasoSolicitudService
 
 from django.contrib.auth import get_user_model
-from apps.inventario.models import MovimientoInventario, ProductosMovimiento, LoteInventario
 
 User = get_user_model()
 
@@ -41,6 +38,8 @@ class SolicitudTraspasoViewSet(viewsets.ModelViewSet):
     - PATCH /solicitudes-traspaso/{id}/ - Actualizar parcial
     - POST /solicitudes-traspaso/{id}/aprobar/ - Aprobar solicitud
     - POST /solicitudes-traspaso/{id}/rechazar/ - Rechazar solicitud
+    - POST /solicitudes-traspaso/aprobar-lote/ - Aprobar varias solicitudes
+    - POST /solicitudes-traspaso/rechazar-lote/ - Rechazar varias solicitudes
     """
     permission_classes = [IsAuthenticated]
     queryset = SolicitudTraspaso.objects.all()
@@ -86,6 +85,8 @@ class SolicitudTraspasoViewSet(viewsets.ModelViewSet):
             return SolicitudTraspasoCreateUpdateSerializer
         elif self.action in ['aprobar', 'rechazar']:
             return AprobarRechazarSolicitudSerializer
+        elif self.action in ['aprobar_lote', 'rechazar_lote']:
+            return AprobarRechazarSolicitudesLoteSerializer
         return SolicitudTraspasoDetailSerializer
     
     @extend_schema(
@@ -279,7 +280,8 @@ class SolicitudTraspasoViewSet(viewsets.ModelViewSet):
         1. Valida que la solicitud esté PENDIENTE
         2. Cambia el estado a APROBADO
         3. Registra quién aprobó y cuándo
-        4. El movimiento de inventario se creará posteriormente (por implementar)
+        4. Crea el movimiento de salida del almacén surtidor tomando los lotes en orden FIFO
+           y suma la cantidad al lote del almacén solicitante
         
         **Parámetros opcionales:**
         - `nota`: Justificación de la aprobación
@@ -287,7 +289,7 @@ class SolicitudTraspasoViewSet(viewsets.ModelViewSet):
         request=AprobarRechazarSolicitudSerializer,
         responses={
             200: OpenApiResponse(description='Solicitud aprobada exitosamente'),
-            400: OpenApiResponse(description='No se puede aprobar (ya no está PENDIENTE)'),
+            400: OpenApiResponse(description='No se puede aprobar (ya no está PENDIENTE o sin inventario suficiente)'),
             404: OpenApiResponse(description='Solicitud no encontrada'),
         },
         tags=['Solicitudes de Traspaso']
@@ -313,105 +315,39 @@ class SolicitudTraspasoViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        with transaction.atomic():
-            # Actualizar solicitud
-            solicitud.estado = SolicitudTraspaso.APROBADO
-            solicitud.aprobado_el = timezone.now()
-            solicitud.aprobado_por = request.user
-            
-            # Agregar nota si se proporcionó
-            nota_aprobacion = serializer.validated_data.get('nota', '')
-            if nota_aprobacion:
-                if solicitud.nota:
-                    solicitud.nota += f"\n\n[APROBACIÓN] {nota_aprobacion}"
-                else:
-                    solicitud.nota = f"[APROBACIÓN] {nota_aprobacion}"
-            
-            solicitud.save()
-            
-            # TODO: Aquí se creará el movimiento de inventario en el futuro
-            # ✅ Crear movimiento de salida (almacén surtidor)
-            movimiento = MovimientoInventario.objects.create(
-                almacen=solicitud.almacen_surtidor,
-                almacen_destino=solicitud.almacen_solicitante,
-                tipo=MovimientoInventario.TIPO_SALIDA,
-                movimiento=MovimientoInventario.SALIDA_TRASPASO,
+        try:
+            resultado = TraspasoSolicitudService.aprobar(
+                [solicitud.id],
+                request.user,
+                nota=serializer.validated_data.get('nota', '')
+            )
+        except ValueError as e:
+            return Response(
+                {
+                    "success": False,
+                    "message": "No hay suficiente inventario para surtir la solicitud",
+                    "errors": {"detail": str(e)}
+                },
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-            # ✅ Por cada producto solicitado, descontar inventario
-            for det in solicitud.detalles.all():
-
-                # 🔹 LOTE ORIGEN (surtidor)
-                cantidad_restante = det.cantidad
-
-                lotes = LoteInventario.objects.select_for_update().filter(
-                    producto=det.producto,
-                    almacen=solicitud.almacen_surtidor,
-                    cantidad__gt=0
-                ).order_by('created_at')
-                total_transferido = 0
-                ultimo_costo = None
-
-                for lote in lotes:
-                    if cantidad_restante <= 0:
-                        break
-
-                    tomar = min(lote.cantidad, cantidad_restante)
-
-                    ProductosMovimiento.objects.create(
-                        movimiento=movimiento,
-                        producto=det.producto,
-                        lote=lote,
-                        cantidad=tomar,
-                        costo_unitario=lote.costo_unitario
-                    )
-
-                    cantidad_restante -= tomar
-                    total_transferido += tomar
-                    ultimo_costo = lote.costo_unitario
-
-
-                if cantidad_restante > 0:
-                    raise ValidationError({
-                        "success": False,
-                        "message": "No hay suficiente inventario para surtir la solicitud",
-                        "errors": {"detail": f"No hay suficiente inventario total del siguiente producto: {det.producto.nombre}"}
-                    })
-
-
-                # 🔹 LOTE DESTINO (solicitante)
-                lote_destino = LoteInventario.objects.filter(
-                    producto=det.producto,
-                    almacen=solicitud.almacen_solicitante,
-                ).first()
-
-                if not lote_destino:
-                    lote_destino = LoteInventario.objects.create(
-                        producto=det.producto,
-                        almacen=solicitud.almacen_solicitante,
-                        cantidad=0,
-                        costo_unitario=ultimo_costo
-                    )
-
-                lote_destino.cantidad += total_transferido
-                lote_destino.save()
-
-
-
-
-            # guardar relación
-            solicitud.movimiento = movimiento
-            solicitud.save()
-
-            # movimiento = crear_movimiento_traspaso(solicitud)
-            # solicitud.movimiento = movimiento
-            # solicitud.save()
+        if not resultado['aprobadas']:
+            # Otra petición la procesó mientras tanto
+            estado_actual = resultado['omitidas'][0]['estado']
+            return Response(
+                {
+                    "success": False,
+                    "message": f"No se puede aprobar una solicitud en estado {estado_actual}",
+                    "estado_actual": estado_actual
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
         return Response(
             {
                 "success": True,
                 "message": "Solicitud aprobada exitosamente",
-                "data": SolicitudTraspasoDetailSerializer(solicitud).data
+                "data": SolicitudTraspasoDetailSerializer(self.get_object()).data
             },
             status=status.HTTP_200_OK
         )
@@ -426,6 +362,8 @@ class SolicitudTraspasoViewSet(viewsets.ModelViewSet):
         2. Cambia el estado a RECHAZADO
         3. Registra quién rechazó y cuándo
         
+        No se genera ningún movimiento de inventario.
+        
         **Parámetros opcionales:**
         - `nota`: Justificación del rechazo
         """,
@@ -458,55 +396,129 @@ class SolicitudTraspasoViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        with transaction.atomic():
-            solicitud.estado = SolicitudTraspaso.APROBADO
-            solicitud.aprobado_el = timezone.now()
-            solicitud.aprobado_por = request.user
+        resultado = TraspasoSolicitudService.rechazar(
+            [solicitud.id],
+            request.user,
+            nota=serializer.validated_data.get('nota', '')
+        )
 
-            nota_aprobacion = serializer.validated_data.get('nota', '')
-            if nota_aprobacion:
-                if solicitud.nota:
-                    solicitud.nota += f"\n\n[APROBACIÓN] {nota_aprobacion}"
-                else:
-                    solicitud.nota = f"[APROBACIÓN] {nota_aprobacion}"
+        if not resultado['rechazadas']:
+            estado_actual = resultado['omitidas'][0]['estado']
+            return Response(
+                {
+                    "success": False,
+                    "message": f"No se puede rechazar una solicitud en estado {estado_actual}",
+                    "estado_actual": estado_actual
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(
+            {
+                "success": True,
+                "message": "Solicitud rechazada exitosamente",
+                "data": SolicitudTraspasoDetailSerializer(self.get_object()).data
+            },
+            status=status.HTTP_200_OK
+        )
 
-            solicitud.save()
+    @extend_schema(
+        summary="Aprobar varias solicitudes de traspaso",
+        description="""
+        Aprueba en una sola operación todas las solicitudes indicadas que estén PENDIENTES.
+        
+        - Los lotes de todos los productos se bloquean y asignan (FIFO) con una sola consulta.
+        - Si algún producto no tiene inventario suficiente no se aprueba ninguna solicitud.
+        - Las solicitudes que ya no están PENDIENTES se regresan en `omitidas`.
+        """,
+        request=AprobarRechazarSolicitudesLoteSerializer,
+        responses={
+            200: OpenApiResponse(description='Solicitudes aprobadas exitosamente'),
+            400: OpenApiResponse(description='Solicitudes no encontradas o sin inventario suficiente'),
+        },
+        tags=['Solicitudes de Traspaso']
+    )
+    @action(detail=False, methods=['post'], url_path='aprobar-lote')
+    def aprobar_lote(self, request):
+        """
+        Aprobar varias solicitudes de traspaso
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-            # 👇👇👇 AQUÍ MISMO
-            movimiento = MovimientoInventario.objects.create(
-                almacen=solicitud.almacen_surtidor,
-                almacen_destino=solicitud.almacen_solicitante,
-                tipo=MovimientoInventario.TIPO_SALIDA,
-                movimiento=MovimientoInventario.SALIDA_TRASPASO,
+        try:
+            resultado = TraspasoSolicitudService.aprobar(
+                serializer.validated_data['solicitudes'],
+                request.user,
+                nota=serializer.validated_data.get('nota', '')
+            )
+        except ValueError as e:
+            return Response(
+                {
+                    "success": False,
+                    "message": "No se pudieron aprobar las solicitudes",
+                    "errors": {"detail": str(e)}
+                },
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-            for det in solicitud.detalles.all():
-                lote = LoteInventario.objects.filter(
-                    producto=det.producto,
-                    almacen=solicitud.almacen_surtidor,
-                    cantidad__gt=0
-                ).first()
-
-                if not lote:
-                    raise ValidationError("Stock insuficiente")
+        return Response(
+            {
+                "success": True,
+                "message": f"{len(resultado['aprobadas'])} solicitudes aprobadas exitosamente",
+                "data": {
+                    "aprobadas": [solicitud.id for solicitud in resultado['aprobadas']],
+                    "omitidas": resultado['omitidas'],
+                }
+            },
+            status=status.HTTP_200_OK
+        )
 
-                ProductosMovimiento.objects.create(
-                    movimiento=movimiento,
-                    producto=det.producto,
-                    lote=lote,
-                    cantidad=det.cantidad,
-                    costo_unitario=lote.costo_unitario
-                )
+    @extend_schema(
+        summary="Rechazar varias solicitudes de traspaso",
+        description="""
+        Rechaza en una sola operación todas las solicitudes indicadas que estén PENDIENTES.
+        Las solicitudes que ya no están PENDIENTES se regresan en `omitidas`.
+        """,
+        request=AprobarRechazarSolicitudesLoteSerializer,
+        responses={
+            200: OpenApiResponse(description='Solicitudes rechazadas exitosamente'),
+            400: OpenApiResponse(description='Solicitudes no encontradas'),
+        },
+        tags=['Solicitudes de Traspaso']
+    )
+    @action(detail=False, methods=['post'], url_path='rechazar-lote')
+    def rechazar_lote(self, request):
+        """
+        Rechazar varias solicitudes de traspaso
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
-            solicitud.movimiento = movimiento
-            solicitud.save()
+        try:
+            resultado = TraspasoSolicitudService.rechazar(
+                serializer.validated_data['solicitudes'],
+                request.user,
+                nota=serializer.validated_data.get('nota', '')
+            )
+        except ValueError as e:
+            return Response(
+                {
+                    "success": False,
+                    "message": "No se pudieron rechazar las solicitudes",
+                    "errors": {"detail": str(e)}
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        
         return Response(
             {
                 "success": True,
-                "message": "Solicitud rechazada exitosamente",
-                "data": SolicitudTraspasoDetailSerializer(solicitud).data
+                "message": f"{len(resultado['rechazadas'])} solicitudes rechazadas exitosamente",
+                "data": {
+                    "rechazadas": [solicitud.id for solicitud in resultado['rechazadas']],
+                    "omitidas": resultado['omitidas'],
+                }
             },
             status=status.HTTP_200_OK
         )
@@ -12,6 +12,9 @@ from apps.inventario.services.alertasvencimiento import evaluar_vencimiento
 
 #MODELS
 from apps.base.models import BaseModel
+from apps.base.pagination import PaginacionCursorOpcional
+from apps.base.views import CamposDinamicosViewMixin, RespuestaCondicionalMixin
+from apps.base.versiones import recurso_inventario
 from apps.erp.models import Almacen, Compra, Producto
 from apps.inventario.models import Piso, Zona, Rack,  MovimientoInventario, LoteInventario
 
@@ -385,7 +388,8 @@ class RackViewSet(viewsets.ModelViewSet):
 
 
 #class MovimientoSalidaViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet): y reornar lo del creste data
-class MovimientoSalidaViewSet(mixins.CreateModelMixin, 
+class MovimientoSalidaViewSet(CamposDinamicosViewMixin,
+                             mixins.CreateModelMixin, 
                              mixins.RetrieveModelMixin, 
                              mixins.ListModelMixin, 
                              viewsets.GenericViewSet):
@@ -394,8 +398,13 @@ class MovimientoSalidaViewSet(mixins.CreateModelMixin,
     """
     queryset = MovimientoInventario.objects.all()
     serializer_class = MovimientoSalidaSerializer
+    pagination_class = PaginacionCursorOpcional
     filter_backends = [filters.SearchFilter]
     search_fields = ['status_model', 'referencia', 'movimiento']
+    relaciones_por_campo = {
+        'almacen_origen': {'select': ['almacen']},
+        'almacen_destino': {'select': ['almacen_destino']},
+    }
 
     def get_serializer_class(self):
         """
@@ -414,12 +423,14 @@ class MovimientoSalidaViewSet(mixins.CreateModelMixin,
         request=MovimientoSalidaSerializer,
         responses={201: MovimientoSalidaDetalleSerializer},
         summary="Crear movimiento de salida",
-        description="Permite crear movimientos de salida (merma o traspaso)"
+        description="Permite crear movimientos de salida (merma o traspaso). Con `dry_run` se regresan los lotes planeados sin guardar nada."
     )
     def create(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data, context={'user': request.user})
         if serializer.is_valid():
             resultado = serializer.save()
+            if serializer.validated_data.get('dry_run'):
+                return Response(resultado, status=status.HTTP_200_OK)
             return Response(resultado, status=status.HTTP_201_CREATED)
         return Response(
             serializer.errors,
@@ -559,8 +570,6 @@ class MovimientoTraspasoAPIView(APIView):
         if pk:
             return self.retrieve(request, pk)
         
-        from rest_framework.pagination import LimitOffsetPagination
-        
         tipo = request.query_params.get('tipo', None)
         fecha_inicio = request.query_params.get('fecha_inicio', None)
         fecha_fin = request.query_params.get('fecha_fin', None)
@@ -599,9 +608,9 @@ class MovimientoTraspasoAPIView(APIView):
         queryset = queryset.filter(movimiento__in=[MovimientoInventario.ENTRADA_TRASPASO,
                                                    MovimientoInventario.SALIDA_TRASPASO,])
         
-        # Aplicar paginación
-        paginator = LimitOffsetPagination()
-        paginated_queryset = paginator.paginate_queryset(queryset, request)
+        # Aplicar paginación (?paginacion=cursor para paginar por cursor)
+        paginator = PaginacionCursorOpcional()
+        paginated_queryset = paginator.paginate_queryset(queryset, request, view=self)
         
         serializer = MovimimientosMiniSerializer(paginated_queryset, many=True)
         return paginator.get_paginated_response(serializer.data)
@@ -701,7 +710,14 @@ class MovimientoTraspasoAPIView(APIView):
     ],
     responses={200: InventarioPorAlmacenSerializer}
 )
-class InventarioAlmacenAPIView(APIView):
+class InventarioAlmacenAPIView(RespuestaCondicionalMixin, APIView):
+
+    def get_recursos_version(self):
+        almacen_id = self.request.query_params.get('almacen_id') or getattr(self.request.user, 'almacen_id', None)
+        if not almacen_id:
+            return ()  # El almacén se resuelve en get() (encargado); sin respuesta condicional
+        return ('productos', 'ubicaciones', recurso_inventario(almacen_id))
+
     def get(self, request, *args, **kwargs):
         almacen_id = request.query_params.get('almacen_id', None)
         producto_id = request.query_params.get('producto_id')
@@ -1557,7 +1573,7 @@ class MisEntradasListViewSet(mixins.ListModelMixin,
     """
     ViewSet para listar y ver detalles de entradas de inventario del almacén del usuario
     """
-    #pagination_class =
+    pagination_class = PaginacionCursorOpcional
 
     def get_serializer_class(self):
         """Usar diferentes serializers para list y retrieve"""
@@ -1,6 +1,11 @@
+import logging
+
 from django.apps import AppConfig
 
 
+logger = logging.getLogger(__name__)
+
+
 class InventarioConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.inventario'
@@ -9,6 +14,6 @@ class InventarioConfig(AppConfig):
         try:
             # Importar específicamente el módulo de permisos
             import apps.inventario.signals 
-            print("✅ Signals de inventario cargados correctamente")
-        except ImportError as e:
-            print(f"❌ Error cargando signals de inventario: {e}")
\ No newline at end of file
+            logger.debug("Signals de inventario cargados")
+        except ImportError:
+            logger.exception("Error cargando signals de inventario")
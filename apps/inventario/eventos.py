@@ -0,0 +1,22 @@
+"""
+============================================================================================
+                    EVENTOS DE DOMINIO DE INVENTARIO (apps/base/eventos.py)
+============================================================================================
+Receptores: def receptor(sender, instancias, **kwargs) con la lista de instancias.
+TraspasoSolicitudService aprueba y rechaza en bloque (sin save()): envía los eventos con emitir().
+"""
+from django.dispatch import Signal
+
+from apps.base.eventos import transicion
+from apps.inventario.models import EmbarqueReparto, SolicitudTraspaso
+
+
+# El embarque pasó a REPARTO: se abre la caja del encargado (signals/embarque.py)
+embarque_iniciado = Signal()
+# La solicitud de traspaso fue aprobada / rechazada (signals/productos_solicitud.py)
+solicitud_traspaso_aprobada = Signal()
+solicitud_traspaso_rechazada = Signal()
+
+transicion(EmbarqueReparto, 'fase', EmbarqueReparto.FASE_REPARTO, embarque_iniciado)
+transicion(SolicitudTraspaso, 'estado', SolicitudTraspaso.APROBADO, solicitud_traspaso_aprobada)
+transicion(SolicitudTraspaso, 'estado', SolicitudTraspaso.RECHAZADO, solicitud_traspaso_rechazada)
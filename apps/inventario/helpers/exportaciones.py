@@ -0,0 +1,125 @@
+"""
+============================================================================================
+                EXPORTACIÓN DE MOVIMIENTOS E INVENTARIO (CSV / XLSX EN STREAMING)
+============================================================================================
+- Movimientos: un renglón por producto/lote de cada movimiento (ProductosMovimiento), con los
+  filtros del listado de movimientos (tipo, fase, fechas) más el tipo de movimiento. Con el
+  historial se incluyen los movimientos archivados (UNION ALL con ProductosMovimientoHistorico,
+  ver apps/inventario/helpers/historial.py).
+- Inventario: un renglón por lote con existencia, con los filtros de la consulta de
+  inventario por almacén (almacen_id, producto_id, search).
+La escritura por bloques está en apps/base/exportar.py.
+"""
+from django.db import models
+
+from apps.base.models import BaseModel
+from apps.inventario.models import (
+    MovimientoInventario, ProductosMovimiento, LoteInventario, ProductosMovimientoHistorico
+)
+
+
+COLUMNAS_MOVIMIENTOS = [
+    ('Movimiento', 'movimiento_id'),
+    ('Fecha', 'movimiento__created_at'),
+    ('Referencia', 'movimiento__referencia'),
+    ('Tipo', 'movimiento__tipo'),
+    ('Tipo de movimiento', 'movimiento__movimiento'),
+    ('Fase', 'movimiento__fase'),
+    ('Almacén origen', 'movimiento__almacen__nombre'),
+    ('Almacén destino', 'movimiento__almacen_destino__nombre'),
+    ('Producto código', 'producto__codigo'),
+    ('Producto', 'producto__nombre'),
+    ('Lote', 'lote_id'),
+    ('Cantidad', 'cantidad'),
+    ('Costo unitario', 'costo_unitario'),
+    ('Costo total', 'costo_total'),
+]
+
+COLUMNAS_INVENTARIO = [
+    ('Almacén', 'almacen__nombre'),
+    ('Producto código', 'producto__codigo'),
+    ('Producto', 'producto__nombre'),
+    ('Unidad', 'producto__unidad_sat__nombre'),
+    ('Lote', 'id'),
+    ('Referencia', 'referencia'),
+    ('Cantidad', 'cantidad'),
+    ('Costo unitario', 'costo_unitario'),
+    ('Fecha ingreso', 'fecha_ingreso'),
+    ('Fecha vencimiento', 'fecha_vencimiento'),
+    ('Ubicación', 'ubicacion__nombre'),
+]
+
+
+def filtrar_movimientos(parametros, almacen=None, modelo=MovimientoInventario):
+    """
+    Movimientos no eliminados del almacén (origen o destino) con los filtros tipo, fase,
+    movimiento, fecha_inicio y fecha_fin. parametros: request.query_params o un dict.
+    modelo: MovimientoInventario o MovimientoInventarioHistorico (mismos campos).
+    """
+    queryset = modelo.objects.exclude(status_model=BaseModel.STATUS_MODEL_DELETE)
+    if almacen:
+        queryset = queryset.filter(models.Q(almacen=almacen) | models.Q(almacen_destino=almacen))
+
+    fase = parametros.get('fase')
+    if fase:
+        queryset = queryset.filter(fase=fase)
+
+    tipo = parametros.get('tipo')
+    if tipo:
+        queryset = queryset.filter(tipo=tipo)
+        if almacen and tipo == MovimientoInventario.TIPO_ENTRADA:
+            queryset = queryset.filter(almacen_destino=almacen)
+        elif almacen and tipo == MovimientoInventario.TIPO_SALIDA:
+            queryset = queryset.filter(almacen=almacen)
+
+    movimiento = parametros.get('movimiento')
+    if movimiento:
+        queryset = queryset.filter(movimiento=movimiento)
+
+    fecha_inicio = parametros.get('fecha_inicio')
+    fecha_fin = parametros.get('fecha_fin')
+    if fecha_inicio and fecha_fin:
+        queryset = queryset.filter(created_at__range=[fecha_inicio, fecha_fin])
+    return queryset
+
+
+def _productos(modelo, movimientos):
+    return modelo.objects.filter(
+        movimiento_id__in=movimientos.order_by().values('pk')
+    ).exclude(status_model=BaseModel.STATUS_MODEL_DELETE)
+
+
+def exportacion_movimientos(movimientos, historicos=None):
+    """
+    (queryset, columnas) de los productos de los movimientos filtrados (subconsulta).
+    historicos: movimientos archivados filtrados igual (filtrar_movimientos con el modelo
+    del historial); se leen en la misma consulta con UNION ALL.
+    """
+    if historicos is None:
+        queryset = _productos(ProductosMovimiento, movimientos).order_by('movimiento__created_at', 'movimiento_id', 'pk')
+        return queryset, COLUMNAS_MOVIMIENTOS
+
+    # El ORDER BY de un UNION solo puede usar columnas seleccionadas
+    lookups = [lookup for _, lookup in COLUMNAS_MOVIMIENTOS]
+    archivados = _productos(ProductosMovimientoHistorico, historicos).order_by().values_list(*lookups)
+    activos = _productos(ProductosMovimiento, movimientos).order_by().values_list(*lookups)
+    queryset = archivados.union(activos, all=True).order_by('movimiento__created_at', 'movimiento_id')
+    return queryset, COLUMNAS_MOVIMIENTOS
+
+
+def exportacion_inventario(almacen_id, parametros):
+    """
+    (queryset, columnas) de los lotes con existencia del almacén, filtrados por producto_id o search
+    """
+    queryset = LoteInventario.objects.filter(
+        almacen_id=almacen_id,
+        status_model=BaseModel.STATUS_MODEL_ACTIVE,
+        cantidad__gt=0
+    )
+    producto_id = parametros.get('producto_id')
+    search = (parametros.get('search') or '').strip()
+    if producto_id:
+        queryset = queryset.filter(producto_id=producto_id)
+    elif len(search) >= 3:
+        queryset = queryset.filter(producto__nombre__icontains=search)
+    return queryset.order_by('producto__nombre', 'fecha_vencimiento', 'pk'), COLUMNAS_INVENTARIO
@@ -0,0 +1,242 @@
+"""
+============================================================================================
+            HISTORIAL DE MOVIMIENTOS DE INVENTARIO (CIERRE MENSUAL Y ARCHIVO)
+============================================================================================
+MovimientoInventario / ProductosMovimiento crecen con cada venta, traspaso y embarque.
+El ciclo de vida del historial es:
+
+1. Cierre mensual (cerrar_meses): por cada mes terminado se guarda en SaldoInventarioCierre
+   la existencia neta por almacén y producto (saldo del mes anterior + entradas - salidas de
+   los lotes, en el almacén de cada movimiento). Un mes cerrado no vuelve a calcularse.
+2. Archivo (archivar_meses): los movimientos TERMINADOS de meses cerrados con más de
+   INVENTARIO_MESES_ACTIVOS meses se mueven por lotes a MovimientoInventarioHistorico /
+   ProductosMovimientoHistorico (particionadas por mes en PostgreSQL, ver
+   apps/base/particiones.py). Se quedan en la tabla activa los movimientos referenciados por
+   embarques, transformaciones, solicitudes, etc. (perderían la referencia) y los que
+   tienen productos registrados en un mes posterior.
+3. Consultas: existencias_al() parte del último cierre y solo suma los movimientos
+   posteriores (tabla activa); la exportación de movimientos lee ambas tablas con
+   historico=true (apps/inventario/helpers/exportaciones.py).
+
+    python manage.py cerrar_inventario
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Exists, F, Min, OuterRef, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.base import particiones
+from apps.inventario.models import (
+    MovimientoInventario, ProductosMovimiento, MovimientoInventarioHistorico,
+    ProductosMovimientoHistorico, CierreInventario, SaldoInventarioCierre,
+)
+
+
+MESES_ACTIVOS = getattr(settings, 'INVENTARIO_MESES_ACTIVOS', 6)
+LOTE = getattr(settings, 'INVENTARIO_ARCHIVO_LOTE', 500)
+
+TIPOS_SALDO = (MovimientoInventario.TIPO_ENTRADA, MovimientoInventario.TIPO_SALIDA)
+CAMPOS_MOVIMIENTO = [
+    'id', 'status_model', 'created_at', 'updated_at', 'created_by_id', 'updated_by_id', 'almacen_id',
+    'almacen_destino_id', 'tipo', 'movimiento', 'cantidad', 'costo_unitario', 'referencia', 'detalle_nota',
+    'nota', 'fase', 'alert_cantidad', 'tipo_alerta',
+]
+CAMPOS_PRODUCTO = [
+    'id', 'status_model', 'created_at', 'updated_at', 'created_by_id', 'updated_by_id', 'movimiento_id',
+    'producto_id', 'lote_id', 'cantidad', 'costo_unitario', 'costo_total',
+]
+
+
+#=============================================
+#         SALDOS
+#==============================================
+def _almacen_movimiento():
+    # Almacén afectado por el movimiento, no el actual del lote (los lotes cambian de almacén en
+    # traspasos y ventas): la salida descuenta del origen y la entrada suma al que recibe
+    return Case(
+        When(movimiento__tipo=MovimientoInventario.TIPO_ENTRADA,
+             then=Coalesce('movimiento__almacen_destino_id', 'movimiento__almacen_id')),
+        default='movimiento__almacen_id',
+    )
+
+
+def _sumar_netos(saldos, modelo, desde, hasta, almacen_id=None, producto_id=None):
+    """
+    Suma a saldos {(almacen_id, producto_id): [cantidad, valor]} las entradas y resta las
+    salidas de los lotes registradas en [desde, hasta), en el almacén de cada movimiento
+    """
+    queryset = modelo.objects.filter(
+        created_at__lt=hasta, lote__isnull=False, movimiento__tipo__in=TIPOS_SALDO
+    ).annotate(almacen_saldo=_almacen_movimiento())
+    if desde is not None:
+        queryset = queryset.filter(created_at__gte=desde)
+    if modelo is ProductosMovimientoHistorico:
+        # El producto se registra después del movimiento: acota las particiones leídas
+        queryset = queryset.filter(fecha_movimiento__lt=hasta)
+    if almacen_id:
+        queryset = queryset.filter(almacen_saldo=almacen_id)
+    if producto_id:
+        queryset = queryset.filter(lote__producto_id=producto_id)
+
+    netos = queryset.order_by().values('almacen_saldo', 'lote__producto_id', 'movimiento__tipo').annotate(
+        total_cantidad=Sum('cantidad'), total_valor=Sum('costo_total')
+    )
+    for fila in netos:
+        signo = 1 if fila['movimiento__tipo'] == MovimientoInventario.TIPO_ENTRADA else -1
+        saldo = saldos.setdefault((fila['almacen_saldo'], fila['lote__producto_id']), [0, 0])
+        saldo[0] += signo * (fila['total_cantidad'] or 0)
+        saldo[1] += signo * (fila['total_valor'] or 0)
+    return saldos
+
+
+def _saldos_cierre(cierre, almacen_id=None, producto_id=None):
+    if cierre is None:
+        return {}
+    queryset = SaldoInventarioCierre.objects.filter(mes=cierre.mes)
+    if almacen_id:
+        queryset = queryset.filter(almacen_id=almacen_id)
+    if producto_id:
+        queryset = queryset.filter(producto_id=producto_id)
+    return {
+        (almacen, producto): [cantidad, valor]
+        for almacen, producto, cantidad, valor in queryset.values_list('almacen_id', 'producto_id', 'cantidad', 'valor')
+    }
+
+
+def limite_archivo():
+    """
+    Todo lo archivado es anterior a esta fecha (None si no hay nada archivado)
+    """
+    ultimo = CierreInventario.objects.filter(archivado_en__isnull=False).order_by('-mes').first()
+    return particiones.mes_siguiente(particiones.inicio_mes(ultimo.mes)) if ultimo else None
+
+
+def existencias_al(fecha, almacen_id=None, producto_id=None):
+    """
+    Existencia neta por (almacen_id, producto_id) al momento `fecha`: {clave: [cantidad, valor]}.
+    Parte del último cierre anterior; el historial solo se lee si la fecha cae en meses archivados.
+    """
+    cierre = CierreInventario.objects.filter(mes__lt=particiones.inicio_mes(fecha).date()).order_by('-mes').first()
+    desde = particiones.mes_siguiente(particiones.inicio_mes(cierre.mes)) if cierre else None
+    saldos = _saldos_cierre(cierre, almacen_id, producto_id)
+    _sumar_netos(saldos, ProductosMovimiento, desde, fecha, almacen_id, producto_id)
+
+    limite = limite_archivo()
+    if limite is not None and (desde is None or desde < limite):
+        _sumar_netos(saldos, ProductosMovimientoHistorico, desde, fecha, almacen_id, producto_id)
+    return saldos
+
+
+#=============================================
+#         CIERRE MENSUAL
+#==============================================
+def cerrar_mes(mes):
+    """
+    Guarda los saldos al terminar `mes` (inicio del mes, UTC). Retorna el CierreInventario.
+    """
+    anterior = CierreInventario.objects.filter(mes=particiones.mes_anterior(mes).date()).first()
+    desde = mes if anterior else None
+    saldos = _saldos_cierre(anterior)
+    _sumar_netos(saldos, ProductosMovimiento, desde, particiones.mes_siguiente(mes))
+
+    with transaction.atomic():
+        cierre = CierreInventario.objects.create(mes=mes.date())
+        SaldoInventarioCierre.objects.bulk_create([
+            SaldoInventarioCierre(mes=cierre.mes, almacen_id=almacen_id, producto_id=producto_id, cantidad=cantidad, valor=valor)
+            for (almacen_id, producto_id), (cantidad, valor) in saldos.items()
+            if almacen_id and producto_id and (cantidad or valor)
+        ], batch_size=LOTE)
+    return cierre
+
+
+def cerrar_meses(hasta=None):
+    """
+    Cierra en orden los meses terminados pendientes (anteriores a `hasta`, por defecto el mes actual).
+    Retorna los meses cerrados.
+    """
+    hasta = particiones.inicio_mes(hasta or timezone.now())
+    ultimo = CierreInventario.objects.order_by('-mes').first()
+    if ultimo:
+        mes = particiones.mes_siguiente(particiones.inicio_mes(ultimo.mes))
+    else:
+        primero = ProductosMovimiento.objects.aggregate(primero=Min('created_at'))['primero']
+        if primero is None:
+            return []
+        mes = particiones.inicio_mes(primero)
+
+    cerrados = []
+    while mes < hasta:
+        cerrados.append(cerrar_mes(mes))
+        mes = particiones.mes_siguiente(mes)
+    return cerrados
+
+
+#=============================================
+#         ARCHIVO
+#==============================================
+def _sin_referencias():
+    # Movimientos que ningún otro modelo (embarques, transformaciones, solicitudes...) referencia
+    return [
+        ~Exists(relacion.related_model.objects.filter(**{relacion.field.name: OuterRef('pk')}))
+        for relacion in MovimientoInventario._meta.related_objects
+        if relacion.related_model is not ProductosMovimiento
+    ]
+
+
+def archivar_mes(cierre, lote=LOTE):
+    """
+    Mueve al historial los movimientos archivables del mes cerrado. Retorna cuántos se movieron.
+    """
+    mes = particiones.inicio_mes(cierre.mes)
+    fin = particiones.mes_siguiente(mes)
+    for tabla in (MovimientoInventarioHistorico._meta.db_table, ProductosMovimientoHistorico._meta.db_table):
+        if particiones.es_particionada(tabla):
+            particiones.asegurar_particiones(tabla, mes, meses=0)
+
+    pendientes = MovimientoInventario.objects.filter(
+        *_sin_referencias(),
+        created_at__gte=mes,
+        created_at__lt=fin,
+        fase=MovimientoInventario.FASE_TERMINADA,
+    ).exclude(productosMovimiento__created_at__gte=fin)
+
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = list(pendientes.order_by('created_at', 'id').values_list('id', flat=True)[:lote])
+            if not ids:
+                break
+            movimientos = MovimientoInventario.objects.filter(id__in=ids).values(*CAMPOS_MOVIMIENTO)
+            productos = ProductosMovimiento.objects.filter(movimiento_id__in=ids).values(
+                *CAMPOS_PRODUCTO, fecha_movimiento=F('movimiento__created_at')
+            )
+            MovimientoInventarioHistorico.objects.bulk_create(
+                [MovimientoInventarioHistorico(**fila) for fila in movimientos], ignore_conflicts=True
+            )
+            ProductosMovimientoHistorico.objects.bulk_create(
+                [ProductosMovimientoHistorico(**fila) for fila in productos], ignore_conflicts=True
+            )
+            ProductosMovimiento.objects.filter(movimiento_id__in=ids).delete()
+            MovimientoInventario.objects.filter(id__in=ids).delete()
+        total += len(ids)
+
+    CierreInventario.objects.filter(pk=cierre.pk).update(
+        archivado_en=timezone.now(), movimientos_archivados=F('movimientos_archivados') + total
+    )
+    return total
+
+
+def archivar_meses(meses_activos=MESES_ACTIVOS, lote=LOTE):
+    """
+    Archiva los meses cerrados con más de `meses_activos` meses. Retorna {mes: movimientos}.
+    """
+    limite = particiones.inicio_mes(timezone.now())
+    for _ in range(meses_activos):
+        limite = particiones.mes_anterior(limite)
+
+    archivados = {}
+    for cierre in CierreInventario.objects.filter(archivado_en__isnull=True, mes__lt=limite.date()).order_by('mes'):
+        archivados[cierre.mes] = archivar_mes(cierre, lote)
+    return archivados
+
@@ -2,14 +2,27 @@ from decimal import Decimal
 from apps.erp.models import Almacen
 from ..models import LoteInventario, MovimientoInventario, ProductosMovimiento
 from django.db import transaction
+from django.utils import timezone
+from apps.base.versiones import marcar_cambio_inventario
+
+
+BATCH_SIZE = 500
 
 #============================= IMPORTANTE: MOVIMIENTOS DE INVENTARIO ==========================
 #                                     MOVIMENTO PRONCIPAL
 #============================= MOVIMIENTOS DE INVENTARIO ==========================
-def movimento_inventario(detalle_lotes=[], almacen_salida=None, almacen_destino=None, movimiento=MovimientoInventario.TIPO_SALIDA, sub_movimiento=MovimientoInventario.SALIDA_TRASPASO, nota="", user=None):
+def movimento_inventario(detalle_lotes=[], almacen_salida=None, almacen_destino=None, movimiento=MovimientoInventario.TIPO_SALIDA, sub_movimiento=MovimientoInventario.SALIDA_TRASPASO, nota="", user=None, dry_run=False):
     """
-    Función para manejar movimientos de inventario con corrección en la deducción de lotes
+    Función para manejar movimientos de inventario con corrección en la deducción de lotes.
+
+    Crea el movimiento principal de salida y su movimiento virtual de entrada al almacén de
+    traspaso, clonando cada lote tomado en el almacén virtual. Todas las escrituras se hacen
+    en bloque: el número de consultas no depende de la cantidad de lotes.
+
+    Con dry_run=True no se escribe nada y se regresa la lista de lotes planeada (ver planear_salida).
     """
+    if dry_run:
+        return planear_salida(detalle_lotes, bloquear=False)
 
     # Calcular cantidad total usando sum de Django para mejor precisión
     cantidad_total_productos = sum(Decimal(str(lote['cantidad'])) for lote in detalle_lotes)
@@ -21,6 +34,8 @@ def movimento_inventario(detalle_lotes=[], almacen_salida=None, almacen_destino=
     ALMACEN_TRASPASO = Almacen.objects.filter(tipo=Almacen.TIPO_TRASPASO,pertence=almacen_salida).first()
     # Usar transacción para garantizar consistencia
     with transaction.atomic():
+        plan = planear_salida(detalle_lotes, bloquear=True)
+
         model = MovimientoInventario.objects.create(
             almacen=almacen_salida,
             almacen_destino=almacen_destino,
@@ -28,7 +43,7 @@ def movimento_inventario(detalle_lotes=[], almacen_salida=None, almacen_destino=
             tipo=movimiento,
             movimiento=sub_movimiento,
             nota=nota,
-            detalle_nota=f'ENTRADA AL ALMACEN {almacen_destino.nombre} DE {almacen_salida.nombre}',
+            detalle_nota=f'ENTRADA AL ALMACEN {almacen_destino.nombre} DE {almacen_salida.nombre}' if almacen_destino else None,
             created_by=user,
             referencia=f'MOV-{sub_movimiento}-ORI-ALM-{almacen_salida.id}-DEST-ALM-{almacen_destino.id}' if almacen_destino else f'MOV-{sub_movimiento}-ORI-ALM-{almacen_salida.id}',
             fase=fase,
@@ -47,63 +62,100 @@ def movimento_inventario(detalle_lotes=[], almacen_salida=None, almacen_destino=
             #status_model=MovimientoInventario.STATUS_MODEL_INACTIVE
         )
 
-     
-        # CREAR PRODUCTOS MOVIMIENTO
-        for detalle in detalle_lotes:
-            model_producto = detalle['producto']
-            #print(f"Procesando detalle: {detalle}")
-            
-            for lotes_data in detalle['lotes']:
-                #print(f"Lote data: {lotes_data}")
-                cantidad_lote_tomar = Decimal(str(lotes_data['cantidad']))
-                
-                model_lote = actualiza_lote_salida(
-                    lotes_data['lote'], 
-                    cantidad_lote_tomar, 
-                    user_id=user.id if user else None
-                )
-                #Prod mov main salida
-                item = ProductosMovimiento.objects.create(
-                    movimiento=model,
-                    producto=model_producto,
-                    cantidad=cantidad_lote_tomar,  # Usar cantidad del lote
-                    lote_id=model_lote.id,
-                    costo_unitario=model_lote.costo_unitario,
-                    costo_total=lotes_data['cantidad'] * model_lote.costo_unitario,
-                    created_by=user
-                )
-                
-                #duplica el model lote tal cual con todos sus campos
-                lote_new = LoteInventario(
-                    producto=model_lote.producto,
-                    almacen=ALMACEN_TRASPASO,
-                    ubicacion=None,  # Siempre null para almacenes virtuales
-                    cantidad=cantidad_lote_tomar,
-                    costo_unitario=model_lote.costo_unitario,
-                    fecha_ingreso=model_lote.fecha_ingreso,  # Mantener fecha de ingreso original
-                    fecha_vencimiento=model_lote.fecha_vencimiento,
-                    created_by=user
-                )
-                # Asignar created_at manualmente antes de guardar
-                lote_new.created_at = model_lote.created_at
-                lote_new.save()
-                #Prod mov vir salida
-                item_vir = ProductosMovimiento.objects.create(
-                    movimiento=mov_virtual,
-                    producto=model_producto,
-                    cantidad=cantidad_lote_tomar,  # Usar cantidad del lote
-                    lote_id=lote_new.id,
-                    costo_unitario=lote_new.costo_unitario,
-                    costo_total=cantidad_lote_tomar * lote_new.costo_unitario,
+        # DESCONTAR LOTES ORIGEN (la cantidad ya se descontó en memoria al planear)
+        ahora = timezone.now()
+        lotes_origen = {item['lote'].id: item['lote'] for item in plan}
+        for model_lote in lotes_origen.values():
+            if model_lote.cantidad <= 0:
+                model_lote.status_model = LoteInventario.STATUS_MODEL_INACTIVE
+            model_lote.updated_by = user
+            model_lote.updated_at = ahora
+        LoteInventario.objects.bulk_update(
+            lotes_origen.values(), ['cantidad', 'status_model', 'updated_by', 'updated_at'], batch_size=BATCH_SIZE
+        )
+
+        #duplica los lotes tal cual en el almacén virtual
+        lotes_virtuales = [
+            LoteInventario(
+                producto=item['lote'].producto,
+                almacen=ALMACEN_TRASPASO,
+                ubicacion=None,  # Siempre null para almacenes virtuales
+                cantidad=item['cantidad'],
+                costo_unitario=item['lote'].costo_unitario,
+                fecha_vencimiento=item['lote'].fecha_vencimiento,
+                status_model=LoteInventario.STATUS_MODEL_ACTIVE,
+                created_by=user
+            )
+            for item in plan
+        ]
+        for lote_new in lotes_virtuales:
+            lote_new.asignar_fecha_vencimiento()
+        LoteInventario.objects.bulk_create(lotes_virtuales, batch_size=BATCH_SIZE)
+        # auto_now_add sobreescribe las fechas al insertar, se conservan las del lote original aquí
+        for item, lote_new in zip(plan, lotes_virtuales):
+            lote_new.fecha_ingreso = item['lote'].fecha_ingreso
+            lote_new.created_at = item['lote'].created_at
+        LoteInventario.objects.bulk_update(lotes_virtuales, ['fecha_ingreso', 'created_at'], batch_size=BATCH_SIZE)
+        marcar_cambio_inventario(list(lotes_origen.values()) + lotes_virtuales)
+
+        # CREAR PRODUCTOS MOVIMIENTO (principal y virtual)
+        # bulk_create no ejecuta ProductosMovimiento.save(), los lotes ya quedaron ajustados arriba
+        productos_movimiento = []
+        for item, lote_new in zip(plan, lotes_virtuales):
+            for mov, lote in ((model, item['lote']), (mov_virtual, lote_new)):
+                productos_movimiento.append(ProductosMovimiento(
+                    movimiento=mov,
+                    producto=item['producto'],
+                    cantidad=item['cantidad'],
+                    lote=lote,
+                    costo_unitario=lote.costo_unitario,
+                    costo_total=item['cantidad'] * lote.costo_unitario,
                     created_by=user
-                )
+                ))
+        ProductosMovimiento.objects.bulk_create(productos_movimiento, batch_size=BATCH_SIZE)
                 
     return model
 
 
-def actualiza_lote_salida(lote, cantidad, user_id=None):
+def planear_salida(detalle_lotes, bloquear=True):
+    """
+    Obtiene con una sola consulta todos los lotes indicados en detalle_lotes, valida que
+    alcancen y descuenta en memoria la cantidad a tomar de cada uno.
+
+    Retorna una lista con un elemento por lote tomado:
+    [{'producto', 'lote', 'cantidad', 'cantidad_disponible', 'cantidad_restante', 'costo_unitario'}]
+    """
+    lotes_ids = {lotes_data['lote'].id for detalle in detalle_lotes for lotes_data in detalle['lotes']}
+    queryset = LoteInventario.objects.select_related('producto').filter(id__in=lotes_ids).order_by('id')
+    if bloquear:
+        queryset = queryset.select_for_update(of=('self',))
+    lotes = {lote.id: lote for lote in queryset}
+
+    plan = []
+    for detalle in detalle_lotes:
+        model_producto = detalle['producto']
+        for lotes_data in detalle['lotes']:
+            model_lote = lotes.get(lotes_data['lote'].id)
+            if model_lote is None:
+                raise ValueError(f"El lote {lotes_data['lote'].id} no existe")
+            cantidad_lote_tomar = Decimal(str(lotes_data['cantidad']))
+            disponible = model_lote.cantidad
+            actualiza_lote_salida(model_lote, cantidad_lote_tomar, guardar=False)
+            plan.append({
+                'producto': model_producto,
+                'lote': model_lote,
+                'cantidad': cantidad_lote_tomar,
+                'cantidad_disponible': disponible,
+                'cantidad_restante': model_lote.cantidad,
+                'costo_unitario': model_lote.costo_unitario,
+            })
+    return plan
+
+
+def actualiza_lote_salida(lote, cantidad, user_id=None, guardar=True):
     """
     Actualiza la cantidad de un lote de inventario.
+    Con guardar=False solo se descuenta en memoria (para escrituras en bloque).
     """
     lote_id = lote.id
     cantidad = Decimal(str(cantidad))  # Asegurar que sea Decimal
@@ -117,7 +169,8 @@ def actualiza_lote_salida(lote, cantidad, user_id=None):
     if user_id:
         lote.updated_by_id = user_id
     
-    lote.save()
+    if guardar:
+        lote.save()
     #print(f"Lote {lote_id} actualizado. Nueva cantidad: {lote.cantidad}")
     return lote
 
@@ -1,23 +1,41 @@
 from apps.inventario.models import MovimientoInventario, ProductosMovimiento, LoteInventario
 from apps.erp.models import Insidencia, InsidenciaLote,Almacen
 from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from decimal import Decimal
+from apps.base.versiones import marcar_cambio_inventario
 
 
 def create_movimiento_entrada(model_movimiento,productos_con_lote, user=None,ref_base="MOV-TRASP-VIT"):
+    """
+    Recibe en el almacén destino un traspaso en tránsito.
+
+    - Carga en una sola consulta el manifiesto (lotes del movimiento virtual) y los lotes recibidos.
+    - Compara en memoria lo recibido contra lo enviado por lote. Las diferencias
+      (enviado - recibido) generan incidencia; los lotes del manifiesto que no se
+      recibieron se registran completos como faltantes.
+    - Lotes, productos del movimiento e incidencias se escriben en bloque en una transacción.
+    """
     if model_movimiento.fase == MovimientoInventario.FASE_TERMINADA:
         raise ValueError("Este movimiento ya fue procesado")
-    model_movimento_vir = MovimientoInventario.objects.filter(referencia=f'{ref_base}-{model_movimiento.id}').first()
-    almacen_destino = model_movimiento.almacen_destino
     with transaction.atomic():
+        # Bloquear el movimiento evita que dos recepciones del mismo traspaso se procesen a la vez
+        model_movimiento = MovimientoInventario.objects.select_for_update(of=('self',)).select_related(
+            'almacen', 'almacen_destino'
+        ).get(pk=model_movimiento.pk)
+        if model_movimiento.fase == MovimientoInventario.FASE_TERMINADA:
+            raise ValueError("Este movimiento ya fue procesado")
+
+        model_movimento_vir = MovimientoInventario.objects.filter(referencia=f'{ref_base}-{model_movimiento.id}').first()
+        almacen_destino = model_movimiento.almacen_destino
+        ahora = timezone.now()
+
+        MovimientoInventario.objects.filter(
+            id__in=[model_movimiento.id] + ([model_movimento_vir.id] if model_movimento_vir else [])
+        ).update(fase=MovimientoInventario.FASE_TERMINADA, updated_by=user, updated_at=ahora)
         model_movimiento.fase = MovimientoInventario.FASE_TERMINADA
-        model_movimiento.updated_by = user
-        model_movimiento.save()
-        
-        if model_movimento_vir is not None:
-            model_movimento_vir.fase = MovimientoInventario.FASE_TERMINADA
-            model_movimento_vir.updated_by = user
-            model_movimento_vir.save()
-            
+
         movimiento_entrada = MovimientoInventario.objects.filter(
         referencia=f'MOV-ENTRADA-{model_movimiento.id}'
         ).first()
@@ -35,58 +53,98 @@ def create_movimiento_entrada(model_movimiento,productos_con_lote, user=None,ref
                 fase=MovimientoInventario.FASE_TERMINADA,
             )
 
-        count_cantidad = 0
-        
+        #MANIFIESTO Y LOTES RECIBIDOS (UNA SOLA CONSULTA CON BLOQUEO)
+        manifiesto = _cargar_manifiesto(model_movimento_vir)
+        recibidos = _agrupar_recibidos(productos_con_lote)
+        lotes = {
+            lote.id: lote
+            for lote in LoteInventario.objects.select_for_update(of=('self',)).select_related('producto').filter(
+                id__in=set(manifiesto) | set(recibidos)
+            )
+        }
+        marcar_cambio_inventario(lotes.values())  # almacén de origen (virtual) antes de moverlos
+
+        #COMPARAR RECIBIDO VS ENVIADO EN MEMORIA
         lotes_incidencias = []
-        for detalle in productos_con_lote:
-            producto = detalle['producto']
-            cantidad_producto = detalle['cantidad']
-            lotes = detalle['lotes']
-            
-            for lote_data in lotes:
-                lote = lote_data['lote']
-                cantidad = lote_data['cantidad']
-                if lote.cantidad < cantidad:
-                    # Registrar incidencia por cantidad insuficiente en el lote
-                    lotes_incidencias.append({
-                        'producto': producto,
-                        'cantidad': lote.cantidad - cantidad,
-                        'costo_unitario': lote.costo_unitario,
-                        'referencia_lote': lote,
-                    })
-                    print(f"Incidencia en lote {lote.id} para producto {producto.nombre}: solicitado {cantidad}, disponible {lote.cantidad}")
-                    cantidad = lote.cantidad  # Ajustar a la cantidad disponible
-                
-                # Lógica para actualizar el lote y el inventario
-                # Por ejemplo, aumentar la cantidad en el lote
-                lote.almacen = almacen_destino
-                lote.updated_by = user
-                print("ANTES:", lote.cantidad)
-                lote.cantidad = 0
-                print("DESPUES:", lote.cantidad)
-                count_cantidad += cantidad
-                lote.save()
-                
-                item_vir, created = ProductosMovimiento.objects.get_or_create(
-                movimiento=movimiento_entrada,
-                producto=producto,
-                lote_id=lote.id,
-                defaults={
-                    "cantidad": cantidad,
-                    "costo_unitario": lote.costo_unitario,
-                    "costo_total": cantidad * lote.costo_unitario,
-                    "created_by": user
-                    }
-                )
-
-                if not created:
-                    item_vir.cantidad += cantidad
-                    item_vir.costo_total = item_vir.cantidad * item_vir.costo_unitario
-                    item_vir.save()
-
-                
+        entradas = []
+        count_cantidad = Decimal('0')
+        for lote_id, recibido in recibidos.items():
+            lote = lotes.get(lote_id)
+            if lote is None:
+                raise ValueError(f"El lote {lote_id} no existe")
+            producto = recibido['producto']
+            cantidad = recibido['cantidad']
+            enviado = lote.cantidad
+            if enviado != cantidad:
+                # Registrar incidencia por la diferencia entre lo enviado y lo recibido
+                lotes_incidencias.append({
+                    'producto': producto,
+                    'cantidad': enviado - cantidad,
+                    'costo_unitario': lote.costo_unitario,
+                    'referencia_lote': str(lote),
+                })
+            if cantidad > enviado:
+                cantidad = enviado  # Ajustar a la cantidad disponible
+
+            # El lote pasa al almacén destino con lo recibido
+            lote.almacen = almacen_destino
+            lote.cantidad = cantidad
+            lote.updated_by = user
+            count_cantidad += cantidad
+            entradas.append((producto, lote, cantidad))
+
+        for lote_id in manifiesto:
+            if lote_id in recibidos or lote_id not in lotes:
+                continue
+            # Lote enviado que no llegó: todo es faltante y sale del almacén virtual
+            lote = lotes[lote_id]
+            if lote.cantidad > 0:
+                lotes_incidencias.append({
+                    'producto': lote.producto,
+                    'cantidad': lote.cantidad,
+                    'costo_unitario': lote.costo_unitario,
+                    'referencia_lote': str(lote),
+                })
+            lote.cantidad = Decimal('0')
+            lote.updated_by = user
+
+        #ESCRIBIR EN BLOQUE
+        for lote in lotes.values():
+            lote.status_model = (
+                LoteInventario.STATUS_MODEL_ACTIVE if lote.cantidad > 0 else LoteInventario.STATUS_MODEL_INACTIVE
+            )
+            lote.updated_at = ahora
+        LoteInventario.objects.bulk_update(
+            lotes.values(), ['almacen', 'cantidad', 'status_model', 'updated_by', 'updated_at'], batch_size=500
+        )
+        marcar_cambio_inventario(lotes.values())
+
+        # bulk_create no ejecuta ProductosMovimiento.save(); los lotes ya quedaron con lo recibido
+        existentes = {
+            (item.producto_id, item.lote_id): item
+            for item in ProductosMovimiento.objects.filter(movimiento=movimiento_entrada)
+        }
+        nuevos = []
+        for producto, lote, cantidad in entradas:
+            item_vir = existentes.get((producto.id, lote.id))
+            if item_vir is None:
+                nuevos.append(ProductosMovimiento(
+                    movimiento=movimiento_entrada,
+                    producto=producto,
+                    lote=lote,
+                    cantidad=cantidad,
+                    costo_unitario=lote.costo_unitario,
+                    costo_total=cantidad * lote.costo_unitario,
+                    created_by=user
+                ))
+            else:
+                item_vir.cantidad += cantidad
+                item_vir.costo_total = item_vir.cantidad * item_vir.costo_unitario
+        ProductosMovimiento.objects.bulk_create(nuevos, batch_size=500)
+        if existentes:
+            ProductosMovimiento.objects.bulk_update(existentes.values(), ['cantidad', 'costo_total'])
+
         # Crear insidencia si hay lotes con diferencias
-        print(lotes_incidencias)
         if lotes_incidencias:
             ALMACEN_incidencia = Almacen.objects.filter(tipo=Almacen.TIPO_INSIDENCIAS).first()
             _crear_insidencia(
@@ -95,16 +153,41 @@ def create_movimiento_entrada(model_movimiento,productos_con_lote, user=None,ref
                 movimiento=model_movimiento,
                 user=user
             )
-                
-                # Aquí también podrías actualizar el inventario del producto si es necesario
-        
-        
+
         movimiento_entrada.cantidad = count_cantidad
-        movimiento_entrada.save()
-        
+        movimiento_entrada.save(update_fields=['cantidad'])
+
         return movimiento_entrada
-    
-    
+
+
+def _cargar_manifiesto(model_movimento_vir):
+    """
+    Cantidad enviada por lote según el movimiento virtual del traspaso: {lote_id: cantidad}
+    """
+    if model_movimento_vir is None:
+        return {}
+    return {
+        fila['lote_id']: fila['cantidad']
+        for fila in ProductosMovimiento.objects.filter(
+            movimiento=model_movimento_vir, lote__isnull=False
+        ).values('lote_id').annotate(cantidad=Sum('cantidad')).order_by()
+    }
+
+
+def _agrupar_recibidos(productos_con_lote):
+    """
+    Suma lo recibido por lote (un lote puede venir repetido): {lote_id: {'producto', 'cantidad'}}
+    """
+    recibidos = {}
+    for detalle in productos_con_lote:
+        for lote_data in detalle['lotes']:
+            recibido = recibidos.setdefault(
+                lote_data['lote'].id, {'producto': detalle['producto'], 'cantidad': Decimal('0')}
+            )
+            recibido['cantidad'] += Decimal(str(lote_data['cantidad']))
+    return recibidos
+
+
 def crear_lote_insidencia(almacen,producto,  cantidad, costo_unitario,  user=None,referencia = None):
     """
     Crea un nuevo lote para una insidencia
@@ -122,9 +205,10 @@ def crear_lote_insidencia(almacen,producto,  cantidad, costo_unitario,  user=Non
 
 def _crear_insidencia(productos_incidencias, almacen, movimiento, user):
         """
-        Crea una insidencia para los productos con diferencias en la entrada
+        Crea una insidencia para los productos con diferencias en la entrada.
+        Los lotes de incidencia y su relación se crean en bloque.
         """
-        #from apps.erp.models import 
+        #from apps.erp.models import
 
         if not productos_incidencias:
             return None
@@ -136,24 +220,34 @@ def _crear_insidencia(productos_incidencias, almacen, movimiento, user):
             #updated_by=user
         )
 
+        lotes = []
         for item in productos_incidencias:
-            lote = crear_lote_insidencia(
+            lote = LoteInventario(
+                referencia=item['referencia_lote'],
                 producto=item['producto'],
+                almacen=almacen,
                 cantidad=item['cantidad'],
                 costo_unitario=item['costo_unitario'],
-                almacen=almacen,
-                referencia=item['referencia_lote'],
-                user=user
+                status_model=(
+                    LoteInventario.STATUS_MODEL_ACTIVE if item['cantidad'] > 0 else LoteInventario.STATUS_MODEL_INACTIVE
+                ),
+                created_by=user
             )
-            
-            InsidenciaLote.objects.create(
+            lote.asignar_fecha_vencimiento()
+            lotes.append(lote)
+        LoteInventario.objects.bulk_create(lotes)
+        marcar_cambio_inventario(lotes)
+
+        InsidenciaLote.objects.bulk_create([
+            InsidenciaLote(
                 insidencia=insidencia,
-                lote=lote,  # No hay lote asociado en este caso
-                #producto=item['producto'],
+                lote=lote,
                 cantidad=item['cantidad'],
                 atendida=False,
                 created_by=user,
                 updated_by=user
             )
+            for item, lote in zip(productos_incidencias, lotes)
+        ])
 
-        return insidencia
\ No newline at end of file
+        return insidencia
@@ -0,0 +1,48 @@
+from django.db.models import Q
+
+from apps.base.tareas import encolar
+from apps.erp.models import Notificacion
+from apps.usuarios.models import Usuario
+from ..models import ProductosSolicitud
+
+
+def usuario_compras_id():
+    """
+    Usuario que atiende las solicitudes de productos (grupo Compras o permiso de crear
+    órdenes de compra). Si no hay ninguno se notifica al usuario 1.
+    """
+    usuario_compras = Usuario.objects.filter(
+        is_active=True
+    ).filter(
+        Q(groups__name__in=['Compras']) | Q(user_permissions__codename='can_create_orden_compra')
+    ).values_list('id', flat=True).first()
+    return usuario_compras or 1
+
+
+def notificacion_solicitud(solicitud, usuario_id):
+    """
+    Notificación (sin guardar) de una solicitud de producto nueva
+    """
+    return Notificacion(
+        tipo=Notificacion.TIPO_MENSAJE,
+        titulo="¡Nueva Solicitud de Producto!",
+        mensaje=(
+        f"Se ha solicitado el producto '{solicitud.producto.nombre}' "
+        f"(Cantidad: {solicitud.cantidad}). Por {solicitud.created_by.full_name() if solicitud.created_by else ''}.\n"
+        f"📦 Almacén: {solicitud.almacen.nombre}\n"
+        "Por favor, revisa y gestiona la solicitud en el sistema."
+        ),
+        usuario_id=usuario_id
+    )
+
+
+def crear_solicitudes(solicitudes):
+    """
+    Guarda en bloque las solicitudes de productos y encola una sola tarea para sus
+    notificaciones (bulk_create no dispara el signal post_save de ProductosSolicitud).
+    """
+    if not solicitudes:
+        return []
+    ProductosSolicitud.objects.bulk_create(solicitudes)
+    encolar('inventario.notificar_productos_solicitud', {'solicitudes_ids': [solicitud.id for solicitud in solicitudes]})
+    return solicitudes
@@ -1,247 +1,328 @@
 from apps.inventario.models import MovimientoInventario, ProductosMovimiento, LoteInventario, Transformacion
 #from apps.erp.models import Producto, Almacen
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import Q
+from django.utils import timezone
+from collections import defaultdict
 from decimal import Decimal
+from apps.base.versiones import marcar_cambio_inventario
 
 
 
 def crear_movimiento_transformacion(almacen=None, tipo=None, productos_entrada=[],productos_salida=[], nota="", usuario=None):
-    #validar aalamcen existe
-    if not almacen:
-        raise ValueError("El almacén es obligatorio para crear un movimiento de transformación.")
-    
-    if tipo is None:
-        raise ValueError("El tipo de movimiento debe ser 'TRANSFORMACION' o 'MERMA'.")
-    
-    if len(nota) > 150 or len(nota) == 0:
-        raise ValueError("La nota debe tener entre 1 y 150 caracteres.")
-    nota = nota.strip()
-    _validar_lotes_producto(productos_entrada, almacen, tipo)
-    
-    if tipo == Transformacion.TIPO_MERMA:
-        #retoenamos tupla
-        mov = _crear_movimiento_salida(
-            almacen=almacen,
-            productos_entrada=productos_entrada,
-            nota=nota,
-            usuario=usuario,
-            tipo=Transformacion.TIPO_MERMA
-        )
-        
-        model_trans = crear_transformacion_registro(
-            almacen=almacen,
-            tipo=Transformacion.TIPO_MERMA,
-            movimiento_salida=mov,
-            movimiento_entrada=None,
-            nota=nota,
-            usuario=usuario
-        )
-        
-        return model_trans
-        
-    elif tipo == Transformacion.TIPO_TRANSFORMACION:
-        mov_salida = _crear_movimiento_salida(
-            almacen=almacen,
-            productos_entrada=productos_entrada,
-            nota=nota,
-            usuario=usuario,
-            tipo=Transformacion.TIPO_TRANSFORMACION
-        )
-        mov_entrada = _crear_movimiento_entrada(
-            almacen=almacen,
-            productos_salida=productos_salida,
-            nota=nota,
-            usuario=usuario,
-            referencia=f"ENTRADA-TRANS-{mov_salida.id}"
-        )
-        
-        
-        mov_entrada.referencia = f"SALIDA-TRANS-{mov_salida.id}"
-        mov_entrada.save()
-        mov_salida.referencia = f"ENTRADA-TRANS-{mov_entrada.id}"
-        mov_salida.save()
-        
-        model_trans = crear_transformacion_registro(
-            almacen=almacen,
-            tipo=Transformacion.TIPO_TRANSFORMACION,
-            movimiento_salida=mov_salida,
-            movimiento_entrada=mov_entrada,
-            nota=nota,
-            usuario=usuario
-        )
-        
-        return model_trans
-    else:
-        pass
-    
-def crear_lote_transformacion(almacen=None, producto=None, cantidad=Decimal('0.00'), costo_unitario=Decimal('0.00'), usuario=None):
-    cost_unitario = costo_unitario if costo_unitario and costo_unitario > 0 else Decimal(producto.precio_base)
-    return LoteInventario.objects.create(
-        almacen=almacen,
-        producto=producto,
-        cantidad=cantidad,
-        costo_unitario=cost_unitario,
-        created_by=usuario,
-        referencia="Lote creado por transformación"
-    )
-    
-def crear_transformacion_registro(almacen=None, tipo=None, movimiento_salida=None, movimiento_entrada=None, nota="", usuario=None):
-    #from apps.inventario.models import Transformacion
-    transformacion = Transformacion.objects.create(
-        tipo=tipo,
-        almacen=almacen,
-        referencia=f"TRANS-{movimiento_salida.id}-{movimiento_entrada.id if movimiento_entrada else 'N/A'}",
-        nota=nota,
-        movimiento_salida=movimiento_salida,
-        movimiento_entrada=movimiento_entrada,
-        created_by=usuario
-    )
-    return transformacion
+    """
+    Crea una transformación o merma. Usa el mismo motor que procesar_transformaciones.
+    """
+    resultado = procesar_transformaciones([{
+        'almacen': almacen,
+        'tipo': tipo,
+        'productos_entrada': productos_entrada,
+        'productos_salida': productos_salida,
+        'nota': nota,
+    }], usuario=usuario)
+    return resultado[0]['transformacion']
+
+
+def procesar_transformaciones(transformaciones=[], usuario=None):
+    """
+    Procesa un lote de transformaciones y mermas en una sola transacción.
+
+    transformaciones = [{'almacen', 'tipo', 'productos_entrada', 'productos_salida', 'nota'}]
+
+    - Todos los lotes de entrada (indicados o FIFO) se validan y bloquean con una sola consulta.
+    - La asignación de lotes se hace en memoria, respetando lo que ya tomaron las transformaciones anteriores del lote.
+    - Movimientos, lotes de salida, productos del movimiento y registros de transformación se crean en bloque.
+    - Si alguna transformación no es válida no se guarda ninguna.
+
+    Retorna por transformación: {'transformacion', 'cantidad_entrada', 'cantidad_salida', 'merma', 'rendimiento'}
+    """
+    if not transformaciones:
+        raise ValueError("Debe proporcionar al menos una transformación.")
+
+    # Las notas limpias van aparte para no modificar los datos recibidos
+    notas = [_validar_transformacion(datos, i, len(transformaciones)) for i, datos in enumerate(transformaciones)]
 
-def _crear_movimiento_entrada(almacen=None, productos_salida=[], nota="", usuario=None, referencia=""):
-    
     with transaction.atomic():
-        cant_productos = sum([float(producto_data.get('cantidad')) for producto_data in productos_salida])
-        movimiento = MovimientoInventario.objects.create(
-            almacen=almacen,
-            tipo=MovimientoInventario.TIPO_ENTRADA ,
-            movimiento=MovimientoInventario.ENTRADA_TRANSFORMACION,
-            nota=nota,
-            fase=MovimientoInventario.FASE_TERMINADA,
-            created_by=usuario,
-            cantidad=cant_productos,
-            #referencia=referencia
+        lotes_por_id, lotes_fifo = _bloquear_lotes_entrada(transformaciones)
+
+        #ASIGNAR LOTES EN MEMORIA
+        asignaciones = []
+        for i, datos in enumerate(transformaciones):
+            try:
+                asignaciones.append(_asignar_lotes(datos, lotes_por_id, lotes_fifo))
+            except ValueError as e:
+                raise ValueError(_prefijo(i, len(transformaciones)) + str(e))
+
+        #MOVIMIENTOS
+        movimientos_salida = []
+        movimientos_entrada = []
+        for datos, nota in zip(transformaciones, notas):
+            es_merma = datos['tipo'] == Transformacion.TIPO_MERMA
+            movimientos_salida.append(MovimientoInventario(
+                almacen=datos['almacen'],
+                tipo=MovimientoInventario.TIPO_SALIDA,
+                movimiento=MovimientoInventario.SALIDA_MERMA if es_merma else MovimientoInventario.SALIDA_TRANSFORMACION,
+                nota=nota,
+                fase=MovimientoInventario.FASE_TERMINADA,
+                created_by=usuario,
+                cantidad=sum(Decimal(str(p.get('cantidad'))) for p in datos['productos_entrada']),
+            ))
+            movimientos_entrada.append(None if es_merma else MovimientoInventario(
+                almacen=datos['almacen'],
+                tipo=MovimientoInventario.TIPO_ENTRADA,
+                movimiento=MovimientoInventario.ENTRADA_TRANSFORMACION,
+                nota=nota,
+                fase=MovimientoInventario.FASE_TERMINADA,
+                created_by=usuario,
+                cantidad=sum(Decimal(str(p.get('cantidad'))) for p in datos['productos_salida']),
+            ))
+        MovimientoInventario.objects.bulk_create(
+            movimientos_salida + [mov for mov in movimientos_entrada if mov is not None]
+        )
+
+        # bulk_create no ejecuta MovimientoInventario.save(), las referencias se asignan aquí
+        for mov_salida, mov_entrada in zip(movimientos_salida, movimientos_entrada):
+            if mov_entrada is None:
+                mov_salida.referencia = mov_salida.generar_folio()
+            else:
+                mov_entrada.referencia = f"SALIDA-TRANS-{mov_salida.id}"
+                mov_salida.referencia = f"ENTRADA-TRANS-{mov_entrada.id}"
+        MovimientoInventario.objects.bulk_update(
+            movimientos_salida + [mov for mov in movimientos_entrada if mov is not None], ['referencia']
         )
-        for producto_data in productos_salida:
-            producto = producto_data.get('producto')
-            cantidad = float(producto_data.get('cantidad'))
-            lote = crear_lote_transformacion(
-                almacen=almacen,
+
+        #LOTES DE SALIDA (PRODUCTOS NUEVOS)
+        lotes_nuevos = []
+        for datos, mov_entrada in zip(transformaciones, movimientos_entrada):
+            if mov_entrada is None:
+                continue
+            for producto_data in datos['productos_salida']:
+                producto = producto_data.get('producto')
+                cantidad = Decimal(str(producto_data.get('cantidad')))
+                lote = LoteInventario(
+                    almacen=datos['almacen'],
+                    producto=producto,
+                    cantidad=cantidad,
+                    costo_unitario=Decimal(producto.precio_base),
+                    status_model=LoteInventario.STATUS_MODEL_ACTIVE,
+                    created_by=usuario,
+                    referencia="Lote creado por transformación"
+                )
+                lote.asignar_fecha_vencimiento()
+                lotes_nuevos.append((mov_entrada, lote))
+        LoteInventario.objects.bulk_create([lote for _, lote in lotes_nuevos])
+
+        # bulk_create no ejecuta ProductosMovimiento.save(), los lotes se ajustan en memoria
+        productos_movimiento = [
+            ProductosMovimiento(
+                movimiento=mov_salida,
                 producto=producto,
-                cantidad=Decimal(cantidad),
-                costo_unitario=None,
-                usuario=usuario
+                lote=lote,
+                cantidad=cantidad,
+                costo_unitario=lote.costo_unitario,
+                costo_total=cantidad * lote.costo_unitario,
+                created_by=usuario
             )
-            producto_movimiento = ProductosMovimiento.objects.create(
-                movimiento=movimiento,
-                producto=producto,
+            for mov_salida, lotes in zip(movimientos_salida, asignaciones)
+            for producto, lote, cantidad in lotes
+        ] + [
+            ProductosMovimiento(
+                movimiento=mov_entrada,
+                producto=lote.producto,
                 lote=lote,
-                cantidad=Decimal(cantidad),
-                costo_unitario=lote.costo_unitario
+                cantidad=lote.cantidad,
+                costo_unitario=lote.costo_unitario,
+                costo_total=lote.cantidad * lote.costo_unitario,
+                created_by=usuario
             )
-            
-        return movimiento
-        
-        
-        
-def _crear_movimiento_salida(almacen=None, productos_entrada=[], nota="", usuario=None, tipo=Transformacion.TIPO_MERMA, referencia=""):
-    with transaction.atomic():
-        cant_productos = sum([float(producto_data.get('cantidad')) for producto_data in productos_entrada])
-        movimiento = MovimientoInventario.objects.create(
-            almacen=almacen,
-            tipo=MovimientoInventario.TIPO_SALIDA ,
-            movimiento=MovimientoInventario.SALIDA_MERMA if tipo==Transformacion.TIPO_MERMA else MovimientoInventario.SALIDA_TRANSFORMACION,
-            nota=nota,
-            fase=MovimientoInventario.FASE_TERMINADA,
-            created_by=usuario,
-            cantidad=cant_productos,
-            referencia=referencia
+            for mov_entrada, lote in lotes_nuevos
+        ]
+        ProductosMovimiento.objects.bulk_create(productos_movimiento, batch_size=500)
+
+        ahora = timezone.now()
+        lotes_afectados = {lote.id: lote for lotes in asignaciones for _, lote, _ in lotes}
+        for lote in lotes_afectados.values():
+            if lote.cantidad <= 0:
+                lote.status_model = LoteInventario.STATUS_MODEL_INACTIVE
+            lote.updated_by = usuario
+            lote.updated_at = ahora
+        LoteInventario.objects.bulk_update(
+            lotes_afectados.values(), ['cantidad', 'status_model', 'updated_by', 'updated_at'], batch_size=500
         )
-        
-        for producto_data in productos_entrada:
-            producto = producto_data.get('producto')
-            #cantidad_total = Decimal(producto_data.get('cantidad'))
-            lotes = producto_data.get('lotes', [])
-            if not lotes:
-                lotes = _asignar_lotes_fifo(
-                    producto=producto,
-                    cantidad_total=producto_data.get('cantidad'),
-                    almacen=almacen
-                )
-                producto_data['lotes'] = lotes
-            
-            for lote_data in lotes:
-                lote = lote_data.get('lote')
-                cantidad_lote = Decimal(lote_data.get('cantidad'))
-                
-                producto_movimiento = ProductosMovimiento.objects.create(
-                    movimiento=movimiento,
-                    producto=producto,
-                    lote=lote,
-                    cantidad=cantidad_lote,
-                    costo_unitario=lote.costo_unitario
-                )
-        
-        return movimiento
-    
+        marcar_cambio_inventario(list(lotes_afectados.values()) + [lote for _, lote in lotes_nuevos])
+
+        #REGISTROS DE TRANSFORMACION
+        registros = [
+            Transformacion(
+                tipo=datos['tipo'],
+                almacen=datos['almacen'],
+                referencia=f"TRANS-{mov_salida.id}-{mov_entrada.id if mov_entrada else 'N/A'}",
+                nota=nota,
+                movimiento_salida=mov_salida,
+                movimiento_entrada=mov_entrada,
+                created_by=usuario
+            )
+            for datos, nota, mov_salida, mov_entrada in zip(
+                transformaciones, notas, movimientos_salida, movimientos_entrada
+            )
+        ]
+        Transformacion.objects.bulk_create(registros)
+
+    return [
+        _rendimiento(registro, mov_salida, mov_entrada)
+        for registro, mov_salida, mov_entrada in zip(registros, movimientos_salida, movimientos_entrada)
+    ]
+
+
+def _rendimiento(registro, mov_salida, mov_entrada):
+    """
+    Rendimiento de la transformación: porcentaje de lo que entró que se convirtió en producto nuevo
+    """
+    cantidad_entrada = mov_salida.cantidad
+    cantidad_salida = mov_entrada.cantidad if mov_entrada else Decimal('0.00')
+    return {
+        'transformacion': registro,
+        'cantidad_entrada': cantidad_entrada,
+        'cantidad_salida': cantidad_salida,
+        'merma': cantidad_entrada - cantidad_salida,
+        'rendimiento': round(cantidad_salida * 100 / cantidad_entrada, 2) if cantidad_entrada else Decimal('0.00'),
+    }
+
+
+def _prefijo(indice, total):
+    return f"Transformación {indice + 1}: " if total > 1 else ""
+
 #=============================================
 #         VALIDAR LOTES
-#==============================================   
-def _validar_lotes_producto(productos_entrada = [], almacen=None, tipo=None):
+#==============================================
+def _validar_transformacion(datos, indice, total):
+    """
+    Validaciones que no necesitan consultar existencias. Retorna la nota limpia.
+    """
+    prefijo = _prefijo(indice, total)
+    almacen = datos.get('almacen')
+    tipo = datos.get('tipo')
+    nota = datos.get('nota') or ""
+    productos_entrada = datos.get('productos_entrada') or []
+
+    #validar aalamcen existe
+    if not almacen:
+        raise ValueError(prefijo + "El almacén es obligatorio para crear un movimiento de transformación.")
+
+    if tipo not in (Transformacion.TIPO_MERMA, Transformacion.TIPO_TRANSFORMACION):
+        raise ValueError(prefijo + "El tipo de movimiento debe ser 'TRANSFORMACION' o 'MERMA'.")
+
+    if len(nota) > 150 or len(nota) == 0:
+        raise ValueError(prefijo + "La nota debe tener entre 1 y 150 caracteres.")
+
     if len(productos_entrada) == 0:
-        raise ValueError("Debe proporcionar al menos un producto para la transformación.")
-    
+        raise ValueError(prefijo + "Debe proporcionar al menos un producto para la transformación.")
+
+    if tipo == Transformacion.TIPO_TRANSFORMACION and not datos.get('productos_salida'):
+        raise ValueError(prefijo + "Para una transformación, debe proporcionar al menos un producto de salida.")
+
     for producto_data in productos_entrada:
-        
         producto = producto_data.get('producto')
         cantidad = Decimal(str(producto_data.get('cantidad')))
         lotes = producto_data.get('lotes', [])
         if tipo == Transformacion.TIPO_MERMA and not lotes:
-            total_stock = (LoteInventario.objects.filter(
-                producto=producto,
-                almacen=almacen,
-                cantidad__gt=0,
-                status_model=LoteInventario.STATUS_MODEL_ACTIVE
-            ).aggregate(total=Sum('cantidad'))['total'] or Decimal('0.00'))
-            if total_stock < cantidad:
-                raise ValueError(
-                    f"No hay suficiente inventario para merma del producto {producto.nombre}. "
-                    f"Disponible: {total_stock}, requerido: {cantidad}."
-                )
+            # Se asignan por FIFO y se valida la existencia al bloquear los lotes
             continue
 
         suma_lotes = sum([Decimal(str(lote.get('cantidad'))) for lote in lotes])
         if suma_lotes != cantidad:
             raise ValueError(
+                prefijo +
                 f"La suma de las cantidades de los lotes ({suma_lotes}) no coincide con la "
                 f"cantidad total del producto ({cantidad}) para el producto {producto.nombre}."
             )
-        
+
         for lote_data in lotes:
-            if almacen.id != lote_data.get('lote').almacen.id:
-                raise ValueError(f"El lote {lote_data.get('lote').id} no pertenece al almacén {almacen.nombre}.")
             lote = lote_data.get('lote')
+            if almacen.id != lote.almacen_id:
+                raise ValueError(prefijo + f"El lote {lote.id} no pertenece al almacén {almacen.nombre}.")
             cantidad_lote = Decimal(str(lote_data.get('cantidad')))
             if cantidad_lote <= 0:
-                raise ValueError(f"La cantidad del lote debe ser mayor a 0 para el lote {lote.id} del producto {producto.nombre}.")
+                raise ValueError(prefijo + f"La cantidad del lote debe ser mayor a 0 para el lote {lote.id} del producto {producto.nombre}.")
 
+    return nota.strip()
 
-def _asignar_lotes_fifo(producto=None, cantidad_total=None, almacen=None):
-    cantidad_total = Decimal(str(cantidad_total))
-    lotes_qs = (LoteInventario.objects
-                .filter(
-                    producto=producto,
-                    almacen=almacen,
-                    cantidad__gt=0,
-                    status_model=LoteInventario.STATUS_MODEL_ACTIVE
-                )
-                .order_by('fecha_ingreso'))
-
-    restante = cantidad_total
-    lotes = []
-
-    for lote in lotes_qs:
-        if restante <= 0:
-            break
-        tomar = lote.cantidad if lote.cantidad <= restante else restante
-        lotes.append({'lote': lote, 'cantidad': tomar})
-        restante -= tomar
-
-    if restante > 0:
-        raise ValueError(
-            f"No hay suficiente inventario para merma del producto {producto.nombre}. "
-            f"Faltante: {restante}."
+
+def _bloquear_lotes_entrada(transformaciones):
+    """
+    Bloquea con una sola consulta los lotes indicados y los lotes con existencia
+    de los productos que se asignan por FIFO.
+    Retorna ({lote_id: lote}, {(almacen_id, producto_id): [lotes en orden FIFO]})
+    """
+    lotes_ids = set()
+    claves_fifo = set()
+    for datos in transformaciones:
+        for producto_data in datos['productos_entrada']:
+            lotes = producto_data.get('lotes', [])
+            if lotes:
+                lotes_ids.update(lote_data.get('lote').id for lote_data in lotes)
+            else:
+                claves_fifo.add((datos['almacen'].id, producto_data.get('producto').id))
+
+    filtro = Q(id__in=lotes_ids)
+    for almacen_id, producto_id in claves_fifo:
+        filtro |= Q(
+            almacen_id=almacen_id,
+            producto_id=producto_id,
+            cantidad__gt=0,
+            status_model=LoteInventario.STATUS_MODEL_ACTIVE
         )
 
-    return lotes
\ No newline at end of file
+    lotes_por_id = {}
+    lotes_fifo = defaultdict(list)
+    queryset = LoteInventario.objects.select_for_update(of=('self',)).select_related('producto').filter(filtro).order_by(
+        'almacen_id', 'producto_id', 'fecha_ingreso', 'id'
+    )
+    for lote in queryset:
+        lotes_por_id[lote.id] = lote
+        clave = (lote.almacen_id, lote.producto_id)
+        if clave in claves_fifo and lote.cantidad > 0 and lote.status_model == LoteInventario.STATUS_MODEL_ACTIVE:
+            lotes_fifo[clave].append(lote)
+    return lotes_por_id, lotes_fifo
+
+
+def _asignar_lotes(datos, lotes_por_id, lotes_fifo):
+    """
+    Descuenta en memoria los lotes de entrada de una transformación.
+    Retorna [(producto, lote, cantidad)]
+    """
+    asignados = []
+    for producto_data in datos['productos_entrada']:
+        producto = producto_data.get('producto')
+        lotes = producto_data.get('lotes', [])
+
+        if not lotes:
+            # Merma sin lotes: FIFO por fecha de ingreso
+            restante = Decimal(str(producto_data.get('cantidad')))
+            for lote in lotes_fifo[(datos['almacen'].id, producto.id)]:
+                if restante <= 0:
+                    break
+                if lote.cantidad <= 0:
+                    continue
+                tomar = lote.cantidad if lote.cantidad <= restante else restante
+                lote.cantidad -= tomar
+                restante -= tomar
+                asignados.append((producto, lote, tomar))
+            if restante > 0:
+                raise ValueError(
+                    f"No hay suficiente inventario para merma del producto {producto.nombre}. "
+                    f"Faltante: {restante}."
+                )
+            continue
+
+        for lote_data in lotes:
+            lote = lotes_por_id.get(lote_data.get('lote').id)
+            cantidad_lote = Decimal(str(lote_data.get('cantidad')))
+            if lote is None or lote.cantidad < cantidad_lote:
+                raise ValueError(
+                    f"No hay suficiente inventario en el lote {lote_data.get('lote').id} del producto {producto.nombre}. "
+                    f"Disponible: {lote.cantidad if lote else 0}, requerido: {cantidad_lote}."
+                )
+            lote.cantidad -= cantidad_lote
+            asignados.append((producto, lote, cantidad_lote))
+    return asignados
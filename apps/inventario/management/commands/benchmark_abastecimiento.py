@@ -0,0 +1,79 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.base.mediciones import AYUDA_REVERTIDOS, capturar_consultas, datos_revertidos
+from apps.erp.models import Almacen, Compra, CompraDetalle, Producto, Proveedor
+from apps.inventario.models import LoteInventario, ProductosMovimiento
+from apps.inventario.services.entradas import AbastecimientoService
+from apps.usuarios.models import Usuario
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el abastecimiento de compras con entregas de varios tamaños (por defecto 50, 300 y 1000 líneas). "
+        + AYUDA_REVERTIDOS
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lineas', type=int, nargs='+', default=[50, 300, 1000], help="Tamaños de entrega a medir")
+        parser.add_argument('--max-queries', type=int, default=None, help="Falla si algún abastecimiento usa más consultas")
+
+    def handle(self, *args, **options):
+        with datos_revertidos():
+            usuario = Usuario.objects.create(username='benchmark-abastecimiento', nombre='BENCHMARK')
+            proveedor = Proveedor.objects.create(nombre='BENCH PROVEEDOR')
+            almacen = Almacen.objects.create(nombre='BENCH SUCURSAL')
+            virtual = Almacen.objects.create(nombre='BENCH COMPRA', tipo=Almacen.TIPO_COMPRA)
+            for total_lineas in options['lineas']:
+                self._medir(total_lineas, usuario, proveedor, almacen, virtual, options['max_queries'])
+
+    def _medir(self, total_lineas, usuario, proveedor, almacen, virtual, max_queries):
+        compra = Compra.objects.create(
+            proveedor=proveedor,
+            almacen_destino=almacen,
+            almacen_virtual=virtual,
+            estado=Compra.EN_CAMINO,
+            total=0
+        )
+        productos = Producto.objects.bulk_create([
+            Producto(nombre=f'BENCH {total_lineas}-{i}', precio_base=1) for i in range(total_lineas)
+        ])
+        CompraDetalle.objects.bulk_create([
+            CompraDetalle(
+                compra=compra,
+                producto=producto,
+                cantidad=Decimal('10'),
+                precio_unitario=Decimal('2.50'),
+                subtotal=Decimal('25.00')
+            )
+            for producto in productos
+        ])
+        # La mitad de los productos llegan por ID y la otra mitad como instancia
+        items = [
+            {'producto': producto if i % 2 else producto.id, 'cantidad': Decimal('9') if i % 10 == 0 else Decimal('10')}
+            for i, producto in enumerate(productos)
+        ]
+
+        with capturar_consultas() as queries:
+            inicio = time.perf_counter()
+            resultado = AbastecimientoService.procesar_abastecimiento_completo(
+                {'compra': compra.id, 'items': items, 'nota': 'benchmark'},
+                usuario
+            )
+            segundos = time.perf_counter() - inicio
+        self.stdout.write(f"abastecimiento: {total_lineas} líneas, {len(queries)} consultas, {segundos * 1000:.1f} ms")
+
+        movimiento_id = resultado['movimiento_principal']['id']
+        checks = {
+            'lotes': LoteInventario.objects.filter(productosmovimiento__movimiento_id=movimiento_id).count() == total_lineas,
+            'lineas': ProductosMovimiento.objects.filter(movimiento_id=movimiento_id).count() == total_lineas,
+            'diferencias': CompraDetalle.objects.filter(compra=compra, existe_diferencia=True).count() == len(range(0, total_lineas, 10)),
+            'estado compra': Compra.objects.get(pk=compra.pk).estado == Compra.FINALIZADA,
+        }
+        fallidos = [nombre for nombre, ok in checks.items() if not ok]
+        if fallidos:
+            raise CommandError(f"Resultado incorrecto con {total_lineas} líneas: {', '.join(fallidos)}")
+        if max_queries is not None and len(queries) > max_queries:
+            raise CommandError(f"El abastecimiento de {total_lineas} líneas usó {len(queries)} consultas (máximo {max_queries})")
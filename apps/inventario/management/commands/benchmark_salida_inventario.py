@@ -0,0 +1,87 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.base.mediciones import AYUDA_REVERTIDOS, capturar_consultas, datos_revertidos
+from apps.erp.models import Almacen, Producto
+from apps.inventario.models import LoteInventario, MovimientoInventario, ProductosMovimiento
+from apps.inventario.helpers.movimientoSalida import movimento_inventario
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la salida de inventario en bloque (movimiento principal + virtual) con N lotes. "
+        + AYUDA_REVERTIDOS
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lotes', type=int, default=1000, help="Número de lotes a sacar")
+        parser.add_argument('--productos', type=int, default=50, help="Número de productos diferentes")
+        parser.add_argument('--max-queries', type=int, default=None, help="Falla si la salida usa más consultas")
+
+    def handle(self, *args, **options):
+        total_lotes = options['lotes']
+        total_productos = max(1, min(options['productos'], total_lotes))
+        with datos_revertidos():
+            self._ejecutar(total_lotes, total_productos, options['max_queries'])
+
+    def _ejecutar(self, total_lotes, total_productos, max_queries):
+        origen = Almacen.objects.create(nombre='BENCH ORIGEN')
+        destino = Almacen.objects.create(nombre='BENCH DESTINO')
+        virtual = Almacen.objects.create(nombre='BENCH TRASPASO', tipo=Almacen.TIPO_TRASPASO, pertence=origen)
+        productos = Producto.objects.bulk_create([
+            Producto(nombre=f'BENCH {i}', precio_base=1) for i in range(total_productos)
+        ])
+        lotes = LoteInventario.objects.bulk_create([
+            LoteInventario(
+                producto=productos[i % total_productos],
+                almacen=origen,
+                cantidad=Decimal('10.00'),
+                costo_unitario=Decimal('2.50'),
+            )
+            for i in range(total_lotes)
+        ])
+
+        detalle_lotes = []
+        for producto in productos:
+            lotes_producto = [lote for lote in lotes if lote.producto_id == producto.id]
+            detalle_lotes.append({
+                'producto': producto,
+                'cantidad': Decimal('4.00') * len(lotes_producto),
+                'lotes': [{'lote': lote, 'cantidad': Decimal('4.00')} for lote in lotes_producto],
+            })
+
+        for dry_run in (True, False):
+            with capturar_consultas() as queries:
+                inicio = time.perf_counter()
+                resultado = movimento_inventario(
+                    detalle_lotes=detalle_lotes,
+                    almacen_salida=origen,
+                    almacen_destino=destino,
+                    dry_run=dry_run
+                )
+                segundos = time.perf_counter() - inicio
+            etiqueta = 'dry-run' if dry_run else 'salida'
+            self.stdout.write(f"{etiqueta}: {total_lotes} lotes, {len(queries)} consultas, {segundos * 1000:.1f} ms")
+            if dry_run and len(resultado) != total_lotes:
+                raise CommandError(f"El plan debe tener {total_lotes} lotes, tiene {len(resultado)}")
+
+        if max_queries is not None and len(queries) > max_queries:
+            raise CommandError(f"La salida usó {len(queries)} consultas (máximo {max_queries})")
+
+        #VALIDAR RESULTADO
+        movimiento = resultado
+        virtual_mov = MovimientoInventario.objects.get(referencia=f'MOV-TRASP-VIT-{movimiento.id}')
+        esperado = Decimal('4.00') * total_lotes
+        checks = {
+            'lineas principales': ProductosMovimiento.objects.filter(movimiento=movimiento).count() == total_lotes,
+            'lineas virtuales': ProductosMovimiento.objects.filter(movimiento=virtual_mov).count() == total_lotes,
+            'lotes clonados': LoteInventario.objects.filter(almacen=virtual).count() == total_lotes,
+            'cantidad virtual': sum(LoteInventario.objects.filter(almacen=virtual).values_list('cantidad', flat=True)) == esperado,
+            'cantidad origen': not LoteInventario.objects.filter(almacen=origen).exclude(cantidad=Decimal('6.00')).exists(),
+        }
+        fallidos = [nombre for nombre, ok in checks.items() if not ok]
+        if fallidos:
+            raise CommandError(f"Resultado incorrecto: {', '.join(fallidos)}")
+        self.stdout.write(self.style.SUCCESS("✔ Salida en bloque verificada (los datos de prueba se revirtieron)"))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventario.helpers.historial import MESES_ACTIVOS, LOTE, cerrar_meses, archivar_meses
+
+
+class Command(BaseCommand):
+    help = (
+        "Cierre mensual de inventario: guarda los saldos por almacén y producto de los meses "
+        "terminados y mueve al historial los movimientos terminados de los meses cerrados más "
+        "antiguos. Programar en cron una vez al día (los meses ya cerrados no se recalculan)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses-activos', dest='meses_activos', type=int, default=MESES_ACTIVOS,
+                            help="Meses cerrados que se quedan en la tabla activa")
+        parser.add_argument('--lote', type=int, default=LOTE, help="Movimientos por transacción")
+        parser.add_argument('--solo-cierre', dest='solo_cierre', action='store_true',
+                            help="Solo guarda los saldos, no archiva")
+
+    def handle(self, *args, **options):
+        cerrados = cerrar_meses()
+        for cierre in cerrados:
+            self.stdout.write(f"  + {cierre}")
+        archivados = {}
+        if not options['solo_cierre']:
+            archivados = archivar_meses(options['meses_activos'], options['lote'])
+            for mes, total in archivados.items():
+                self.stdout.write(f"  > {mes:%Y-%m}: {total} movimientos archivados")
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {len(cerrados)} meses cerrados, {sum(archivados.values())} movimientos archivados"
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.base.exportar import FORMATOS, FORMATO_CSV, CHUNK_SIZE, exportar_archivo
+from apps.inventario.helpers.exportaciones import exportacion_inventario
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta los lotes con existencia de un almacén a CSV o XLSX leyendo por bloques "
+        "(memoria constante). Sin --salida escribe el CSV en la salida estándar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--almacen', dest='almacen_id', type=int, required=True, help="ID del almacén")
+        parser.add_argument('--producto', dest='producto_id', type=int)
+        parser.add_argument('--search', help="Nombre del producto (mínimo 3 caracteres)")
+        parser.add_argument('--formato', choices=FORMATOS, default=FORMATO_CSV)
+        parser.add_argument('--salida', help="Ruta del archivo")
+        parser.add_argument('--chunk-size', dest='chunk_size', type=int, default=CHUNK_SIZE, help="Renglones por bloque")
+
+    def handle(self, *args, **options):
+        queryset, columnas = exportacion_inventario(options['almacen_id'], options)
+        try:
+            total = exportar_archivo(queryset, columnas, options['salida'], options['formato'],
+                                     options['chunk_size'], titulo='inventario', stdout=self.stdout)
+        except ValueError as e:
+            raise CommandError(str(e))
+        destino = self.stdout if options['salida'] else self.stderr
+        destino.write(self.style.SUCCESS(f"✔ {total} renglones exportados"))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.base.exportar import FORMATOS, FORMATO_CSV, CHUNK_SIZE, exportar_archivo
+from apps.inventario.models import MovimientoInventarioHistorico
+from apps.inventario.helpers.exportaciones import filtrar_movimientos, exportacion_movimientos
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta los productos de los movimientos de inventario a CSV o XLSX leyendo por bloques "
+        "(memoria constante). Sin --almacen exporta todos los almacenes. "
+        "Sin --salida escribe el CSV en la salida estándar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--almacen', type=int, help="ID del almacén (origen o destino)")
+        parser.add_argument('--tipo', help="ENTRADA / SALIDA")
+        parser.add_argument('--fase')
+        parser.add_argument('--movimiento', help="Tipo de movimiento, p. ej. SALIDA_VENTA")
+        parser.add_argument('--fecha-inicio', dest='fecha_inicio', help="YYYY-MM-DD")
+        parser.add_argument('--fecha-fin', dest='fecha_fin', help="YYYY-MM-DD")
+        parser.add_argument('--historico', action='store_true', help="Incluir los movimientos archivados")
+        parser.add_argument('--formato', choices=FORMATOS, default=FORMATO_CSV)
+        parser.add_argument('--salida', help="Ruta del archivo")
+        parser.add_argument('--chunk-size', dest='chunk_size', type=int, default=CHUNK_SIZE, help="Renglones por bloque")
+
+    def handle(self, *args, **options):
+        movimientos = filtrar_movimientos(options, almacen=options['almacen'])
+        historicos = None
+        if options['historico']:
+            historicos = filtrar_movimientos(options, almacen=options['almacen'], modelo=MovimientoInventarioHistorico)
+        queryset, columnas = exportacion_movimientos(movimientos, historicos)
+        try:
+            total = exportar_archivo(queryset, columnas, options['salida'], options['formato'],
+                                     options['chunk_size'], titulo='movimientos', stdout=self.stdout)
+        except ValueError as e:
+            raise CommandError(str(e))
+        destino = self.stdout if options['salida'] else self.stderr
+        destino.write(self.style.SUCCESS(f"✔ {total} renglones exportados"))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0086_compra_fecha_vencimiento'),
+        ('inventario', '0035_productoembarque_precio_unitario'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiquidacionEmbarque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status_model', models.CharField(choices=[('ACTIVE', 'Activo'), ('INACTIVE', 'Inactivo')], default='ACTIVE', max_length=10, verbose_name='Estado')),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True, verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de actualización')),
+                ('fecha_cierre', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cantidad_cargada', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('cantidad_entregada', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('cantidad_devuelta', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('cantidad_ventas', models.PositiveIntegerField(default=0)),
+                ('total_ventas', models.DecimalField(decimal_places=2, default=0, max_digits=25)),
+                ('total_cobrado_ventas', models.DecimalField(decimal_places=2, default=0, max_digits=25)),
+                ('total_credito', models.DecimalField(decimal_places=2, default=0, help_text='Crédito otorgado a clientes durante el reparto', max_digits=25)),
+                ('monto_inicial', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('total_entradas', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('total_salidas', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('total_gastos', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('metodos_pago', models.JSONField(blank=True, default=list, help_text='Totales de caja por método de pago')),
+                ('productos', models.JSONField(blank=True, default=list, help_text='Cargado / entregado / devuelto por producto')),
+                ('apertura_caja', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='liquidaciones_embarque', to='erp.cajaapertura')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_%(class)s_set', to=settings.AUTH_USER_MODEL)),
+                ('embarque', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='liquidacion', to='inventario.embarquereparto')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='updated_%(class)s_set', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Liquidación de Embarque',
+                'verbose_name_plural': 'Liquidaciones de Embarque',
+                'ordering': ['-fecha_cierre'],
+            },
+        ),
+    ]
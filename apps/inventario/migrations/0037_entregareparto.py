@@ -0,0 +1,37 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0086_compra_fecha_vencimiento'),
+        ('inventario', '0036_liquidacionembarque'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntregaReparto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status_model', models.CharField(choices=[('ACTIVE', 'Activo'), ('INACTIVE', 'Inactivo')], default='ACTIVE', max_length=10, verbose_name='Estado')),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True, verbose_name='Fecha de creación')),
+                ('updated_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de actualización')),
+                ('clave', models.CharField(help_text='Clave única de la entrega generada por el dispositivo', max_length=100, unique=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='created_%(class)s_set', to=settings.AUTH_USER_MODEL)),
+                ('embarque', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entregas', to='inventario.embarquereparto')),
+                ('movimiento', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='entregas_reparto', to='inventario.movimientoinventario')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='updated_%(class)s_set', to=settings.AUTH_USER_MODEL)),
+                ('venta', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entregas_reparto', to='erp.venta')),
+            ],
+            options={
+                'verbose_name': 'Entrega de Reparto',
+                'verbose_name_plural': 'Entregas de Reparto',
+                'indexes': [models.Index(fields=['embarque', 'venta'], name='inventario__embarqu_6ca87e_idx')],
+            },
+        ),
+    ]
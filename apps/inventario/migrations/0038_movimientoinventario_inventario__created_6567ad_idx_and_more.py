@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-18 23:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0087_cajatransaccion_erp_cajatra_created_e088b8_idx_and_more'),
+        ('inventario', '0037_entregareparto'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['created_at', 'id'], name='inventario__created_6567ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['almacen', 'created_at', 'id'], name='inventario__almacen_9682d6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['almacen_destino', 'created_at', 'id'], name='inventario__almacen_6e7abe_idx'),
+        ),
+    ]
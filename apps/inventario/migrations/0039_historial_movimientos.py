@@ -0,0 +1,204 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# tabla -> columna de la partición mensual
+TABLAS_PARTICIONADAS = {
+    'inventario_movimientoinventariohistorico': 'created_at',
+    'inventario_productosmovimientohistorico': 'fecha_movimiento',
+}
+
+
+def particionar_tabla_vacia(schema_editor, tabla, columna):
+    # SQL congelado (no depende de apps/base/particiones.py): la tabla recién creada (vacía)
+    # se vuelve a crear particionada y con los mismos índices que le dio Django
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+            [tabla, f"{tabla}_pkey"]
+        )
+        indices = [fila[0] for fila in cursor.fetchall()]
+
+    schema_editor.execute(f"ALTER TABLE {tabla} RENAME TO {tabla}_plantilla")
+    schema_editor.execute(
+        f"CREATE TABLE {tabla} (LIKE {tabla}_plantilla INCLUDING DEFAULTS INCLUDING STORAGE) "
+        f"PARTITION BY RANGE (\"{columna}\")"
+    )
+    schema_editor.execute(f"DROP TABLE {tabla}_plantilla")
+    schema_editor.execute(f"ALTER TABLE {tabla} ADD PRIMARY KEY (id, \"{columna}\")")
+    for indice in indices:
+        schema_editor.execute(indice)
+    schema_editor.execute(f"CREATE TABLE {tabla}_pdefault PARTITION OF {tabla} DEFAULT")
+
+
+def particionar_historial(apps, schema_editor):
+    # Solo PostgreSQL; en otras bases el historial es una tabla normal
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for tabla, columna in TABLAS_PARTICIONADAS.items():
+        particionar_tabla_vacia(schema_editor, tabla, columna)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0091_venta_clave_dispositivo'),
+        ('inventario', '0038_movimientoinventario_inventario__created_6567ad_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CierreInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primer día del mes (UTC)', unique=True)),
+                ('cerrado_en', models.DateTimeField(auto_now_add=True)),
+                ('archivado_en', models.DateTimeField(blank=True, null=True)),
+                ('movimientos_archivados', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Cierre de Inventario',
+                'verbose_name_plural': 'Cierres de Inventario',
+                'ordering': ['-mes'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MovimientoInventarioHistorico',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('status_model', models.CharField(choices=[('ACTIVE', 'Activo'), ('INACTIVE', 'Inactivo')], default='ACTIVE', max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+                ('tipo', models.CharField(choices=[('SALIDA', 'SALIDA'), ('ENTRADA', 'ENTRADA'), ('AJUSTE', 'AJUSTE')], max_length=20)),
+                ('movimiento', models.CharField(choices=[('ENTRADA ABASTECIMIENTO', 'ENTRADA ABASTECIMIENTO'), ('ENTRADA TRASPASO', 'ENTRADA TRASPASO'), ('ENTRADA TRASPASO VIRTUAL', 'ENTRADA TRASPASO VIRTUAL'), ('ENTRADA EMBARQUE', 'ENTRADA EMBARQUE'), ('ENTRADA VENTA CANCELADA', 'ENTRADA VENTA CANCELADA'), ('ENTRADA TRANSFORMACION', 'ENTRADA TRANSFORMACION'), ('SALIDA VENTA', 'SALIDA VENTA'), ('SALIDA TRASPASO', 'SALIDA TRASPASO'), ('SALIDA MERMA', 'SALIDA MERMA'), ('SALIDA TRANSFORMACION', 'SALIDA TRANSFORMACION'), ('SALIDA TRASPASO VIRTUAL', 'SALIDA TRASPASO VIRTUAL'), ('SALIDA EMBARQUE', 'SALIDA EMBARQUE'), ('AJUSTE MANUAL', 'AJUSTE MANUAL')], max_length=30)),
+                ('cantidad', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('costo_unitario', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('referencia', models.CharField(blank=True, max_length=150, null=True)),
+                ('detalle_nota', models.CharField(blank=True, max_length=255, null=True)),
+                ('nota', models.TextField(blank=True, null=True)),
+                ('fase', models.CharField(choices=[('FASE PROCESO', 'FASE PROCESO'), ('FASE TERMINADA', 'FASE TERMINADA')], max_length=20)),
+                ('alert_cantidad', models.BooleanField(default=False)),
+                ('tipo_alerta', models.CharField(blank=True, choices=[('MAS', 'MAS'), ('MENOS', 'MENOS')], max_length=10, null=True)),
+                ('archivado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Inventario (Historial)',
+                'verbose_name_plural': 'Movimientos de Inventario (Historial)',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductosMovimientoHistorico',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('status_model', models.CharField(choices=[('ACTIVE', 'Activo'), ('INACTIVE', 'Inactivo')], default='ACTIVE', max_length=10)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+                ('cantidad', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('costo_unitario', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('costo_total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('fecha_movimiento', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Producto en Movimiento (Historial)',
+                'verbose_name_plural': 'Productos en Movimientos (Historial)',
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoInventarioCierre',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primer día del mes (UTC)')),
+                ('cantidad', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('valor', models.DecimalField(decimal_places=2, default=0, max_digits=25)),
+            ],
+            options={
+                'verbose_name': 'Saldo de Cierre',
+                'verbose_name_plural': 'Saldos de Cierre',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='productosmovimiento',
+            index=models.Index(fields=['created_at'], name='inventario__created_8338b9_idx'),
+        ),
+        migrations.AddField(
+            model_name='movimientoinventariohistorico',
+            name='almacen',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='erp.almacen'),
+        ),
+        migrations.AddField(
+            model_name='movimientoinventariohistorico',
+            name='almacen_destino',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='erp.almacen'),
+        ),
+        migrations.AddField(
+            model_name='movimientoinventariohistorico',
+            name='created_by',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='movimientoinventariohistorico',
+            name='updated_by',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='productosmovimientohistorico',
+            name='created_by',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='productosmovimientohistorico',
+            name='lote',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='inventario.loteinventario'),
+        ),
+        migrations.AddField(
+            model_name='productosmovimientohistorico',
+            name='movimiento',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='productosMovimiento', to='inventario.movimientoinventariohistorico'),
+        ),
+        migrations.AddField(
+            model_name='productosmovimientohistorico',
+            name='producto',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='erp.producto'),
+        ),
+        migrations.AddField(
+            model_name='productosmovimientohistorico',
+            name='updated_by',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='saldoinventariocierre',
+            name='almacen',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_cierre', to='erp.almacen'),
+        ),
+        migrations.AddField(
+            model_name='saldoinventariocierre',
+            name='producto',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_cierre', to='erp.producto'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinventariohistorico',
+            index=models.Index(fields=['created_at', 'id'], name='inventario__created_8a5874_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinventariohistorico',
+            index=models.Index(fields=['almacen', 'created_at', 'id'], name='inventario__almacen_8618d9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinventariohistorico',
+            index=models.Index(fields=['almacen_destino', 'created_at', 'id'], name='inventario__almacen_6b583d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productosmovimientohistorico',
+            index=models.Index(fields=['fecha_movimiento', 'movimiento'], name='inventario__fecha_m_4c0b0c_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='saldoinventariocierre',
+            constraint=models.UniqueConstraint(fields=('mes', 'almacen', 'producto'), name='inventario_saldo_cierre_unico'),
+        ),
+        # Las tablas son nuevas (vacías); al revertir se eliminan con los modelos
+        migrations.RunPython(particionar_historial, migrations.RunPython.noop),
+    ]
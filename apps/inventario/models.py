@@ -127,22 +127,30 @@ class LoteInventario(BaseModel):
         if self.cantidad > 0 and self.status_model != self.STATUS_MODEL_ACTIVE:
             self.status_model = self.STATUS_MODEL_ACTIVE
         # Por ejemplo, podrías validar o modificar campos antes de guardar
-        if not self.fecha_vencimiento:
-            dias = getattr(self.producto, "dias_caducidad", None)
-            try:
-                dias = int(dias) if dias is not None else 0
-            except (TypeError, ValueError):
-                dias = 0
-
-            if 0 < dias <= 36500:
-                try:
-                    self.fecha_vencimiento = (self.created_at or timezone.now()) + timezone.timedelta(days=dias)
-                except OverflowError:
-                    self.fecha_vencimiento = None
-            else:
-                self.fecha_vencimiento = None
+        self.asignar_fecha_vencimiento()
         
         super().save(*args, **kwargs)
+
+    def asignar_fecha_vencimiento(self):
+        """
+        Calcula la fecha de vencimiento con los días de caducidad del producto.
+        Se usa también antes de un bulk_create, donde save() no se ejecuta.
+        """
+        if self.fecha_vencimiento:
+            return
+        dias = getattr(self.producto, "dias_caducidad", None)
+        try:
+            dias = int(dias) if dias is not None else 0
+        except (TypeError, ValueError):
+            dias = 0
+
+        if 0 < dias <= 36500:
+            try:
+                self.fecha_vencimiento = (self.created_at or timezone.now()) + timezone.timedelta(days=dias)
+            except OverflowError:
+                self.fecha_vencimiento = None
+        else:
+            self.fecha_vencimiento = None
        
     
 
@@ -233,6 +241,14 @@ class MovimientoInventario(BaseModel):
     fase = models.CharField(max_length=20, choices=FASES, default=FASE_PROCESO)
     alert_cantidad = models.BooleanField(default=False, help_text="Indica si la cantidad es menor a la que salió del traspaso")
     tipo_alerta = models.CharField(max_length=10, choices=TIPO_ALERTA, null=True, blank=True, help_text="Tipo de alerta para el movimiento")
+
+    class Meta:
+        #PAGINACIÓN POR CURSOR (created_at, id)
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['almacen', 'created_at', 'id']),
+            models.Index(fields=['almacen_destino', 'created_at', 'id']),
+        ]
     
     @property
     def folio(self):
@@ -281,6 +297,10 @@ class ProductosMovimiento(BaseModel):
     class Meta:
         verbose_name = "Producto en Movimiento"
         verbose_name_plural = "Productos en Movimientos"
+        #CIERRE MENSUAL DE SALDOS (apps/inventario/helpers/historial.py)
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
 
     def save(self, *args, **kwargs):
         with transaction.atomic():
@@ -316,6 +336,119 @@ class ProductosMovimiento(BaseModel):
 
 
 
+"""
+==============================================================================
+      HISTORIAL DE MOVIMIENTOS Y SALDOS DE CIERRE (apps/inventario/helpers/historial.py)
+==============================================================================
+Los movimientos terminados de meses ya cerrados se mueven a estas tablas (particionadas
+por mes en PostgreSQL). Conservan el id original; las llaves foráneas no tienen restricción
+en la base de datos para que la tabla se pueda particionar y los catálogos se puedan depurar.
+"""
+class MovimientoInventarioHistorico(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    status_model = models.CharField(max_length=10, choices=BaseModel.STATUS_CHOICES, default=BaseModel.STATUS_MODEL_ACTIVE)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(Usuario, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+')
+    updated_by = models.ForeignKey(Usuario, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+')
+    almacen = models.ForeignKey(Almacen, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+')
+    almacen_destino = models.ForeignKey(Almacen, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+')
+    tipo = models.CharField(max_length=20, choices=MovimientoInventario.TIPO_MOVIMIENTO)
+    movimiento = models.CharField(max_length=30, choices=MovimientoInventario.ENTRADAS_CHOICES + MovimientoInventario.SALIDAS_CHOICES + MovimientoInventario.AJUSTE_CHOICES)
+    cantidad = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    costo_unitario = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    referencia = models.CharField(max_length=150, null=True, blank=True)
+    detalle_nota = models.CharField(max_length=255, null=True, blank=True)
+    nota = models.TextField(null=True, blank=True)
+    fase = models.CharField(max_length=20, choices=MovimientoInventario.FASES)
+    alert_cantidad = models.BooleanField(default=False)
+    tipo_alerta = models.CharField(max_length=10, choices=MovimientoInventario.TIPO_ALERTA, null=True, blank=True)
+    archivado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Movimiento de Inventario (Historial)"
+        verbose_name_plural = "Movimientos de Inventario (Historial)"
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['almacen', 'created_at', 'id']),
+            models.Index(fields=['almacen_destino', 'created_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} - {self.movimiento} ({self.cantidad})"
+
+
+class ProductosMovimientoHistorico(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    status_model = models.CharField(max_length=10, choices=BaseModel.STATUS_CHOICES, default=BaseModel.STATUS_MODEL_ACTIVE)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(Usuario, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+')
+    updated_by = models.ForeignKey(Usuario, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+')
+    movimiento = models.ForeignKey(MovimientoInventarioHistorico, on_delete=models.DO_NOTHING, db_constraint=False, related_name='productosMovimiento')
+    producto = models.ForeignKey(Producto, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+')
+    lote = models.ForeignKey(LoteInventario, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+')
+    cantidad = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    costo_unitario = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    costo_total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    # created_at del movimiento: llave de la partición, igual que en MovimientoInventarioHistorico
+    fecha_movimiento = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Producto en Movimiento (Historial)"
+        verbose_name_plural = "Productos en Movimientos (Historial)"
+        indexes = [
+            models.Index(fields=['fecha_movimiento', 'movimiento']),
+        ]
+
+    def __str__(self):
+        return f"{self.movimiento_id} - {self.producto_id} ({self.cantidad})"
+
+
+class CierreInventario(models.Model):
+    """
+    Mes cerrado: sus saldos están en SaldoInventarioCierre y no vuelven a cambiar.
+    archivado_en indica que sus movimientos ya se movieron al historial.
+    """
+    mes = models.DateField(unique=True, help_text="Primer día del mes (UTC)")
+    cerrado_en = models.DateTimeField(auto_now_add=True)
+    archivado_en = models.DateTimeField(null=True, blank=True)
+    movimientos_archivados = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Cierre de Inventario"
+        verbose_name_plural = "Cierres de Inventario"
+        ordering = ['-mes']
+
+    def __str__(self):
+        return f"Cierre {self.mes:%Y-%m}"
+
+
+class SaldoInventarioCierre(models.Model):
+    """
+    Existencia neta (entradas - salidas de los lotes) por almacén y producto al terminar el mes.
+    Cada cierre arrastra el saldo anterior, así una existencia a una fecha solo suma los
+    movimientos posteriores al último cierre.
+    """
+    mes = models.DateField(help_text="Primer día del mes (UTC)")
+    almacen = models.ForeignKey(Almacen, on_delete=models.CASCADE, related_name='saldos_cierre')
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='saldos_cierre')
+    cantidad = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    valor = models.DecimalField(max_digits=25, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Saldo de Cierre"
+        verbose_name_plural = "Saldos de Cierre"
+        constraints = [
+            models.UniqueConstraint(fields=['mes', 'almacen', 'producto'], name='inventario_saldo_cierre_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.mes:%Y-%m} {self.almacen_id}/{self.producto_id}: {self.cantidad}"
+
+
+
+
 class EmbarqueReparto(BaseModel):
     FASE_CARGA = 'CARGA'
     FASE_REPARTO = 'REPARTO'
@@ -370,6 +503,27 @@ class LoteProductoEmbarque(BaseModel):
     producto_embarque = models.ForeignKey(ProductoEmbarque, on_delete=models.CASCADE, related_name='lotes')
     lote = models.ForeignKey(LoteInventario, on_delete=models.CASCADE, related_name='lotes_embarque')
     cantidad = models.DecimalField(max_digits=20, decimal_places=2, default=0)   
+
+
+class EntregaReparto(BaseModel):
+    """
+    Registro de una entrega realizada en ruta. La clave la genera el dispositivo
+    del chofer y permite reintentar el envío sin duplicar movimientos.
+    """
+    clave = models.CharField(max_length=100, unique=True, help_text="Clave única de la entrega generada por el dispositivo")
+    embarque = models.ForeignKey(EmbarqueReparto, on_delete=models.CASCADE, related_name='entregas')
+    venta = models.ForeignKey('erp.Venta', on_delete=models.CASCADE, related_name='entregas_reparto')
+    movimiento = models.ForeignKey(MovimientoInventario, on_delete=models.SET_NULL, null=True, blank=True, related_name='entregas_reparto')
+
+    class Meta:
+        verbose_name = "Entrega de Reparto"
+        verbose_name_plural = "Entregas de Reparto"
+        indexes = [
+            models.Index(fields=['embarque', 'venta']),
+        ]
+
+    def __str__(self):
+        return f"Entrega {self.clave} - Venta {self.venta_id}"
  
 
 
@@ -475,3 +629,51 @@ class Transformacion(BaseModel):
 
     
     
+
+
+
+
+"""
+============================================================================================
+                            MODELO DE LIQUIDACION DE EMBARQUE
+============================================================================================
+"""
+class LiquidacionEmbarque(BaseModel):
+    """
+    Cifras de cierre de un embarque de reparto calculadas al finalizar la ruta.
+    Se guardan para que las consultas y reimpresiones lean los totales almacenados
+    en lugar de recalcularlos.
+    """
+    embarque = models.OneToOneField(EmbarqueReparto, on_delete=models.CASCADE, related_name='liquidacion')
+    apertura_caja = models.ForeignKey('erp.CajaApertura', on_delete=models.SET_NULL, null=True, blank=True, related_name='liquidaciones_embarque')
+    fecha_cierre = models.DateTimeField(default=timezone.now)
+
+    # Cantidades de producto
+    cantidad_cargada = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    cantidad_entregada = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    cantidad_devuelta = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    # Ventas
+    cantidad_ventas = models.PositiveIntegerField(default=0)
+    total_ventas = models.DecimalField(max_digits=25, decimal_places=2, default=0)
+    total_cobrado_ventas = models.DecimalField(max_digits=25, decimal_places=2, default=0)
+    total_credito = models.DecimalField(max_digits=25, decimal_places=2, default=0, help_text="Crédito otorgado a clientes durante el reparto")
+
+    # Caja
+    monto_inicial = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_entradas = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_salidas = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    total_gastos = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    # Desgloses
+    metodos_pago = models.JSONField(default=list, blank=True, help_text="Totales de caja por método de pago")
+    productos = models.JSONField(default=list, blank=True, help_text="Cargado / entregado / devuelto por producto")
+
+    class Meta:
+        verbose_name = "Liquidación de Embarque"
+        verbose_name_plural = "Liquidaciones de Embarque"
+        ordering = ['-fecha_cierre']
+
+    def __str__(self):
+        return f"Liquidación embarque {self.embarque_id} ({self.fecha_cierre:%Y-%m-%d})"
@@ -2,7 +2,7 @@ from rest_framework import serializers
 from apps.erp.models import Producto, Almacen
 from apps.inventario.models import (MovimientoInventario, LoteInventario, SolicitudTraspaso)
 #from ..helpers.movimientoSalida import movimento_inventario
-from apps.base.serializer import FlexiblePKRelatedField
+from apps.base.serializer import FlexiblePKRelatedField, CamposDinamicosMixin
 
 
 #SERIALIZERS SOLO PARA VISUALIZAR MOVIMIENTOS PRINCIPALES
@@ -40,7 +40,7 @@ class MovimientoPrincipalSerializer(serializers.Serializer):
 
 
 
-class MovimimientosMiniSerializer(serializers.ModelSerializer):
+class MovimimientosMiniSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     almacen_origen = serializers.SerializerMethodField()
     almacen_destino = serializers.SerializerMethodField()
     folio = serializers.SerializerMethodField()
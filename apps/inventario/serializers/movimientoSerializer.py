@@ -173,6 +173,12 @@ class MovimientoSalidaSerializer(serializers.Serializer):
     #)
     tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
 
+    dry_run = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Si es verdadero no se guarda nada y se regresa la lista de lotes que se tomarían"
+    )
+
     productos = ProductosMovimientoLoteSerializer(
         many=True,
         required=True,
@@ -266,15 +272,41 @@ class MovimientoSalidaSerializer(serializers.Serializer):
         productos = validated_data['productos']
         lista_productos = productos
 
+        if validated_data.get('dry_run'):
+            try:
+                plan = movimento_inventario(detalle_lotes=lista_productos, dry_run=True)
+            except ValueError as e:
+                raise serializers.ValidationError({'detail': str(e)})
+            return {
+                'dry_run': True,
+                'almacen_origen': almacen_origen.id,
+                'almacen_destino': almacen_destino.id if almacen_destino else None,
+                'lotes': [
+                    {
+                        'producto': item['producto'].id,
+                        'producto_nombre': item['producto'].nombre,
+                        'lote': item['lote'].id,
+                        'cantidad': item['cantidad'],
+                        'cantidad_disponible': item['cantidad_disponible'],
+                        'cantidad_restante': item['cantidad_restante'],
+                        'costo_unitario': item['costo_unitario'],
+                    }
+                    for item in plan
+                ],
+            }
+
         # Guardar el movimiento
-        movimiento = movimento_inventario(
-            detalle_lotes=lista_productos,
-            almacen_salida=almacen_origen,
-            almacen_destino=almacen_destino,
-            nota=nota,
-            sub_movimiento=sub_movimiento,
-            user=user
-        )
+        try:
+            movimiento = movimento_inventario(
+                detalle_lotes=lista_productos,
+                almacen_salida=almacen_origen,
+                almacen_destino=almacen_destino,
+                nota=nota,
+                sub_movimiento=sub_movimiento,
+                user=user
+            )
+        except ValueError as e:
+            raise serializers.ValidationError({'detail': str(e)})
 
         # Retornar el serializer de detalle
         #return movimiento  cuando usas mixins
@@ -137,6 +137,48 @@ class TransformacionCreateSerializer(serializers.Serializer):
         )
         
         return movimiento
+
+
+class TransformacionLoteSerializer(serializers.Serializer):
+    """
+    Serializer para procesar varias transformaciones o mermas en una sola operación
+    """
+    transformaciones = TransformacionCreateSerializer(
+        many=True,
+        min_length=1,
+        max_length=200,
+        help_text="Lista de transformaciones o mermas a procesar (todas o ninguna)"
+    )
+
+    def create(self, validated_data):
+        from apps.inventario.helpers.transformacion.movimientos_transformacion import (
+            procesar_transformaciones
+        )
+
+        usuario = self.context['request'].user if 'request' in self.context else None
+        transformaciones = []
+        for datos in validated_data.get('transformaciones', []):
+            transformaciones.append({
+                'almacen': datos.get('almacen', None) or getattr(usuario, 'almacen', None),
+                'tipo': datos.get('tipo'),
+                'productos_entrada': datos.get('productos_entrada', []),
+                'productos_salida': datos.get('productos_salida', []),
+                'nota': datos.get('nota', ''),
+            })
+        return procesar_transformaciones(transformaciones, usuario=usuario)
+
+
+class RendimientoTransformacionSerializer(serializers.Serializer):
+    """
+    Rendimiento de una transformación procesada en lote
+    """
+    transformacion_id = serializers.IntegerField(source='transformacion.id', read_only=True)
+    referencia = serializers.CharField(source='transformacion.referencia', read_only=True)
+    tipo = serializers.CharField(source='transformacion.tipo', read_only=True)
+    cantidad_entrada = serializers.DecimalField(max_digits=20, decimal_places=4, read_only=True)
+    cantidad_salida = serializers.DecimalField(max_digits=20, decimal_places=4, read_only=True)
+    merma = serializers.DecimalField(max_digits=20, decimal_places=4, read_only=True)
+    rendimiento = serializers.DecimalField(max_digits=7, decimal_places=2, read_only=True, help_text="Porcentaje de la entrada que se convirtió en producto nuevo")
     
     
 #=============================================
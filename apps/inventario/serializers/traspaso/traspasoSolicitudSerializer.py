@@ -245,3 +245,19 @@ class AprobarRechazarSolicitudSerializer(serializers.Serializer):
         max_length=500,
         help_text="Nota opcional para justificar la aprobación o rechazo"
     )
+
+
+class AprobarRechazarSolicitudesLoteSerializer(AprobarRechazarSolicitudSerializer):
+    """
+    Serializer para aprobar o rechazar varias solicitudes en una sola llamada
+    """
+    solicitudes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=500,
+        help_text="IDs de las solicitudes a procesar"
+    )
+
+    def validate_solicitudes(self, value):
+        """Quitar IDs repetidos conservando el orden"""
+        return list(dict.fromkeys(value))
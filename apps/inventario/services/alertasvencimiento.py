@@ -1,8 +1,9 @@
 from datetime import date, timedelta
-from django.db.models import Q
+from django.utils import timezone
+from apps.base.tareas import encolar
 from apps.inventario.models import Producto
+from apps.inventario.helpers.solicitudes import usuario_compras_id
 from apps.erp.models import Notificacion
-from apps.usuarios.models import Usuario
 
 
 def evaluar_vencimiento(fecha_vencimiento, dias_alerta=3):
@@ -17,58 +18,70 @@ def evaluar_vencimiento(fecha_vencimiento, dias_alerta=3):
     return "vigente", dias_restantes
 
 
-def productos_por_vencer(dias_alerta=3):
-    productos = Producto.objects.exclude(horas_caducidad=None)
-
-    resultado = []
-
-    # 🔔 usuario que recibirá la notificación (MISMO PATRÓN QUE YA USAS)
-    usuario_compras = Usuario.objects.filter(
-        is_active=True
-    ).filter(
-        Q(groups__name__in=['Compras']) |
-        Q(user_permissions__codename='can_create_orden_compra')
-    ).first()
-
-    user_id = usuario_compras.id if usuario_compras else 1
-
+def _productos_con_vencimiento(dias_alerta):
+    productos = Producto.objects.exclude(horas_caducidad=None).only('id', 'nombre', 'created_at', 'horas_caducidad')
     for producto in productos:
         fecha_vencimiento = (
             producto.created_at + timedelta(hours=producto.horas_caducidad)
         ).date()
-
-        estado, dias_restantes = evaluar_vencimiento(
-            fecha_vencimiento, dias_alerta
-        )
-
+        estado, dias_restantes = evaluar_vencimiento(fecha_vencimiento, dias_alerta)
         if estado != "vigente":
-            # 📌 evitar notificaciones duplicadas
-            existe_notificacion = Notificacion.objects.filter(
-                titulo="⚠️ Producto por vencer",
-                usuario_id=user_id,
-                mensaje__icontains=f"ID:{producto.id}"
-            ).exists()
-
-            if estado == "por_vencer" and not existe_notificacion:
-                Notificacion.objects.create(
-                    tipo=Notificacion.TIPO_MENSAJE,
-                    titulo="⚠️ Producto por vencer",
-                    mensaje=(
-                        f"ID:{producto.id}\n"
-                        f"Producto: {producto.nombre}\n"
-                        f"Fecha de vencimiento: {fecha_vencimiento}\n"
-                        f"Días restantes: {dias_restantes}\n\n"
-                        "Por favor, revisa el inventario."
-                    ),
-                    usuario_id=user_id
-                )
+            yield producto, fecha_vencimiento, estado, dias_restantes
 
-            resultado.append({
-                "id": producto.id,
-                "nombre": producto.nombre,
-                "fecha_vencimiento": fecha_vencimiento,
-                "estado": estado,
-                "dias_restantes": dias_restantes,
-            })
 
+def productos_por_vencer(dias_alerta=3):
+    """
+    Productos vencidos o por vencer. Las notificaciones se crean en segundo plano
+    (tarea inventario.notificar_productos_por_vencer, una vez por hora como máximo).
+    """
+    resultado = [
+        {
+            "id": producto.id,
+            "nombre": producto.nombre,
+            "fecha_vencimiento": fecha_vencimiento,
+            "estado": estado,
+            "dias_restantes": dias_restantes,
+        }
+        for producto, fecha_vencimiento, estado, dias_restantes in _productos_con_vencimiento(dias_alerta)
+    ]
+    if any(producto["estado"] == "por_vencer" for producto in resultado):
+        encolar(
+            'inventario.notificar_productos_por_vencer', {'dias_alerta': dias_alerta},
+            clave=f"productos_por_vencer:{dias_alerta}:{timezone.now():%Y%m%d%H}"
+        )
     return resultado
+
+
+def notificar_productos_por_vencer(dias=3):
+    """
+    Notifica al usuario de compras los productos por vencer que aún no tengan notificación.
+    Retorna cuántas notificaciones se crearon.
+    """
+    # 🔔 usuario que recibirá la notificación (MISMO PATRÓN QUE YA USAS)
+    user_id = usuario_compras_id()
+    total = 0
+    for producto, fecha_vencimiento, estado, dias_restantes in _productos_con_vencimiento(dias):
+        if estado != "por_vencer":
+            continue
+        # 📌 evitar notificaciones duplicadas
+        existe_notificacion = Notificacion.objects.filter(
+            titulo="⚠️ Producto por vencer",
+            usuario_id=user_id,
+            mensaje__icontains=f"ID:{producto.id}"
+        ).exists()
+        if existe_notificacion:
+            continue
+        Notificacion.objects.create(
+            tipo=Notificacion.TIPO_MENSAJE,
+            titulo="⚠️ Producto por vencer",
+            mensaje=(
+                f"ID:{producto.id}\n"
+                f"Producto: {producto.nombre}\n"
+                f"Fecha de vencimiento: {fecha_vencimiento}\n"
+                f"Días restantes: {dias_restantes}\n\n"
+                "Por favor, revisa el inventario."
+            ),
+            usuario_id=user_id
+        )
+        total += 1
+    return total
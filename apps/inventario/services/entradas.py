@@ -3,8 +3,10 @@ from django.utils import timezone
 from datetime import timedelta 
 from decimal import Decimal
 
-from apps.erp.models import Compra, CompraDetalle, OrdenCompra, Almacen,Insidencia, InsidenciaLote, Producto
-from apps.inventario.models import LoteInventario, MovimientoInventario, ProductosMovimiento
+from apps.erp.models import Compra, CompraDetalle, OrdenCompra, Almacen,Insidencia, InsidenciaLote, Producto, CambioSync
+from apps.erp.helpers.sync_ruta import registrar_cambios
+from apps.inventario.models import LoteInventario, MovimientoInventario, ProductosMovimiento, Rack
+from apps.base.versiones import marcar_cambio_inventario
 
 
 class AbastecimientoService:
@@ -131,30 +133,69 @@ class AbastecimientoService:
             #updated_by=user
         )
 
+    @staticmethod
+    def _mapa_productos(items):
+        """
+        Obtiene en una sola consulta los productos de los items que vienen como ID.
+        Retorna {producto_id: Producto}
+        """
+        productos = {}
+        ids_pendientes = set()
+        for item in items:
+            producto_value = item["producto"]
+            if isinstance(producto_value, Producto):
+                productos[producto_value.id] = producto_value
+            else:
+                ids_pendientes.add(producto_value)
+
+        ids_pendientes -= set(productos)
+        if ids_pendientes:
+            productos.update(
+                Producto.objects.filter(
+                    id__in=ids_pendientes,
+                    status_model=Producto.STATUS_MODEL_ACTIVE
+                ).in_bulk()
+            )
+            for producto_id in ids_pendientes:
+                if producto_id not in productos:
+                    raise ValueError(f"Producto con ID {producto_id} no encontrado o inactivo")
+        return productos
+
+    @staticmethod
+    def _mapa_detalles_compra(compra_id, productos_ids):
+        """
+        Obtiene en una sola consulta las líneas de la compra de los productos recibidos.
+        Retorna {producto_id: CompraDetalle} (la primera línea de cada producto)
+        """
+        detalles = {}
+        for detalle in CompraDetalle.objects.filter(
+            compra_id=compra_id,
+            producto_id__in=productos_ids
+        ).only("id", "producto_id", "cantidad", "precio_unitario", "existe_diferencia", "cantidad_entrada").order_by("id"):
+            detalles.setdefault(detalle.producto_id, detalle)
+        return detalles
+
     @staticmethod
     def procesar_items_abastecimiento(items, movimiento_principal, almacen_destino, compra_id, user):
         """
-        Procesa cada item del abastecimiento creando lotes y productos_movimiento
+        Procesa los items del abastecimiento creando lotes y productos_movimiento.
+        Productos y líneas de compra se obtienen con una consulta cada uno y
+        lotes y productos_movimiento se crean con bulk_create.
         """
         lotes_creados = []
+        productos_movimiento = []
         productos_abastecidos = []
         costo_total_abastecimiento = Decimal("0.00")
+        recibidos = {}
 
-        for item in items:
-            now = timezone.now()
+        productos = AbastecimientoService._mapa_productos(items)
+        detalles = AbastecimientoService._mapa_detalles_compra(compra_id, productos.keys())
+        now = timezone.now()
 
+        for item in items:
             producto_value = item["producto"]
-            if isinstance(producto_value, Producto):
-                producto = producto_value
-                producto_id = producto.id
-            else:
-                producto_id = producto_value
-                producto = Producto.objects.filter(
-                    id=producto_id,
-                    status_model=Producto.STATUS_MODEL_ACTIVE
-                ).first()
-                if not producto:
-                    raise ValueError(f"Producto con ID {producto_id} no encontrado o inactivo")
+            producto_id = producto_value.id if isinstance(producto_value, Producto) else producto_value
+            producto = productos[producto_id]
 
             # Validación ubicación rack (CEDIS)
             ubicacion_rack = item.get("ubicacion_rack")
@@ -171,35 +212,35 @@ class AbastecimientoService:
                 cantidad = Decimal(str(cantidad))
 
             # Costo unitario desde CompraDetalle
-            detalle = CompraDetalle.objects.filter(
-                compra_id=compra_id,
-                producto_id=producto_id
-            ).only("precio_unitario").first()
-
+            detalle = detalles.get(producto_id)
             costo_unitario = detalle.precio_unitario if detalle else Decimal("0.00")
             item["costo_unitario"] = costo_unitario  # para tu procesar_entrada()
 
             costo_total_item = cantidad * costo_unitario
+            recibidos[producto_id] = recibidos.get(producto_id, Decimal("0.00")) + cantidad
 
             # Caducidad por horas
             horas = int(getattr(producto, "horas_caducidad", 0) or 0)
             fecha_vencimiento = (now + timedelta(hours=horas)) if horas > 0 else None
 
-            # Crear lote
-            lote = LoteInventario.objects.create(
+            # bulk_create no ejecuta ProductosMovimiento.save(), el lote nace con la cantidad recibida
+            lote = LoteInventario(
                 producto=producto,
                 almacen=almacen_destino,
                 ubicacion=ubicacion_rack,
-                cantidad=Decimal("0.00"),
+                cantidad=cantidad,
                 costo_unitario=costo_unitario,
                 fecha_ingreso=now,
                 fecha_vencimiento=fecha_vencimiento,
+                status_model=(
+                    LoteInventario.STATUS_MODEL_ACTIVE if cantidad > 0 else LoteInventario.STATUS_MODEL_INACTIVE
+                ),
                 created_by=user,
                 updated_by=user,
             )
+            lotes_creados.append(lote)
 
-            # Crear producto-movimiento
-            ProductosMovimiento.objects.create(
+            productos_movimiento.append(ProductosMovimiento(
                 movimiento=movimiento_principal,
                 producto=producto,
                 lote=lote,
@@ -207,11 +248,21 @@ class AbastecimientoService:
                 costo_unitario=costo_unitario,
                 costo_total=costo_total_item,
                 created_by=user,
-            )
-
-            lotes_creados.append(lote)
+            ))
             costo_total_abastecimiento += costo_total_item
 
+        LoteInventario.objects.bulk_create(lotes_creados, batch_size=500)
+        marcar_cambio_inventario(lotes_creados)
+        ProductosMovimiento.objects.bulk_create(productos_movimiento, batch_size=500)
+        AbastecimientoService.actualizar_detalles_compra(detalles, recibidos)
+
+        # Nombre de las ubicaciones (rack -> zona -> piso) en una sola consulta
+        racks = Rack.objects.select_related('zona__piso').in_bulk(
+            {lote.ubicacion_id for lote in lotes_creados if lote.ubicacion_id}
+        )
+        for lote, item_movimiento in zip(lotes_creados, productos_movimiento):
+            producto = lote.producto
+            ubicacion = racks.get(lote.ubicacion_id)
             productos_abastecidos.append({
                 "producto": {
                     "id": producto.id,
@@ -219,14 +270,34 @@ class AbastecimientoService:
                     "codigo": producto.codigo or "Sin código",
                 },
                 "lote_id": lote.id,
-                "cantidad": float(cantidad),
-                "costo_unitario": float(costo_unitario),
-                "costo_total": float(costo_total_item),
-                "ubicacion": str(lote.ubicacion) if lote.ubicacion else "Sin asignar",
+                "cantidad": float(item_movimiento.cantidad),
+                "costo_unitario": float(item_movimiento.costo_unitario),
+                "costo_total": float(item_movimiento.costo_total),
+                "ubicacion": str(ubicacion) if ubicacion else "Sin asignar",
             })
 
         return lotes_creados, productos_abastecidos, costo_total_abastecimiento
 
+    @staticmethod
+    def actualizar_detalles_compra(detalles, recibidos):
+        """
+        Registra en las líneas de la compra la cantidad recibida y si hubo diferencia,
+        con un solo bulk_update
+        """
+        actualizados = []
+        for producto_id, cantidad in recibidos.items():
+            detalle = detalles.get(producto_id)
+            if detalle is None:
+                continue
+            detalle.cantidad_entrada = cantidad
+            detalle.existe_diferencia = detalle.cantidad != cantidad
+            actualizados.append(detalle)
+        if actualizados:
+            CompraDetalle.objects.bulk_update(actualizados, ['cantidad_entrada', 'existe_diferencia'], batch_size=500)
+            # El promedio de precios usa cantidad_entrada
+            registrar_cambios(CambioSync.ENTIDAD_PRECIO, [detalle.producto_id for detalle in actualizados])
+        return actualizados
+
     @staticmethod
     def actualizar_movimiento_principal(movimiento_principal, items, costo_total_abastecimiento):
         """
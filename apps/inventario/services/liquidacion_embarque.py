@@ -0,0 +1,215 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum, Count, Q, F, Value, DecimalField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.erp.models import Venta, VentaDetalle, CajaTransaccion
+from apps.inventario.models import EmbarqueReparto, ProductoEmbarque, LiquidacionEmbarque
+
+
+CERO = Value(Decimal('0.00'), output_field=DecimalField(max_digits=25, decimal_places=5))
+
+
+def _suma(campo, **kwargs):
+    """
+    Sum(...) que regresa 0 en lugar de NULL cuando no hay registros
+    """
+    return Coalesce(Sum(campo, **kwargs), CERO, output_field=DecimalField(max_digits=25, decimal_places=5))
+
+
+def _redondear(valor):
+    return round(float(valor or 0), 2)
+
+
+class LiquidacionEmbarqueService:
+    """
+    Servicio para calcular y guardar la liquidación (cierre) de un embarque de reparto.
+    Todos los totales se calculan con agregaciones en base de datos.
+    """
+
+    @staticmethod
+    def ventas_periodo(embarque):
+        """
+        Ventas realizadas por el usuario de la caja del embarque durante el reparto
+        """
+        if not embarque.apertura_caja_id:
+            return Venta.objects.none()
+
+        fecha_fin = embarque.fecha_finalizada if embarque.fecha_finalizada else timezone.now()
+        return Venta.objects.filter(
+            created_by_id=embarque.apertura_caja.usuario_id,
+            created_at__gte=embarque.created_at,
+            created_at__lte=fecha_fin,
+            status_model=Venta.STATUS_MODEL_ACTIVE
+        ).exclude(
+            fase=Venta.FASE_CANCELADA
+        )
+
+    @staticmethod
+    def totales_ventas(ventas_queryset):
+        """
+        Total vendido, total cobrado y número de ventas en una sola consulta
+        """
+        return ventas_queryset.order_by().aggregate(
+            total_ventas=_suma('total'),
+            total_cobrado_ventas=_suma('total_pagado'),
+            cantidad_ventas=Count('id'),
+        )
+
+    @staticmethod
+    def calcular_productos(embarque):
+        """
+        Cantidades cargadas, entregadas y devueltas por producto.
+        Los pedidos se toman de los detalles de las preventas del embarque
+        y la tara de los productos del embarque de tipo TARA.
+        """
+        pedidos = VentaDetalle.objects.filter(
+            venta__embarques_ruta=embarque
+        ).values(
+            'producto_id', 'producto__nombre'
+        ).annotate(
+            cargado=_suma('cantidad_cargada'),
+            entregado=_suma('cantidad_entregada'),
+        ).annotate(
+            devuelto=F('cargado') - F('entregado')
+        ).order_by('producto__nombre')
+
+        tara = ProductoEmbarque.objects.filter(
+            embarque=embarque,
+            tipo=ProductoEmbarque.TARA
+        ).values(
+            'producto_id', 'producto__nombre'
+        ).annotate(
+            cargado=_suma('cantidad'),
+            entregado=_suma('cantidad_entregada'),
+        ).annotate(
+            devuelto=F('cargado') - F('entregado')
+        ).order_by('producto__nombre')
+
+        productos = []
+        for tipo, filas in ((ProductoEmbarque.PEDIDO, pedidos), (ProductoEmbarque.TARA, tara)):
+            for fila in filas:
+                productos.append({
+                    'tipo': tipo,
+                    'producto_id': fila['producto_id'],
+                    'producto_nombre': fila['producto__nombre'],
+                    'cargado': _redondear(fila['cargado']),
+                    'entregado': _redondear(fila['entregado']),
+                    'devuelto': _redondear(fila['devuelto']),
+                })
+        return productos
+
+    @staticmethod
+    def calcular_caja(apertura_caja):
+        """
+        Totales de la caja del embarque y su desglose por método de pago
+        """
+        vacio = {
+            'monto_inicial': Decimal('0.00'),
+            'total_entradas': Decimal('0.00'),
+            'total_salidas': Decimal('0.00'),
+            'total_gastos': Decimal('0.00'),
+            'balance': Decimal('0.00'),
+            'metodos_pago': [],
+        }
+        if apertura_caja is None:
+            return vacio
+
+        transacciones = CajaTransaccion.objects.filter(
+            caja_apertura=apertura_caja,
+            status_model=CajaTransaccion.STATUS_MODEL_ACTIVE
+        )
+        filtros = {
+            'entradas': Q(tipo=CajaTransaccion.TIPO_ENTRADA),
+            'salidas': Q(tipo=CajaTransaccion.TIPO_SALIDA),
+            'gastos': Q(tipo=CajaTransaccion.TIPO_GASTO),
+        }
+        totales = transacciones.order_by().aggregate(
+            **{nombre: _suma('monto', filter=filtro) for nombre, filtro in filtros.items()}
+        )
+        por_metodo = transacciones.values(
+            'metodo_pago_id', 'metodo_pago__nombre'
+        ).annotate(
+            **{nombre: _suma('monto', filter=filtro) for nombre, filtro in filtros.items()}
+        ).order_by('metodo_pago__nombre')
+
+        monto_inicial = apertura_caja.monto_inicial or Decimal('0.00')
+        vacio.update({
+            'monto_inicial': monto_inicial,
+            'total_entradas': totales['entradas'],
+            'total_salidas': totales['salidas'],
+            'total_gastos': totales['gastos'],
+            'balance': monto_inicial + totales['entradas'] - totales['salidas'] - totales['gastos'],
+            'metodos_pago': [
+                {
+                    'metodo_pago_id': fila['metodo_pago_id'],
+                    'metodo_pago_nombre': fila['metodo_pago__nombre'],
+                    'entradas': _redondear(fila['entradas']),
+                    'salidas': _redondear(fila['salidas']),
+                    'gastos': _redondear(fila['gastos']),
+                    'neto': _redondear(fila['entradas'] - fila['salidas'] - fila['gastos']),
+                }
+                for fila in por_metodo
+            ],
+        })
+        return vacio
+
+    @staticmethod
+    def calcular_credito(embarque, ventas_queryset):
+        """
+        Crédito otorgado a clientes por las ventas del periodo y las preventas del embarque
+        """
+        from apps.credito.models import CreditoCliente
+
+        return CreditoCliente.objects.filter(
+            Q(venta_id__in=ventas_queryset.values('id')) |
+            Q(venta_id__in=embarque.ventas.values('id'))
+        ).exclude(
+            status_model=CreditoCliente.STATUS_MODEL_DELETE
+        ).order_by().aggregate(total=_suma('monto'))['total']
+
+    @staticmethod
+    def calcular(embarque):
+        """
+        Calcula todas las cifras de liquidación del embarque sin guardarlas
+        """
+        ventas = LiquidacionEmbarqueService.ventas_periodo(embarque)
+        totales_ventas = LiquidacionEmbarqueService.totales_ventas(ventas)
+        productos = LiquidacionEmbarqueService.calcular_productos(embarque)
+        caja = LiquidacionEmbarqueService.calcular_caja(embarque.apertura_caja)
+
+        return {
+            'apertura_caja': embarque.apertura_caja,
+            'cantidad_cargada': sum(Decimal(str(p['cargado'])) for p in productos),
+            'cantidad_entregada': sum(Decimal(str(p['entregado'])) for p in productos),
+            'cantidad_devuelta': sum(Decimal(str(p['devuelto'])) for p in productos),
+            'cantidad_ventas': totales_ventas['cantidad_ventas'],
+            'total_ventas': totales_ventas['total_ventas'],
+            'total_cobrado_ventas': totales_ventas['total_cobrado_ventas'],
+            'total_credito': LiquidacionEmbarqueService.calcular_credito(embarque, ventas),
+            'productos': productos,
+            **caja,
+        }
+
+    @staticmethod
+    @transaction.atomic
+    def cerrar(embarque, usuario=None):
+        """
+        Calcula y guarda la liquidación del embarque. Si ya existía se recalcula.
+        """
+        embarque = EmbarqueReparto.objects.select_related('apertura_caja').get(pk=embarque.pk)
+        datos = LiquidacionEmbarqueService.calcular(embarque)
+        datos['fecha_cierre'] = embarque.fecha_finalizada or timezone.now()
+
+        liquidacion, created = LiquidacionEmbarque.objects.get_or_create(
+            embarque=embarque,
+            defaults={**datos, 'created_by': usuario}
+        )
+        if not created:
+            for campo, valor in datos.items():
+                setattr(liquidacion, campo, valor)
+            liquidacion.updated_by = usuario
+            liquidacion.save()
+        return liquidacion
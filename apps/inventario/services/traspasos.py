@@ -0,0 +1,273 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q, F, Value, Case, When, TextField
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from apps.base.eventos import emitir
+from apps.base.versiones import marcar_cambio_inventario
+from apps.inventario.eventos import solicitud_traspaso_aprobada, solicitud_traspaso_rechazada
+from apps.inventario.models import (
+    SolicitudTraspaso, SolicitudTraspasoDetalle, LoteInventario, MovimientoInventario, ProductosMovimiento
+)
+
+
+# Relaciones que usan el traspaso y la respuesta de aprobar/rechazar
+RELACIONES_SOLICITUD = ('almacen_surtidor', 'almacen_solicitante__encargado', 'created_by')
+
+
+def _agregar_nota(nota_actual, etiqueta, nota):
+    if not nota:
+        return nota_actual
+    if nota_actual:
+        return f"{nota_actual}\n\n[{etiqueta}] {nota}"
+    return f"[{etiqueta}] {nota}"
+
+
+class TraspasoSolicitudService:
+    """
+    Servicio para aprobar y rechazar solicitudes de traspaso entre almacenes.
+    Las operaciones trabajan por conjunto: varias solicitudes se procesan con
+    un número fijo de consultas sin importar cuántos productos incluyan.
+    """
+
+    @staticmethod
+    def _bloquear_pendientes(solicitudes_ids):
+        """
+        Bloquea las solicitudes y separa las que ya no están PENDIENTES
+        """
+        solicitudes = list(
+            SolicitudTraspaso.objects.select_for_update(of=('self',)).select_related(
+                *RELACIONES_SOLICITUD
+            ).filter(id__in=solicitudes_ids).order_by('id')
+        )
+        encontradas = {solicitud.id for solicitud in solicitudes}
+        faltantes = [solicitud_id for solicitud_id in solicitudes_ids if solicitud_id not in encontradas]
+        if faltantes:
+            raise ValueError(f"Solicitudes de traspaso no encontradas: {faltantes}")
+
+        pendientes = [s for s in solicitudes if s.estado == SolicitudTraspaso.PENDIENTE]
+        omitidas = [
+            {'id': s.id, 'estado': s.estado}
+            for s in solicitudes if s.estado != SolicitudTraspaso.PENDIENTE
+        ]
+        return pendientes, omitidas
+
+    @staticmethod
+    def _bloquear_lotes(detalles_por_solicitud, solicitudes):
+        """
+        Bloquea con una sola consulta ordenada los lotes que participan en los traspasos:
+        - Origen: lotes con existencia de los almacenes surtidores, en orden FIFO.
+        - Destino: primer lote existente de cada producto en el almacén solicitante.
+        Un mismo lote puede ser origen de una solicitud y destino de otra; se usa la misma instancia.
+        """
+        claves_origen = set()
+        claves_destino = set()
+        for solicitud in solicitudes:
+            for detalle in detalles_por_solicitud[solicitud.id]:
+                claves_origen.add((solicitud.almacen_surtidor_id, detalle.producto_id))
+                claves_destino.add((solicitud.almacen_solicitante_id, detalle.producto_id))
+
+        lotes_origen = defaultdict(list)
+        lotes_destino = {}
+        if not claves_origen:
+            return lotes_origen, lotes_destino
+
+        filtro = Q()
+        for almacen_id, producto_id in claves_origen:
+            filtro |= Q(almacen_id=almacen_id, producto_id=producto_id, cantidad__gt=0)
+        for almacen_id, producto_id in claves_destino:
+            filtro |= Q(almacen_id=almacen_id, producto_id=producto_id)
+
+        queryset = LoteInventario.objects.select_for_update().filter(filtro).order_by(
+            'almacen_id', 'producto_id', 'created_at', 'id'
+        )
+        for lote in queryset:
+            clave = (lote.almacen_id, lote.producto_id)
+            if clave in claves_origen and lote.cantidad > 0:
+                lotes_origen[clave].append(lote)
+            if clave in claves_destino:
+                actual = lotes_destino.get(clave)
+                if actual is None or (lote.fecha_ingreso, lote.id) < (actual.fecha_ingreso, actual.id):
+                    lotes_destino[clave] = lote
+        return lotes_origen, lotes_destino
+
+    @staticmethod
+    def _tomar_fifo(lotes, detalle, solicitud):
+        """
+        Descuenta en memoria la cantidad del detalle de los lotes en orden FIFO
+        """
+        cantidad_restante = detalle.cantidad
+        tomados = []
+        for lote in lotes:
+            if cantidad_restante <= 0:
+                break
+            if lote.cantidad <= 0:
+                continue
+            tomar = min(lote.cantidad, cantidad_restante)
+            lote.cantidad -= tomar
+            cantidad_restante -= tomar
+            tomados.append((lote, tomar))
+
+        if cantidad_restante > 0:
+            raise ValueError(
+                f"No hay suficiente inventario total del siguiente producto: {detalle.producto.nombre} "
+                f"(solicitud {solicitud.id}, faltan {cantidad_restante})"
+            )
+        return tomados
+
+    @staticmethod
+    @transaction.atomic
+    def aprobar(solicitudes_ids, usuario, nota=''):
+        """
+        Aprueba un conjunto de solicitudes PENDIENTES y ejecuta sus traspasos.
+
+        - Todos los lotes origen se bloquean y planean con una sola consulta ordenada.
+        - Movimientos, productos del movimiento y lotes destino nuevos se crean en bloque.
+        - Si algún producto no tiene existencia suficiente no se aprueba ninguna solicitud.
+
+        Retorna {'aprobadas': [SolicitudTraspaso], 'omitidas': [{'id', 'estado'}]}.
+        """
+        solicitudes, omitidas = TraspasoSolicitudService._bloquear_pendientes(solicitudes_ids)
+        if not solicitudes:
+            return {'aprobadas': [], 'omitidas': omitidas}
+
+        detalles_por_solicitud = defaultdict(list)
+        detalles = SolicitudTraspasoDetalle.objects.select_related('producto').filter(
+            solicitud_id__in=[solicitud.id for solicitud in solicitudes],
+            producto__isnull=False
+        ).order_by('solicitud_id', 'id')
+        for detalle in detalles:
+            detalles_por_solicitud[detalle.solicitud_id].append(detalle)
+
+        lotes_origen, lotes_destino = TraspasoSolicitudService._bloquear_lotes(detalles_por_solicitud, solicitudes)
+
+        #PLANEAR EN MEMORIA
+        ahora = timezone.now()
+        movimientos = {}
+        lineas = []
+        lotes_destino_nuevos = []
+        for solicitud in solicitudes:
+            total_movimiento = Decimal('0.00')
+            for detalle in detalles_por_solicitud[solicitud.id]:
+                tomados = TraspasoSolicitudService._tomar_fifo(
+                    lotes_origen[(solicitud.almacen_surtidor_id, detalle.producto_id)], detalle, solicitud
+                )
+                lineas.extend((solicitud.id, lote, cantidad) for lote, cantidad in tomados)
+                total_transferido = sum(cantidad for _, cantidad in tomados)
+                total_movimiento += total_transferido
+
+                clave_destino = (solicitud.almacen_solicitante_id, detalle.producto_id)
+                lote_destino = lotes_destino.get(clave_destino)
+                if lote_destino is None:
+                    lote_destino = LoteInventario(
+                        producto=detalle.producto,
+                        almacen=solicitud.almacen_solicitante,
+                        cantidad=0,
+                        costo_unitario=tomados[-1][0].costo_unitario if tomados else 0,
+                        created_by=usuario
+                    )
+                    lotes_destino[clave_destino] = lote_destino
+                    lotes_destino_nuevos.append(lote_destino)
+                lote_destino.cantidad += total_transferido
+
+            movimientos[solicitud.id] = MovimientoInventario(
+                almacen=solicitud.almacen_surtidor,
+                almacen_destino=solicitud.almacen_solicitante,
+                tipo=MovimientoInventario.TIPO_SALIDA,
+                movimiento=MovimientoInventario.SALIDA_TRASPASO,
+                cantidad=total_movimiento,
+                created_by=usuario
+            )
+
+        #ESCRIBIR EN BLOQUE
+        MovimientoInventario.objects.bulk_create(movimientos.values())
+        # bulk_create no ejecuta MovimientoInventario.save(), se genera aquí el folio
+        for movimiento in movimientos.values():
+            movimiento.referencia = movimiento.generar_folio()
+        MovimientoInventario.objects.bulk_update(movimientos.values(), ['referencia'])
+
+        ProductosMovimiento.objects.bulk_create([
+            ProductosMovimiento(
+                movimiento=movimientos[solicitud_id],
+                producto_id=lote.producto_id,
+                lote=lote,
+                cantidad=cantidad,
+                costo_unitario=lote.costo_unitario,
+                costo_total=cantidad * lote.costo_unitario,
+                created_by=usuario
+            )
+            for solicitud_id, lote, cantidad in lineas
+        ])
+
+        # bulk_create no ejecuta ProductosMovimiento.save(), los lotes se ajustan aquí
+        lotes_afectados = {lote.id: lote for _, lote, _ in lineas}
+        lotes_afectados.update({lote.id: lote for lote in lotes_destino.values() if lote.id})
+        for lote in lotes_afectados.values():
+            lote.status_model = (
+                LoteInventario.STATUS_MODEL_ACTIVE if lote.cantidad > 0 else LoteInventario.STATUS_MODEL_INACTIVE
+            )
+            lote.updated_at = ahora
+        LoteInventario.objects.bulk_update(lotes_afectados.values(), ['cantidad', 'status_model', 'updated_at'])
+
+        for lote in lotes_destino_nuevos:
+            lote.status_model = (
+                LoteInventario.STATUS_MODEL_ACTIVE if lote.cantidad > 0 else LoteInventario.STATUS_MODEL_INACTIVE
+            )
+            lote.asignar_fecha_vencimiento()
+        LoteInventario.objects.bulk_create(lotes_destino_nuevos)
+        marcar_cambio_inventario(list(lotes_afectados.values()) + lotes_destino_nuevos)
+
+        for solicitud in solicitudes:
+            solicitud.estado = SolicitudTraspaso.APROBADO
+            solicitud.aprobado_el = ahora
+            solicitud.aprobado_por = usuario
+            solicitud.nota = _agregar_nota(solicitud.nota, 'APROBACIÓN', nota)
+            solicitud.movimiento = movimientos[solicitud.id]
+            solicitud.updated_by = usuario
+            solicitud.updated_at = ahora
+        SolicitudTraspaso.objects.bulk_update(
+            solicitudes,
+            ['estado', 'aprobado_el', 'aprobado_por', 'nota', 'movimiento', 'updated_by', 'updated_at']
+        )
+
+        # bulk_update no pasa por save(): el evento se envía una vez con todo el bloque
+        emitir(solicitud_traspaso_aprobada, SolicitudTraspaso, solicitudes)
+        return {'aprobadas': solicitudes, 'omitidas': omitidas}
+
+    @staticmethod
+    @transaction.atomic
+    def rechazar(solicitudes_ids, usuario, nota=''):
+        """
+        Rechaza un conjunto de solicitudes PENDIENTES con un solo UPDATE.
+        No genera movimientos de inventario.
+
+        Retorna {'rechazadas': [SolicitudTraspaso], 'omitidas': [{'id', 'estado'}]}.
+        """
+        solicitudes, omitidas = TraspasoSolicitudService._bloquear_pendientes(solicitudes_ids)
+        ids = [solicitud.id for solicitud in solicitudes]
+        if not ids:
+            return {'rechazadas': [], 'omitidas': omitidas}
+
+        campos = {
+            'estado': SolicitudTraspaso.RECHAZADO,
+            'rechazado_el': timezone.now(),
+            'rechazado_por': usuario,
+            'updated_by': usuario,
+            'updated_at': timezone.now(),
+        }
+        if nota:
+            campos['nota'] = Case(
+                When(Q(nota__isnull=True) | Q(nota=''), then=Value(f"[RECHAZO] {nota}")),
+                default=Concat(F('nota'), Value(f"\n\n[RECHAZO] {nota}"), output_field=TextField()),
+                output_field=TextField()
+            )
+        SolicitudTraspaso.objects.filter(id__in=ids).update(**campos)
+
+        rechazadas = list(
+            SolicitudTraspaso.objects.select_related(*RELACIONES_SOLICITUD).filter(id__in=ids).order_by('id')
+        )
+        emitir(solicitud_traspaso_rechazada, SolicitudTraspaso, rechazadas)
+        return {'rechazadas': rechazadas, 'omitidas': omitidas}
@@ -1,15 +1,26 @@
 from apps.inventario.models import EmbarqueReparto
 from apps.erp.models import CajaApertura, Caja
 from apps.usuarios.models import Usuario
+from apps.inventario.eventos import embarque_iniciado
 from django.db.models import Q
-from django.db.models.signals import post_save
 from django.dispatch import receiver
+import logging
 
 
-@receiver(post_save, sender=EmbarqueReparto)
-def iniciar_reparto(sender, instance, created, **kwargs):  
+logger = logging.getLogger(__name__)
+
+
+# Se queda en la petición (no en apps/base/tareas.py): el vendedor cobra con la apertura de
+# caja en cuanto inicia el reparto y sin caja asignada el inicio de reparto debe fallar.
+@receiver(embarque_iniciado)
+def iniciar_reparto(sender, instancias, **kwargs):
+    for instance in instancias:
+        abrir_caja_reparto(instance)
+
+
+def abrir_caja_reparto(instance):
     # Evitar bucle infinito: si ya tiene apertura_caja asignada, no hacer nada
-    if instance.fase == EmbarqueReparto.FASE_REPARTO and not instance.apertura_caja:
+    if instance.fase == EmbarqueReparto.FASE_REPARTO and not instance.apertura_caja_id:
         caja_model = Caja.objects.filter(ruta=instance.ruta, status_model=Caja.STATUS_MODEL_ACTIVE).first()
         
         # Verificar si ya tiene una apertura de caja abierta
@@ -22,13 +33,14 @@ def iniciar_reparto(sender, instance, created, **kwargs):
         if apertura_caja:
             # Usar update() para evitar disparar el signal nuevamente
             EmbarqueReparto.objects.filter(pk=instance.pk).update(apertura_caja=apertura_caja)
-            print(f"El embarque {instance.id} ya tiene una apertura de caja asignada: {apertura_caja}")
+            logger.info("Embarque %s usa la apertura de caja abierta %s", instance.id, apertura_caja.id,
+                        extra={'embarque_id': instance.id})
             return apertura_caja
         
         # Crear una nueva apertura de caja para el usuario y la ruta del embarque
-        print(f"Caja encontrada para la ruta {instance.ruta}: {caja_model}")
         if caja_model is None:
-            print("No existe una caja asignada a la ruta del embarque.")
+            logger.warning("Embarque %s: la ruta %s no tiene caja asignada", instance.id, instance.ruta_id,
+                           extra={'embarque_id': instance.id})
             raise Exception("No existe una caja asignada a la ruta del embarque.")
         
         nueva_apertura = CajaApertura.objects.create(
@@ -38,7 +50,8 @@ def iniciar_reparto(sender, instance, created, **kwargs):
             is_abierta=True,
             created_by=instance.created_by
         )
-        print(f"Nueva apertura de caja creada para el embarque {instance.id}: {nueva_apertura}")
+        logger.info("Nueva apertura de caja %s para el embarque %s", nueva_apertura.id, instance.id,
+                    extra={'embarque_id': instance.id})
         
         # Usar update() para evitar disparar el signal nuevamente
         EmbarqueReparto.objects.filter(pk=instance.pk).update(apertura_caja=nueva_apertura)
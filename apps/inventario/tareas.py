@@ -0,0 +1,107 @@
+"""
+============================================================================================
+                    TAREAS EN SEGUNDO PLANO DE INVENTARIO (apps/base/tareas.py)
+============================================================================================
+Efectos secundarios que antes se ejecutaban en los signals durante la petición.
+Reciben ids (no instancias) y deben poder repetirse si un intento falla.
+"""
+from apps.base.tareas import tarea
+from apps.erp.models import Almacen, Notificacion
+from apps.inventario.helpers.solicitudes import notificacion_solicitud, usuario_compras_id
+from apps.inventario.models import ProductosSolicitud, SolicitudTraspaso, SolicitudTraspasoDetalle
+from apps.inventario.services.alertasvencimiento import notificar_productos_por_vencer
+
+
+#=============================================
+#         SOLICITUDES DE PRODUCTOS
+#==============================================
+@tarea('inventario.notificar_productos_solicitud')
+def notificar_productos_solicitud(solicitudes_ids):
+    """
+    Notifica al usuario de compras las solicitudes de productos nuevas (una o un bloque)
+    """
+    solicitudes = ProductosSolicitud.objects.select_related('producto', 'almacen', 'created_by').filter(
+        id__in=solicitudes_ids
+    )
+    usuario_id = usuario_compras_id()
+    Notificacion.objects.bulk_create([notificacion_solicitud(solicitud, usuario_id) for solicitud in solicitudes])
+
+
+#=============================================
+#         SOLICITUDES DE TRASPASO
+#==============================================
+def _mensaje_traspaso(solicitud, texto):
+    return (
+        f"La solicitud de traspaso desde el almacén "
+        f"'{solicitud.almacen_surtidor.nombre}' al almacén '{solicitud.almacen_solicitante.nombre}' {texto}"
+    )
+
+
+def _solicitud_traspaso(solicitud_id):
+    return SolicitudTraspaso.objects.select_related(
+        'almacen_surtidor__encargado', 'almacen_solicitante__encargado', 'created_by'
+    ).get(pk=solicitud_id)
+
+
+@tarea('inventario.notificar_solicitud_traspaso_creada')
+def notificar_solicitud_traspaso_creada(solicitud_id):
+    solicitud = _solicitud_traspaso(solicitud_id)
+    encargado = solicitud.almacen_surtidor.encargado
+    Notificacion.objects.create(
+        tipo=Notificacion.TIPO_MENSAJE,
+        titulo="¡Nueva Solicitud de Traspaso!",
+        mensaje=(
+        f"Se ha creado una solicitud de traspaso desde el almacén "
+        f"'{solicitud.almacen_surtidor.nombre}' al almacén '{solicitud.almacen_solicitante.nombre}'.\n"
+        f"Por favor, revisa y gestiona la solicitud en el sistema."
+        ),
+        usuario_id=encargado.id if encargado else 1
+    )
+
+
+@tarea('inventario.notificar_solicitud_traspaso_aprobada')
+def notificar_solicitud_traspaso_aprobada(solicitud_id):
+    solicitud = _solicitud_traspaso(solicitud_id)
+    encargado_destino = solicitud.almacen_solicitante.encargado
+    Notificacion.objects.create(
+        tipo=Notificacion.TIPO_MENSAJE,
+        titulo="¡Solicitud de Traspaso Aprobada!",
+        mensaje=_mensaje_traspaso(
+            solicitud, "ha sido aprobada.\nPor favor, prepara la recepción de los productos en el sistema."
+        ),
+        usuario_id=encargado_destino.id if encargado_destino else 1
+    )
+
+
+@tarea('inventario.solicitud_traspaso_rechazada')
+def solicitud_traspaso_rechazada(solicitud_id):
+    """
+    Crea la misma solicitud al CEDIS y notifica al solicitante
+    """
+    solicitud = _solicitud_traspaso(solicitud_id)
+    cedis = Almacen.objects.filter(is_cedis=True).first()
+    model = SolicitudTraspaso.objects.create(
+        almacen_solicitante=solicitud.almacen_solicitante,
+        almacen_surtidor_id=cedis.id if cedis else 1,  # Asumiendo que el ID 1 es el de CEDIS
+        estado=SolicitudTraspaso.PENDIENTE,
+        created_by=solicitud.created_by
+    )
+    SolicitudTraspasoDetalle.objects.bulk_create([
+        SolicitudTraspasoDetalle(solicitud=model, producto_id=detalle.producto_id, cantidad=detalle.cantidad)
+        for detalle in solicitud.detalles.all()
+    ])
+    encargado_origen = solicitud.created_by
+    Notificacion.objects.create(
+        tipo=Notificacion.TIPO_MENSAJE,
+        titulo="¡Solicitud de Traspaso Rechazada!",
+        mensaje=_mensaje_traspaso(solicitud, "ha sido rechazada.\nPor favor, revisa los detalles en el sistema."),
+        usuario_id=encargado_origen.id if encargado_origen else 1
+    )
+
+
+#=============================================
+#         ALERTAS DE VENCIMIENTO
+#==============================================
+@tarea('inventario.notificar_productos_por_vencer')
+def alerta_productos_por_vencer(dias_alerta=3):
+    notificar_productos_por_vencer(dias_alerta)
@@ -1,3 +1,256 @@
+from datetime import timedelta
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+
+from apps.base import particiones
+from apps.erp.models import Almacen, Empresa, Producto
+from apps.inventario.helpers.historial import cerrar_meses, existencias_al
+from apps.inventario.helpers.transformacion.movimientos_transformacion import procesar_transformaciones
+from apps.inventario.models import (
+    CierreInventario, LoteInventario, MovimientoInventario, ProductosMovimiento, SaldoInventarioCierre,
+    SolicitudTraspaso, SolicitudTraspasoDetalle, Transformacion,
+)
+from apps.inventario.services.traspasos import TraspasoSolicitudService
+from apps.usuarios.models import Usuario
+
+
+class ExistenciasCierreTests(TestCase):
+    """
+    existencias_al da el mismo saldo antes y después del cierre mensual
+    """
+
+    def setUp(self):
+        # Almacen.empresa tiene default=1
+        Empresa.objects.create(id=1, nombre='EMPRESA', rfc='XAXX010101000')
+        self.almacen = Almacen.objects.create(nombre='A1')
+        self.producto = Producto.objects.create(nombre='P1', precio_base=10)
+        self.lote = LoteInventario.objects.create(producto=self.producto, almacen=self.almacen, cantidad=0)
+        self.clave = (self.almacen.id, self.producto.id)
+
+        self.ahora = timezone.now()
+        self.mes_pasado = particiones.mes_anterior(particiones.inicio_mes(self.ahora))
+        self.antepasado = particiones.mes_anterior(self.mes_pasado)
+        self._movimiento(MovimientoInventario.TIPO_ENTRADA, 10, self.antepasado + timedelta(days=1))
+        self._movimiento(MovimientoInventario.TIPO_SALIDA, 3, self.antepasado + timedelta(days=2))
+        self._movimiento(MovimientoInventario.TIPO_ENTRADA, 5, self.mes_pasado + timedelta(days=1))
+
+    def _movimiento(self, tipo, cantidad, fecha, lote=None, almacen=None, almacen_destino=None):
+        lote = lote or self.lote
+        movimiento = MovimientoInventario.objects.create(
+            almacen=almacen or self.almacen,
+            almacen_destino=almacen_destino,
+            tipo=tipo,
+            movimiento=MovimientoInventario.ENTRADA_ABASTECIMIENTO if tipo == MovimientoInventario.TIPO_ENTRADA
+            else MovimientoInventario.SALIDA_VENTA,
+            fase=MovimientoInventario.FASE_TERMINADA
+        )
+        # bulk_create: solo interesa el historial, no la existencia del lote
+        ProductosMovimiento.objects.bulk_create([
+            ProductosMovimiento(
+                movimiento=movimiento, producto=lote.producto, lote=lote,
+                cantidad=cantidad, costo_unitario=2, costo_total=cantidad * 2
+            )
+        ])
+        MovimientoInventario.objects.filter(pk=movimiento.pk).update(created_at=fecha)
+        ProductosMovimiento.objects.filter(movimiento=movimiento).update(created_at=fecha)
+
+    def _saldo(self, fecha):
+        return existencias_al(fecha).get(self.clave)
+
+    def test_existencias_al_cruzando_cierre(self):
+        fechas = [
+            self.antepasado + timedelta(days=1, hours=12),
+            self.mes_pasado + timedelta(days=2),
+            self.ahora,
+        ]
+        antes = [self._saldo(fecha) for fecha in fechas]
+        self.assertEqual(antes, [[10, 20], [12, 24], [12, 24]])
+
+        cerrados = cerrar_meses()
+        self.assertEqual([cierre.mes for cierre in cerrados], [self.antepasado.date(), self.mes_pasado.date()])
+        self.assertEqual(
+            SaldoInventarioCierre.objects.get(mes=self.antepasado.date()).cantidad, Decimal(7)
+        )
+        self.assertEqual([self._saldo(fecha) for fecha in fechas], antes)
+
+        # Lo posterior al último cierre se suma sobre su saldo
+        self._movimiento(MovimientoInventario.TIPO_ENTRADA, 1, self.ahora)
+        self.assertEqual(self._saldo(self.ahora + timedelta(seconds=1)), [13, 26])
+
+    def test_cerrar_meses_no_repite(self):
+        cerrar_meses()
+        self.assertEqual(cerrar_meses(), [])
+        self.assertEqual(CierreInventario.objects.count(), 2)
+
+    def test_lote_traspasado(self):
+        # El lote entra a A, se traspasa a B y después se vende una parte en B
+        destino = Almacen.objects.create(nombre='B1')
+        lote = LoteInventario.objects.create(producto=self.producto, almacen=self.almacen, cantidad=0)
+        self._movimiento(MovimientoInventario.TIPO_ENTRADA, 8, self.antepasado + timedelta(days=3), lote)
+        self._movimiento(
+            MovimientoInventario.TIPO_SALIDA, 8, self.mes_pasado + timedelta(days=3), lote, almacen_destino=destino
+        )
+        self._movimiento(
+            MovimientoInventario.TIPO_ENTRADA, 8, self.mes_pasado + timedelta(days=3), lote, destino, destino
+        )
+        self._movimiento(MovimientoInventario.TIPO_SALIDA, 2, self.ahora - timedelta(seconds=1), lote, destino)
+        LoteInventario.objects.filter(pk=lote.pk).update(almacen=destino, cantidad=6)
+
+        clave_destino = (destino.id, self.producto.id)
+        antes_traspaso = existencias_al(self.mes_pasado)
+        self.assertEqual(antes_traspaso[self.clave], [15, 30])
+        self.assertNotIn(clave_destino, antes_traspaso)
+
+        cerrar_meses()
+        saldos = existencias_al(self.ahora)
+        # A conserva solo el lote original; B tiene lo que hoy existe en el lote traspasado
+        self.assertEqual(saldos[self.clave], [12, 24])
+        self.assertEqual(saldos[clave_destino][0], LoteInventario.objects.get(pk=lote.pk).cantidad)
+        self.assertEqual(
+            SaldoInventarioCierre.objects.get(mes=self.antepasado.date(), almacen=self.almacen).cantidad, Decimal(15)
+        )
+        self.assertFalse(SaldoInventarioCierre.objects.filter(mes=self.antepasado.date(), almacen=destino).exists())
+        self.assertEqual(existencias_al(self.ahora, almacen_id=destino.id), {clave_destino: [6, 12]})
+
+
+class TraspasoSolicitudTests(TestCase):
+    """
+    Aprobación y rechazo en bloque de solicitudes de traspaso (TraspasoSolicitudService)
+    """
+
+    def setUp(self):
+        # Almacen.empresa tiene default=1
+        Empresa.objects.create(id=1, nombre='EMPRESA', rfc='XAXX010101000')
+        self.usuario = Usuario.objects.create(username='cedis', nombre='CEDIS')
+        self.surtidor = Almacen.objects.create(nombre='CEDIS')
+        self.solicitante = Almacen.objects.create(nombre='SUCURSAL')
+        self.producto = Producto.objects.create(nombre='P1', precio_base=10)
+        self.lotes = [
+            LoteInventario.objects.create(producto=self.producto, almacen=self.surtidor, cantidad=cantidad, costo_unitario=2)
+            for cantidad in (5, 5)
+        ]
+
+    def _solicitud(self, cantidad, nota=None):
+        solicitud = SolicitudTraspaso.objects.create(
+            almacen_solicitante=self.solicitante, almacen_surtidor=self.surtidor, nota=nota
+        )
+        SolicitudTraspasoDetalle.objects.create(solicitud=solicitud, producto=self.producto, cantidad=cantidad)
+        return solicitud
+
+    def _existencia(self, almacen):
+        return sum(lote.cantidad for lote in LoteInventario.objects.filter(almacen=almacen, producto=self.producto))
+
+    def test_aprobar_en_bloque(self):
+        solicitudes = [self._solicitud(4), self._solicitud(3)]
+        resultado = TraspasoSolicitudService.aprobar([s.id for s in solicitudes], self.usuario, nota='OK')
+
+        self.assertEqual(len(resultado['aprobadas']), 2)
+        # FIFO: la segunda solicitud termina el primer lote y toma 2 del segundo
+        self.assertEqual(
+            [lote.cantidad for lote in LoteInventario.objects.filter(pk__in=[l.pk for l in self.lotes]).order_by('id')],
+            [0, 3]
+        )
+        # Las dos solicitudes comparten el mismo lote destino
+        self.assertEqual(LoteInventario.objects.filter(almacen=self.solicitante).count(), 1)
+        self.assertEqual(self._existencia(self.solicitante), 7)
+        for solicitud in SolicitudTraspaso.objects.filter(pk__in=[s.pk for s in solicitudes]):
+            self.assertEqual(solicitud.estado, SolicitudTraspaso.APROBADO)
+            self.assertEqual(solicitud.nota, '[APROBACIÓN] OK')
+            self.assertEqual(
+                solicitud.movimiento.almacen_destino_id, self.solicitante.id
+            )
+
+        # Una solicitud ya aprobada se omite y no vuelve a mover inventario
+        repetida = TraspasoSolicitudService.aprobar([solicitudes[0].id], self.usuario)
+        self.assertEqual(repetida['omitidas'], [{'id': solicitudes[0].id, 'estado': SolicitudTraspaso.APROBADO}])
+        self.assertEqual(self._existencia(self.solicitante), 7)
+
+    def test_aprobar_sin_existencia_no_aprueba_ninguna(self):
+        solicitudes = [self._solicitud(4), self._solicitud(7)]
+        with self.assertRaises(ValueError):
+            TraspasoSolicitudService.aprobar([s.id for s in solicitudes], self.usuario)
+
+        self.assertEqual(self._existencia(self.surtidor), 10)
+        self.assertFalse(LoteInventario.objects.filter(almacen=self.solicitante).exists())
+        self.assertFalse(SolicitudTraspaso.objects.exclude(estado=SolicitudTraspaso.PENDIENTE).exists())
+
+    def test_rechazar_en_bloque(self):
+        aprobada = self._solicitud(1)
+        TraspasoSolicitudService.aprobar([aprobada.id], self.usuario)
+        solicitudes = [self._solicitud(2), self._solicitud(2, nota='URGENTE')]
+
+        resultado = TraspasoSolicitudService.rechazar(
+            [aprobada.id] + [s.id for s in solicitudes], self.usuario, nota='SIN UNIDAD'
+        )
+
+        self.assertEqual([s.id for s in resultado['rechazadas']], [s.id for s in solicitudes])
+        self.assertEqual(resultado['omitidas'], [{'id': aprobada.id, 'estado': SolicitudTraspaso.APROBADO}])
+        self.assertEqual(
+            [s.nota for s in resultado['rechazadas']],
+            ['[RECHAZO] SIN UNIDAD', 'URGENTE\n\n[RECHAZO] SIN UNIDAD']
+        )
+        self.assertTrue(all(s.estado == SolicitudTraspaso.RECHAZADO for s in resultado['rechazadas']))
+        self.assertEqual(self._existencia(self.surtidor), 9)
+
+
+class TransformacionTests(TestCase):
+    """
+    Transformaciones y mermas procesadas en bloque (procesar_transformaciones)
+    """
+
+    def setUp(self):
+        # Almacen.empresa tiene default=1
+        Empresa.objects.create(id=1, nombre='EMPRESA', rfc='XAXX010101000')
+        self.almacen = Almacen.objects.create(nombre='A1')
+        self.materia = Producto.objects.create(nombre='POLLO', precio_base=10)
+        self.resultado = Producto.objects.create(nombre='PECHUGA', precio_base=20)
+        self.lote = LoteInventario.objects.create(producto=self.materia, almacen=self.almacen, cantidad=10, costo_unitario=5)
+
+    def _transformacion(self, cantidad, cantidad_salida):
+        return {
+            'almacen': self.almacen,
+            'tipo': Transformacion.TIPO_TRANSFORMACION,
+            'nota': 'CORTE',
+            'productos_entrada': [{
+                'producto': self.materia, 'cantidad': cantidad,
+                'lotes': [{'lote': self.lote, 'cantidad': cantidad}],
+            }],
+            'productos_salida': [{'producto': self.resultado, 'cantidad': cantidad_salida}],
+        }
+
+    def _merma(self, cantidad):
+        return {
+            'almacen': self.almacen,
+            'tipo': Transformacion.TIPO_MERMA,
+            'nota': 'CADUCADO',
+            'productos_entrada': [{'producto': self.materia, 'cantidad': cantidad}],
+        }
+
+    def test_transformacion_y_merma_comparten_lote(self):
+        resultados = procesar_transformaciones([self._transformacion(6, 4), self._merma(3)])
+
+        self.lote.refresh_from_db()
+        self.assertEqual(self.lote.cantidad, 1)
+        self.assertEqual(resultados[0]['merma'], 2)
+        self.assertEqual(resultados[0]['rendimiento'], Decimal('66.67'))
+        self.assertEqual(resultados[1]['rendimiento'], 0)
+        self.assertIsNone(resultados[1]['transformacion'].movimiento_entrada)
+
+        nuevo = LoteInventario.objects.get(producto=self.resultado)
+        self.assertEqual((nuevo.almacen_id, nuevo.cantidad), (self.almacen.id, 4))
+        self.assertEqual(Transformacion.objects.count(), 2)
+        self.assertEqual(
+            MovimientoInventario.objects.filter(movimiento=MovimientoInventario.SALIDA_MERMA).get().cantidad, 3
+        )
+
+    def test_una_invalida_no_guarda_ninguna(self):
+        # La merma ya no encuentra existencia después de la transformación
+        with self.assertRaisesMessage(ValueError, 'Transformación 2:'):
+            procesar_transformaciones([self._transformacion(8, 6), self._merma(3)])
 
-# Create your tests here.
+        self.lote.refresh_from_db()
+        self.assertEqual(self.lote.cantidad, 10)
+        self.assertFalse(Transformacion.objects.exists())
+        self.assertFalse(LoteInventario.objects.filter(producto=self.resultado).exists())
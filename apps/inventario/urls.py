@@ -30,6 +30,10 @@ from apps.inventario.api.traspaso.solicitudTraspasoViews import SolicitudTraspas
 
 from apps.inventario.api.productos_solicitud_view import ProductosSolicitudViewSet
 
+#EXPORTACIONES
+from apps.inventario.api.exportaciones import ExportarMovimientosAPIView, ExportarInventarioAPIView
+from apps.inventario.api.historial import ExistenciasFechaAPIView
+
 #EMBARQUES
 from apps.inventario.api.embarque.embarqueRutaView import EmbarqueRutaViewSet
 
@@ -100,6 +104,17 @@ urlpatterns = [
     #path('inventario-almacen/<int:almacen_id>/', InventarioAlmacenView.as_view(), name='inventario-almacen-optimizado'),
     path('inventario-almacenes/', InventarioTodosAlmacenesView.as_view(), name='inventario-todos-almacenes'),
 
+    #=============================================
+    #   EXPORTACIONES (CSV / XLSX EN STREAMING)
+    #=============================================
+    path('movimientos/exportar/', ExportarMovimientosAPIView.as_view(), name='exportar-movimientos'),
+    path('inventario/exportar/', ExportarInventarioAPIView.as_view(), name='exportar-inventario'),
+
+    #=============================================
+    #   HISTORIAL (CIERRES MENSUALES)
+    #=============================================
+    path('inventario/existencias-fecha/', ExistenciasFechaAPIView.as_view(), name='existencias-fecha'),
+
     #=============================================
     #   ENTRADAS DE INVENTARIO
     #=============================================
@@ -1,6 +1,6 @@
 # apps/logging/admin.py
 from django.contrib import admin
-from .models import RequestLog
+from .models import RequestLog, RequestLogResumen
 
 from django.contrib import admin
 from .models import RequestLog
@@ -20,3 +20,14 @@ class RequestLogAdmin(admin.ModelAdmin):
 
     # 🔹 Evitar conteo total (para más velocidad)
     show_full_result_count = False
+
+
+@admin.register(RequestLogResumen)
+class RequestLogResumenAdmin(admin.ModelAdmin):
+    list_display = ("hora", "method", "path", "total", "errores_4xx", "errores_5xx", "p50_ms", "p95_ms", "p99_ms", "maximo_ms")
+    list_filter = ("method",)
+    search_fields = ("path",)
+    date_hierarchy = "hora"
+    readonly_fields = [f.name for f in RequestLogResumen._meta.fields]
+    list_per_page = 50
+    show_full_result_count = False
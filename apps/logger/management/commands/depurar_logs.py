@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.logger.retencion import RETENCION_DIAS, DIAS_ACTIVOS, LOTE, depurar
+
+
+class Command(BaseCommand):
+    help = (
+        "Retención de RequestLog: resume las horas pendientes, crea las particiones de los próximos "
+        "meses y elimina las vencidas (PostgreSQL) o archiva los logs antiguos (otras bases), y borra "
+        "por lotes lo que excede la retención. Programar en cron una vez al día."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=RETENCION_DIAS, help="Días de logs que se conservan")
+        parser.add_argument('--dias-activos', dest='dias_activos', type=int, default=DIAS_ACTIVOS,
+                            help="Días que se quedan en RequestLog antes de archivarse (sin particiones)")
+        parser.add_argument('--lote', type=int, default=LOTE, help="Renglones por transacción")
+        parser.add_argument('--meses', type=int, default=2, help="Meses de particiones creadas por adelantado")
+
+    def handle(self, *args, **options):
+        resultado = depurar(options['dias'], options['dias_activos'], options['lote'], options['meses'])
+        for nombre in resultado['particiones_creadas']:
+            self.stdout.write(f"  + {nombre}")
+        for nombre in resultado['particiones_eliminadas']:
+            self.stdout.write(f"  - {nombre}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✔ {resultado['horas_resumidas']} horas resumidas, {resultado['archivados']} logs archivados, "
+            f"{resultado['logs_eliminados'] + resultado['archivo_eliminados']} logs eliminados, "
+            f"{resultado['resumenes_eliminados']} resúmenes eliminados"
+        ))
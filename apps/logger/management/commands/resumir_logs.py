@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.logger.resumen import resumir_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Resume por hora, método y ruta los RequestLog de las horas cerradas pendientes "
+        "(conteo, errores, p50/p95/p99). Programar en cron cada hora."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help="Recalcular desde esta fecha (YYYY-MM-DD o 'YYYY-MM-DD HH:MM')")
+
+    def handle(self, *args, **options):
+        desde = None
+        if options['desde']:
+            try:
+                desde = timezone.make_aware(datetime.fromisoformat(options['desde']))
+            except ValueError:
+                raise CommandError(f"Fecha no válida: {options['desde']}")
+        horas, filas = resumir_pendientes(desde)
+        self.stdout.write(self.style.SUCCESS(f"✔ {horas} horas resumidas ({filas} rutas)"))
@@ -0,0 +1,125 @@
+# Generated by Django 5.2.9 on 2026-10-19 00:14
+
+from datetime import datetime, timezone as dt_timezone
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# SQL congelado: la migración no depende de apps/base/particiones.py ni de apps/logger/particiones.py
+TABLA = 'logger_requestlog'
+HISTORICO = f'{TABLA}_historico'
+SECUENCIA = f'{TABLA}_particion_id_seq'
+INDICE_TIMESTAMP = 'logger_requ_timesta_f551fb_idx'
+MESES_ADELANTADOS = 2
+
+
+def _mes_siguiente(mes):
+    return datetime(mes.year + mes.month // 12, mes.month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def sql_convertir(tabla_usuarios, hoy):
+    """
+    Convierte la tabla existente en particionada sin copiar renglones: la tabla actual se
+    renombra y se adjunta como partición histórica de todo lo previo al mes siguiente.
+    """
+    hoy = hoy.astimezone(dt_timezone.utc)
+    primer_mes = _mes_siguiente(datetime(hoy.year, hoy.month, 1, tzinfo=dt_timezone.utc))
+    sentencias = [
+        f"ALTER TABLE {TABLA} RENAME TO {HISTORICO}",
+        # La llave primaria de una partición debe coincidir con la del padre (id, timestamp);
+        # se crea aquí para que ATTACH PARTITION la adopte en lugar de construir otra
+        f"ALTER TABLE {HISTORICO} DROP CONSTRAINT {TABLA}_pkey",
+        f"ALTER TABLE {HISTORICO} ADD CONSTRAINT {HISTORICO}_pkey PRIMARY KEY (id, \"timestamp\")",
+        f"ALTER INDEX {INDICE_TIMESTAMP} RENAME TO {HISTORICO}_timestamp_id",
+        # Los ids los asigna la tabla padre; la partición no puede tener su propia identidad
+        f"ALTER TABLE {HISTORICO} ALTER COLUMN id DROP IDENTITY IF EXISTS",
+        f"CREATE SEQUENCE {SECUENCIA}",
+        f"SELECT setval('{SECUENCIA}', COALESCE((SELECT MAX(id) FROM {HISTORICO}), 0) + 1, false)",
+        f"CREATE TABLE {TABLA} (LIKE {HISTORICO} INCLUDING DEFAULTS INCLUDING STORAGE) PARTITION BY RANGE (\"timestamp\")",
+        f"ALTER TABLE {TABLA} ALTER COLUMN id SET DEFAULT nextval('{SECUENCIA}')",
+        f"ALTER SEQUENCE {SECUENCIA} OWNED BY {TABLA}.id",
+        f"ALTER TABLE {TABLA} ADD PRIMARY KEY (id, \"timestamp\")",
+        f"ALTER TABLE {TABLA} ADD CONSTRAINT {TABLA}_user_id_fk FOREIGN KEY (user_id) "
+        f"REFERENCES {tabla_usuarios} (id) DEFERRABLE INITIALLY DEFERRED",
+        f"CREATE INDEX {INDICE_TIMESTAMP} ON {TABLA} (\"timestamp\", id)",
+        f"CREATE INDEX {TABLA}_user_id_part ON {TABLA} (user_id)",
+        # Valida que todo lo existente quede antes del primer mes particionado (un recorrido)
+        f"ALTER TABLE {TABLA} ATTACH PARTITION {HISTORICO} "
+        f"FOR VALUES FROM (MINVALUE) TO ('{primer_mes.isoformat()}')",
+        f"CREATE TABLE {TABLA}_pdefault PARTITION OF {TABLA} DEFAULT",
+    ]
+    mes = primer_mes
+    for _ in range(MESES_ADELANTADOS + 1):
+        sentencias.append(
+            f"CREATE TABLE IF NOT EXISTS {TABLA}_p{mes:%Y%m} PARTITION OF {TABLA} "
+            f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{_mes_siguiente(mes).isoformat()}')"
+        )
+        mes = _mes_siguiente(mes)
+    return sentencias
+
+
+def particionar_logs(apps, schema_editor):
+    # Solo PostgreSQL; en otras bases se usa RequestLogArchivo (apps/logger/retencion.py)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    tabla_usuarios = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    for sql in sql_convertir(tabla_usuarios, timezone.now()):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('logger', '0002_requestlog_logger_requ_timesta_f551fb_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestLogArchivo',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('timestamp', models.DateTimeField(db_index=True)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.TextField()),
+                ('query_string', models.TextField(blank=True, null=True)),
+                ('remote_addr', models.CharField(blank=True, max_length=100, null=True)),
+                ('headers', models.JSONField(blank=True, null=True)),
+                ('body', models.TextField(blank=True, null=True)),
+                ('content_type', models.CharField(blank=True, max_length=200, null=True)),
+                ('status_code', models.PositiveIntegerField(blank=True, null=True)),
+                ('response_time_ms', models.IntegerField(blank=True, null=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RequestLogResumen',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hora', models.DateTimeField()),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=255)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('errores_4xx', models.PositiveIntegerField(default=0)),
+                ('errores_5xx', models.PositiveIntegerField(default=0)),
+                ('promedio_ms', models.FloatField(blank=True, null=True)),
+                ('p50_ms', models.IntegerField(blank=True, null=True)),
+                ('p95_ms', models.IntegerField(blank=True, null=True)),
+                ('p99_ms', models.IntegerField(blank=True, null=True)),
+                ('maximo_ms', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-hora', 'path'],
+                'indexes': [models.Index(fields=['path', 'hora'], name='logger_requ_path_7ecaf9_idx')],
+                'constraints': [models.UniqueConstraint(fields=('hora', 'method', 'path'), name='logger_resumen_hora_ruta_unico')],
+            },
+        ),
+        # La tabla particionada funciona igual con el modelo: al revertir se deja como está
+        migrations.RunPython(particionar_logs, migrations.RunPython.noop),
+    ]
@@ -25,6 +25,70 @@ class RequestLog(models.Model):
 
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=['timestamp', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.timestamp} {self.method} {self.path}"
+
+
+class RequestLogArchivo(models.Model):
+    """
+    Logs antiguos movidos fuera de RequestLog en bases sin particiones (ver apps/logger/retencion.py).
+    Conserva el id original; timestamp sin auto_now_add para no perder la fecha al archivar.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    timestamp = models.DateTimeField(db_index=True)
+    method = models.CharField(max_length=10)
+    path = models.TextField()
+    query_string = models.TextField(blank=True, null=True)
+    remote_addr = models.CharField(max_length=100, blank=True, null=True)
+    headers = JSONField(blank=True, null=True)
+    body = models.TextField(blank=True, null=True)
+    content_type = models.CharField(max_length=200, blank=True, null=True)
+    status_code = models.PositiveIntegerField(blank=True, null=True)
+    response_time_ms = models.IntegerField(blank=True, null=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+
+    class Meta:
+        ordering = ["-timestamp"]
+
+    def __str__(self):
+        return f"{self.timestamp} {self.method} {self.path}"
+
+
+class RequestLogResumen(models.Model):
+    """
+    Resumen por hora, método y ruta (ids reemplazados por {id}) de RequestLog:
+    las consultas operativas (volumen, latencia, errores) se hacen aquí y no sobre los logs.
+    """
+    hora = models.DateTimeField()
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    total = models.PositiveIntegerField(default=0)
+    errores_4xx = models.PositiveIntegerField(default=0)
+    errores_5xx = models.PositiveIntegerField(default=0)
+    promedio_ms = models.FloatField(null=True, blank=True)
+    p50_ms = models.IntegerField(null=True, blank=True)
+    p95_ms = models.IntegerField(null=True, blank=True)
+    p99_ms = models.IntegerField(null=True, blank=True)
+    maximo_ms = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-hora", "path"]
+        constraints = [
+            models.UniqueConstraint(fields=['hora', 'method', 'path'], name='logger_resumen_hora_ruta_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['path', 'hora']),
+        ]
+
+    @property
+    def tasa_error(self):
+        return self.errores_5xx / self.total if self.total else 0
+
+    def __str__(self):
+        return f"{self.hora} {self.method} {self.path} ({self.total})"
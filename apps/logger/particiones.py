@@ -0,0 +1,34 @@
+"""
+============================================================================================
+                    PARTICIONES MENSUALES DE RequestLog (SOLO POSTGRESQL)
+============================================================================================
+logger_requestlog se convierte (migración 0003) en una tabla particionada por rango de
+timestamp (utilidades en apps/base/particiones.py):
+- logger_requestlog_historico: la tabla anterior, adjuntada como partición de todo lo previo
+  al mes siguiente de la migración. Se vacía por lotes con la retención.
+- logger_requestlog_pAAAAMM: una partición por mes, creadas por adelantado
+  (python manage.py depurar_logs).
+- logger_requestlog_pdefault: recibe lo que no tenga partición para no perder logs; al
+  crear la partición de su mes esos logs se mueven a ella.
+En otras bases de datos la tabla se queda igual y se usa RequestLogArchivo (retencion.py).
+"""
+from apps.base import particiones
+
+
+TABLA = 'logger_requestlog'
+HISTORICO = f'{TABLA}_historico'
+
+
+def es_particionada():
+    return particiones.es_particionada(TABLA)
+
+
+def asegurar_particiones(hoy, meses=2):
+    """
+    Crea las particiones del mes actual y de los siguientes `meses` que no cubre la histórica
+    """
+    return particiones.asegurar_particiones(TABLA, hoy, meses, limite=particiones.limite_particion(HISTORICO))
+
+
+def eliminar_particiones(corte):
+    return particiones.eliminar_particiones(TABLA, corte)
@@ -0,0 +1,117 @@
+"""
+============================================================================================
+                    RESUMEN POR HORA DE RequestLog
+============================================================================================
+Cada hora cerrada se resume en RequestLogResumen por método y ruta (los ids de la ruta se
+reemplazan por {id} para agrupar /api/ventas/15/ y /api/ventas/16/): total, errores 4xx / 5xx,
+promedio, p50 / p95 / p99 y máximo de response_time_ms.
+Los logs de la hora se leen por bloques con iterator(); un resumen se puede recalcular
+(borra y vuelve a crear las filas de la hora). Programar cada hora:
+    python manage.py resumir_logs
+"""
+import math
+import re
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from apps.logger.models import RequestLog, RequestLogResumen
+
+
+LOTE = getattr(settings, 'REQUEST_LOG_LOTE', 2000)
+# Los logs se guardan en un hilo al terminar la petición: la hora se cierra unos minutos después
+MARGEN = timedelta(minutes=5)
+HORA = timedelta(hours=1)
+SEGMENTO_ID = re.compile(r'/(\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})(?=/|$)', re.IGNORECASE)
+
+
+def normalizar_ruta(path):
+    return SEGMENTO_ID.sub('/{id}', path or '')[:255]
+
+
+def inicio_hora(fecha):
+    return fecha.replace(minute=0, second=0, microsecond=0)
+
+
+def percentil(ordenados, porcentaje):
+    # Rango más cercano: el valor bajo el que queda el porcentaje de las peticiones
+    if not ordenados:
+        return None
+    return ordenados[max(math.ceil(porcentaje / 100 * len(ordenados)) - 1, 0)]
+
+
+def resumir_hora(hora):
+    """
+    (Re)calcula el resumen de la hora que inicia en `hora`. Retorna las filas creadas.
+    """
+    grupos = defaultdict(lambda: {'tiempos': [], 'total': 0, 'errores_4xx': 0, 'errores_5xx': 0})
+    logs = RequestLog.objects.filter(
+        timestamp__gte=hora, timestamp__lt=hora + HORA
+    ).order_by().values_list('method', 'path', 'status_code', 'response_time_ms')
+
+    for method, path, status_code, response_time_ms in logs.iterator(chunk_size=LOTE):
+        grupo = grupos[(method, normalizar_ruta(path))]
+        grupo['total'] += 1
+        if status_code and 400 <= status_code < 500:
+            grupo['errores_4xx'] += 1
+        elif status_code and status_code >= 500:
+            grupo['errores_5xx'] += 1
+        if response_time_ms is not None:
+            grupo['tiempos'].append(response_time_ms)
+
+    resumenes = []
+    for (method, path), grupo in grupos.items():
+        tiempos = sorted(grupo.pop('tiempos'))
+        resumenes.append(RequestLogResumen(
+            hora=hora,
+            method=method,
+            path=path,
+            promedio_ms=sum(tiempos) / len(tiempos) if tiempos else None,
+            p50_ms=percentil(tiempos, 50),
+            p95_ms=percentil(tiempos, 95),
+            p99_ms=percentil(tiempos, 99),
+            maximo_ms=tiempos[-1] if tiempos else None,
+            **grupo
+        ))
+
+    with transaction.atomic():
+        RequestLogResumen.objects.filter(hora=hora).delete()
+        RequestLogResumen.objects.bulk_create(resumenes)
+    return len(resumenes)
+
+
+def horas_pendientes(desde=None, hasta=None):
+    """
+    Horas cerradas sin resumen: desde la última resumida (o el primer log) hasta ahora - MARGEN.
+    Las horas sin tráfico no generan filas ni consultas.
+    """
+    hasta = inicio_hora(hasta or timezone.now() - MARGEN)
+    if desde is None:
+        ultima = RequestLogResumen.objects.aggregate(ultima=Max('hora'))['ultima']
+        desde = ultima + HORA if ultima else RequestLog.objects.aggregate(primero=Min('timestamp'))['primero']
+    if desde is None:
+        return []
+
+    horas = []
+    hora = inicio_hora(desde)
+    while hora < hasta:
+        siguiente = RequestLog.objects.filter(timestamp__gte=hora, timestamp__lt=hasta).order_by('timestamp').values_list('timestamp', flat=True).first()
+        if siguiente is None:
+            break
+        hora = inicio_hora(siguiente)
+        horas.append(hora)
+        hora += HORA
+    return horas
+
+
+def resumir_pendientes(desde=None, hasta=None):
+    """
+    Resume las horas pendientes. Retorna (horas resumidas, filas creadas).
+    """
+    horas = horas_pendientes(desde, hasta)
+    filas = sum(resumir_hora(hora) for hora in horas)
+    return len(horas), filas
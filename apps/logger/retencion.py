@@ -0,0 +1,92 @@
+"""
+============================================================================================
+                    RETENCIÓN DE RequestLog
+============================================================================================
+- PostgreSQL (tabla particionada, ver particiones.py): los meses completos fuera de la
+  retención se eliminan con DETACH + DROP; lo que quede antes del corte en particiones que
+  lo cruzan (p. ej. la histórica) se borra por lotes.
+- Otras bases: los logs con más de REQUEST_LOG_DIAS_ACTIVOS días se mueven por lotes a
+  RequestLogArchivo (la tabla de logs se queda chica) y el archivo se depura con la retención.
+Antes de borrar se resumen las horas pendientes (resumen.py) para no perder estadísticas.
+Todos los borrados son por lotes de REQUEST_LOG_LOTE renglones, cada uno en su transacción.
+    python manage.py depurar_logs
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.logger import particiones
+from apps.logger.models import RequestLog, RequestLogArchivo, RequestLogResumen
+from apps.logger.resumen import resumir_pendientes
+
+
+RETENCION_DIAS = getattr(settings, 'REQUEST_LOG_RETENCION_DIAS', 90)
+DIAS_ACTIVOS = getattr(settings, 'REQUEST_LOG_DIAS_ACTIVOS', 30)
+RESUMEN_DIAS = getattr(settings, 'REQUEST_LOG_RESUMEN_DIAS', 730)
+LOTE = getattr(settings, 'REQUEST_LOG_LOTE', 2000)
+
+CAMPOS = [
+    'id', 'timestamp', 'method', 'path', 'query_string', 'remote_addr', 'headers', 'body',
+    'content_type', 'status_code', 'response_time_ms', 'user_id',
+]
+
+
+def borrar_por_lotes(queryset, lote=LOTE):
+    """
+    Borra los renglones del queryset en bloques por llave primaria. Retorna cuántos se borraron.
+    """
+    modelo = queryset.model
+    total = 0
+    while True:
+        ids = list(queryset.order_by().values_list('pk', flat=True)[:lote])
+        if not ids:
+            return total
+        with transaction.atomic():
+            borrados, _ = modelo.objects.filter(pk__in=ids).delete()
+        total += borrados
+
+
+def archivar(dias=DIAS_ACTIVOS, lote=LOTE):
+    """
+    Mueve a RequestLogArchivo los logs con más de `dias` días. Retorna cuántos se movieron.
+    """
+    corte = timezone.now() - timedelta(days=dias)
+    total = 0
+    while True:
+        with transaction.atomic():
+            filas = list(
+                RequestLog.objects.filter(timestamp__lt=corte).order_by('timestamp', 'id').values(*CAMPOS)[:lote]
+            )
+            if not filas:
+                return total
+            RequestLogArchivo.objects.bulk_create([RequestLogArchivo(**fila) for fila in filas], ignore_conflicts=True)
+            RequestLog.objects.filter(pk__in=[fila['id'] for fila in filas]).delete()
+        total += len(filas)
+
+
+def depurar(dias=RETENCION_DIAS, dias_activos=DIAS_ACTIVOS, lote=LOTE, meses=2):
+    """
+    Aplica la retención. Retorna un dict con lo realizado en cada paso.
+    """
+    ahora = timezone.now()
+    corte = ahora - timedelta(days=dias)
+    resultado = {'particiones_creadas': [], 'particiones_eliminadas': [], 'archivados': 0}
+
+    resultado['horas_resumidas'], _ = resumir_pendientes()
+
+    particionada = particiones.es_particionada()
+    if particionada:
+        resultado['particiones_creadas'] = particiones.asegurar_particiones(ahora, meses)
+        resultado['particiones_eliminadas'] = particiones.eliminar_particiones(corte)
+
+    # Primero lo que sale de la retención, para no archivar renglones que se van a borrar
+    resultado['logs_eliminados'] = borrar_por_lotes(RequestLog.objects.filter(timestamp__lt=corte), lote)
+    if not particionada:
+        resultado['archivados'] = archivar(dias_activos, lote)
+    resultado['archivo_eliminados'] = borrar_por_lotes(RequestLogArchivo.objects.filter(timestamp__lt=corte), lote)
+    resultado['resumenes_eliminados'] = borrar_por_lotes(
+        RequestLogResumen.objects.filter(hora__lt=ahora - timedelta(days=RESUMEN_DIAS)), lote
+    )
+    return resultado
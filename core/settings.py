@@ -28,6 +28,12 @@ ALLOWED_HOSTS = ['*', 'localhost', '127.0.0.1']
 CORS_ALLOW_HEADERS = list(default_headers) + [
     'authorization',
 ]
+CORS_ALLOW_HEADERS += ['if-none-match', 'if-modified-since']  # GET condicional (RespuestaCondicionalMixin)
+CORS_EXPOSE_HEADERS = ['etag', 'last-modified']
+CORS_ALLOW_HEADERS += ['idempotency-key']  # Reintentos seguros de pagos y movimientos (apps/base/idempotencia.py)
+CORS_EXPOSE_HEADERS += ['idempotent-replayed']
+CORS_ALLOW_HEADERS += ['x-request-id']  # Id de correlación de los logs (apps/base/registro.py)
+CORS_EXPOSE_HEADERS += ['x-request-id']
 
 # Application definition
 
@@ -40,6 +46,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',  # Búsqueda trigram / texto completo (apps/base/busqueda.py)
     'rest_framework',
     'rest_framework_simplejwt',
     'drf_yasg',
@@ -62,8 +69,10 @@ INSTALLED_APPS += MY_APPS
 AUTH_USER_MODEL = 'usuarios.Usuario'
 
 MIDDLEWARE = [
+    'apps.base.registro.CorrelacionMiddleware',  # X-Request-ID en los logs (apps/base/registro.py)
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'apps.base.middleware.CompresionMiddleware',  # gzip / brotli (respuestas grandes)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -93,12 +102,114 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+# python manage.py test apps.base.tests apps.erp.tests apps.inventario.tests
+TEST_RUNNER = 'apps.base.pruebas.EjecutorPruebas'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
 DATABASES = {'default':  dj_database_url.config(default=os.getenv('DATABASE_URL'))}
 
+# Caché compartida entre workers (permisos, versiones de recursos, tokens revocados).
+# Con REDIS_URL se usa Redis (requiere el paquete redis, recomendado en producción);
+# sin ella se usa una tabla de la BD (base_cache, migración base 0003), que también
+# comparten todos los procesos. Una caché en memoria por proceso no invalidaría entre workers.
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'base_cache',
+            # Al rebasar el límite se borra un tercio de las llaves, incluidas las versiones
+            'OPTIONS': {'MAX_ENTRIES': int(os.environ.get("CACHE_MAX_ENTRIES", 20000))},
+        }
+    }
+
+# Segundos que se conservan en caché los permisos efectivos de cada usuario
+PERMISOS_CACHE_TIMEOUT = int(os.environ.get("PERMISOS_CACHE_TIMEOUT", 60 * 60))
+
+# Tamaño mínimo (bytes) de una respuesta para comprimirla con gzip / brotli
+COMPRESION_MIN_BYTES = int(os.environ.get("COMPRESION_MIN_BYTES", 1024))
+
+# Segundos que se reutiliza el resultado de una búsqueda global (mismo texto, tipos y almacén)
+BUSQUEDA_GLOBAL_CACHE_SEGUNDOS = int(os.environ.get("BUSQUEDA_GLOBAL_CACHE_SEGUNDOS", 15))
+
+# Segundos que el token de sincronización de rutas no avanza sobre cambios recientes
+# (transacciones que confirman tarde); esos cambios se reenvían en la siguiente sincronización
+SYNC_MARGEN_SEGUNDOS = int(os.environ.get("SYNC_MARGEN_SEGUNDOS", 60))
+
+# Idempotency-Key (apps/base/idempotencia.py): horas que se conserva la respuesta, segundos que un
+# duplicado espera a la petición original y segundos tras los que una petición sin terminar se da por abandonada
+IDEMPOTENCIA_HORAS = int(os.environ.get("IDEMPOTENCIA_HORAS", 24))
+IDEMPOTENCIA_ESPERA_SEGUNDOS = int(os.environ.get("IDEMPOTENCIA_ESPERA_SEGUNDOS", 10))
+IDEMPOTENCIA_BLOQUEO_SEGUNDOS = int(os.environ.get("IDEMPOTENCIA_BLOQUEO_SEGUNDOS", 300))
+
+# Renglones que se leen de la BD por bloque en las exportaciones CSV / XLSX (cursor del lado del servidor)
+EXPORTACION_CHUNK_SIZE = int(os.environ.get("EXPORTACION_CHUNK_SIZE", 2000))
+
+# Retención de RequestLog (apps/logger/retencion.py): días de logs, días en la tabla activa antes de
+# archivarse (bases sin particiones), días de resúmenes por hora y renglones por lote al borrar/archivar
+REQUEST_LOG_RETENCION_DIAS = int(os.environ.get("REQUEST_LOG_RETENCION_DIAS", 90))
+REQUEST_LOG_DIAS_ACTIVOS = int(os.environ.get("REQUEST_LOG_DIAS_ACTIVOS", 30))
+REQUEST_LOG_RESUMEN_DIAS = int(os.environ.get("REQUEST_LOG_RESUMEN_DIAS", 730))
+REQUEST_LOG_LOTE = int(os.environ.get("REQUEST_LOG_LOTE", 2000))
+
+# Historial de inventario (apps/inventario/helpers/historial.py): meses cerrados que se quedan en la
+# tabla activa antes de archivarse y movimientos por transacción al archivar
+INVENTARIO_MESES_ACTIVOS = int(os.environ.get("INVENTARIO_MESES_ACTIVOS", 6))
+INVENTARIO_ARCHIVO_LOTE = int(os.environ.get("INVENTARIO_ARCHIVO_LOTE", 500))
+
+# Cola de tareas en segundo plano (apps/base/tareas.py, python manage.py procesar_tareas).
+# TAREAS_EN_LINEA=1 las ejecuta en el mismo proceso al confirmar la transacción (desarrollo sin worker)
+# Las tareas terminadas o fallidas (y sus claves) se borran a los TAREAS_RETENCION_DIAS
+TAREAS_EN_LINEA = os.environ.get("TAREAS_EN_LINEA", "0") == "1"
+TAREAS_LOTE = int(os.environ.get("TAREAS_LOTE", 20))
+TAREAS_MAX_INTENTOS = int(os.environ.get("TAREAS_MAX_INTENTOS", 5))
+TAREAS_ESPERA_BASE = int(os.environ.get("TAREAS_ESPERA_BASE", 10))
+TAREAS_ESPERA_MAXIMA = int(os.environ.get("TAREAS_ESPERA_MAXIMA", 3600))
+TAREAS_BLOQUEO_SEGUNDOS = int(os.environ.get("TAREAS_BLOQUEO_SEGUNDOS", 600))
+TAREAS_RETENCION_DIAS = int(os.environ.get("TAREAS_RETENCION_DIAS", 7))
+
+# Logging estructurado (apps/base/registro.py): nivel de los loggers de apps.*, formato json / texto y
+# porcentaje de peticiones que conservan sus registros DEBUG
+REGISTRO_NIVEL = os.environ.get("REGISTRO_NIVEL", "INFO").upper()
+REGISTRO_FORMATO = os.environ.get("REGISTRO_FORMATO", "json")
+REGISTRO_MUESTREO_DEBUG = int(os.environ.get("REGISTRO_MUESTREO_DEBUG", 100))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'correlacion': {'()': 'apps.base.registro.CorrelacionFilter'},
+        'muestreo_debug': {'()': 'apps.base.registro.MuestreoDebug'},
+    },
+    'formatters': {
+        'json': {'()': 'apps.base.registro.FormatoJSON'},
+        'texto': {'format': '%(asctime)s %(levelname)s [%(correlacion_id)s] %(name)s: %(message)s'},
+    },
+    'handlers': {
+        'consola': {
+            'class': 'logging.StreamHandler',
+            'stream': 'ext://sys.stdout',
+            'filters': ['correlacion', 'muestreo_debug'],
+            'formatter': 'texto' if REGISTRO_FORMATO == 'texto' else 'json',
+        },
+    },
+    'root': {'handlers': ['consola'], 'level': 'WARNING'},
+    'loggers': {
+        'apps': {'handlers': ['consola'], 'level': REGISTRO_NIVEL, 'propagate': False},
+        'django': {'handlers': ['consola'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 
 
 # Password validation
@@ -151,7 +262,8 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
          'rest_framework.authentication.SessionAuthentication',  # Para interfaz web
             #'rest_framework_simplejwt.authentication.JWTTokenUserAuthentication',
-            'rest_framework_simplejwt.authentication.JWTAuthentication', 
+            #'rest_framework_simplejwt.authentication.JWTAuthentication',
+            'apps.base.auth.jwtAuth.JWTAuthenticationLigera',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -163,10 +275,25 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 5,
 }
 
+# JSON con orjson (apps/base/renderers.py). Sin el paquete orjson se usa el de DRF; JSON_ORJSON=0 lo desactiva.
+if os.environ.get("JSON_ORJSON", "1") == "1":
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = (
+        'apps.base.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    )
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = (
+        'apps.base.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    )
+
 SIMPLE_JWT = {
-    "ACCESS_TOKEN_LIFETIME": timedelta(days=30),
-    "REFRESH_TOKEN_LIFETIME": timedelta(days=20),
+    # Access corto: la revocación y los cambios de usuario se reflejan pronto aunque el cliente no refresque
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=int(os.environ.get("JWT_ACCESS_MINUTES", 15))),
+    "REFRESH_TOKEN_LIFETIME": timedelta(days=int(os.environ.get("JWT_REFRESH_DAYS", 7))),
+    "ROTATE_REFRESH_TOKENS": True,
     "TOKEN_OBTAIN_SERIALIZER": "apps.base.token_jwt.MyTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "apps.base.token_jwt.MyTokenRefreshSerializer",
 }
 
 SPECTACULAR_SETTINGS = {
@@ -13,6 +13,7 @@ from rest_framework import permissions
 #from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
+from apps.base.token_jwt import RevocarTokenView
 
 #schema_view = get_schema_view(
 #    openapi.Info(
@@ -35,6 +36,7 @@ urlpatterns = [
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),  # Obtener token de acceso
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),  # Refrescar token de acceso
     path('api/token/verify/', TokenVerifyView.as_view(), name='token_verify'),  # Verificar token de acceso
+    path('api/token/revoke/', RevocarTokenView.as_view(), name='token_revoke'),  # Cerrar sesión (revocar tokens)
    
        # ===============================
     # 📘 DOCUMENTACIÓN API (AQUÍ)